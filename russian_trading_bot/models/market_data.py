@@ -7,6 +7,7 @@ from datetime import datetime, time, timedelta
 from typing import Optional, Dict, Any, List, Tuple
 from decimal import Decimal
 import re
+import numpy as np
 import pytz
 
 
@@ -74,9 +75,15 @@ class RussianStock:
         self.sector = self.sector.upper()
 
 
-@dataclass
+@dataclass(slots=True)
 class MarketData:
-    """Market data for Russian stocks with enhanced validation"""
+    """
+    Market data for Russian stocks with enhanced validation
+    
+    Slotted to keep per-bar memory low in large backtests. Data that was
+    already validated (internal stores, bulk-validated arrays) can skip
+    __post_init__ via MarketData.trusted().
+    """
     symbol: str
     timestamp: datetime
     price: Decimal
@@ -118,6 +125,88 @@ class MarketData:
                 
         # Normalize symbol
         self.symbol = self.symbol.upper()
+    
+    @classmethod
+    def trusted(cls, symbol: str, timestamp: datetime, price: Decimal, volume: int,
+                bid: Optional[Decimal] = None, ask: Optional[Decimal] = None,
+                currency: str = "RUB", open_price: Optional[Decimal] = None,
+                high_price: Optional[Decimal] = None, low_price: Optional[Decimal] = None,
+                previous_close: Optional[Decimal] = None, change: Optional[Decimal] = None,
+                change_percent: Optional[Decimal] = None) -> 'MarketData':
+        """
+        Create market data without validation
+        
+        Only for already validated data: the symbol must be upper case and
+        the values must satisfy the checks in __post_init__ (see
+        validate_market_data_arrays for checking whole arrays at once).
+        """
+        data = object.__new__(cls)
+        data.symbol = symbol
+        data.timestamp = timestamp
+        data.price = price
+        data.volume = volume
+        data.bid = bid
+        data.ask = ask
+        data.currency = currency
+        data.open_price = open_price
+        data.high_price = high_price
+        data.low_price = low_price
+        data.previous_close = previous_close
+        data.change = change
+        data.change_percent = change_percent
+        return data
+
+
+def validate_market_data_arrays(symbols, prices, volumes, bids=None, asks=None,
+                                opens=None, highs=None, lows=None) -> np.ndarray:
+    """
+    Vectorized MarketData validation for whole arrays
+    
+    Applies the same rules as MarketData.__post_init__ to every row in one
+    pass. Missing optional values are NaN or 0 (like None in MarketData).
+    Each distinct ticker is checked against the MOEX pattern only once.
+    
+    Args:
+        symbols: Tickers (one per row, or a single ticker for all rows)
+        prices: Current prices
+        volumes: Volumes
+        bids, asks: Optional bid/ask prices
+        opens, highs, lows: Optional OHLC prices
+        
+    Returns:
+        Boolean mask, True for rows that would pass MarketData validation
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    volumes = np.asarray(volumes, dtype=np.float64)
+    
+    symbols = np.asarray(symbols, dtype=object)
+    if symbols.ndim == 0:
+        symbols = np.full(len(prices), symbols.item(), dtype=object)
+    unique, inverse = np.unique(symbols.astype(str), return_inverse=True)
+    ticker_ok = np.array([validate_moex_ticker(symbol) for symbol in unique], dtype=bool)
+    
+    valid = ticker_ok[inverse].reshape(len(prices)) & (prices > 0) & (volumes >= 0)
+    
+    def present(values):
+        if values is None:
+            return None, np.zeros(len(prices), dtype=bool)
+        values = np.asarray(values, dtype=np.float64)
+        return values, ~np.isnan(values) & (values != 0)
+    
+    bids, has_bid = present(bids)
+    asks, has_ask = present(asks)
+    if bids is not None and asks is not None:
+        quoted = has_bid & has_ask
+        valid &= ~quoted | (bids <= asks)
+    
+    opens, has_open = present(opens)
+    highs, has_high = present(highs)
+    lows, has_low = present(lows)
+    if opens is not None and highs is not None and lows is not None:
+        ohlc = has_open & has_high & has_low
+        valid &= ~ohlc | ((highs >= np.fmax(opens, prices)) & (lows <= np.fmin(opens, prices)))
+    
+    return valid
 
 
 @dataclass
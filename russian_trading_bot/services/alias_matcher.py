@@ -0,0 +1,133 @@
+"""
+Multi-pattern matcher for company aliases and stock tickers.
+
+An Aho-Corasick automaton over all patterns finds every mention in a text
+in a single pass, so matching cost does not grow with the number of aliases.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+def fold_case(text: str) -> str:
+    """Приводит текст к нижнему регистру и заменяет ё на е, сохраняя длину."""
+    folded = text.lower()
+    if len(folded) != len(text):
+        # Символы, у которых нижний регистр длиннее (например, 'İ'), оставляем как есть,
+        # чтобы позиции в свернутом тексте совпадали с позициями в исходном
+        folded = ''.join(char.lower() if len(char.lower()) == 1 else char for char in text)
+    return folded.replace('ё', 'е')
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+@dataclass
+class AliasMatch:
+    """Вхождение шаблона в текст."""
+    start: int
+    end: int
+    pattern: str
+    value: Any
+    case_sensitive: bool = False
+
+
+class AliasMatcher:
+    """
+    Автомат Ахо-Корасик для поиска всех вхождений набора шаблонов.
+
+    Шаблоны и текст сравниваются после fold_case, для шаблонов с
+    case_sensitive=True дополнительно проверяется точное совпадение.
+    При whole_words=True вхождение не может быть частью более длинного слова.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, Any]] = (), whole_words: bool = True):
+        self.whole_words = whole_words
+        self._patterns: List[Tuple[str, Any, bool]] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._terminals: List[List[int]] = [[]]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[int]] = [[]]
+        self._built = True
+
+        for pattern, value in patterns:
+            self.add(pattern, value)
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def add(self, pattern: str, value: Any, case_sensitive: bool = False):
+        """Добавляет шаблон (автомат перестраивается при следующем поиске)."""
+        if not pattern:
+            return
+
+        node = 0
+        for char in fold_case(pattern):
+            child = self._goto[node].get(char)
+            if child is None:
+                child = len(self._goto)
+                self._goto[node][char] = child
+                self._goto.append({})
+                self._terminals.append([])
+            node = child
+
+        self._terminals[node].append(len(self._patterns))
+        self._patterns.append((pattern, value, case_sensitive))
+        self._built = False
+
+    def build(self):
+        """Строит суффиксные ссылки и объединенные списки выходов."""
+        self._fail = [0] * len(self._goto)
+        self._outputs = [list(terminals) for terminals in self._terminals]
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._outputs[child].extend(self._outputs[self._fail[child]])
+                queue.append(child)
+
+        self._built = True
+
+    def find_all(self, text: str) -> List[AliasMatch]:
+        """Возвращает все вхождения шаблонов в порядке позиции их конца."""
+        if not self._built:
+            self.build()
+
+        folded = fold_case(text)
+        goto, fail, outputs, patterns = self._goto, self._fail, self._outputs, self._patterns
+        matches = []
+
+        node = 0
+        for index, char in enumerate(folded):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if not outputs[node]:
+                continue
+
+            end = index + 1
+            for pattern_id in outputs[node]:
+                pattern, value, case_sensitive = patterns[pattern_id]
+                start = end - len(pattern)
+                if self.whole_words and not self._is_whole_word(folded, start, end):
+                    continue
+                if case_sensitive and text[start:end] != pattern:
+                    continue
+                matches.append(AliasMatch(start, end, pattern, value, case_sensitive))
+
+        return matches
+
+    @staticmethod
+    def _is_whole_word(text: str, start: int, end: int) -> bool:
+        if start > 0 and _is_word_char(text[start - 1]) and _is_word_char(text[start]):
+            return False
+        if end < len(text) and _is_word_char(text[end]) and _is_word_char(text[end - 1]):
+            return False
+        return True
@@ -0,0 +1,381 @@
+"""
+Parallel Parameter Sweep and Walk-Forward Optimizer for Backtesting
+
+This module runs many BacktestConfig / DecisionWeights variants over a
+ProcessPoolExecutor. Historical bars are published once into shared memory
+and every worker attaches a read-only BarStore to it, so no worker loads or
+copies the price history. Results are aggregated into a ranked table.
+"""
+
+import itertools
+import logging
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, fields, replace
+from datetime import datetime, timedelta
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple, Any, Sequence
+
+import numpy as np
+import pandas as pd
+
+from services.backtesting_engine import BacktestingEngine, BacktestConfig, BacktestResults
+from services.ai_decision_engine import AIDecisionEngine, DecisionWeights
+from services.bar_store import BarStore, BAR_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Parameters prefixed with this go to DecisionWeights instead of BacktestConfig
+WEIGHTS_PREFIX = "weights."
+
+# BacktestResults metrics collected into the sweep table
+SWEEP_METRICS = (
+    'total_return', 'annual_return', 'sharpe_ratio', 'sortino_ratio', 'max_drawdown',
+    'volatility', 'total_trades', 'win_rate', 'profit_factor', 'alpha', 'beta'
+)
+
+_CONFIG_FIELDS = {f.name for f in fields(BacktestConfig)}
+_WEIGHT_FIELDS = {f.name for f in fields(DecisionWeights)}
+
+
+@dataclass
+class WalkForwardWindow:
+    """Train/test split for walk-forward optimization"""
+    train_start: datetime
+    train_end: datetime
+    test_start: datetime
+    test_end: datetime
+
+
+@dataclass
+class SweepTask:
+    """One backtest run in a sweep"""
+    config_id: int
+    window_id: int
+    phase: str  # train, test
+    params: Dict[str, Any]
+    config: BacktestConfig
+    weights: Optional[DecisionWeights]
+
+
+def generate_parameter_sets(space: Dict[str, Sequence[Any]], method: str = "grid",
+                            n_samples: int = 50, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Generate parameter combinations for a sweep
+
+    Args:
+        space: Parameter name -> candidate values. Names are BacktestConfig fields
+               or "weights.<field>" for DecisionWeights
+        method: "grid" for the full cartesian product, "random" for sampling
+        n_samples: Number of random combinations (random method only)
+        seed: Random seed for reproducible sampling
+
+    Returns:
+        List of parameter dictionaries
+    """
+    for name in space:
+        if name.startswith(WEIGHTS_PREFIX):
+            if name[len(WEIGHTS_PREFIX):] not in _WEIGHT_FIELDS:
+                raise ValueError(f"Unknown DecisionWeights field: {name}")
+        elif name not in _CONFIG_FIELDS:
+            raise ValueError(f"Unknown BacktestConfig field: {name}")
+
+    names = list(space.keys())
+
+    if method == "grid":
+        return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+    if method == "random":
+        rng = random.Random(seed)
+        seen = set()
+        parameter_sets = []
+        total = int(np.prod([len(space[n]) for n in names])) if names else 1
+        while len(parameter_sets) < min(n_samples, total):
+            values = tuple(rng.choice(list(space[n])) for n in names)
+            if values not in seen:
+                seen.add(values)
+                parameter_sets.append(dict(zip(names, values)))
+        return parameter_sets
+
+    raise ValueError(f"Unknown sweep method: {method}")
+
+
+def walk_forward_windows(start_date: datetime, end_date: datetime, train_days: int,
+                         test_days: int, step_days: Optional[int] = None) -> List[WalkForwardWindow]:
+    """
+    Build rolling walk-forward windows
+
+    Args:
+        start_date: First date of the first training window
+        end_date: Last date any test window may reach
+        train_days: Training window length in calendar days
+        test_days: Test window length in calendar days
+        step_days: Shift between windows (defaults to test_days)
+
+    Returns:
+        List of non-overlapping-test walk-forward windows
+    """
+    step = timedelta(days=step_days or test_days)
+    windows = []
+    train_start = start_date
+
+    while True:
+        train_end = train_start + timedelta(days=train_days)
+        test_start = train_end + timedelta(days=1)
+        test_end = test_start + timedelta(days=test_days)
+        if test_end > end_date:
+            break
+        windows.append(WalkForwardWindow(train_start, train_end, test_start, test_end))
+        train_start += step
+
+    return windows
+
+
+def build_config(base_config: BacktestConfig, params: Dict[str, Any]) -> Tuple[BacktestConfig, Optional[DecisionWeights]]:
+    """Apply sweep parameters to a base config; returns (config, weights or None)"""
+    config_params = {k: v for k, v in params.items() if not k.startswith(WEIGHTS_PREFIX)}
+    weight_params = {k[len(WEIGHTS_PREFIX):]: v for k, v in params.items() if k.startswith(WEIGHTS_PREFIX)}
+
+    config = replace(base_config, **config_params)
+    weights = DecisionWeights(**weight_params) if weight_params else None
+    return config, weights
+
+
+class SharedBarStore:
+    """
+    Bar store published into one shared memory block
+
+    The owner process copies the store fields once; workers attach by name
+    and get read-only NumPy views without copying.
+    """
+
+    _ARRAYS = BAR_FIELDS + ('source_row',)
+
+    def __init__(self, store: BarStore):
+        self.symbols = list(store.symbols)
+        self.calendar_ns = store.calendar.asi8.copy()
+
+        arrays = {name: getattr(store, name) for name in self._ARRAYS}
+        self.layout: Dict[str, Tuple[int, str, Tuple[int, ...]]] = {}
+        offset = 0
+        for name, array in arrays.items():
+            self.layout[name] = (offset, array.dtype.str, array.shape)
+            offset += array.nbytes
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        self.name = self._shm.name
+
+        for name, array in arrays.items():
+            start, dtype, shape = self.layout[name]
+            view = np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=start)
+            view[...] = array
+
+        logger.debug(f"Shared bar store {self.name}: {offset / 1e6:.1f} MB")
+
+    def spec(self) -> Dict[str, Any]:
+        """Picklable description for attaching from worker processes"""
+        return {
+            'name': self.name,
+            'layout': self.layout,
+            'symbols': self.symbols,
+            'calendar_ns': self.calendar_ns
+        }
+
+    @staticmethod
+    def attach(spec: Dict[str, Any]) -> Tuple[BarStore, shared_memory.SharedMemory]:
+        """Attach to a published store; the returned handle must stay alive while the store is used"""
+        shm = shared_memory.SharedMemory(name=spec['name'])
+        arrays = {}
+        for name, (offset, dtype, shape) in spec['layout'].items():
+            view = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            view.flags.writeable = False
+            arrays[name] = view
+
+        source_row = arrays.pop('source_row')
+        calendar = pd.DatetimeIndex(spec['calendar_ns'].astype('datetime64[ns]'))
+        return BarStore(spec['symbols'], calendar, arrays, source_row), shm
+
+    def close(self):
+        """Release and unlink the shared memory block"""
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+
+# Per-process state of sweep workers
+_worker_store: Optional[BarStore] = None
+_worker_shm: Optional[shared_memory.SharedMemory] = None
+_worker_benchmarks: Dict[str, pd.DataFrame] = {}
+
+
+def _init_worker(spec: Dict[str, Any], benchmark_data: Dict[str, pd.DataFrame]):
+    """Attach the shared bar store once per worker process"""
+    global _worker_store, _worker_shm, _worker_benchmarks
+    _worker_store, _worker_shm = SharedBarStore.attach(spec)
+    _worker_benchmarks = benchmark_data
+    logging.getLogger('services.backtesting_engine').setLevel(logging.WARNING)
+
+
+def _run_task(task: SweepTask, symbols: List[str], mode: str,
+              store: Optional[BarStore] = None,
+              benchmark_data: Optional[Dict[str, pd.DataFrame]] = None) -> Tuple[SweepTask, Dict[str, float]]:
+    """Run one sweep task and return its metrics"""
+    engine = BacktestingEngine(AIDecisionEngine(task.weights))
+    engine.attach_bar_store(store or _worker_store,
+                            benchmark_data if benchmark_data is not None else _worker_benchmarks)
+
+    if mode == "fast":
+        results = engine.run_fast_backtest(task.config, symbols)
+    else:
+        results = engine.run_backtest(task.config, symbols)
+
+    return task, _collect_metrics(results)
+
+
+def _collect_metrics(results: BacktestResults) -> Dict[str, float]:
+    return {name: float(getattr(results, name)) for name in SWEEP_METRICS}
+
+
+class BacktestSweepRunner:
+    """
+    Parallel parameter sweep and walk-forward optimizer.
+
+    Fans (parameter set x window) backtests out to a process pool that shares
+    the engine's bar store through shared memory, then ranks parameter sets.
+    """
+
+    def __init__(self, engine: BacktestingEngine, symbols: List[str],
+                 max_workers: Optional[int] = None, mode: str = "fast"):
+        """
+        Args:
+            engine: Engine with historical data loaded (its bar store is shared)
+            symbols: Symbols to trade in every run
+            max_workers: Worker processes (defaults to CPU count; 1 runs in-process)
+            mode: "fast" for run_fast_backtest, "standard" for run_backtest
+                  (DecisionWeights only affect the standard AI-driven mode;
+                  sweeping weights.* parameters in fast mode raises ValueError)
+        """
+        if mode not in ("fast", "standard"):
+            raise ValueError(f"Unknown backtest mode: {mode}")
+
+        self.engine = engine
+        self.symbols = symbols
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.mode = mode
+
+    def run(self, base_config: BacktestConfig, parameter_sets: List[Dict[str, Any]],
+            windows: Optional[List[WalkForwardWindow]] = None,
+            rank_by: str = 'sharpe_ratio', ascending: bool = False) -> pd.DataFrame:
+        """
+        Run the sweep and build a ranked table
+
+        Without windows each parameter set is backtested over the base config
+        period. With walk-forward windows every set runs on each train and test
+        window and metrics are averaged per phase. Sets are ranked by the train
+        metric so that selection never looks at the test windows; test_*
+        columns report the out-of-sample result of that selection.
+
+        Args:
+            base_config: Configuration the parameters are applied to
+            parameter_sets: Output of generate_parameter_sets
+            windows: Optional walk-forward windows
+            rank_by: Metric from SWEEP_METRICS used for ranking
+            ascending: Sort order of the ranking metric
+
+        Returns:
+            DataFrame with one row per parameter set, sorted by rank
+        """
+        if rank_by not in SWEEP_METRICS:
+            raise ValueError(f"Unknown ranking metric: {rank_by}")
+
+        tasks = self._build_tasks(base_config, parameter_sets, windows)
+        logger.info(f"Running parameter sweep: {len(parameter_sets)} sets, {len(tasks)} backtests, "
+                    f"{min(self.max_workers, len(tasks)) or 1} workers")
+
+        completed = self._execute(tasks)
+        table = self._aggregate(parameter_sets, completed, windowed=windows is not None)
+
+        rank_column = f"train_{rank_by}" if windows is not None else rank_by
+        table = table.sort_values(rank_column, ascending=ascending, na_position='last').reset_index(drop=True)
+        table.insert(0, 'rank', np.arange(1, len(table) + 1))
+        return table
+
+    def _build_tasks(self, base_config: BacktestConfig, parameter_sets: List[Dict[str, Any]],
+                     windows: Optional[List[WalkForwardWindow]]) -> List[SweepTask]:
+        sweeps_weights = any(name.startswith(WEIGHTS_PREFIX) for params in parameter_sets for name in params)
+        if self.mode == "fast" and sweeps_weights:
+            # run_fast_backtest ignores DecisionWeights: every set would produce the same result
+            raise ValueError(f"{WEIGHTS_PREFIX}* parameters require mode='standard'")
+
+        tasks = []
+        for config_id, params in enumerate(parameter_sets):
+            config, weights = build_config(base_config, params)
+
+            if windows is None:
+                tasks.append(SweepTask(config_id, 0, 'full', params, config, weights))
+                continue
+
+            for window_id, window in enumerate(windows):
+                tasks.append(SweepTask(config_id, window_id, 'train', params,
+                                       replace(config, start_date=window.train_start, end_date=window.train_end),
+                                       weights))
+                tasks.append(SweepTask(config_id, window_id, 'test', params,
+                                       replace(config, start_date=window.test_start, end_date=window.test_end),
+                                       weights))
+        return tasks
+
+    def _execute(self, tasks: List[SweepTask]) -> List[Tuple[SweepTask, Dict[str, float]]]:
+        store = self.engine.bar_store
+        benchmark_data = self.engine.benchmark_data
+
+        if self.max_workers <= 1 or len(tasks) <= 1:
+            return [_run_task(task, self.symbols, self.mode, store, benchmark_data) for task in tasks]
+
+        shared = SharedBarStore(store)
+        completed = []
+        try:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(tasks)),
+                                     initializer=_init_worker,
+                                     initargs=(shared.spec(), benchmark_data)) as executor:
+                futures = {executor.submit(_run_task, task, self.symbols, self.mode): task for task in tasks}
+                for future in as_completed(futures):
+                    try:
+                        completed.append(future.result())
+                    except Exception as e:
+                        # A missing run would silently drop out of the averages, so fail
+                        # the sweep like the in-process path does
+                        task = futures[future]
+                        logger.error(f"Sweep backtest failed (set {task.config_id}, "
+                                     f"window {task.window_id}, {task.phase}): {e}")
+                        for pending in futures:
+                            pending.cancel()
+                        raise
+        finally:
+            shared.close()
+
+        return completed
+
+    def _aggregate(self, parameter_sets: List[Dict[str, Any]],
+                   completed: List[Tuple[SweepTask, Dict[str, float]]], windowed: bool) -> pd.DataFrame:
+        rows = []
+        for config_id, params in enumerate(parameter_sets):
+            row: Dict[str, Any] = dict(params)
+            runs = [(task, metrics) for task, metrics in completed if task.config_id == config_id]
+
+            if not windowed:
+                metrics = runs[0][1] if runs else {}
+                for name in SWEEP_METRICS:
+                    row[name] = metrics.get(name, np.nan)
+            else:
+                for phase in ('train', 'test'):
+                    phase_metrics = [metrics for task, metrics in runs if task.phase == phase]
+                    for name in SWEEP_METRICS:
+                        values = [metrics[name] for metrics in phase_metrics]
+                        row[f"{phase}_{name}"] = float(np.mean(values)) if values else np.nan
+                row['windows'] = len([task for task, _ in runs if task.phase == 'test'])
+
+            rows.append(row)
+
+        return pd.DataFrame(rows)
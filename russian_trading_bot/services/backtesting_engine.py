@@ -6,7 +6,7 @@ to validate trading strategies and compare performance against Russian market in
 """
 
 import logging
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Callable
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from decimal import Decimal, ROUND_HALF_UP
@@ -15,12 +15,21 @@ import numpy as np
 from enum import Enum
 
 from models.trading import TradingSignal, OrderAction, TradeOrder, ExecutionResult, Portfolio, Position
-from models.market_data import RussianStock, MarketData
+from models.market_data import RussianStock, MarketData, validate_market_data_arrays
 from services.portfolio_manager import PortfolioManager, PerformanceMetrics
 from services.ai_decision_engine import AIDecisionEngine, MarketConditions
+from services.bar_store import BarStore
+from services.candle_cache import CandleCache
+from services.technical_analyzer import TechnicalAnalyzer, IndicatorMatrix
 
 logger = logging.getLogger(__name__)
 
+# (indicators, close matrix) -> (direction -1/0/1, confidence) matrices for the fast mode
+SignalGenerator = Callable[[IndicatorMatrix, np.ndarray], Tuple[np.ndarray, np.ndarray]]
+
+# Maximum age of the last bar before a symbol is treated as not trading
+MAX_QUOTE_AGE_DAYS = 3
+
 
 class BacktestStatus(Enum):
     """Backtesting status"""
@@ -158,17 +167,66 @@ class BacktestResults:
         }
 
 
+class _VersionedFrames(dict):
+    """Symbol -> DataFrame mapping that counts its modifications"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = 0
+    
+    def _modified(self):
+        self.version += 1
+    
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._modified()
+    
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._modified()
+    
+    def clear(self):
+        super().clear()
+        self._modified()
+    
+    def pop(self, *args):
+        result = super().pop(*args)
+        self._modified()
+        return result
+    
+    def popitem(self):
+        result = super().popitem()
+        self._modified()
+        return result
+    
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+    
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._modified()
+
+
 class BacktestingEngine:
     """
     Comprehensive backtesting engine for Russian stock market strategies.
     Supports historical MOEX data, multiple strategies, and detailed performance analysis.
     """
     
-    def __init__(self, ai_engine: AIDecisionEngine):
+    def __init__(self, ai_engine: AIDecisionEngine, candle_cache: Optional[CandleCache] = None):
         self.ai_engine = ai_engine
+        self.candle_cache = candle_cache
         self.status = BacktestStatus.NOT_STARTED
         self.current_backtest: Optional[BacktestResults] = None
         
+        # Columnar view of historical_data, rebuilt when the frames change
+        self._bar_store: Optional[BarStore] = None
+        self._bar_store_key: Optional[Tuple[int, int]] = None
+        self._bar_store_attached = False
+        self._data_generation = 0
+        
         # Historical data cache
         self.historical_data: Dict[str, pd.DataFrame] = {}
         self.benchmark_data: Dict[str, pd.DataFrame] = {}
@@ -193,6 +251,14 @@ class BacktestingEngine:
             # For now, we'll simulate the data structure
             
             for symbol in symbols:
+                # Use cached MOEX candles when the whole period is already on disk
+                if self.candle_cache is not None and not self.candle_cache.missing_ranges(symbol, start_date, end_date):
+                    df = self.candle_cache.to_frame(symbol, start_date, end_date)
+                    df['currency'] = 'RUB'
+                    self.historical_data[symbol] = df
+                    logger.debug(f"Loaded {len(df)} cached days of data for {symbol}")
+                    continue
+                
                 # Generate sample historical data
                 date_range = pd.date_range(start=start_date, end=end_date, freq='D')
                 
@@ -235,6 +301,62 @@ class BacktestingEngine:
             logger.error(f"Error loading historical data: {e}")
             return False
     
+    @property
+    def historical_data(self) -> Dict[str, pd.DataFrame]:
+        """Symbol -> OHLCV frame used for backtests"""
+        return self._historical_data
+    
+    @historical_data.setter
+    def historical_data(self, frames: Dict[str, pd.DataFrame]):
+        self._historical_data = _VersionedFrames(frames)
+        self._data_generation += 1
+    
+    @property
+    def bar_store(self) -> BarStore:
+        """
+        Columnar bar store built from historical_data
+        
+        The store is cached and rebuilt when historical_data is replaced or
+        a frame is assigned, added or removed. Frames edited in place are
+        not detected: call invalidate_bar_store() after such edits. A store
+        attached with attach_bar_store() is returned as is.
+        """
+        if self._bar_store_attached:
+            return self._bar_store
+        
+        key = (self._data_generation, self._historical_data.version)
+        if self._bar_store is None or self._bar_store_key != key:
+            self._bar_store = BarStore.from_frames(self.historical_data)
+            self._bar_store_key = key
+        return self._bar_store
+    
+    def invalidate_bar_store(self):
+        """Drop the cached bar store (e.g. after editing a frame in place)"""
+        if not self._bar_store_attached:
+            self._bar_store = None
+            self._bar_store_key = None
+    
+    def attach_bar_store(self, store: BarStore,
+                         benchmark_data: Optional[Dict[str, pd.DataFrame]] = None):
+        """
+        Use an existing bar store instead of building one from historical_data
+        
+        Lets several engines (e.g. parameter sweep workers) share one read-only
+        store without loading or copying per-symbol DataFrames.
+        
+        Args:
+            store: Bar store to backtest on
+            benchmark_data: Optional benchmark frames for alpha/beta calculation
+        """
+        self._bar_store = store
+        self._bar_store_attached = True
+        if benchmark_data is not None:
+            self.benchmark_data = benchmark_data
+    
+    def _has_historical_data(self) -> bool:
+        """Check whether historical data is loaded or a bar store is attached"""
+        return bool(self.historical_data) or self._bar_store_attached
+    
     def _load_benchmark_data(self, start_date: datetime, end_date: datetime):
         """Load Russian market benchmark data"""
         benchmarks = ['IMOEX', 'RTSI', 'MOEXBMI']  # MOEX Russia, RTS, MOEX BMI
@@ -280,7 +402,7 @@ class BacktestingEngine:
             logger.info(f"Starting backtest: {strategy_name} from {config.start_date} to {config.end_date}")
             
             # Load historical data if not already loaded
-            if not self.historical_data:
+            if not self._has_historical_data():
                 if not self.load_historical_data(symbols, config.start_date, config.end_date):
                     raise ValueError("Failed to load historical data")
             
@@ -288,39 +410,11 @@ class BacktestingEngine:
             portfolio_manager = PortfolioManager(config.initial_capital)
             
             # Initialize results tracking
-            results = BacktestResults(
-                config=config,
-                start_date=config.start_date,
-                end_date=config.end_date,
-                duration_days=(config.end_date - config.start_date).days,
-                initial_capital=config.initial_capital,
-                final_capital=config.initial_capital,
-                total_return=0.0,
-                annual_return=0.0,
-                sharpe_ratio=0.0,
-                sortino_ratio=0.0,
-                max_drawdown=0.0,
-                volatility=0.0,
-                total_trades=0,
-                winning_trades=0,
-                losing_trades=0,
-                win_rate=0.0,
-                profit_factor=0.0,
-                avg_win=Decimal('0'),
-                avg_loss=Decimal('0'),
-                benchmark_return=0.0,
-                alpha=0.0,
-                beta=0.0,
-                information_ratio=0.0
-            )
-            
-            # Get trading dates
-            all_dates = set()
-            for symbol_data in self.historical_data.values():
-                all_dates.update(symbol_data.index)
+            results = self._empty_results(config)
             
-            trading_dates = sorted(list(all_dates))
-            trading_dates = [d for d in trading_dates if config.start_date <= d <= config.end_date]
+            # Get trading dates from the shared calendar
+            calendar = self.bar_store.calendar
+            trading_dates = list(calendar[(calendar >= config.start_date) & (calendar <= config.end_date)])
             
             # Track open positions
             open_positions: Dict[str, BacktestTrade] = {}
@@ -397,30 +491,265 @@ class BacktestingEngine:
             self.status = BacktestStatus.FAILED
             raise
     
+    def run_fast_backtest(self, config: BacktestConfig, symbols: List[str],
+                          strategy_name: str = "Technical_Vectorized",
+                          signal_generator: Optional[SignalGenerator] = None,
+                          analyzer: Optional[TechnicalAnalyzer] = None) -> BacktestResults:
+        """
+        Run a vectorized backtest over the columnar bar store
+        
+        Signals for every symbol and date are precomputed as arrays up front
+        (technical indicator matrix + TechnicalAnalyzer.calculate_signal_matrix
+        by default). The daily loop only does NumPy arithmetic over the symbol
+        row for marking to market, stop losses and take profits; no MarketData,
+        portfolio snapshots or Decimal values are created per day, and
+        BacktestTrade records are materialized only for completed trades.
+        
+        Args:
+            config: Backtesting configuration
+            symbols: List of symbols to trade
+            strategy_name: Name of the strategy being tested
+            signal_generator: Optional callable (indicators, close) -> (direction, confidence)
+            analyzer: Technical analyzer whose parameters are used for indicators
+            
+        Returns:
+            BacktestResults with comprehensive analysis
+        """
+        try:
+            self.status = BacktestStatus.RUNNING
+            logger.info(f"Starting fast backtest: {strategy_name} from {config.start_date} to {config.end_date}")
+            
+            if not self._has_historical_data():
+                if not self.load_historical_data(symbols, config.start_date, config.end_date):
+                    raise ValueError("Failed to load historical data")
+            
+            results = self._empty_results(config)
+            
+            store = self.bar_store
+            symbols = [symbol for symbol in symbols if symbol in store]
+            columns = store.columns(symbols)
+            
+            calendar = store.calendar
+            in_range = np.flatnonzero((calendar >= config.start_date) & (calendar <= config.end_date))
+            
+            initial_capital = float(config.initial_capital)
+            if len(in_range) == 0 or len(columns) == 0:
+                self._finish_fast_backtest(results, config, np.array([initial_capital]), [])
+                self.current_backtest = results
+                self.status = BacktestStatus.COMPLETED
+                return results
+            
+            # Everything the daily loop needs, precomputed as (dates x symbols) arrays
+            close = store.close[:, columns]
+            source_row = store.source_row[:, columns]
+            day_ns = 24 * 3600 * 10 ** 9
+            quote_age = (calendar.asi8[:, np.newaxis] - calendar.asi8[np.maximum(source_row, 0)]) / day_ns
+            tradable = (source_row >= 0) & (quote_age <= MAX_QUOTE_AGE_DAYS)
+            
+            analyzer = analyzer or TechnicalAnalyzer()
+            indicators = analyzer.calculate_indicator_matrix(
+                close, store.high[:, columns], store.low[:, columns], symbols=symbols, dates=calendar
+            )
+            generator = signal_generator or analyzer.calculate_signal_matrix
+            direction, confidence = generator(indicators, close)
+            entry_signal = tradable & (direction != 0) & (confidence >= config.min_confidence)
+            
+            slippage_rate = config.slippage_rate
+            commission_rate = config.commission_rate
+            
+            # Open position state per symbol (side: +1 long, -1 short, 0 flat)
+            side = np.zeros(len(symbols), dtype=np.int8)
+            quantity = np.zeros(len(symbols), dtype=np.int64)
+            entry_price = np.zeros(len(symbols))
+            entry_commission = np.zeros(len(symbols))
+            entry_slippage = np.zeros(len(symbols))
+            entry_row = np.zeros(len(symbols), dtype=np.int64)
+            last_price = np.full(len(symbols), np.nan)
+            
+            cash = initial_capital
+            values = np.empty(len(in_range))
+            peak = initial_capital
+            completed: List[BacktestTrade] = []
+            
+            def close_positions(mask: np.ndarray, row: int, reason: str):
+                nonlocal cash
+                for j in np.flatnonzero(mask):
+                    price = float(last_price[j])
+                    slip = price * slippage_rate
+                    exit_price = price - slip if side[j] > 0 else price + slip
+                    exit_commission = exit_price * int(quantity[j]) * commission_rate
+                    cash += int(side[j]) * int(quantity[j]) * exit_price - exit_commission
+                    
+                    completed.append(BacktestTrade(
+                        entry_date=store.date(entry_row[j]),
+                        exit_date=store.date(row),
+                        symbol=symbols[j],
+                        action=OrderAction.BUY if side[j] > 0 else OrderAction.SELL,
+                        entry_price=Decimal(str(float(entry_price[j]))),
+                        exit_price=Decimal(str(exit_price)),
+                        quantity=int(quantity[j]),
+                        commission=Decimal(str(float(entry_commission[j]) + exit_commission)),
+                        slippage=Decimal(str(float(entry_slippage[j]) + slip)),
+                        exit_reason=reason
+                    ))
+                side[mask] = 0
+                quantity[mask] = 0
+            
+            for i, row in enumerate(in_range):
+                prices = close[row]
+                available = tradable[row]
+                np.copyto(last_price, prices, where=available)
+                
+                held = side != 0
+                value = cash + float(np.sum(side[held] * quantity[held] * last_price[held]))
+                values[i] = value
+                peak = max(peak, value)
+                
+                # Stop losses and take profits for all open positions at once
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    pnl_pct = side * (prices - entry_price) / entry_price
+                stop = held & available & (pnl_pct <= -config.stop_loss_pct)
+                take = held & available & (pnl_pct >= config.take_profit_pct) & ~stop
+                if stop.any():
+                    close_positions(stop, row, "stop_loss")
+                if take.any():
+                    close_positions(take, row, "take_profit")
+                
+                # New entries: only symbols with a signal and no open position
+                if i >= 20:
+                    for j in np.flatnonzero(entry_signal[row] & (side == 0)):
+                        trade_side = int(direction[row, j])
+                        price = float(prices[j])
+                        weight = config.max_position_size
+                        if config.position_sizing_method == "confidence_weighted":
+                            weight *= confidence[row, j]
+                        size = max(1, int(value * weight / price))
+                        
+                        slip = price * slippage_rate
+                        execution_price = price + slip if trade_side > 0 else price - slip
+                        commission = execution_price * size * commission_rate
+                        
+                        if trade_side > 0 and execution_price * size + commission > cash:
+                            continue
+                        
+                        cash -= trade_side * size * execution_price + commission
+                        side[j] = trade_side
+                        quantity[j] = size
+                        entry_price[j] = execution_price
+                        entry_commission[j] = commission
+                        entry_slippage[j] = slip
+                        entry_row[j] = row
+                        results.total_trades += 1
+                
+                # Risk management: check max drawdown
+                drawdown = (peak - value) / peak if peak > 0 else 0.0
+                if drawdown > config.max_drawdown_limit and (side != 0).any():
+                    logger.warning(f"Max drawdown limit reached: {drawdown:.2%}")
+                    close_positions(side != 0, row, "max_drawdown")
+            
+            # Close any remaining open positions at end of backtest
+            close_positions(side != 0, in_range[-1], "end_of_backtest")
+            
+            results.final_capital = Decimal(str(round(cash, 2)))
+            self._finish_fast_backtest(results, config, values, completed, calendar[in_range])
+            
+            self.current_backtest = results
+            self.status = BacktestStatus.COMPLETED
+            
+            logger.info(f"Fast backtest completed. Total return: {results.total_return:.2%}, "
+                       f"Sharpe ratio: {results.sharpe_ratio:.2f}")
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Fast backtest failed: {e}")
+            self.status = BacktestStatus.FAILED
+            raise
+    
+    def _empty_results(self, config: BacktestConfig) -> BacktestResults:
+        """Create zero-initialized results for a backtest run"""
+        return BacktestResults(
+            config=config,
+            start_date=config.start_date,
+            end_date=config.end_date,
+            duration_days=(config.end_date - config.start_date).days,
+            initial_capital=config.initial_capital,
+            final_capital=config.initial_capital,
+            total_return=0.0,
+            annual_return=0.0,
+            sharpe_ratio=0.0,
+            sortino_ratio=0.0,
+            max_drawdown=0.0,
+            volatility=0.0,
+            total_trades=0,
+            winning_trades=0,
+            losing_trades=0,
+            win_rate=0.0,
+            profit_factor=0.0,
+            avg_win=Decimal('0'),
+            avg_loss=Decimal('0'),
+            benchmark_return=0.0,
+            alpha=0.0,
+            beta=0.0,
+            information_ratio=0.0
+        )
+    
+    def _finish_fast_backtest(self, results: BacktestResults, config: BacktestConfig,
+                              values: np.ndarray, trades: List[BacktestTrade],
+                              dates: Optional[pd.DatetimeIndex] = None):
+        """Fill results from the portfolio value array and completed trades"""
+        results.trades = trades
+        results.winning_trades = sum(1 for trade in trades if trade.pnl > 0)
+        results.losing_trades = len(trades) - results.winning_trades
+        
+        if dates is not None and len(values) > 1:
+            results.daily_returns = (np.diff(values) / values[:-1]).tolist()
+        if dates is not None:
+            results.portfolio_values = [
+                (date.to_pydatetime(), Decimal(str(round(value, 2))))
+                for date, value in zip(dates, values)
+            ]
+        
+        self._calculate_final_metrics(results, config)
+    
     def _get_market_data_for_date(self, date: datetime, symbols: List[str]) -> Dict[str, MarketData]:
         """Get market data for all symbols on a specific date"""
         market_data = {}
         
-        for symbol in symbols:
-            if symbol in self.historical_data:
-                df = self.historical_data[symbol]
-                
-                # Find the closest trading date
-                available_dates = df.index
-                closest_date = min(available_dates, key=lambda x: abs((x - date).days))
-                
-                if abs((closest_date - date).days) <= 3:  # Within 3 days
-                    row = df.loc[closest_date]
-                    
-                    market_data[symbol] = MarketData(
-                        symbol=symbol,
-                        timestamp=closest_date,
-                        price=Decimal(str(row['close'])),
-                        volume=int(row['volume']),
-                        bid=Decimal(str(row['close'] * 0.999)),  # Approximate bid
-                        ask=Decimal(str(row['close'] * 1.001)),  # Approximate ask
-                        currency="RUB"
-                    )
+        store = self.bar_store
+        row = store.row(date)
+        if row < 0:
+            return market_data
+        
+        # Last known bar at or before the date, rejected if older than 3 days
+        staleness = store.staleness_days(date, row)
+        bars = store.bars_at(row)
+        
+        selected = [symbol for symbol in symbols
+                    if symbol in store and staleness[store.column(symbol)] <= MAX_QUOTE_AGE_DAYS]
+        if not selected:
+            return market_data
+        
+        columns = np.array([store.column(symbol) for symbol in selected])
+        closes = bars['close'][columns]
+        volumes = bars['volume'][columns]
+        
+        # Bars from the store are validated in one pass; MarketData skips re-validation
+        valid = validate_market_data_arrays(selected, closes, volumes)
+        if not valid.all():
+            invalid = [symbol for symbol, ok in zip(selected, valid) if not ok]
+            raise ValueError(f"Invalid bars on {date}: {', '.join(invalid)}")
+        
+        for symbol, column, close, volume in zip(selected, columns.tolist(), closes.tolist(), volumes.tolist()):
+            market_data[symbol] = MarketData.trusted(
+                symbol=symbol.upper(),
+                timestamp=store.date(store.source_row[row, column]),
+                price=Decimal(str(close)),
+                volume=int(volume),
+                bid=Decimal(str(close * 0.999)),  # Approximate bid
+                ask=Decimal(str(close * 1.001)),  # Approximate ask
+                currency="RUB"
+            )
         
         return market_data
     
@@ -444,13 +773,17 @@ class BacktestingEngine:
                 continue
             
             try:
-                # Get historical data for technical analysis
-                historical_data = self.historical_data[symbol]
-                recent_data = historical_data[historical_data.index <= date].tail(50)
+                # Get historical data for technical analysis (array views, no copies)
+                store = self.bar_store
+                row = store.row(date)
+                recent_close = store.window(symbol, row, 50)
+                recent_volume = store.window(symbol, row, 50, field='volume')
                 
-                if len(recent_data) < 20:
+                if len(recent_close) < 20:
                     continue
                 
+                sma_20 = float(recent_close[-20:].mean())
+                
                 # Calculate technical indicators (simplified)
                 from services.technical_analyzer import TechnicalIndicators
                 
@@ -459,11 +792,11 @@ class BacktestingEngine:
                     rsi=50.0 + np.random.normal(0, 15),
                     macd=np.random.normal(0, 0.5),
                     macd_signal=np.random.normal(0, 0.5),
-                    sma_20=float(recent_data['close'].rolling(20).mean().iloc[-1]),
-                    sma_50=float(recent_data['close'].rolling(50).mean().iloc[-1]) if len(recent_data) >= 50 else None,
-                    bollinger_upper=float(recent_data['close'].rolling(20).mean().iloc[-1] * 1.02),
-                    bollinger_lower=float(recent_data['close'].rolling(20).mean().iloc[-1] * 0.98),
-                    bollinger_middle=float(recent_data['close'].rolling(20).mean().iloc[-1]),
+                    sma_20=sma_20,
+                    sma_50=float(recent_close.mean()) if len(recent_close) >= 50 else None,
+                    bollinger_upper=sma_20 * 1.02,
+                    bollinger_lower=sma_20 * 0.98,
+                    bollinger_middle=sma_20,
                     stochastic_k=50.0 + np.random.normal(0, 20)
                 )
                 
@@ -483,7 +816,7 @@ class BacktestingEngine:
                     technical_indicators=indicators,
                     sentiments=[],  # No sentiment data in backtest
                     market_conditions=market_conditions,
-                    historical_volume=recent_data['volume'].tolist()
+                    historical_volume=recent_volume.tolist()
                 )
                 
                 # Only include signals above minimum confidence
@@ -0,0 +1,216 @@
+"""
+Columnar Historical Bar Store for Russian Stock Market
+
+This module keeps daily OHLCV history for many MOEX symbols as contiguous
+(dates x symbols) NumPy arrays on a shared trading calendar, so that a
+backtest step for one date is a single row lookup instead of a search
+through per-symbol DataFrames.
+"""
+
+import logging
+from typing import Dict, List, Optional, Sequence, Union
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close')
+BAR_FIELDS = PRICE_FIELDS + ('volume',)
+
+DateLike = Union[datetime, pd.Timestamp, np.datetime64, str]
+
+
+class BarStore:
+    """
+    Columnar OHLCV store aligned on a shared MOEX trading calendar.
+
+    Every field is a C-contiguous (dates x symbols) array: float64 for prices,
+    int64 for volume, so row t holds all symbols for one trading date. Missing
+    bars are filled as-of (last known bar carried forward) and ``source_row``
+    records which calendar row each value actually came from, which lets callers
+    reject stale quotes.
+    """
+
+    def __init__(self, symbols: Sequence[str], calendar: Union[pd.DatetimeIndex, np.ndarray],
+                 fields: Dict[str, np.ndarray], source_row: Optional[np.ndarray] = None):
+        self.symbols: List[str] = list(symbols)
+        self.calendar = pd.DatetimeIndex(calendar).as_unit('ns')
+
+        if not self.calendar.is_monotonic_increasing or not self.calendar.is_unique:
+            raise ValueError("Trading calendar must be sorted and unique")
+
+        shape = (len(self.calendar), len(self.symbols))
+        self.open = self._as_field(fields, 'open', np.float64, shape)
+        self.high = self._as_field(fields, 'high', np.float64, shape)
+        self.low = self._as_field(fields, 'low', np.float64, shape)
+        self.close = self._as_field(fields, 'close', np.float64, shape)
+        self.volume = self._as_field(fields, 'volume', np.int64, shape)
+
+        if source_row is None:
+            source_row = np.repeat(np.arange(shape[0], dtype=np.int64)[:, np.newaxis], shape[1], axis=1)
+            source_row[np.isnan(self.close)] = -1
+        self.source_row = np.ascontiguousarray(source_row, dtype=np.int64)
+
+        has_bar = self.source_row >= 0
+        self._first_row = np.full(shape[1], -1, dtype=np.int64)
+        if shape[0] > 0:
+            self._first_row = np.where(has_bar.any(axis=0), has_bar.argmax(axis=0), -1)
+
+        # Precomputed lookups: calendar date -> row, symbol -> column
+        self._calendar_ns = self.calendar.asi8
+        self._row_index: Dict[int, int] = {value: row for row, value in enumerate(self._calendar_ns)}
+        self._column_index: Dict[str, int] = {symbol: column for column, symbol in enumerate(self.symbols)}
+
+    @staticmethod
+    def _as_field(fields: Dict[str, np.ndarray], name: str, dtype, shape) -> np.ndarray:
+        if name not in fields:
+            fill = np.nan if dtype == np.float64 else 0
+            return np.full(shape, fill, dtype=dtype)
+
+        array = np.ascontiguousarray(fields[name], dtype=dtype)
+        if array.shape != shape:
+            raise ValueError(f"Field '{name}' has shape {array.shape}, expected {shape}")
+        return array
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame],
+                    calendar: Optional[pd.DatetimeIndex] = None) -> 'BarStore':
+        """
+        Build a store from per-symbol OHLCV DataFrames indexed by date
+
+        Args:
+            frames: Symbol -> DataFrame with open/high/low/close/volume columns
+            calendar: Trading calendar (defaults to the union of all frame indices)
+
+        Returns:
+            BarStore with as-of filled fields
+        """
+        symbols = list(frames.keys())
+
+        if calendar is None:
+            calendar = pd.DatetimeIndex([])
+            for df in frames.values():
+                calendar = calendar.union(pd.DatetimeIndex(df.index))
+        calendar = pd.DatetimeIndex(calendar).sort_values().unique()
+
+        shape = (len(calendar), len(symbols))
+        raw = {name: np.full(shape, np.nan) for name in BAR_FIELDS}
+
+        for column, symbol in enumerate(symbols):
+            df = frames[symbol]
+            if df.empty:
+                continue
+            rows = calendar.get_indexer(pd.DatetimeIndex(df.index))
+            present = rows >= 0
+            for name in BAR_FIELDS:
+                if name in df.columns:
+                    raw[name][rows[present], column] = df[name].to_numpy(dtype=np.float64)[present]
+
+        source_row = _asof_rows(~np.isnan(raw['close']))
+        fields = {name: _take_rows(values, source_row) for name, values in raw.items()}
+        fields['volume'] = np.nan_to_num(fields['volume'], nan=0.0)
+
+        store = cls(symbols, calendar, fields, source_row)
+        logger.debug(f"Bar store built: {len(calendar)} dates x {len(symbols)} symbols")
+        return store
+
+    def __len__(self) -> int:
+        return len(self.calendar)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._column_index
+
+    def column(self, symbol: str) -> int:
+        """Column index of a symbol"""
+        return self._column_index[symbol]
+
+    def columns(self, symbols: Sequence[str]) -> np.ndarray:
+        """Column indices of the given symbols (unknown symbols are skipped)"""
+        return np.array([self._column_index[s] for s in symbols if s in self._column_index], dtype=np.int64)
+
+    def field(self, name: str) -> np.ndarray:
+        """Full (dates x symbols) array of a field"""
+        if name not in BAR_FIELDS:
+            raise KeyError(f"Unknown bar field: {name}")
+        return getattr(self, name)
+
+    def row(self, date: DateLike) -> int:
+        """
+        Calendar row for a date with as-of semantics
+
+        Exact trading dates are an O(1) dictionary lookup; other dates resolve
+        to the last trading date before them. Returns -1 before the calendar start.
+        """
+        value = pd.Timestamp(date).value
+        row = self._row_index.get(value)
+        if row is not None:
+            return row
+        return int(np.searchsorted(self._calendar_ns, value, side='right')) - 1
+
+    def date(self, row: int) -> datetime:
+        """Trading date of a calendar row"""
+        return self.calendar[row].to_pydatetime()
+
+    def bars_at(self, row: int) -> Dict[str, np.ndarray]:
+        """All fields for one calendar row (views of length len(symbols))"""
+        return {name: getattr(self, name)[row] for name in BAR_FIELDS}
+
+    def staleness_days(self, date: DateLike, row: Optional[int] = None) -> np.ndarray:
+        """
+        Days between the date and the bar actually used for each symbol
+
+        Symbols with no bar yet get +inf.
+        """
+        if row is None:
+            row = self.row(date)
+        if row < 0:
+            return np.full(len(self.symbols), np.inf)
+
+        sources = self.source_row[row]
+        result = np.full(len(self.symbols), np.inf)
+        known = sources >= 0
+        delta = pd.Timestamp(date).value - self._calendar_ns[sources[known]]
+        result[known] = delta / (24 * 3600 * 1e9)
+        return result
+
+    def window(self, symbol: str, row: int, length: int, field: str = 'close') -> np.ndarray:
+        """
+        Last ``length`` values of a field up to and including ``row``
+
+        Rows before the symbol's first actual bar are excluded. Returns a view.
+        """
+        column = self._column_index[symbol]
+        first = self.first_row(symbol)
+        if first < 0 or row < first:
+            return self.field(field)[0:0, column]
+        start = max(first, row - length + 1)
+        return self.field(field)[start:row + 1, column]
+
+    def first_row(self, symbol: str) -> int:
+        """First calendar row with an actual bar for the symbol (-1 if none)"""
+        return int(self._first_row[self._column_index[symbol]])
+
+    def to_frame(self, symbol: str) -> pd.DataFrame:
+        """Per-symbol OHLCV DataFrame (as-of filled) for compatibility with pandas code"""
+        column = self._column_index[symbol]
+        first = max(self.first_row(symbol), 0)
+        data = {name: getattr(self, name)[first:, column] for name in BAR_FIELDS}
+        return pd.DataFrame(data, index=self.calendar[first:])
+
+
+def _asof_rows(present: np.ndarray) -> np.ndarray:
+    """For each cell, the row of the latest present value at or before it (-1 if none)"""
+    rows = np.where(present, np.arange(present.shape[0], dtype=np.int64)[:, np.newaxis], -1)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return rows
+
+
+def _take_rows(values: np.ndarray, source_row: np.ndarray) -> np.ndarray:
+    """Gather values[source_row[t, j], j]; cells without a source become NaN"""
+    columns = np.arange(values.shape[1])[np.newaxis, :]
+    result = values[np.maximum(source_row, 0), columns]
+    result[source_row < 0] = np.nan
+    return result
@@ -0,0 +1,309 @@
+"""
+Persistent memory-mapped cache of MOEX daily candles
+Локальный кэш дневных свечей MOEX на основе memory-mapped файлов
+
+Для каждой пары (режим торгов, тикер) хранится один бинарный файл .npy со
+структурированным массивом свечей и небольшой JSON-файл с покрытыми
+диапазонами дат. Чтение выполняется через np.load(mmap_mode='r'), поэтому
+бэктесты, монитор рынка и риск-менеджер получают представления (views)
+без копирования, а страницы файла разделяются между процессами через
+страничный кэш ОС. Из ISS догружаются только отсутствующие диапазоны.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from russian_trading_bot.models.market_data import MOSCOW_TZ
+
+
+logger = logging.getLogger(__name__)
+
+
+# Формат записи свечи в файле кэша
+CANDLE_DTYPE = np.dtype([
+    ('date', 'datetime64[D]'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<i8'),
+])
+
+CANDLE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+DateLike = Union[date, datetime, pd.Timestamp, str]
+DateRange = Tuple[date, date]
+
+# (тикер, начало, конец) -> массив свечей CANDLE_DTYPE
+CandleFetcher = Callable[[str, datetime, datetime], Awaitable[np.ndarray]]
+
+
+def _to_date(value: DateLike) -> date:
+    """Привести дату к datetime.date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return pd.Timestamp(value).date()
+
+
+def make_candles(rows: Iterable[Tuple[DateLike, Optional[float], Optional[float],
+                                      Optional[float], Optional[float], Optional[int]]]) -> np.ndarray:
+    """
+    Собрать массив свечей из кортежей (дата, open, high, low, close, volume)
+
+    Отсутствующие цены сохраняются как NaN, отсутствующий объем как 0.
+    Результат отсортирован по дате, дубликаты дат удалены (побеждает последняя запись).
+    """
+    records = [
+        (np.datetime64(_to_date(trade_date), 'D'),
+         np.nan if open_price is None else float(open_price),
+         np.nan if high_price is None else float(high_price),
+         np.nan if low_price is None else float(low_price),
+         np.nan if close_price is None else float(close_price),
+         int(volume) if volume else 0)
+        for trade_date, open_price, high_price, low_price, close_price, volume in rows
+    ]
+    return normalize_candles(np.array(records, dtype=CANDLE_DTYPE))
+
+
+def normalize_candles(candles: np.ndarray) -> np.ndarray:
+    """Отсортировать свечи по дате и удалить дубликаты (последняя запись побеждает)"""
+    if len(candles) == 0:
+        return np.empty(0, dtype=CANDLE_DTYPE)
+    # Стабильная сортировка в обратном порядке: первой встречается последняя запись даты
+    reversed_candles = candles[::-1]
+    order = np.argsort(reversed_candles['date'], kind='stable')
+    ordered = reversed_candles[order]
+    _, first = np.unique(ordered['date'], return_index=True)
+    return np.ascontiguousarray(ordered[first])
+
+
+def _merge_ranges(ranges: Iterable[DateRange]) -> List[DateRange]:
+    """Объединить пересекающиеся и смежные диапазоны дат"""
+    merged: List[List[date]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+class CandleCache:
+    """
+    Кэш дневных свечей MOEX на диске с инкрементальной догрузкой.
+
+    Файлы: <cache_dir>/<board>/<SYMBOL>.npy (свечи) и <SYMBOL>.json (покрытие).
+    Запись выполняется атомарной заменой файла, поэтому уже открытые
+    читателями отображения остаются корректными.
+    """
+
+    def __init__(self, cache_dir: str, board: str = "TQBR"):
+        """
+        Args:
+            cache_dir: Каталог кэша
+            board: Режим торгов MOEX (по умолчанию TQBR)
+        """
+        self.cache_dir = cache_dir
+        self.board = board.upper()
+        self._directory = os.path.join(cache_dir, self.board)
+        os.makedirs(self._directory, exist_ok=True)
+
+        # Открытые отображения: тикер -> (идентификатор файла, memmap)
+        self._mapped: Dict[str, Tuple[Tuple[int, int], np.ndarray]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _data_path(self, symbol: str) -> str:
+        return os.path.join(self._directory, f"{symbol.upper()}.npy")
+
+    def _coverage_path(self, symbol: str) -> str:
+        return os.path.join(self._directory, f"{symbol.upper()}.json")
+
+    def symbols(self) -> List[str]:
+        """Тикеры, для которых есть данные в кэше"""
+        return sorted(name[:-4] for name in os.listdir(self._directory) if name.endswith('.npy'))
+
+    def coverage(self, symbol: str) -> List[DateRange]:
+        """Диапазоны дат, уже загруженные из ISS (включительно)"""
+        path = self._coverage_path(symbol)
+        if not os.path.exists(path):
+            return []
+        with open(path, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+        return [(date.fromisoformat(start), date.fromisoformat(end)) for start, end in raw]
+
+    def missing_ranges(self, symbol: str, start_date: DateLike, end_date: DateLike) -> List[DateRange]:
+        """
+        Диапазоны внутри [start_date, end_date], которых нет в кэше
+
+        Returns:
+            Список непересекающихся диапазонов дат (включительно)
+        """
+        start, end = _to_date(start_date), _to_date(end_date)
+        if start > end:
+            return []
+
+        missing = []
+        cursor = start
+        for covered_start, covered_end in self.coverage(symbol):
+            if covered_end < cursor:
+                continue
+            if covered_start > end:
+                break
+            if covered_start > cursor:
+                missing.append((cursor, covered_start - timedelta(days=1)))
+            cursor = max(cursor, covered_end + timedelta(days=1))
+            if cursor > end:
+                break
+
+        if cursor <= end:
+            missing.append((cursor, end))
+        return missing
+
+    def _load(self, symbol: str) -> np.ndarray:
+        """Отображение файла свечей в память (переоткрывается после перезаписи)"""
+        key = symbol.upper()
+        path = self._data_path(key)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return np.empty(0, dtype=CANDLE_DTYPE)
+
+        identity = (stat.st_ino, stat.st_mtime_ns)
+        cached = self._mapped.get(key)
+        if cached is not None and cached[0] == identity:
+            return cached[1]
+
+        candles = np.load(path, mmap_mode='r')
+        self._mapped[key] = (identity, candles)
+        return candles
+
+    def get(self, symbol: str, start_date: Optional[DateLike] = None,
+            end_date: Optional[DateLike] = None) -> np.ndarray:
+        """
+        Свечи тикера за период без копирования
+
+        Returns:
+            Срез memory-mapped массива CANDLE_DTYPE (только чтение)
+        """
+        candles = self._load(symbol)
+        if len(candles) == 0:
+            return candles
+
+        dates = candles['date']
+        lo = 0 if start_date is None else int(np.searchsorted(dates, np.datetime64(_to_date(start_date), 'D'), side='left'))
+        hi = len(candles) if end_date is None else int(np.searchsorted(dates, np.datetime64(_to_date(end_date), 'D'), side='right'))
+        return candles[lo:hi]
+
+    def field(self, symbol: str, name: str, start_date: Optional[DateLike] = None,
+              end_date: Optional[DateLike] = None) -> np.ndarray:
+        """Одно поле свечей (open/high/low/close/volume/date) как представление без копирования"""
+        if name not in CANDLE_DTYPE.names:
+            raise KeyError(f"Неизвестное поле свечи: {name}")
+        return self.get(symbol, start_date, end_date)[name]
+
+    def close_histories(self, symbols: Sequence[str], start_date: Optional[DateLike] = None,
+                        end_date: Optional[DateLike] = None) -> Dict[str, np.ndarray]:
+        """Цены закрытия нескольких тикеров за период (тикеры без данных пропускаются)"""
+        histories = {}
+        for symbol in symbols:
+            closes = self.field(symbol, 'close', start_date, end_date)
+            if len(closes) > 0:
+                histories[symbol] = closes
+        return histories
+
+    def to_frame(self, symbol: str, start_date: Optional[DateLike] = None,
+                 end_date: Optional[DateLike] = None) -> pd.DataFrame:
+        """Свечи тикера в виде DataFrame с индексом по датам (совместимо с BarStore.from_frames)"""
+        candles = self.get(symbol, start_date, end_date)
+        index = pd.DatetimeIndex(candles['date'].astype('datetime64[ns]'), name='date')
+        return pd.DataFrame({name: candles[name] for name in CANDLE_FIELDS}, index=index)
+
+    def write(self, symbol: str, candles: np.ndarray, start_date: DateLike, end_date: DateLike):
+        """
+        Добавить загруженные свечи и отметить диапазон как покрытый
+
+        Args:
+            symbol: Тикер MOEX
+            candles: Массив CANDLE_DTYPE (новые записи заменяют старые на те же даты)
+            start_date: Начало загруженного диапазона
+            end_date: Конец загруженного диапазона
+        """
+        key = symbol.upper()
+        start, end = _to_date(start_date), _to_date(end_date)
+
+        # Текущий торговый день еще не завершен - его не отмечаем как покрытый
+        # (торговый день определяется по московскому времени, а не по часам хоста)
+        last_final_day = datetime.now(MOSCOW_TZ).date() - timedelta(days=1)
+        end = min(end, last_final_day)
+
+        existing = self._load(key)
+        merged = normalize_candles(np.concatenate([np.asarray(existing), np.asarray(candles, dtype=CANDLE_DTYPE)]))
+        self._atomic_write(self._data_path(key), lambda f: np.save(f, merged))
+
+        ranges = self.coverage(key)
+        if start <= end:
+            ranges = _merge_ranges(ranges + [(start, end)])
+        raw = [[s.isoformat(), e.isoformat()] for s, e in ranges]
+        self._atomic_write(self._coverage_path(key), lambda f: f.write(json.dumps(raw).encode('utf-8')))
+
+        logger.debug(f"Кэш свечей {self.board}/{key}: {len(merged)} записей, покрытие {raw}")
+
+    def _atomic_write(self, path: str, writer: Callable):
+        """Записать файл через временный файл и os.replace"""
+        fd, tmp_path = tempfile.mkstemp(dir=self._directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                writer(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    async def ensure(self, symbol: str, start_date: DateLike, end_date: DateLike,
+                     fetcher: CandleFetcher) -> np.ndarray:
+        """
+        Догрузить отсутствующие диапазоны и вернуть свечи за период
+
+        Args:
+            symbol: Тикер MOEX
+            start_date: Начальная дата
+            end_date: Конечная дата
+            fetcher: Корутина загрузки свечей из ISS за диапазон
+
+        Returns:
+            Срез memory-mapped массива CANDLE_DTYPE
+        """
+        key = symbol.upper()
+        lock = self._locks.setdefault(key, asyncio.Lock())
+
+        async with lock:
+            for missing_start, missing_end in self.missing_ranges(key, start_date, end_date):
+                logger.info(f"Загрузка свечей {key} за {missing_start} - {missing_end}")
+                candles = await fetcher(
+                    key,
+                    datetime.combine(missing_start, datetime.min.time()),
+                    datetime.combine(missing_end, datetime.min.time())
+                )
+                self.write(key, candles, missing_start, missing_end)
+
+        return self.get(key, start_date, end_date)
+
+    def clear(self, symbol: Optional[str] = None):
+        """Удалить кэш тикера (или весь кэш режима торгов)"""
+        symbols = [symbol.upper()] if symbol else self.symbols()
+        for key in symbols:
+            self._mapped.pop(key, None)
+            for path in (self._data_path(key), self._coverage_path(key)):
+                if os.path.exists(path):
+                    os.unlink(path)
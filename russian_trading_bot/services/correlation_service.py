@@ -0,0 +1,264 @@
+"""
+Shared correlation matrix service for Russian stocks
+Builds the returns matrix once and computes all pairwise correlations
+with NumPy; results are cached per (universe, window).
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+def returns_matrix(
+    symbols: Sequence[str],
+    price_histories: Mapping[str, Sequence],
+    window: Optional[int] = None
+) -> np.ndarray:
+    """
+    Simple returns of several price histories aligned on their most recent prices
+
+    Args:
+        symbols: Column order
+        price_histories: Symbol -> prices (Decimal, float or NumPy array), oldest first
+        window: Use only the last `window` prices of each history
+
+    Returns:
+        Array (T x N) of returns; shorter or missing histories are NaN-padded at the top
+    """
+    series = []
+    for symbol in symbols:
+        prices = price_histories.get(symbol)
+        if prices is None or len(prices) < 2:
+            series.append(np.empty(0))
+            continue
+        if window is not None:
+            prices = prices[-window:]
+        values = np.asarray(prices, dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            series.append(values[1:] / values[:-1] - 1.0)
+
+    length = max((len(returns) for returns in series), default=0)
+    matrix = np.full((length, len(symbols)), np.nan)
+    for column, returns in enumerate(series):
+        if len(returns):
+            matrix[length - len(returns):, column] = returns
+    matrix[~np.isfinite(matrix)] = np.nan
+    return matrix
+
+
+def pairwise_correlation(returns: np.ndarray, min_periods: int = 2) -> np.ndarray:
+    """
+    Pearson correlation of every column pair over their common observations
+
+    Equivalent to computing each pair separately on overlapping rows, but done
+    with a handful of matrix products.
+
+    Args:
+        returns: Array (T x N) with NaN for missing observations
+        min_periods: Minimum number of common observations per pair
+
+    Returns:
+        Array (N x N) clipped to [-1, 1]; NaN where there is too little overlap,
+        0.0 where one of the series is constant over the overlap
+    """
+    size = returns.shape[1]
+    if size == 0:
+        return np.empty((0, 0))
+
+    mask = ~np.isnan(returns)
+    weights = mask.astype(np.float64)
+
+    # Centering by column means keeps the sums of squares well conditioned;
+    # correlations do not depend on the shift
+    observations = weights.sum(axis=0)
+    column_means = np.where(mask, returns, 0.0).sum(axis=0) / np.maximum(observations, 1.0)
+    values = np.where(mask, returns - column_means, 0.0)
+
+    counts = weights.T @ weights
+    sums = values.T @ weights              # sums[i, j]: sum of column i over rows shared with j
+    squares = (values ** 2).T @ weights
+    products = values.T @ values
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = products - sums * sums.T / counts
+        variance = squares - sums ** 2 / counts
+        correlation = covariance / np.sqrt(np.clip(variance, 0.0, None) * np.clip(variance.T, 0.0, None))
+
+    # A series constant over the overlap has zero variance (up to rounding in the products)
+    flat = variance <= 1e-12 * squares
+    correlation = np.where(flat | flat.T, 0.0, correlation)
+    correlation = np.where(counts >= max(min_periods, 2), correlation, np.nan)
+    np.fill_diagonal(correlation, np.where(np.diag(counts) >= max(min_periods, 2), 1.0, np.nan))
+    return np.clip(correlation, -1.0, 1.0)
+
+
+@dataclass(frozen=True)
+class CorrelationMatrix:
+    """Correlation matrix of one universe; NaN marks pairs without enough data"""
+    symbols: Tuple[str, ...]
+    values: np.ndarray
+    window: Optional[int] = None
+
+    def __post_init__(self):
+        object.__setattr__(self, '_index', {symbol: i for i, symbol in enumerate(self.symbols)})
+        self.values.setflags(write=False)
+
+    def __contains__(self, pair: Tuple[str, str]) -> bool:
+        return self.get(pair) is not None
+
+    def __getitem__(self, pair: Tuple[str, str]) -> float:
+        value = self.get(pair)
+        if value is None:
+            raise KeyError(pair)
+        return value
+
+    def get(self, pair: Tuple[str, str], default: Optional[float] = None) -> Optional[float]:
+        """Correlation of a symbol pair, or default if it is unknown"""
+        i = self._index.get(pair[0])
+        j = self._index.get(pair[1])
+        if i is None or j is None:
+            return default
+        value = self.values[i, j]
+        return default if np.isnan(value) else float(value)
+
+    def to_pairs(self, symmetric: bool = True, diagonal: bool = False) -> Dict[Tuple[str, str], float]:
+        """
+        Dictionary form used by the risk checks
+
+        Args:
+            symmetric: Include both (a, b) and (b, a); otherwise only pairs in universe order
+            diagonal: Include (a, a) entries
+        """
+        size = len(self.symbols)
+        rows, columns = np.triu_indices(size, k=0 if diagonal else 1)
+        correlations = self.values[rows, columns]
+
+        pairs = {}
+        for i, j, value in zip(rows.tolist(), columns.tolist(), correlations.tolist()):
+            if value != value:  # NaN
+                continue
+            pairs[(self.symbols[i], self.symbols[j])] = value
+            if symmetric and i != j:
+                pairs[(self.symbols[j], self.symbols[i])] = value
+        return pairs
+
+    def pairs_above(self, threshold: float) -> List[Tuple[str, str, float]]:
+        """Pairs (in universe order) whose absolute correlation exceeds the threshold"""
+        rows, columns = np.triu_indices(len(self.symbols), k=1)
+        correlations = self.values[rows, columns]
+        with np.errstate(invalid='ignore'):
+            selected = np.abs(correlations) > threshold
+        return [
+            (self.symbols[i], self.symbols[j], float(value))
+            for i, j, value in zip(rows[selected], columns[selected], correlations[selected])
+        ]
+
+
+class CorrelationService:
+    """
+    Shared correlation engine for the risk and diversification managers.
+
+    Returns are built once per universe and the full matrix is computed with
+    matrix products instead of per-pair Python loops. Results are kept in a
+    small LRU keyed by (universe, window, min_periods) plus a digest of the
+    windowed histories, so repeated risk checks on the same data reuse the
+    matrix and any changed price (new or corrected) invalidates it.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        """
+        Args:
+            max_entries: Number of cached matrices
+        """
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Hashable, CorrelationMatrix]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _fingerprint(symbols: Sequence[str], price_histories: Mapping[str, Sequence],
+                     window: Optional[int] = None) -> Tuple:
+        fingerprint = []
+        for symbol in symbols:
+            prices = price_histories.get(symbol)
+            if prices is None or len(prices) == 0:
+                fingerprint.append(None)
+                continue
+            if window is not None:
+                prices = prices[-window:]
+            values = np.ascontiguousarray(prices, dtype=np.float64)
+            fingerprint.append((len(values), hashlib.blake2b(values.tobytes(), digest_size=16).digest()))
+        return tuple(fingerprint)
+
+    def matrix(
+        self,
+        symbols: Iterable[str],
+        price_histories: Mapping[str, Sequence],
+        window: Optional[int] = None,
+        min_periods: int = 2
+    ) -> CorrelationMatrix:
+        """
+        Correlation matrix of a universe
+
+        Args:
+            symbols: Universe (order is kept; duplicates are dropped)
+            price_histories: Symbol -> prices, oldest first; histories of different
+                length are aligned on their most recent prices
+            window: Use only the last `window` prices of each history
+            min_periods: Minimum number of common returns per pair
+
+        Returns:
+            Cached CorrelationMatrix
+        """
+        universe = tuple(dict.fromkeys(symbols))
+        key = (universe, window, min_periods, self._fingerprint(universe, price_histories, window))
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        returns = returns_matrix(universe, price_histories, window)
+        result = CorrelationMatrix(universe, pairwise_correlation(returns, min_periods), window)
+
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+        logger.debug(f"Correlation matrix built for {len(universe)} symbols ({len(returns)} returns)")
+        return result
+
+    def clear(self):
+        """Drop all cached matrices"""
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Cache metrics"""
+        return {'entries': len(self._cache), 'hits': self.hits, 'misses': self.misses}
+
+
+_shared_service: Optional[CorrelationService] = None
+_shared_lock = threading.Lock()
+
+
+def get_correlation_service() -> CorrelationService:
+    """Process-wide correlation service shared by managers created without one"""
+    global _shared_service
+    with _shared_lock:
+        if _shared_service is None:
+            _shared_service = CorrelationService()
+        return _shared_service
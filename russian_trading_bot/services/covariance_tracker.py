@@ -0,0 +1,266 @@
+"""
+Streaming EWMA covariance tracker for real-time risk
+Maintains an exponentially weighted covariance matrix of daily returns
+that is updated in O(n^2) per bar instead of being rebuilt from full
+price histories on every risk check.
+"""
+
+import logging
+import math
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+from .correlation_service import CorrelationMatrix, returns_matrix
+
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+class EWMACovarianceTracker:
+    """
+    Online exponentially weighted covariance of returns (RiskMetrics style).
+
+    Each bar updates S = decay * S + (1 - decay) * r r' for the symbols
+    present in the bar (zero-mean returns). A matching weight matrix tracks
+    1 - decay^k for every pair, so estimates are bias-corrected from the
+    first observation and symbols may join the universe at any time.
+    """
+
+    def __init__(
+        self,
+        symbols: Optional[Iterable[str]] = None,
+        decay: float = 0.94,
+        min_observations: int = 20
+    ):
+        """
+        Args:
+            symbols: Initial universe (more symbols are added on first price)
+            decay: EWMA decay factor per bar (0.94 is the RiskMetrics daily value)
+            min_observations: Returns required before a symbol or pair is reported
+        """
+        if not 0 < decay < 1:
+            raise ValueError("decay must be between 0 and 1")
+
+        self.decay = decay
+        self.min_observations = min_observations
+
+        self.symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._last_prices = np.empty(0)
+        self._cov = np.zeros((0, 0))
+        self._weights = np.zeros((0, 0))
+        self._counts = np.zeros((0, 0), dtype=np.int64)
+        self.bars = 0
+
+        for symbol in symbols or []:
+            self.add_symbol(symbol)
+
+    @classmethod
+    def from_price_histories(
+        cls,
+        price_histories: Mapping[str, Sequence],
+        decay: float = 0.94,
+        min_observations: int = 20
+    ) -> 'EWMACovarianceTracker':
+        """Tracker warmed up on price histories aligned on their latest prices"""
+        tracker = cls(price_histories.keys(), decay=decay, min_observations=min_observations)
+        tracker.seed(price_histories)
+        return tracker
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._index
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def add_symbol(self, symbol: str):
+        """Add a symbol to the universe (no-op if already tracked)"""
+        if symbol in self._index:
+            return
+
+        self._index[symbol] = len(self.symbols)
+        self.symbols.append(symbol)
+
+        self._last_prices = np.append(self._last_prices, np.nan)
+        self._cov = np.pad(self._cov, ((0, 1), (0, 1)))
+        self._weights = np.pad(self._weights, ((0, 1), (0, 1)))
+        self._counts = np.pad(self._counts, ((0, 1), (0, 1)))
+
+    def update(self, prices: Mapping[str, Union[float, int, object]]):
+        """
+        Add one bar of closing prices
+
+        Args:
+            prices: Symbol -> close of the new bar; symbols absent from the bar keep their state
+        """
+        for symbol in prices:
+            self.add_symbol(symbol)
+
+        new_prices = self._last_prices.copy()
+        for symbol, price in prices.items():
+            new_prices[self._index[symbol]] = float(price)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = new_prices / self._last_prices - 1.0
+
+        # The first price of a symbol only sets the reference for its next return
+        present = np.zeros(len(self.symbols), dtype=bool)
+        present[[self._index[symbol] for symbol in prices]] = True
+        valid = present & np.isfinite(returns) & (new_prices > 0)
+
+        self._last_prices = np.where(present & (new_prices > 0), new_prices, self._last_prices)
+        self._apply(np.where(valid, returns, np.nan))
+
+    def update_returns(self, returns: Mapping[str, float]):
+        """
+        Add one bar of returns directly
+
+        Args:
+            returns: Symbol -> simple return of the new bar
+        """
+        for symbol in returns:
+            self.add_symbol(symbol)
+
+        vector = np.full(len(self.symbols), np.nan)
+        for symbol, value in returns.items():
+            vector[self._index[symbol]] = float(value)
+        self._apply(vector)
+
+    def _apply(self, returns: np.ndarray):
+        """EWMA update of the pairs whose returns are both present"""
+        present = np.flatnonzero(~np.isnan(returns))
+        self.bars += 1
+        if len(present) == 0:
+            return
+
+        block = np.ix_(present, present)
+        values = returns[present]
+        decay = self.decay
+
+        self._cov[block] = decay * self._cov[block] + (1.0 - decay) * np.outer(values, values)
+        self._weights[block] = decay * self._weights[block] + (1.0 - decay)
+        self._counts[block] += 1
+
+    def seed(self, price_histories: Mapping[str, Sequence]):
+        """
+        Warm up from price histories (oldest first, aligned on latest prices)
+
+        Equivalent to calling update() for every historical bar.
+        """
+        symbols = list(price_histories)
+        for symbol in symbols:
+            self.add_symbol(symbol)
+
+        returns = returns_matrix(symbols, price_histories)
+        positions = np.array([self._index[symbol] for symbol in symbols], dtype=np.int64)
+        for row in returns:
+            vector = np.full(len(self.symbols), np.nan)
+            vector[positions] = row
+            self._apply(vector)
+
+        for symbol in symbols:
+            prices = price_histories[symbol]
+            if len(prices) > 0:
+                self._last_prices[self._index[symbol]] = float(prices[-1])
+
+    def observations(self, symbol: str) -> int:
+        """Number of returns seen for a symbol"""
+        i = self._index.get(symbol)
+        return 0 if i is None else int(self._counts[i, i])
+
+    def is_ready(self, symbols: Iterable[str]) -> bool:
+        """True if every symbol has at least min_observations returns"""
+        return all(self.observations(symbol) >= self.min_observations for symbol in symbols)
+
+    def _positions(self, symbols: Optional[Sequence[str]]) -> np.ndarray:
+        if symbols is None:
+            return np.arange(len(self.symbols))
+        return np.array([self._index[symbol] for symbol in symbols], dtype=np.int64)
+
+    def covariance_matrix(self, symbols: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        Bias-corrected covariance of daily returns
+
+        Returns:
+            Array (N x N); NaN for pairs with fewer than min_observations common returns
+        """
+        positions = self._positions(symbols)
+        block = np.ix_(positions, positions)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covariance = self._cov[block] / self._weights[block]
+        return np.where(self._counts[block] >= self.min_observations, covariance, np.nan)
+
+    def volatility(self, symbol: str, annualize: bool = False) -> Optional[float]:
+        """Daily (or annualized) volatility of a symbol, None until warmed up"""
+        i = self._index.get(symbol)
+        if i is None or self._counts[i, i] < self.min_observations:
+            return None
+        daily = math.sqrt(max(0.0, self._cov[i, i] / self._weights[i, i]))
+        return daily * math.sqrt(TRADING_DAYS_PER_YEAR) if annualize else daily
+
+    def correlation(self, symbol1: str, symbol2: str) -> Optional[float]:
+        """EWMA correlation of two symbols, None until warmed up"""
+        if symbol1 not in self._index or symbol2 not in self._index:
+            return None
+        return self.correlation_matrix([symbol1, symbol2]).get((symbol1, symbol2))
+
+    def correlation_matrix(self, symbols: Optional[Sequence[str]] = None) -> CorrelationMatrix:
+        """EWMA correlations in the same form as the shared correlation service"""
+        symbols = list(self.symbols) if symbols is None else list(symbols)
+        covariance = self.covariance_matrix(symbols)
+        std = np.sqrt(np.clip(np.diag(covariance), 0.0, None))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlation = covariance / np.outer(std, std)
+        correlation = np.where(np.outer(std, std) == 0, 0.0, correlation)
+        correlation = np.where(np.isnan(covariance), np.nan, np.clip(correlation, -1.0, 1.0))
+        if len(symbols):
+            np.fill_diagonal(correlation, np.where(np.isnan(np.diag(covariance)), np.nan, 1.0))
+        return CorrelationMatrix(tuple(symbols), correlation)
+
+    def portfolio_variance(
+        self,
+        weights: Union[Mapping[str, float], Sequence[float], np.ndarray],
+        symbols: Optional[Sequence[str]] = None
+    ) -> Optional[float]:
+        """
+        Daily variance w' S w of a portfolio
+
+        Args:
+            weights: Symbol -> weight, or a weight vector ordered like `symbols`
+            symbols: Order of a weight vector (defaults to the tracker universe)
+
+        Returns:
+            Variance, or None if a weighted symbol is not warmed up
+        """
+        if isinstance(weights, Mapping):
+            symbols = [symbol for symbol, weight in weights.items() if weight]
+            vector = np.array([float(weights[symbol]) for symbol in symbols])
+        else:
+            symbols = list(self.symbols) if symbols is None else list(symbols)
+            vector = np.asarray(weights, dtype=np.float64)
+
+        if not symbols:
+            return 0.0
+        if any(symbol not in self._index for symbol in symbols):
+            return None
+
+        covariance = self.covariance_matrix(symbols)
+        if np.isnan(covariance).any():
+            return None
+        return float(max(0.0, vector @ covariance @ vector))
+
+    def portfolio_volatility(
+        self,
+        weights: Union[Mapping[str, float], Sequence[float], np.ndarray],
+        symbols: Optional[Sequence[str]] = None,
+        annualize: bool = False
+    ) -> Optional[float]:
+        """Daily (or annualized) portfolio volatility, None if not warmed up"""
+        variance = self.portfolio_variance(weights, symbols)
+        if variance is None:
+            return None
+        daily = math.sqrt(variance)
+        return daily * math.sqrt(TRADING_DAYS_PER_YEAR) if annualize else daily
@@ -6,13 +6,13 @@ designed for identifying Russian companies, their stock symbols, and linking
 news mentions to MOEX tickers.
 """
 
-import re
 import json
 import logging
 from typing import List, Dict, Set, Optional, Tuple, Any
 from dataclasses import dataclass, asdict
 from pathlib import Path
 
+from .alias_matcher import AliasMatch, AliasMatcher, fold_case
 from .russian_nlp import RussianNLPPipeline
 
 logger = logging.getLogger(__name__)
@@ -48,6 +48,7 @@ class RussianCompanyDictionary:
         self.companies_data = self._build_companies_dictionary()
         self.ticker_to_company = self._build_ticker_mapping()
         self.alias_to_ticker = self._build_alias_mapping()
+        self.mention_matcher = self._build_mention_matcher()
         
     def _build_companies_dictionary(self) -> Dict[str, Dict[str, Any]]:
         """Создает полный словарь российских компаний."""
@@ -252,6 +253,18 @@ class RussianCompanyDictionary:
         
         return alias_mapping
     
+    def _build_mention_matcher(self) -> AliasMatcher:
+        """Создает автомат поиска алиасов (без учета регистра) и тикеров (с учетом регистра)."""
+        matcher = AliasMatcher(self.alias_to_ticker.items())
+        for ticker in self.companies_data:
+            matcher.add(ticker, ticker, case_sensitive=True)
+        matcher.build()
+        return matcher
+    
+    def find_mentions(self, text: str) -> List[AliasMatch]:
+        """Находит все упоминания алиасов и тикеров за один проход по тексту."""
+        return self.mention_matcher.find_all(text)
+    
     def get_ticker_by_alias(self, alias: str) -> Optional[str]:
         """Возвращает тикер по алиасу компании."""
         return self.alias_to_ticker.get(alias.lower())
@@ -285,9 +298,9 @@ class RussianEntityRecognizer:
         confidence = 0.0
         
         # Базовая уверенность от точности совпадения
-        if match_text.lower() == alias.lower():
+        if fold_case(match_text) == fold_case(alias):
             confidence += 0.6
-        elif alias.lower() in match_text.lower():
+        elif fold_case(alias) in fold_case(match_text):
             confidence += 0.4
         else:
             confidence += 0.2
@@ -323,67 +336,65 @@ class RussianEntityRecognizer:
         
         return min(1.0, max(0.0, confidence))
     
-    def _extract_company_mentions(self, text: str) -> List[CompanyEntity]:
+    def _extract_company_mentions(self, text: str,
+                                  mentions: Optional[List[AliasMatch]] = None) -> List[CompanyEntity]:
         """Извлекает упоминания компаний из текста."""
         companies = []
-        text_lower = text.lower()
+        if mentions is None:
+            mentions = self.company_dict.find_mentions(text)
         
-        # Ищем все возможные упоминания компаний
-        for alias, ticker in self.company_dict.alias_to_ticker.items():
-            # Используем регулярные выражения для поиска слов целиком
-            pattern = r'\b' + re.escape(alias) + r'\b'
-            matches = list(re.finditer(pattern, text_lower, re.IGNORECASE))
+        # Алиасы ищутся автоматом целыми словами без учета регистра
+        for match in mentions:
+            if match.case_sensitive:
+                continue
             
-            for match in matches:
-                start_pos = match.start()
-                end_pos = match.end()
-                match_text = text[start_pos:end_pos]
-                
-                # Получаем контекст вокруг упоминания (50 символов в каждую сторону)
-                context_start = max(0, start_pos - 50)
-                context_end = min(len(text), end_pos + 50)
-                context = text[context_start:context_end]
-                
-                # Вычисляем уверенность
-                confidence = self._calculate_confidence(match_text, alias, context)
-                
-                if confidence >= self.confidence_threshold:
-                    company_data = self.company_dict.get_company_data(ticker)
-                    if company_data:
-                        company_entity = CompanyEntity(
-                            name=company_data['name'],
-                            ticker=ticker,
-                            aliases=company_data['aliases'],
-                            sector=company_data['sector'],
-                            full_name=company_data['full_name'],
-                            confidence=confidence,
-                            start_pos=start_pos,
-                            end_pos=end_pos
-                        )
-                        companies.append(company_entity)
+            ticker = match.value
+            start_pos = match.start
+            end_pos = match.end
+            match_text = text[start_pos:end_pos]
+            
+            # Получаем контекст вокруг упоминания (50 символов в каждую сторону)
+            context_start = max(0, start_pos - 50)
+            context_end = min(len(text), end_pos + 50)
+            context = text[context_start:context_end]
+            
+            # Вычисляем уверенность
+            confidence = self._calculate_confidence(match_text, match.pattern, context)
+            
+            if confidence >= self.confidence_threshold:
+                company_data = self.company_dict.get_company_data(ticker)
+                if company_data:
+                    company_entity = CompanyEntity(
+                        name=company_data['name'],
+                        ticker=ticker,
+                        aliases=company_data['aliases'],
+                        sector=company_data['sector'],
+                        full_name=company_data['full_name'],
+                        confidence=confidence,
+                        start_pos=start_pos,
+                        end_pos=end_pos
+                    )
+                    companies.append(company_entity)
         
-        # Удаляем дубликаты и сортируем по позиции
+        # Удаляем дубликаты (при равной уверенности оставляем самое длинное совпадение)
+        # и сортируем по позиции
         unique_companies = {}
         for company in companies:
             key = f"{company.ticker}_{company.start_pos}"
-            if key not in unique_companies or company.confidence > unique_companies[key].confidence:
+            current = unique_companies.get(key)
+            if current is None or (company.confidence, company.end_pos) > (current.confidence, current.end_pos):
                 unique_companies[key] = company
         
         return sorted(unique_companies.values(), key=lambda x: x.start_pos)
     
-    def _extract_direct_tickers(self, text: str) -> List[str]:
+    def _extract_direct_tickers(self, text: str,
+                                mentions: Optional[List[AliasMatch]] = None) -> List[str]:
         """Извлекает прямые упоминания тикеров из текста."""
-        tickers = []
-        
-        # Паттерн для поиска тикеров (4-5 заглавных букв)
-        ticker_pattern = r'\b[A-Z]{3,5}\b'
-        matches = re.findall(ticker_pattern, text)
+        if mentions is None:
+            mentions = self.company_dict.find_mentions(text)
         
-        for match in matches:
-            if match in self.company_dict.get_all_tickers():
-                tickers.append(match)
-        
-        return list(set(tickers))
+        # Тикеры ищутся тем же автоматом с учетом регистра
+        return list({match.value for match in mentions if match.case_sensitive})
     
     def recognize_entities(self, text: str) -> EntityRecognitionResult:
         """Распознает все сущности российских компаний в тексте."""
@@ -400,11 +411,14 @@ class RussianEntityRecognizer:
             )
         
         try:
+            # Один проход автомата находит и алиасы, и тикеры
+            mentions = self.company_dict.find_mentions(text)
+            
             # Извлекаем упоминания компаний
-            companies = self._extract_company_mentions(text)
+            companies = self._extract_company_mentions(text, mentions)
             
             # Извлекаем прямые упоминания тикеров
-            direct_tickers = self._extract_direct_tickers(text)
+            direct_tickers = self._extract_direct_tickers(text, mentions)
             
             # Собираем все упомянутые тикеры
             all_tickers = list(set([company.ticker for company in companies] + direct_tickers))
@@ -0,0 +1,217 @@
+"""
+Incremental exposure index for pre-trade diversification checks
+Keeps per-position values, sector and group totals and a ranked list of
+positions so that a candidate order is evaluated as a delta against the
+current book instead of simulating and re-analyzing a full portfolio.
+"""
+
+import bisect
+from dataclasses import dataclass, field
+from typing import Collection, Dict, List, Mapping, Optional, Tuple
+
+
+@dataclass
+class ExposureDelta:
+    """Exposure of the traded symbol and its aggregates after a proposed fill"""
+    symbol: str
+    sector: str
+    quantity: int  # Post-trade quantity of the symbol
+    position_value: float
+    position_percent: float
+    sector_percent: float
+    group_percents: Dict[str, float] = field(default_factory=dict)  # Groups containing the symbol
+    num_positions: int = 0
+    num_sectors: int = 0
+    top_concentration: float = 0.0  # Percent of portfolio in the top-N positions
+    total_value: float = 0.0
+    cash_balance: float = 0.0
+
+
+class ExposureIndex:
+    """
+    Running exposure aggregates of a portfolio.
+
+    Positions are marked at the price of the last fill, like the trade
+    simulation of the diversification manager. evaluate() costs O(k) for
+    k = top_n, apply_fill() updates the index in place so accepted orders
+    are visible to the next candidate.
+    """
+
+    def __init__(
+        self,
+        portfolio,
+        sector_mapping: Mapping[str, str],
+        groups: Optional[Mapping[str, Collection[str]]] = None,
+        top_n: int = 5
+    ):
+        """
+        Args:
+            portfolio: Portfolio with positions and cash balance
+            sector_mapping: Symbol -> sector ('OTHER' for unmapped symbols)
+            groups: Group name -> member symbols (state-owned, sanctions-sensitive, ...)
+            top_n: Number of largest positions in the concentration measure
+        """
+        self.sector_mapping = sector_mapping
+        self.groups = {name: frozenset(members) for name, members in (groups or {}).items()}
+        self.top_n = top_n
+
+        self.cash_balance = float(portfolio.cash_balance)
+        self.positions_value = 0.0
+        self.quantities: Dict[str, int] = {}
+        self.position_values: Dict[str, float] = {}
+        self.sector_values: Dict[str, float] = {}
+        self.sector_counts: Dict[str, int] = {}
+        self.group_values: Dict[str, float] = {name: 0.0 for name in self.groups}
+        self._symbol_groups: Dict[str, Tuple[str, ...]] = {}
+        self._ranked: List[Tuple[float, str]] = []  # Ascending by value
+
+        for symbol, position in portfolio.positions.items():
+            self._set_position(symbol, position.quantity, float(position.market_value))
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.quantities
+
+    def __len__(self) -> int:
+        return len(self.quantities)
+
+    @property
+    def total_value(self) -> float:
+        """Positions plus cash"""
+        return self.positions_value + self.cash_balance
+
+    def sector_of(self, symbol: str) -> str:
+        return self.sector_mapping.get(symbol, 'OTHER')
+
+    def groups_of(self, symbol: str) -> Tuple[str, ...]:
+        """Names of the groups a symbol belongs to"""
+        names = self._symbol_groups.get(symbol)
+        if names is None:
+            names = tuple(name for name, members in self.groups.items() if symbol in members)
+            self._symbol_groups[symbol] = names
+        return names
+
+    def group_holdings(self, group: str) -> List[str]:
+        """Held symbols of a group"""
+        return [symbol for symbol in self.quantities if symbol in self.groups[group]]
+
+    def position_percent(self, symbol: str) -> float:
+        total = self.total_value
+        return self.position_values.get(symbol, 0.0) / total * 100 if total > 0 else 0.0
+
+    def sector_percent(self, sector: str) -> float:
+        total = self.total_value
+        return self.sector_values.get(sector, 0.0) / total * 100 if total > 0 else 0.0
+
+    def top_concentration(self, n: Optional[int] = None) -> float:
+        """Percent of portfolio held in the n largest positions"""
+        total = self.total_value
+        if total <= 0:
+            return 0.0
+        n = self.top_n if n is None else n
+        return sum(value for value, _ in self._ranked[-n:]) / total * 100 if n > 0 else 0.0
+
+    def _fill(self, symbol: str, action: str, quantity: int, price: float) -> Tuple[int, float, float]:
+        """Post-trade (quantity, position value, cash change) of a fill"""
+        held = self.quantities.get(symbol, 0)
+
+        if action == "BUY":
+            new_quantity = held + quantity
+            return new_quantity, price * new_quantity, -price * quantity
+
+        if action == "SELL" and held:
+            sold = min(quantity, held)
+            new_quantity = held - sold
+            return new_quantity, price * new_quantity, price * sold
+
+        return held, self.position_values.get(symbol, 0.0), 0.0
+
+    def evaluate(self, symbol: str, action: str, quantity: int, price: float) -> ExposureDelta:
+        """
+        Exposure after a proposed fill, without changing the index
+
+        Args:
+            symbol: Traded symbol
+            action: BUY or SELL
+            quantity: Order quantity (sells are capped at the held quantity)
+            price: Fill price
+        """
+        new_quantity, new_value, cash_change = self._fill(symbol, action, quantity, price)
+        old_value = self.position_values.get(symbol, 0.0)
+        value_change = new_value - old_value
+
+        cash_balance = self.cash_balance + cash_change
+        total = self.positions_value + value_change + cash_balance
+        scale = 100 / total if total > 0 else 0.0
+
+        sector = self.sector_of(symbol)
+        group_percents = {
+            name: (self.group_values[name] + value_change) * scale for name in self.groups_of(symbol)
+        }
+
+        held = symbol in self.quantities
+        opened = not held and new_quantity > 0
+        closed = held and new_quantity == 0
+        num_positions = len(self.quantities) + opened - closed
+
+        sector_count = self.sector_counts.get(sector, 0)
+        num_sectors = len(self.sector_counts)
+        if opened and sector_count == 0:
+            num_sectors += 1
+        elif closed and sector_count == 1:
+            num_sectors -= 1
+
+        # Top-N only changes through the traded symbol: look at n + 1 candidates
+        candidates = [value for value, ranked in self._ranked[-(self.top_n + 1):] if ranked != symbol]
+        if new_quantity > 0:
+            candidates.append(new_value)
+        top_values = sorted(candidates, reverse=True)[:self.top_n]
+
+        return ExposureDelta(
+            symbol=symbol,
+            sector=sector,
+            quantity=new_quantity,
+            position_value=new_value,
+            position_percent=new_value * scale,
+            sector_percent=(self.sector_values.get(sector, 0.0) + value_change) * scale,
+            group_percents=group_percents,
+            num_positions=num_positions,
+            num_sectors=num_sectors,
+            top_concentration=sum(top_values) * scale,
+            total_value=total,
+            cash_balance=cash_balance
+        )
+
+    def apply_fill(self, symbol: str, action: str, quantity: int, price: float):
+        """Update the index in place with an executed fill"""
+        new_quantity, new_value, cash_change = self._fill(symbol, action, quantity, price)
+        self.cash_balance += cash_change
+        self._set_position(symbol, new_quantity, new_value)
+
+    def _set_position(self, symbol: str, quantity: int, value: float):
+        old_value = self.position_values.pop(symbol, None)
+        sector = self.sector_of(symbol)
+        groups = self.groups_of(symbol)
+
+        if old_value is not None:
+            del self.quantities[symbol]
+            del self._ranked[bisect.bisect_left(self._ranked, (old_value, symbol))]
+            self.positions_value -= old_value
+            self.sector_values[sector] -= old_value
+            self.sector_counts[sector] -= 1
+            if self.sector_counts[sector] == 0:
+                del self.sector_counts[sector]
+                del self.sector_values[sector]
+            for name in groups:
+                self.group_values[name] -= old_value
+
+        if quantity <= 0:
+            return
+
+        self.quantities[symbol] = quantity
+        self.position_values[symbol] = value
+        bisect.insort(self._ranked, (value, symbol))
+        self.positions_value += value
+        self.sector_values[sector] = self.sector_values.get(sector, 0.0) + value
+        self.sector_counts[sector] = self.sector_counts.get(sector, 0) + 1
+        for name in groups:
+            self.group_values[name] += value
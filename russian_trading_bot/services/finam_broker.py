@@ -11,6 +11,7 @@ import aiohttp
 import json
 
 from russian_trading_bot.api.broker_interface import RussianBrokerInterface, BrokerType
+from russian_trading_bot.services.rate_limiter import RateLimiter
 from russian_trading_bot.models.trading import (
     TradeOrder, ExecutionResult, OrderStatus, Portfolio, Position,
     OrderType, OrderAction
@@ -23,7 +24,8 @@ logger = logging.getLogger(__name__)
 class FinamBroker(RussianBrokerInterface):
     """Finam API implementation (backup broker)"""
     
-    def __init__(self, access_token: str, client_id: str, sandbox: bool = True):
+    def __init__(self, access_token: str, client_id: str, sandbox: bool = True,
+                 rate_limiter: Optional[RateLimiter] = None):
         """
         Initialize Finam broker client
         
@@ -31,6 +33,7 @@ class FinamBroker(RussianBrokerInterface):
             access_token: Finam API access token
             client_id: Client ID for Finam API
             sandbox: Use sandbox environment for testing
+            rate_limiter: Optional limiter shared with other API clients
         """
         self.access_token = access_token
         self.client_id = client_id
@@ -45,6 +48,7 @@ class FinamBroker(RussianBrokerInterface):
             "accept": "application/json"
         }
         self.session: Optional[aiohttp.ClientSession] = None
+        self.rate_limiter = rate_limiter
         self.portfolio_id: Optional[str] = None
     
     async def _get_session(self) -> aiohttp.ClientSession:
@@ -58,6 +62,9 @@ class FinamBroker(RussianBrokerInterface):
     
     async def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Dict[str, Any]:
         """Make HTTP request to Finam API"""
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+        
         session = await self._get_session()
         url = f"{self.base_url}/{endpoint}"
         
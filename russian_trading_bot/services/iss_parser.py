@@ -0,0 +1,210 @@
+"""
+Columnar parser for MOEX ISS JSON blocks
+Колоночный разбор блоков columns/data ответов ISS MOEX
+
+Вместо dict(zip(columns, row)) и Decimal(str(x)) для каждой строки блок
+транспонируется один раз и каждая нужная колонка превращается в типизированный
+массив NumPy. Объекты MarketData создаются лениво, только при обращении.
+"""
+
+from collections.abc import Mapping
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from russian_trading_bot.models.market_data import MarketData, MOSCOW_TZ, validate_market_data_arrays
+from russian_trading_bot.services.candle_cache import CANDLE_DTYPE
+
+
+# Колонки ISS, используемые для снимка режима торгов
+BOARD_COLUMNS = ('LAST', 'PREVPRICE', 'VOLTODAY', 'BID', 'OFFER', 'OPEN', 'HIGH', 'LOW')
+
+
+def block_columns(block: Dict[str, Any], names: Sequence[str]) -> Dict[str, List[Any]]:
+    """
+    Транспонировать блок ISS и вернуть нужные колонки как списки
+
+    Отсутствующие в блоке колонки возвращаются списками None.
+    """
+    rows = block.get('data') or []
+    index = {name: position for position, name in enumerate(block.get('columns') or [])}
+    transposed = list(zip(*rows)) if rows else []
+
+    result = {}
+    for name in names:
+        position = index.get(name)
+        if position is None or not transposed:
+            result[name] = [None] * len(rows)
+        else:
+            result[name] = list(transposed[position])
+    return result
+
+
+def float_column(values: Sequence[Any]) -> np.ndarray:
+    """Колонка чисел ISS в float64 (None -> NaN)"""
+    return np.array(values, dtype=np.float64) if len(values) else np.empty(0, dtype=np.float64)
+
+
+def _decimal_or_none(value: float) -> Optional[Decimal]:
+    """Decimal из значения колонки; NaN и 0 считаются отсутствующими (как в построчном разборе)"""
+    if value != value or value == 0:
+        return None
+    return Decimal(str(value))
+
+
+def parse_history_candles(block: Dict[str, Any]) -> np.ndarray:
+    """
+    Разобрать блок history в массив свечей candle_cache.CANDLE_DTYPE
+
+    Строки без даты или цены закрытия пропускаются.
+    """
+    columns = block_columns(block, ('TRADEDATE', 'OPEN', 'HIGH', 'LOW', 'CLOSE', 'VOLUME'))
+
+    dates = columns['TRADEDATE']
+    close = float_column(columns['CLOSE'])
+    has_date = np.array([bool(value) for value in dates], dtype=bool)
+    keep = has_date & ~np.isnan(close)
+
+    candles = np.empty(int(keep.sum()), dtype=CANDLE_DTYPE)
+    if len(candles) == 0:
+        return candles
+
+    candles['date'] = np.array(dates, dtype=object)[keep].astype('datetime64[D]')
+    candles['open'] = float_column(columns['OPEN'])[keep]
+    candles['high'] = float_column(columns['HIGH'])[keep]
+    candles['low'] = float_column(columns['LOW'])[keep]
+    candles['close'] = close[keep]
+    candles['volume'] = np.nan_to_num(float_column(columns['VOLUME'])[keep], nan=0.0).astype(np.int64)
+    return candles
+
+
+class BoardSnapshot(Mapping):
+    """
+    Снимок режима торгов в виде структуры массивов.
+
+    Цены, объемы и котировки хранятся колонками float64/int64 (NaN - нет
+    значения), что позволяет фильтровать и ранжировать бумаги без создания
+    объектов. Как Mapping[str, MarketData] снимок создает MarketData только
+    для запрошенных тикеров и кэширует их.
+
+    Строки, которые не прошли бы проверку MarketData (нет цены, bid > ask,
+    несогласованные OHLC), отбрасываются при создании снимка и перечислены
+    в skipped, поэтому обращение к любому тикеру снимка не вызывает ошибку.
+    """
+
+    def __init__(self, symbols: Sequence[str], timestamp: datetime, columns: Dict[str, np.ndarray]):
+        self.timestamp = timestamp
+
+        size = len(symbols)
+        empty = np.full(size, np.nan)
+        last = columns.get('LAST', empty)
+        prev_close = columns.get('PREVPRICE', empty)
+        bid = columns.get('BID', empty)
+        ask = columns.get('OFFER', empty)
+        open_ = columns.get('OPEN', empty)
+        high = columns.get('HIGH', empty)
+        low = columns.get('LOW', empty)
+        volume = np.nan_to_num(columns.get('VOLTODAY', empty), nan=0.0).astype(np.int64)
+
+        # Цена: LAST, если сделок не было - PREVPRICE
+        price = np.where(np.isnan(last), np.nan_to_num(prev_close, nan=0.0), last)
+
+        valid = validate_market_data_arrays(list(symbols), price, volume, bid, ask, open_, high, low)
+        self.skipped: List[str] = [symbol for symbol, ok in zip(symbols, valid) if not ok]
+
+        self.symbols: List[str] = [symbol for symbol, ok in zip(symbols, valid) if ok]
+        self.last = last[valid]
+        self.prev_close = prev_close[valid]
+        self.bid = bid[valid]
+        self.ask = ask[valid]
+        self.open = open_[valid]
+        self.high = high[valid]
+        self.low = low[valid]
+        self.volume = volume[valid]
+        self.price = price[valid]
+
+        self._index = {symbol: position for position, symbol in enumerate(self.symbols)}
+        self._objects: Dict[str, MarketData] = {}
+
+    @classmethod
+    def from_block(cls, block: Dict[str, Any], symbols: Optional[Sequence[str]] = None,
+                   timestamp: Optional[datetime] = None) -> 'BoardSnapshot':
+        """
+        Разобрать блок securities/marketdata
+
+        Args:
+            block: Блок ISS с ключами columns и data
+            symbols: Оставить только эти тикеры (по умолчанию все)
+            timestamp: Время снимка (по умолчанию текущее московское)
+        """
+        columns = block_columns(block, ('SECID',) + BOARD_COLUMNS)
+        secids = columns.pop('SECID')
+
+        if symbols is not None:
+            wanted = set(symbols)
+            rows = [position for position, secid in enumerate(secids) if secid in wanted]
+        else:
+            rows = [position for position, secid in enumerate(secids) if secid]
+
+        arrays = {name: float_column(values)[rows] for name, values in columns.items()}
+        return cls([secids[row] for row in rows], timestamp or datetime.now(MOSCOW_TZ), arrays)
+
+    @property
+    def change_percent(self) -> np.ndarray:
+        """Изменение к предыдущему закрытию в процентах (NaN, если не определено)"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            valid = (self.price != 0) & (np.nan_to_num(self.prev_close) != 0)
+            return np.where(valid, (self.price - self.prev_close) / self.prev_close * 100, np.nan)
+
+    def index(self, symbol: str) -> int:
+        """Позиция тикера в колонках"""
+        return self._index[symbol]
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.symbols)
+
+    def __contains__(self, symbol: object) -> bool:
+        return symbol in self._index
+
+    def __getitem__(self, symbol: str) -> MarketData:
+        market_data = self._objects.get(symbol)
+        if market_data is None:
+            market_data = self._build(self._index[symbol])
+            self._objects[symbol] = market_data
+        return market_data
+
+    def _build(self, row: int) -> MarketData:
+        """Создать MarketData для строки (та же семантика, что и при построчном разборе)"""
+        price = _decimal_or_none(float(self.price[row]))
+        prev_close = _decimal_or_none(float(self.prev_close[row]))
+
+        change = None
+        change_percent = None
+        if price and prev_close:
+            change = price - prev_close
+            change_percent = (change / prev_close) * 100
+
+        return MarketData(
+            symbol=self.symbols[row],
+            timestamp=self.timestamp,
+            price=price if price else Decimal('0'),
+            volume=int(self.volume[row]),
+            bid=_decimal_or_none(float(self.bid[row])),
+            ask=_decimal_or_none(float(self.ask[row])),
+            currency="RUB",
+            open_price=_decimal_or_none(float(self.open[row])),
+            high_price=_decimal_or_none(float(self.high[row])),
+            low_price=_decimal_or_none(float(self.low[row])),
+            previous_close=prev_close,
+            change=change,
+            change_percent=change_percent
+        )
+
+    def to_dict(self) -> Dict[str, MarketData]:
+        """Все MarketData снимка (создаются сразу)"""
+        return {symbol: self[symbol] for symbol in self.symbols}
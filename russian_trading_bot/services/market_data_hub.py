@@ -0,0 +1,310 @@
+"""
+Market data fan-out hub for Russian stock market
+Polls the MOEX TQBR board once per interval and publishes read-only
+snapshots to any number of async subscribers.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Set
+
+from ..api.moex_interface import MOEXDataInterface
+from ..models.market_data import MarketData, MOSCOW_TZ
+from .iss_parser import BoardSnapshot
+
+
+logger = logging.getLogger(__name__)
+
+# Queued after the last snapshot of a closed subscription to wake its consumer
+_CLOSED = object()
+
+
+class SubscriptionClosed(Exception):
+    """Raised by Subscription.get after the subscription or the hub is closed"""
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """
+    One board poll: the same tick for every subscriber
+
+    The snapshot and its quotes mapping are read-only. The MarketData
+    objects are shared by all subscribers and must not be modified.
+    """
+    sequence: int
+    timestamp: datetime
+    quotes: Mapping[str, MarketData]
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.quotes
+
+    def get(self, symbol: str) -> Optional[MarketData]:
+        return self.quotes.get(symbol)
+
+    def filtered(self, symbols: Set[str]) -> 'MarketSnapshot':
+        """Snapshot restricted to the given symbols (same sequence and timestamp)"""
+        # Look up only the wanted symbols so a lazy board snapshot builds just their quotes
+        quotes = {symbol: self.quotes[symbol] for symbol in symbols if symbol in self.quotes}
+        return MarketSnapshot(self.sequence, self.timestamp, MappingProxyType(quotes))
+
+
+class Subscription:
+    """
+    Bounded snapshot queue of one subscriber
+
+    When the subscriber falls behind, the oldest snapshot is dropped so the
+    poller never blocks and the consumer always catches up to recent ticks.
+    After close() the consumer drains the queued snapshots, then get()
+    raises SubscriptionClosed and async iteration stops.
+    """
+
+    def __init__(self, hub: 'MarketDataHub', symbols: Optional[Set[str]], maxsize: int):
+        self.hub = hub
+        self.symbols = symbols
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.closed = False
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._close_queued = False
+
+    def _deliver(self, snapshot: MarketSnapshot):
+        if self.closed:
+            return
+        if self.symbols is not None:
+            snapshot = snapshot.filtered(self.symbols)
+            if not snapshot.quotes:
+                return
+
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(snapshot)
+
+    def _close(self):
+        if self.closed:
+            return
+        self.closed = True
+        # A full queue means nobody is waiting; get() checks closed once it is drained
+        if not self._queue.full():
+            self._queue.put_nowait(_CLOSED)
+            self._close_queued = True
+
+    def pending(self) -> int:
+        """Number of undelivered snapshots"""
+        return self._queue.qsize() - self._close_queued
+
+    async def get(self) -> MarketSnapshot:
+        """
+        Wait for the next snapshot
+
+        Raises:
+            SubscriptionClosed: The subscription is closed and no snapshots are left
+        """
+        if self.closed and self._queue.empty():
+            raise SubscriptionClosed()
+
+        snapshot = await self._queue.get()
+        if snapshot is _CLOSED:
+            # Keep the marker for other consumers waiting on this subscription
+            self._queue.put_nowait(_CLOSED)
+            raise SubscriptionClosed()
+        return snapshot
+
+    def get_nowait(self) -> Optional[MarketSnapshot]:
+        """Next snapshot if one is queued"""
+        try:
+            snapshot = self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return None
+        if snapshot is _CLOSED:
+            self._queue.put_nowait(_CLOSED)
+            return None
+        return snapshot
+
+    def close(self):
+        """Unsubscribe from the hub and wake a waiting consumer"""
+        self.hub.unsubscribe(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> MarketSnapshot:
+        try:
+            return await self.get()
+        except SubscriptionClosed:
+            raise StopAsyncIteration
+
+
+class MarketDataHub:
+    """
+    Single board poller with fan-out to subscribers.
+
+    Replaces per-component polling loops: quotes for the union of requested
+    symbols are fetched with one board request per interval, wrapped in a
+    read-only MarketSnapshot and pushed to every subscriber. Clients with
+    get_board_snapshot (MOEXClient) are polled through the lazy columnar
+    snapshot, so MarketData is only built for quotes a subscriber reads;
+    other clients fall back to get_multiple_stocks_data. Board rows that
+    are not valid MarketData (no price, bid > ask) are left out of the
+    snapshot and counted in invalid_quotes.
+
+    If the hub has no fixed symbols and a subscriber asks for every symbol,
+    the whole board is polled (get_board_snapshot clients only).
+    """
+
+    def __init__(self, client: MOEXDataInterface, symbols: Optional[Iterable[str]] = None,
+                 interval: float = 5.0):
+        """
+        Args:
+            client: MOEX data client
+            symbols: Symbols always polled (subscribers may add more; none
+                     with an all-symbols subscriber polls the whole board)
+            interval: Poll interval in seconds
+        """
+        self.client = client
+        self.symbols: Set[str] = {symbol.upper() for symbol in symbols or []}
+        self.interval = interval
+
+        self.subscriptions: List[Subscription] = []
+        self.latest: Optional[MarketSnapshot] = None
+        self.polls = 0
+        self.errors = 0
+        self.invalid_quotes = 0
+
+        self._sequence = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, symbols: Optional[Iterable[str]] = None, maxsize: int = 16) -> Subscription:
+        """
+        Subscribe to snapshots
+
+        Args:
+            symbols: Symbols of interest (None for every polled symbol)
+            maxsize: Queue size; older snapshots are dropped when it is full
+
+        Returns:
+            Subscription to read snapshots from
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive")
+
+        wanted = {symbol.upper() for symbol in symbols} if symbols is not None else None
+        subscription = Subscription(self, wanted, maxsize)
+        self.subscriptions.append(subscription)
+
+        # New subscribers start from the latest tick instead of waiting a full interval
+        if self.latest is not None:
+            subscription._deliver(self.latest)
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a subscription and wake its consumer"""
+        subscription._close()
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+
+    def polled_symbols(self) -> Optional[List[str]]:
+        """Union of hub symbols and symbols requested by subscribers (None for the whole board)"""
+        symbols = set(self.symbols)
+        whole_board = False
+        for subscription in self.subscriptions:
+            if subscription.symbols is None:
+                whole_board = True
+            else:
+                symbols |= subscription.symbols
+
+        if whole_board and not self.symbols:
+            return None
+        return sorted(symbols)
+
+    def publish(self, quotes: Mapping[str, MarketData]) -> MarketSnapshot:
+        """Wrap quotes into a snapshot and deliver it to all subscribers"""
+        if not isinstance(quotes, BoardSnapshot):
+            # Board snapshots are already read-only and build quotes lazily
+            quotes = MappingProxyType(dict(quotes))
+
+        self._sequence += 1
+        snapshot = MarketSnapshot(self._sequence, datetime.now(MOSCOW_TZ), quotes)
+        self.latest = snapshot
+
+        for subscription in list(self.subscriptions):
+            subscription._deliver(snapshot)
+
+        return snapshot
+
+    async def poll_once(self) -> Optional[MarketSnapshot]:
+        """Fetch the board once and publish the result"""
+        symbols = self.polled_symbols()
+        board_snapshot = getattr(self.client, 'get_board_snapshot', None)
+        if symbols == [] or (symbols is None and board_snapshot is None):
+            return None
+
+        try:
+            if board_snapshot is not None:
+                quotes = await board_snapshot(symbols)
+            else:
+                quotes = await self.client.get_multiple_stocks_data(symbols)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Market data hub poll failed: {e}")
+            return None
+
+        # Board rows that would fail MarketData validation are dropped by the snapshot
+        skipped = getattr(quotes, 'skipped', None)
+        if skipped:
+            self.invalid_quotes += len(skipped)
+            logger.warning(f"Market data hub skipped invalid quotes: {', '.join(skipped)}")
+
+        self.polls += 1
+        return self.publish(quotes)
+
+    async def _poll_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await self.poll_once()
+            await asyncio.sleep(max(0.0, self.interval - (loop.time() - started)))
+
+    def start(self):
+        """Start polling in the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._poll_loop())
+            logger.info(f"Market data hub started: interval {self.interval}s")
+
+    async def stop(self):
+        """Stop polling and close every subscription (consumers see the end of the stream)"""
+        for subscription in list(self.subscriptions):
+            self.unsubscribe(subscription)
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Market data hub stopped")
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def as_provider(self) -> Callable[[List[str]], Dict[str, MarketData]]:
+        """
+        Synchronous provider for PaperTradingEngine.set_market_data_provider
+
+        Returns quotes from the latest snapshot; safe to call from other threads
+        because snapshots are read-only and replaced atomically. The returned
+        MarketData objects are shared and must not be modified.
+        """
+        def provider(symbols: List[str]) -> Dict[str, MarketData]:
+            snapshot = self.latest
+            if snapshot is None:
+                return {}
+            return {symbol: snapshot.quotes[symbol] for symbol in symbols if symbol in snapshot.quotes}
+
+        return provider
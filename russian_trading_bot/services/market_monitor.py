@@ -21,6 +21,7 @@ from ..models.notifications import (
     NotificationPreferences, NotificationType
 )
 from .notification_service import NotificationService
+from .candle_cache import CandleCache
 
 
 @dataclass
@@ -53,10 +54,12 @@ class MarketCondition:
 class MarketMonitor:
     """Service for monitoring Russian market conditions and alerts"""
     
-    def __init__(self, notification_service: NotificationService, config: Dict[str, Any]):
+    def __init__(self, notification_service: NotificationService, config: Dict[str, Any],
+                 candle_cache: Optional[CandleCache] = None):
         """Initialize market monitor"""
         self.notification_service = notification_service
         self.config = config
+        self.candle_cache = candle_cache
         self.logger = logging.getLogger(__name__)
         self.moscow_tz = pytz.timezone('Europe/Moscow')
         
@@ -440,6 +443,13 @@ class MarketMonitor:
     
     async def _get_average_volume(self, symbol: str, days: int = 20) -> Optional[float]:
         """Get average volume for a symbol"""
+        # Prefer daily volumes from the shared candle cache (zero-copy view)
+        if self.candle_cache is not None:
+            volumes = self.candle_cache.field(symbol, 'volume', start_date=datetime.now() - timedelta(days=days))
+            volumes = volumes[volumes > 0]
+            if len(volumes) > 0:
+                return float(volumes.mean())
+        
         if symbol not in self.volume_history:
             return None
         
@@ -0,0 +1,136 @@
+"""
+MinHash/LSH index for near-duplicate detection
+MinHash-сигнатуры множеств шинглов и LSH-индекс с разбиением на полосы:
+поиск кандидатов за время, не зависящее от размера индекса
+"""
+
+import zlib
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def word_shingles(words: List[str], size: int) -> Set[str]:
+    """Шинглы из size подряд идущих слов (для коротких текстов - сами слова)"""
+    if len(words) < size:
+        return set(words)
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Разбиение сигнатуры на полосы (bands, rows)
+
+    Выбирается разбиение, у которого порог срабатывания LSH (1/b)^(1/r)
+    ближе всего к threshold снизу, чтобы кандидаты с похожестью около
+    порога не терялись.
+    """
+    best = (num_perm, 1)
+    best_gap = float('inf')
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        gap = threshold - (1 / bands) ** (1 / rows)
+        if 0 <= gap < best_gap:
+            best, best_gap = (bands, rows), gap
+    return best
+
+
+class MinHasher:
+    """MinHash-сигнатуры множеств строк (детерминированы между процессами)"""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        self.num_perm = num_perm
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, shingles: Iterable[str]) -> np.ndarray:
+        """Сигнатура множества шинглов (num_perm минимумов хэшей)"""
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode('utf-8')) for shingle in set(shingles)), dtype=np.uint64
+        )
+        if len(hashes) == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+
+        # Переполнение uint64 допустимо: результат остаётся хэшем
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+
+def estimated_jaccard(signature1: np.ndarray, signature2: np.ndarray) -> float:
+    """Оценка коэффициента Жаккара по двум сигнатурам"""
+    return float(np.mean(signature1 == signature2))
+
+
+class MinHashLSHIndex:
+    """LSH-индекс сигнатур: полосы сигнатуры служат ключами корзин"""
+
+    def __init__(self, threshold: float, num_perm: int = 128):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = optimal_bands(threshold, num_perm)
+        self._buckets: List[Dict[bytes, Set[Hashable]]] = [{} for _ in range(self.bands)]
+        self._signatures: Dict[Hashable, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._signatures
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        rows = self.rows
+        return [signature[band * rows:(band + 1) * rows].tobytes() for band in range(self.bands)]
+
+    def insert(self, key: Hashable, signature: np.ndarray):
+        """Добавить сигнатуру под ключом key"""
+        if key in self._signatures:
+            self.remove(key)
+        self._signatures[key] = signature
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            buckets.setdefault(band_key, set()).add(key)
+
+    def remove(self, key: Hashable):
+        """Удалить сигнатуру (нет ключа - ничего не делает)"""
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            bucket = buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del buckets[band_key]
+
+    def candidates(self, signature: np.ndarray) -> Set[Hashable]:
+        """Ключи, совпавшие с сигнатурой хотя бы в одной полосе"""
+        found: Set[Hashable] = set()
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            bucket = buckets.get(band_key)
+            if bucket:
+                found.update(bucket)
+        return found
+
+    def best_match(self, signature: np.ndarray) -> Optional[Tuple[Hashable, float]]:
+        """Наиболее похожий кандидат с оценкой похожести не ниже порога"""
+        keys = list(self.candidates(signature))
+        if not keys:
+            return None
+
+        stacked = np.stack([self._signatures[key] for key in keys])
+        similarities = np.count_nonzero(stacked == signature, axis=1) / self.num_perm
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        return keys[best], float(similarities[best])
+
+    def clear(self):
+        for buckets in self._buckets:
+            buckets.clear()
+        self._signatures.clear()
@@ -7,22 +7,37 @@ import asyncio
 import aiohttp
 import logging
 from typing import List, Dict, Optional, Any, Tuple
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 from decimal import Decimal
 import json
-import time
 from dataclasses import asdict
 
+import numpy as np
+
 from russian_trading_bot.models.market_data import (
     MarketData, RussianStock, MOEXMarketData, MOEXOrderBook, 
     MOEXTrade, MarketStatus, MOEXTradingSession, TechnicalIndicators,
-    validate_moex_ticker, MOSCOW_TZ
+    validate_moex_ticker, validate_market_data_arrays, MOSCOW_TZ
 )
 from russian_trading_bot.api.moex_interface import MOEXDataInterface
+from russian_trading_bot.services.candle_cache import CandleCache, make_candles, normalize_candles
+from russian_trading_bot.services.iss_parser import BoardSnapshot, parse_history_candles
+from russian_trading_bot.services.rate_limiter import RateLimiter
+from russian_trading_bot.services.response_cache import ResponseCache, CacheState
 
 
 logger = logging.getLogger(__name__)
 
+# Размер страницы ISS для исторических данных
+HISTORY_PAGE_SIZE = 100
+
+# Календарных дней в одном запросе массовой загрузки (не больше 90 торговых дней,
+# заведомо меньше одной страницы ISS, поэтому лишний запрос пустой страницы не нужен)
+HISTORY_CHUNK_DAYS = 126
+
+# Сколько секунд после TTL котировки и снимок режима торгов можно отдавать, пока они обновляются
+QUOTE_STALE_TTL = 2
+
 
 class MOEXAPIError(Exception):
     """Исключение для ошибок MOEX API"""
@@ -39,38 +54,6 @@ class MOEXConnectionError(MOEXAPIError):
     pass
 
 
-class RateLimiter:
-    """Ограничитель скорости запросов к MOEX API"""
-    
-    def __init__(self, max_requests: int = 60, time_window: int = 60):
-        """
-        Args:
-            max_requests: Максимальное количество запросов
-            time_window: Временное окно в секундах
-        """
-        self.max_requests = max_requests
-        self.time_window = time_window
-        self.requests = []
-        self._lock = asyncio.Lock()
-    
-    async def acquire(self):
-        """Получить разрешение на выполнение запроса"""
-        async with self._lock:
-            now = time.time()
-            # Удаляем старые запросы
-            self.requests = [req_time for req_time in self.requests 
-                           if now - req_time < self.time_window]
-            
-            if len(self.requests) >= self.max_requests:
-                sleep_time = self.time_window - (now - self.requests[0])
-                if sleep_time > 0:
-                    logger.warning(f"Превышен лимит запросов к MOEX API. Ожидание {sleep_time:.2f} сек")
-                    await asyncio.sleep(sleep_time)
-                    return await self.acquire()
-            
-            self.requests.append(now)
-
-
 class MOEXClient(MOEXDataInterface):
     """Клиент для работы с MOEX API"""
     
@@ -80,7 +63,11 @@ class MOEXClient(MOEXDataInterface):
                  api_key: Optional[str] = None,
                  max_requests_per_minute: int = 60,
                  timeout: int = 30,
-                 max_retries: int = 3):
+                 max_retries: int = 3,
+                 candle_cache: Optional[CandleCache] = None,
+                 max_concurrent_requests: int = 8,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 response_cache: Optional[ResponseCache] = None):
         """
         Инициализация MOEX клиента
         
@@ -89,17 +76,27 @@ class MOEXClient(MOEXDataInterface):
             max_requests_per_minute: Максимум запросов в минуту
             timeout: Таймаут запроса в секундах
             max_retries: Максимальное количество повторных попыток
+            candle_cache: Локальный кэш дневных свечей для исторических данных
+            max_concurrent_requests: Максимум одновременных запросов при массовой загрузке
+            rate_limiter: Общий ограничитель скорости (по умолчанию создается собственный)
+            response_cache: Кэш ответов API (по умолчанию LRU/TTL кэш с настройками по умолчанию)
         """
         self.api_key = api_key
         self.timeout = timeout
         self.max_retries = max_retries
-        self.rate_limiter = RateLimiter(max_requests_per_minute, 60)
+        self.rate_limiter = rate_limiter or RateLimiter(max_requests_per_minute, 60)
         self.session: Optional[aiohttp.ClientSession] = None
         
-        # Кэш для данных
-        self._cache = {}
-        self._cache_ttl = {}
-        self._default_cache_duration = 5  # секунд
+        # Кэш ответов: LRU + TTL + stale-while-revalidate
+        self.response_cache = response_cache if response_cache is not None else ResponseCache(default_ttl=5)
+        
+        # Выполняющиеся запросы по ключу кэша (single-flight)
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.coalesced_requests = 0
+        
+        # Персистентный кэш исторических свечей
+        self.candle_cache = candle_cache
+        self.max_concurrent_requests = max_concurrent_requests
     
     async def __aenter__(self):
         """Асинхронный контекстный менеджер - вход"""
@@ -128,6 +125,10 @@ class MOEXClient(MOEXDataInterface):
     
     async def close(self):
         """Закрыть HTTP сессию"""
+        for task in list(self._in_flight.values()):
+            task.cancel()
+        self._in_flight.clear()
+        
         if self.session and not self.session.closed:
             await self.session.close()
     
@@ -138,37 +139,46 @@ class MOEXClient(MOEXDataInterface):
     
     def _is_cache_valid(self, cache_key: str) -> bool:
         """Проверить валидность кэша"""
-        if cache_key not in self._cache_ttl:
-            return False
-        return time.time() < self._cache_ttl[cache_key]
+        return self.response_cache.peek(cache_key) is CacheState.FRESH
     
     def _set_cache(self, cache_key: str, data: Any, ttl: Optional[int] = None):
         """Установить данные в кэш"""
-        if ttl is None:
-            ttl = self._default_cache_duration
-        
-        self._cache[cache_key] = data
-        self._cache_ttl[cache_key] = time.time() + ttl
+        self.response_cache.set(cache_key, data, ttl)
     
     def _get_cache(self, cache_key: str) -> Optional[Any]:
         """Получить данные из кэша"""
-        if self._is_cache_valid(cache_key):
-            return self._cache[cache_key]
-        return None
+        data, state = self.response_cache.get(cache_key)
+        return data if state is CacheState.FRESH else None
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Метрики кэша ответов (попадания, промахи, вытеснения, размер, объединенные запросы)"""
+        stats = self.response_cache.stats()
+        stats['coalesced'] = self.coalesced_requests
+        stats['in_flight'] = len(self._in_flight)
+        return stats
     
     async def _make_request(self, 
                           endpoint: str, 
                           params: Optional[Dict[str, Any]] = None,
                           use_cache: bool = True,
-                          cache_ttl: Optional[int] = None) -> Dict[str, Any]:
+                          cache_ttl: Optional[int] = None,
+                          stale_ttl: Optional[float] = None) -> Dict[str, Any]:
         """
         Выполнить HTTP запрос к MOEX API
         
+        Свежий ответ из кэша возвращается сразу. Устаревший (в пределах
+        stale_ttl записи) тоже возвращается сразу, а обновление запускается
+        одной фоновой задачей на ключ. Одновременные запросы с одинаковым
+        ключом объединяются: HTTP запрос выполняет первый вызов, остальные
+        ждут его результата (single-flight).
+        
         Args:
             endpoint: Конечная точка API
             params: Параметры запроса
             use_cache: Использовать кэширование
             cache_ttl: Время жизни кэша в секундах
+            stale_ttl: Сколько секунд после cache_ttl можно отдавать устаревший ответ
+                       (по умолчанию stale_ttl кэша; котировки используют QUOTE_STALE_TTL)
             
         Returns:
             Ответ API в виде словаря
@@ -184,10 +194,65 @@ class MOEXClient(MOEXDataInterface):
         # Проверяем кэш
         cache_key = self._get_cache_key(endpoint, params)
         if use_cache:
-            cached_data = self._get_cache(cache_key)
-            if cached_data is not None:
+            cached_data, state = self.response_cache.get(cache_key)
+            if state is CacheState.FRESH:
                 return cached_data
+            if state is CacheState.STALE:
+                self._schedule_revalidation(cache_key, endpoint, params, cache_ttl, stale_ttl)
+                return cached_data
+        
+        # Отмена одного из ожидающих не должна отменять общий запрос
+        return await asyncio.shield(self._shared_fetch(cache_key, endpoint, params, use_cache, cache_ttl, stale_ttl))
+    
+    def _shared_fetch(self, 
+                      cache_key: str, 
+                      endpoint: str, 
+                      params: Dict[str, Any],
+                      use_cache: bool,
+                      cache_ttl: Optional[int],
+                      stale_ttl: Optional[float] = None) -> asyncio.Task:
+        """Вернуть выполняющийся запрос с этим ключом или запустить новый"""
+        task = self._in_flight.get(cache_key)
+        if task is not None:
+            self.coalesced_requests += 1
+            return task
+        
+        params = dict(params)
+        
+        async def fetch_and_store():
+            data = await self._fetch(endpoint, params)
+            if use_cache:
+                self.response_cache.set(cache_key, data, cache_ttl, stale_ttl=stale_ttl)
+            return data
         
+        task = asyncio.ensure_future(fetch_and_store())
+        self._in_flight[cache_key] = task
+        
+        def release(finished: asyncio.Task):
+            if self._in_flight.get(cache_key) is finished:
+                del self._in_flight[cache_key]
+        
+        task.add_done_callback(release)
+        return task
+    
+    def _schedule_revalidation(self, 
+                               cache_key: str, 
+                               endpoint: str, 
+                               params: Dict[str, Any],
+                               cache_ttl: Optional[int],
+                               stale_ttl: Optional[float] = None):
+        """Запустить фоновое обновление устаревшей записи (не более одного на ключ)"""
+        if cache_key in self._in_flight:
+            return
+        
+        def log_failure(task: asyncio.Task):
+            if not task.cancelled() and task.exception() is not None:
+                logger.warning(f"Не удалось обновить кэш {endpoint}: {task.exception()}")
+        
+        self._shared_fetch(cache_key, endpoint, params, True, cache_ttl, stale_ttl).add_done_callback(log_failure)
+    
+    async def _fetch(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Выполнить HTTP запрос к MOEX API без кэша (с ограничением скорости и повторами)"""
         # Ограничение скорости запросов
         await self.rate_limiter.acquire()
         
@@ -196,6 +261,7 @@ class MOEXClient(MOEXDataInterface):
         url = f"{self.BASE_URL}{endpoint}"
         
         # Добавляем формат JSON
+        params = dict(params)
         params['iss.json'] = 'extended'
         params['iss.meta'] = 'off'
         
@@ -212,13 +278,7 @@ class MOEXClient(MOEXDataInterface):
                         continue
                     
                     if response.status == 200:
-                        data = await response.json()
-                        
-                        # Сохраняем в кэш
-                        if use_cache:
-                            self._set_cache(cache_key, data, cache_ttl)
-                        
-                        return data
+                        return await response.json()
                     
                     elif response.status >= 500:
                         # Серверная ошибка - повторяем
@@ -267,7 +327,7 @@ class MOEXClient(MOEXDataInterface):
             # Получаем данные с рынка акций
             endpoint = f"/iss/engines/stock/markets/shares/boards/TQBR/securities/{symbol}.json"
             
-            data = await self._make_request(endpoint)
+            data = await self._make_request(endpoint, stale_ttl=QUOTE_STALE_TTL)
             
             if not data or 'securities' not in data:
                 logger.warning(f"Нет данных для тикера {symbol}")
@@ -334,76 +394,53 @@ class MOEXClient(MOEXDataInterface):
         Returns:
             Словарь с тикерами в качестве ключей и объектами MarketData в качестве значений
         """
-        if not symbols:
-            return {}
+        snapshot = await self.get_board_snapshot(symbols)
         
-        # Валидируем все тикеры
-        valid_symbols = []
-        for symbol in symbols:
-            if validate_moex_ticker(symbol):
-                valid_symbols.append(symbol.upper())
-            else:
-                logger.warning(f"Пропускаем неверный тикер: {symbol}")
+        try:
+            return snapshot.to_dict()
+        except Exception as e:
+            logger.error(f"Ошибка получения данных для множественных тикеров: {e}")
+            raise MOEXAPIError(f"Не удалось получить данные для тикеров: {e}")
+    
+    async def get_board_snapshot(self, symbols: Optional[List[str]] = None) -> BoardSnapshot:
+        """
+        Получить снимок режима TQBR в колоночном виде
         
-        if not valid_symbols:
-            return {}
+        Ответ ISS разбирается сразу в массивы NumPy; объекты MarketData
+        создаются только при обращении к конкретному тикеру.
         
-        try:
+        Args:
+            symbols: Список тикеров MOEX (None - все бумаги режима)
+            
+        Returns:
+            BoardSnapshot (Mapping тикер -> MarketData с колонками price/volume/bid/ask/...)
+        """
+        valid_symbols = None
+        params = {}
+        
+        if symbols is not None:
+            # Валидируем все тикеры
+            valid_symbols = []
+            for symbol in symbols:
+                if validate_moex_ticker(symbol):
+                    valid_symbols.append(symbol.upper())
+                else:
+                    logger.warning(f"Пропускаем неверный тикер: {symbol}")
+            
+            if not valid_symbols:
+                return BoardSnapshot([], datetime.now(MOSCOW_TZ), {})
+            
             # Получаем данные для всех акций одним запросом
-            symbols_str = ','.join(valid_symbols)
+            params = {'securities': ','.join(valid_symbols)}
+        
+        try:
             endpoint = "/iss/engines/stock/markets/shares/boards/TQBR/securities.json"
-            params = {'securities': symbols_str}
+            data = await self._make_request(endpoint, params, stale_ttl=QUOTE_STALE_TTL)
             
-            data = await self._make_request(endpoint, params)
+            if not data or 'securities' not in data:
+                return BoardSnapshot([], datetime.now(MOSCOW_TZ), {})
             
-            result = {}
-            
-            if data and 'securities' in data:
-                columns = data['securities']['columns']
-                
-                for row in data['securities']['data']:
-                    security_dict = dict(zip(columns, row))
-                    symbol = security_dict.get('SECID')
-                    
-                    if symbol not in valid_symbols:
-                        continue
-                    
-                    # Извлекаем данные аналогично get_stock_data
-                    price = security_dict.get('LAST')
-                    if price is None:
-                        price = security_dict.get('PREVPRICE', 0)
-                    
-                    volume = security_dict.get('VOLTODAY', 0)
-                    bid = security_dict.get('BID')
-                    ask = security_dict.get('OFFER')
-                    open_price = security_dict.get('OPEN')
-                    high_price = security_dict.get('HIGH')
-                    low_price = security_dict.get('LOW')
-                    prev_close = security_dict.get('PREVPRICE')
-                    
-                    change = None
-                    change_percent = None
-                    if price and prev_close:
-                        change = Decimal(str(price)) - Decimal(str(prev_close))
-                        change_percent = (change / Decimal(str(prev_close))) * 100
-                    
-                    result[symbol] = MarketData(
-                        symbol=symbol,
-                        timestamp=datetime.now(MOSCOW_TZ),
-                        price=Decimal(str(price)) if price else Decimal('0'),
-                        volume=int(volume) if volume else 0,
-                        bid=Decimal(str(bid)) if bid else None,
-                        ask=Decimal(str(ask)) if ask else None,
-                        currency="RUB",
-                        open_price=Decimal(str(open_price)) if open_price else None,
-                        high_price=Decimal(str(high_price)) if high_price else None,
-                        low_price=Decimal(str(low_price)) if low_price else None,
-                        previous_close=Decimal(str(prev_close)) if prev_close else None,
-                        change=change,
-                        change_percent=change_percent
-                    )
-            
-            return result
+            return BoardSnapshot.from_block(data['securities'], valid_symbols)
             
         except Exception as e:
             logger.error(f"Ошибка получения данных для множественных тикеров: {e}")
@@ -424,80 +461,217 @@ class MOEXClient(MOEXDataInterface):
         Returns:
             Список объектов MarketData
         """
+        candles = await self.get_historical_candles(symbol, start_date, end_date)
+        return self._candles_to_market_data(symbol.upper(), candles)
+    
+    def _candles_to_market_data(self, symbol: str, candles: np.ndarray) -> List[MarketData]:
+        """Преобразовать дневные свечи в список MarketData"""
+        # Свечи проверяются одним векторным проходом, объекты создаются без повторной валидации
+        valid = validate_market_data_arrays(symbol, candles['close'], candles['volume'],
+                                            opens=candles['open'], highs=candles['high'], lows=candles['low'])
+        if not valid.all():
+            bad_date = candles['date'][~valid][0]
+            logger.error(f"Некорректная свеча {symbol} за {bad_date}")
+            raise MOEXAPIError(f"Не удалось получить исторические данные для {symbol}: некорректная свеча за {bad_date}")
+        
+        def to_decimal(value: float) -> Optional[Decimal]:
+            return Decimal(str(value)) if value and value == value else None
+        
+        all_data = []
+        for trade_date, open_price, high_price, low_price, close_price, volume in candles.tolist():
+            # Время закрытия основной сессии
+            trade_datetime = MOSCOW_TZ.localize(datetime.combine(trade_date, time(18, 45)))
+            
+            all_data.append(MarketData.trusted(
+                symbol=symbol,
+                timestamp=trade_datetime,
+                price=Decimal(str(close_price)),
+                volume=volume,
+                currency="RUB",
+                open_price=to_decimal(open_price),
+                high_price=to_decimal(high_price),
+                low_price=to_decimal(low_price)
+            ))
+        
+        return all_data
+    
+    async def get_historical_candles(self, 
+                                   symbol: str, 
+                                   start_date: datetime, 
+                                   end_date: datetime) -> np.ndarray:
+        """
+        Получить дневные свечи российской акции в виде массива NumPy
+        
+        Если подключен candle_cache, из ISS загружаются только отсутствующие
+        в кэше диапазоны, а результат возвращается без копирования
+        (срез memory-mapped файла).
+        
+        Args:
+            symbol: Тикер MOEX
+            start_date: Начальная дата
+            end_date: Конечная дата
+            
+        Returns:
+            Структурированный массив candle_cache.CANDLE_DTYPE, отсортированный по дате
+        """
         if not validate_moex_ticker(symbol):
             raise ValueError(f"Неверный формат тикера MOEX: {symbol}")
         
         symbol = symbol.upper()
         
+        try:
+            if self.candle_cache is not None:
+                return await self.candle_cache.ensure(symbol, start_date, end_date, self._fetch_history_candles)
+            return await self._fetch_history_candles(symbol, start_date, end_date)
+            
+        except Exception as e:
+            logger.error(f"Ошибка получения исторических данных для {symbol}: {e}")
+            raise MOEXAPIError(f"Не удалось получить исторические данные для {symbol}: {e}")
+    
+    async def _fetch_history_candles(self, 
+                                   symbol: str, 
+                                   start_date: datetime, 
+                                   end_date: datetime) -> np.ndarray:
+        """Загрузить дневные свечи из ISS постранично"""
         # Форматируем даты
         start_str = start_date.strftime('%Y-%m-%d')
         end_str = end_date.strftime('%Y-%m-%d')
         
-        try:
-            endpoint = f"/iss/history/engines/stock/markets/shares/boards/TQBR/securities/{symbol}.json"
-            params = {
-                'from': start_str,
-                'till': end_str,
-                'start': 0
-            }
+        endpoint = f"/iss/history/engines/stock/markets/shares/boards/TQBR/securities/{symbol}.json"
+        params = {
+            'from': start_str,
+            'till': end_str,
+            'start': 0
+        }
+        
+        pages = []
+        
+        # MOEX API возвращает данные порциями, нужно получить все
+        while True:
+            data = await self._make_request(endpoint, params, use_cache=False)
             
-            all_data = []
+            if not data or 'history' not in data:
+                break
             
-            # MOEX API возвращает данные порциями, нужно получить все
-            while True:
-                data = await self._make_request(endpoint, params, use_cache=False)
-                
-                if not data or 'history' not in data:
-                    break
-                
-                history_data = data['history']['data']
-                if not history_data:
-                    break
-                
-                columns = data['history']['columns']
-                
-                for row in history_data:
-                    row_dict = dict(zip(columns, row))
-                    
-                    trade_date = row_dict.get('TRADEDATE')
-                    if not trade_date:
-                        continue
-                    
-                    # Парсим дату
-                    trade_datetime = datetime.strptime(trade_date, '%Y-%m-%d')
-                    trade_datetime = MOSCOW_TZ.localize(trade_datetime.replace(hour=18, minute=45))
-                    
-                    close_price = row_dict.get('CLOSE')
-                    if close_price is None:
-                        continue
-                    
-                    volume = row_dict.get('VOLUME', 0)
-                    open_price = row_dict.get('OPEN')
-                    high_price = row_dict.get('HIGH')
-                    low_price = row_dict.get('LOW')
-                    
-                    all_data.append(MarketData(
-                        symbol=symbol,
-                        timestamp=trade_datetime,
-                        price=Decimal(str(close_price)),
-                        volume=int(volume) if volume else 0,
-                        currency="RUB",
-                        open_price=Decimal(str(open_price)) if open_price else None,
-                        high_price=Decimal(str(high_price)) if high_price else None,
-                        low_price=Decimal(str(low_price)) if low_price else None
-                    ))
-                
-                # Проверяем, есть ли еще данные
-                if len(history_data) < 100:  # MOEX обычно возвращает по 100 записей
-                    break
-                
-                params['start'] += len(history_data)
+            history_data = data['history']['data']
+            if not history_data:
+                break
             
-            return sorted(all_data, key=lambda x: x.timestamp)
+            candles = parse_history_candles(data['history'])
+            pages.append(candles)
             
-        except Exception as e:
-            logger.error(f"Ошибка получения исторических данных для {symbol}: {e}")
-            raise MOEXAPIError(f"Не удалось получить исторические данные для {symbol}: {e}")
+            # Проверяем, есть ли еще данные
+            if len(history_data) < HISTORY_PAGE_SIZE:  # MOEX обычно возвращает по 100 записей
+                break
+            
+            # Полная страница, которая уже дошла до конца диапазона, - последняя
+            if len(candles) and candles['date'][-1] >= np.datetime64(end_str, 'D'):
+                break
+            
+            params['start'] += len(history_data)
+        
+        return normalize_candles(np.concatenate(pages)) if pages else make_candles([])
+    
+    async def get_bulk_historical_candles(self, 
+                                        ranges: Dict[str, Tuple[datetime, datetime]],
+                                        max_concurrency: Optional[int] = None,
+                                        chunk_days: int = HISTORY_CHUNK_DAYS) -> Dict[str, np.ndarray]:
+        """
+        Массовая загрузка дневных свечей для многих тикеров
+        
+        Диапазоны дат разбиваются на части примерно по одной странице ISS,
+        которые загружаются параллельно (через общий RateLimiter) с
+        ограничением числа одновременных запросов. Части склеиваются в
+        порядке дат. При подключенном candle_cache загружаются только
+        отсутствующие в кэше диапазоны (через CandleCache.ensure).
+        
+        Args:
+            ranges: Тикер -> (начальная дата, конечная дата)
+            max_concurrency: Максимум одновременных запросов (по умолчанию max_concurrent_requests)
+            chunk_days: Размер части диапазона в календарных днях
+            
+        Returns:
+            Словарь тикер -> массив свечей candle_cache.CANDLE_DTYPE. Тикеры с
+            неверным форматом или ошибкой загрузки пропускаются
+        """
+        if chunk_days < 1:
+            raise ValueError("chunk_days должен быть положительным")
+        
+        valid_ranges = {}
+        for symbol, (start_date, end_date) in ranges.items():
+            if validate_moex_ticker(symbol):
+                valid_ranges[symbol.upper()] = (start_date, end_date)
+            else:
+                logger.warning(f"Пропускаем неверный тикер: {symbol}")
+        
+        if not valid_ranges:
+            return {}
+        
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrent_requests)
+        
+        async def fetch_chunk(symbol: str, chunk_start: datetime, chunk_end: datetime) -> np.ndarray:
+            async with semaphore:
+                return await self._fetch_history_candles(symbol, chunk_start, chunk_end)
+        
+        async def fetch_range(symbol: str, range_start: datetime, range_end: datetime) -> np.ndarray:
+            chunks = split_date_range(range_start, range_end, chunk_days)
+            parts = await asyncio.gather(*(fetch_chunk(symbol, chunk_start, chunk_end)
+                                           for chunk_start, chunk_end in chunks))
+            return np.concatenate(parts) if parts else make_candles([])
+        
+        async def load_symbol(symbol: str, start_date: datetime, end_date: datetime) -> np.ndarray:
+            if self.candle_cache is not None:
+                # ensure() держит блокировку тикера, поэтому параллельная загрузка
+                # того же тикера не скачивает и не записывает диапазон дважды
+                return await self.candle_cache.ensure(symbol, start_date, end_date, fetch_range)
+            return await fetch_range(symbol, start_date, end_date)
+        
+        symbols = list(valid_ranges)
+        logger.info(f"Массовая загрузка истории: {len(symbols)} тикеров")
+        loaded = await asyncio.gather(
+            *(load_symbol(symbol, *valid_ranges[symbol]) for symbol in symbols),
+            return_exceptions=True
+        )
+        
+        result = {}
+        for symbol, candles in zip(symbols, loaded):
+            if isinstance(candles, BaseException):
+                logger.error(f"Ошибка получения исторических данных для {symbol}: {candles}")
+                continue
+            result[symbol] = candles
+        
+        return result
+    
+    async def get_multiple_historical_data(self, 
+                                         symbols: List[str], 
+                                         start_date: datetime, 
+                                         end_date: datetime,
+                                         max_concurrency: Optional[int] = None) -> Dict[str, List[MarketData]]:
+        """
+        Получить исторические данные для нескольких российских акций параллельно
+        
+        Args:
+            symbols: Список тикеров MOEX
+            start_date: Начальная дата
+            end_date: Конечная дата
+            max_concurrency: Максимум одновременных запросов
+            
+        Returns:
+            Словарь с тикерами в качестве ключей и списками MarketData в качестве значений
+        """
+        candles = await self.get_bulk_historical_candles(
+            {symbol: (start_date, end_date) for symbol in symbols},
+            max_concurrency=max_concurrency
+        )
+        
+        result = {}
+        for symbol, data in candles.items():
+            try:
+                result[symbol] = self._candles_to_market_data(symbol, data)
+            except MOEXAPIError as e:
+                logger.error(f"Пропускаем {symbol}: {e}")
+        
+        return result
     
     async def get_stock_info(self, symbol: str) -> Optional[RussianStock]:
         """
@@ -602,7 +776,8 @@ class MOEXClient(MOEXDataInterface):
             # Получаем список всех акций на основном рынке
             endpoint = "/iss/engines/stock/markets/shares/boards/TQBR/securities.json"
             
-            data = await self._make_request(endpoint, cache_ttl=300)  # Кэшируем на 5 минут
+            # Кэшируем на 5 минут; справочник бумаг можно отдать устаревшим на время обновления
+            data = await self._make_request(endpoint, cache_ttl=300, stale_ttl=300)
             
             results = []
             
@@ -904,6 +1079,29 @@ class MOEXClient(MOEXDataInterface):
 
 # Вспомогательные функции для работы с MOEX API
 
+def split_date_range(start_date: datetime, 
+                     end_date: datetime, 
+                     chunk_days: int = HISTORY_CHUNK_DAYS) -> List[Tuple[datetime, datetime]]:
+    """
+    Разбить диапазон дат на последовательные непересекающиеся части
+    
+    Args:
+        start_date: Начальная дата
+        end_date: Конечная дата (включительно)
+        chunk_days: Длина части в календарных днях
+        
+    Returns:
+        Список диапазонов (начало, конец) в порядке дат
+    """
+    chunks = []
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end_date)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end + timedelta(days=1)
+    return chunks
+
+
 async def create_moex_client(api_key: Optional[str] = None) -> MOEXClient:
     """
     Создать и инициализировать MOEX клиент
@@ -342,6 +342,45 @@ class MOEXComplianceValidator:
         Returns:
             Dictionary with validation results
         """
+        return self.validate_orders_compliance([order])[0]
+    
+    def validate_orders_compliance(self, orders: List[TradeOrder]) -> List[Dict[str, any]]:
+        """
+        Compliance validation of a batch of orders
+        
+        Trading hours, session and settlement date depend only on the current
+        Moscow time, so they are evaluated once for the whole batch.
+        
+        Args:
+            orders: Trading orders to validate
+            
+        Returns:
+            Validation result dictionary per order, in order
+        """
+        try:
+            session_info = self._session_compliance()
+        except Exception as e:
+            logger.error(f"Order compliance validation failed: {e}")
+            session_info = {"error": f"Validation error: {str(e)}"}
+        
+        return [self._order_compliance(order, session_info) for order in orders]
+    
+    def _session_compliance(self) -> Dict[str, any]:
+        """Trading hours check and settlement date shared by orders placed now"""
+        hours_valid, hours_error = self.validate_trading_hours()
+        
+        current_time = self.get_current_moscow_time()
+        settlement_date = self.calculate_settlement_date(current_time)
+        
+        return {
+            "hours_valid": hours_valid,
+            "hours_error": hours_error,
+            "trading_session": self.get_trading_session().value if hours_valid else None,
+            "settlement_date": settlement_date.isoformat()
+        }
+    
+    def _order_compliance(self, order: TradeOrder, session_info: Dict[str, any]) -> Dict[str, any]:
+        """Order-specific compliance checks on top of the shared session checks"""
         validation_result = {
             "valid": True,
             "errors": [],
@@ -360,14 +399,17 @@ class MOEXComplianceValidator:
                 validation_result["compliance_info"]["lot_size"] = lot_size
                 validation_result["compliance_info"]["lots_ordered"] = order.quantity // lot_size
             
+            if "error" in session_info:
+                validation_result["valid"] = False
+                validation_result["errors"].append(session_info["error"])
+                return validation_result
+            
             # Validate trading hours
-            hours_valid, hours_error = self.validate_trading_hours()
-            if not hours_valid:
+            if not session_info["hours_valid"]:
                 validation_result["valid"] = False
-                validation_result["errors"].append(hours_error)
+                validation_result["errors"].append(session_info["hours_error"])
             else:
-                current_session = self.get_trading_session()
-                validation_result["compliance_info"]["trading_session"] = current_session.value
+                validation_result["compliance_info"]["trading_session"] = session_info["trading_session"]
             
             # Validate minimum order value (for limit orders)
             if order.price and order.order_type in [OrderType.LIMIT]:
@@ -382,9 +424,7 @@ class MOEXComplianceValidator:
                     validation_result["compliance_info"]["order_value_rub"] = float(order_value)
             
             # Add settlement information
-            current_time = self.get_current_moscow_time()
-            settlement_date = self.calculate_settlement_date(current_time)
-            validation_result["compliance_info"]["settlement_date"] = settlement_date.isoformat()
+            validation_result["compliance_info"]["settlement_date"] = session_info["settlement_date"]
             
             # Security type information
             security_type = self.get_security_type(order.symbol)
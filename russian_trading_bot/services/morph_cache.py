@@ -0,0 +1,144 @@
+"""
+Bounded LRU cache of morphological parses
+Ограниченный LRU кэш морфологического разбора: словоформа -> (лемма, часть речи)
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+class MorphologyCache:
+    """
+    Кэш результатов pymorphy2 с вытеснением по LRU.
+
+    Лексика финансовых новостей небольшая и часто повторяется, поэтому
+    большая часть разборов отдается из кэша. pymorphy2 разбирает слова без
+    учета регистра, так что ключом служит словоформа в нижнем регистре.
+    Содержимое можно сохранить в JSON и загрузить при старте.
+    """
+
+    def __init__(self, analyzer_factory: Callable[[], Any], max_entries: int = 100000):
+        """
+        Args:
+            analyzer_factory: Функция, возвращающая морфоанализатор (вызывается при промахе)
+            max_entries: Максимальное количество словоформ в кэше
+        """
+        self.analyzer_factory = analyzer_factory
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, word: str) -> bool:
+        return word.lower() in self._entries
+
+    def parse(self, word: str) -> Tuple[str, str]:
+        """Лемма и часть речи словоформы ('UNKN', если часть речи не определена)"""
+        key = word.lower()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        parsed = self.analyzer_factory().parse(word)[0]
+        entry = (parsed.normal_form, parsed.tag.POS or 'UNKN')
+
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = entry
+            self._evict()
+        return entry
+
+    def lemma(self, word: str) -> str:
+        """Лемма словоформы"""
+        return self.parse(word)[0]
+
+    def lemmatize(self, words: Iterable[str]) -> List[str]:
+        """Леммы последовательности словоформ"""
+        return [self.parse(word)[0] for word in words]
+
+    def clear(self):
+        """Очистить кэш (счетчики сохраняются)"""
+        with self._lock:
+            self._entries.clear()
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def save(self, path: str) -> int:
+        """
+        Сохранить кэш в JSON (от давно использованных к недавним)
+
+        Returns:
+            Количество сохраненных словоформ
+        """
+        with self._lock:
+            entries = [[word, lemma, pos] for word, (lemma, pos) in self._entries.items()]
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+        return len(entries)
+
+    def load(self, path: str) -> int:
+        """
+        Загрузить сохраненный кэш (прогрев при старте)
+
+        Returns:
+            Количество загруженных словоформ (0, если файла нет или он поврежден)
+        """
+        try:
+            with open(path, encoding='utf-8') as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            logger.warning(f"Не удалось загрузить кэш морфологии из {path}: {e}")
+            return 0
+
+        loaded = 0
+        with self._lock:
+            # Сохраненные недавние словоформы идут последними и вытесняются последними
+            try:
+                for word, lemma, pos in entries[-self.max_entries:]:
+                    self._entries[word] = (lemma, pos)
+                    self._entries.move_to_end(word)
+                    loaded += 1
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Поврежденная запись в кэше морфологии {path}: {e}")
+            self._evict()
+        logger.info(f"Загружено {loaded} словоформ в кэш морфологии из {path}")
+        return loaded
+
+    def stats(self) -> Dict[str, Any]:
+        """Метрики кэша"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
@@ -7,11 +7,14 @@ import asyncio
 import aiohttp
 import feedparser
 import logging
-from typing import List, Dict, Optional, Any, Set
+from typing import List, Dict, Optional, Any, Tuple
 from datetime import datetime, timedelta
 from urllib.parse import urljoin, urlparse
 import re
+import string
+import time
 import hashlib
+from collections import OrderedDict
 from dataclasses import asdict
 import xml.etree.ElementTree as ET
 
@@ -20,6 +23,7 @@ from russian_trading_bot.models.news_data import (
     VALID_RUSSIAN_NEWS_SOURCES, detect_russian_financial_content,
     extract_mentioned_tickers, create_news_summary, filter_financial_news
 )
+from russian_trading_bot.services.minhash_index import MinHasher, MinHashLSHIndex, word_shingles
 
 
 logger = logging.getLogger(__name__)
@@ -62,86 +66,74 @@ class RussianNewsSource:
             raise ValueError(f"Invalid Russian news source: {name}")
 
 
+_PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation + '«»—–…')
+
+
+def normalize_news_text(text: str) -> str:
+    """Нормализовать текст новости для сравнения"""
+    # Нормализуем различные варианты написания
+    text = text.replace('%', ' процентов')
+    text = text.replace('₽', ' рублей')
+    text = text.replace('$', ' долларов')
+    text = text.replace('€', ' евро')
+    
+    # Убираем знаки препинания и лишние пробелы
+    normalized = text.translate(_PUNCTUATION_TABLE).lower()
+    return ' '.join(normalized.split())
+
+
 class NewsDeduplicator:
-    """Дедупликатор новостей для избежания дублирования"""
+    """
+    Дедупликатор новостей для избежания дублирования
+    
+    Точные повторы ловятся по хэшу заголовка и текста, почти-дубликаты -
+    по MinHash-сигнатурам слов заголовка и шинглов текста в LSH-индексах.
+    Проверка статьи не зависит от числа запомненных статей, записи
+    вытесняются по возрасту и по общему лимиту.
+    """
     
-    def __init__(self, similarity_threshold: float = 0.8):
+    def __init__(self,
+                 similarity_threshold: float = 0.8,
+                 max_age_hours: float = 24,
+                 max_entries: int = 50000,
+                 num_perm: int = 128,
+                 body_shingle_size: int = 3,
+                 min_body_words: int = 20):
+        """
+        Args:
+            similarity_threshold: Порог похожести (коэффициент Жаккара) для дубликата
+            max_age_hours: Время хранения статьи в индексе
+            max_entries: Максимальное число статей в индексе
+            num_perm: Длина MinHash-сигнатуры
+            body_shingle_size: Число слов в шингле текста статьи
+            min_body_words: Тексты короче сравниваются только по заголовку
+        """
         self.similarity_threshold = similarity_threshold
-        self.seen_articles: Set[str] = set()
-        self.title_hashes: Dict[str, str] = {}
+        self.max_age_seconds = max_age_hours * 3600
+        self.max_entries = max_entries
+        self.body_shingle_size = body_shingle_size
+        self.min_body_words = min_body_words
+        
+        self.hasher = MinHasher(num_perm)
+        self.title_index = MinHashLSHIndex(similarity_threshold, num_perm)
+        self.body_index = MinHashLSHIndex(similarity_threshold, num_perm)
+        self.seen_articles: Dict[str, int] = {}  # Хэш контента -> id записи
+        self._entries: "OrderedDict[int, Tuple[float, str]]" = OrderedDict()  # id -> (время, хэш)
+        self._next_id = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
     
     def _calculate_content_hash(self, title: str, content: str) -> str:
         """Вычислить хэш контента статьи"""
         combined = f"{title.lower().strip()} {content.lower().strip()}"
         return hashlib.md5(combined.encode('utf-8')).hexdigest()
     
-    def _calculate_title_similarity(self, title1: str, title2: str) -> float:
-        """Вычислить схожесть заголовков"""
-        import string
-        
-        def normalize_title(title):
-            # Нормализуем различные варианты написания
-            title = title.replace('%', ' процентов')
-            title = title.replace('₽', ' рублей')
-            title = title.replace('$', ' долларов')
-            title = title.replace('€', ' евро')
-            
-            # Убираем знаки препинания
-            translator = str.maketrans('', '', string.punctuation)
-            normalized = title.translate(translator).lower().strip()
-            
-            # Убираем лишние пробелы
-            return ' '.join(normalized.split())
-        
-        norm_title1 = normalize_title(title1)
-        norm_title2 = normalize_title(title2)
-        
-        words1 = set(norm_title1.split())
-        words2 = set(norm_title2.split())
-        
-        if not words1 or not words2:
-            return 0.0
-        
-        intersection = words1.intersection(words2)
-        union = words1.union(words2)
-        
-        # Базовый коэффициент Жаккара
-        jaccard_similarity = len(intersection) / len(union) if union else 0.0
-        
-        # Дополнительные проверки для повышения точности
-        
-        # 1. Проверяем ключевые слова (длиннее 3 символов)
-        key_words1 = {word for word in words1 if len(word) > 3}
-        key_words2 = {word for word in words2 if len(word) > 3}
-        
-        key_similarity = 0.0
-        if key_words1 and key_words2:
-            key_intersection = key_words1.intersection(key_words2)
-            key_similarity = len(key_intersection) / max(len(key_words1), len(key_words2))
-        
-        # 2. Проверяем порядок слов (для очень похожих заголовков)
-        sequence_similarity = 0.0
-        if jaccard_similarity > 0.5:
-            words1_list = norm_title1.split()
-            words2_list = norm_title2.split()
-            
-            # Простая проверка последовательности
-            common_sequences = 0
-            for i in range(min(len(words1_list), len(words2_list))):
-                if words1_list[i] == words2_list[i]:
-                    common_sequences += 1
-                else:
-                    break
-            
-            sequence_similarity = common_sequences / max(len(words1_list), len(words2_list))
-        
-        # Комбинируем все метрики
-        final_similarity = (jaccard_similarity * 0.5 + key_similarity * 0.3 + sequence_similarity * 0.2)
-        
-        return min(final_similarity, 1.0)
-    
     def is_duplicate(self, article: RussianNewsArticle) -> bool:
-        """Проверить, является ли статья дубликатом"""
+        """Проверить, является ли статья дубликатом (новая статья запоминается)"""
+        now = time.monotonic()
+        self._evict(now - self.max_age_seconds)
+        
         content_hash = self._calculate_content_hash(article.title, article.content)
         
         # Проверяем точное совпадение по хэшу
@@ -149,26 +141,64 @@ class NewsDeduplicator:
             return True
         
         # Проверяем схожесть заголовков
-        for existing_title, existing_hash in self.title_hashes.items():
-            similarity = self._calculate_title_similarity(article.title, existing_title)
-            if similarity >= self.similarity_threshold:
-                logger.debug(f"Найден дубликат по схожести заголовков: {similarity:.2f}")
+        title_signature = self.hasher.signature(normalize_news_text(article.title).split())
+        match = self.title_index.best_match(title_signature)
+        if match:
+            logger.debug(f"Найден дубликат по схожести заголовков: {match[1]:.2f}")
+            return True
+        
+        # Проверяем схожесть текстов
+        body_words = normalize_news_text(article.content).split()
+        body_signature = None
+        if len(body_words) >= self.min_body_words:
+            body_signature = self.hasher.signature(word_shingles(body_words, self.body_shingle_size))
+            match = self.body_index.best_match(body_signature)
+            if match:
+                logger.debug(f"Найден дубликат по схожести текста: {match[1]:.2f}")
                 return True
         
         # Добавляем в список просмотренных
-        self.seen_articles.add(content_hash)
-        self.title_hashes[article.title] = content_hash
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = (now, content_hash)
+        self.seen_articles[content_hash] = entry_id
+        self.title_index.insert(entry_id, title_signature)
+        if body_signature is not None:
+            self.body_index.insert(entry_id, body_signature)
+        
+        if len(self._entries) > self.max_entries:
+            self._remove_entry(next(iter(self._entries)))
         
         return False
     
-    def clear_old_entries(self, max_age_hours: int = 24):
-        """Очистить старые записи для экономии памяти"""
-        # В реальной реализации здесь была бы логика очистки по времени
-        # Для простоты очищаем все, если слишком много записей
-        if len(self.seen_articles) > 10000:
+    def _evict(self, cutoff: float):
+        """Удалить записи, добавленные раньше cutoff (записи упорядочены по времени)"""
+        while self._entries:
+            entry_id, (added_at, _) = next(iter(self._entries.items()))
+            if added_at >= cutoff:
+                break
+            self._remove_entry(entry_id)
+    
+    def _remove_entry(self, entry_id: int):
+        _, content_hash = self._entries.pop(entry_id)
+        if self.seen_articles.get(content_hash) == entry_id:
+            del self.seen_articles[content_hash]
+        self.title_index.remove(entry_id)
+        self.body_index.remove(entry_id)
+    
+    def clear_old_entries(self, max_age_hours: float = 24):
+        """Очистить записи старше max_age_hours (0 - очистить все)"""
+        before = len(self._entries)
+        if max_age_hours <= 0:
+            self._entries.clear()
             self.seen_articles.clear()
-            self.title_hashes.clear()
-            logger.info("Очищен кэш дедупликатора новостей")
+            self.title_index.clear()
+            self.body_index.clear()
+        else:
+            self._evict(time.monotonic() - max_age_hours * 3600)
+        
+        if len(self._entries) < before:
+            logger.info(f"Очищен кэш дедупликатора новостей: удалено {before - len(self._entries)} записей")
 
 
 class RussianNewsAggregator:
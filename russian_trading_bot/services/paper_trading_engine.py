@@ -20,6 +20,8 @@ from models.trading import TradingSignal, OrderAction, TradeOrder, ExecutionResu
 from models.market_data import RussianStock, MarketData
 from services.portfolio_manager import PortfolioManager, PerformanceMetrics
 from services.ai_decision_engine import AIDecisionEngine, MarketConditions
+from services.streaming_indicators import Bar, StreamingIndicatorRegistry
+from services.technical_analyzer import TechnicalIndicators
 
 logger = logging.getLogger(__name__)
 
@@ -175,6 +177,10 @@ class PaperTradingEngine:
         self.open_positions: Dict[str, PaperTrade] = {}
         self.pending_orders: Dict[str, PaperTrade] = {}
         
+        # Incremental technical indicators, updated once per trading cycle
+        self.indicators = StreamingIndicatorRegistry()
+        self._last_market_data: Dict[str, MarketData] = {}
+        
         # Threading for real-time operation
         self.trading_thread: Optional[threading.Thread] = None
         self.stop_event = threading.Event()
@@ -244,6 +250,8 @@ class PaperTradingEngine:
         self.last_trade_date = None
         self.open_positions.clear()
         self.pending_orders.clear()
+        self.indicators = StreamingIndicatorRegistry()
+        self._last_market_data.clear()
         
         # Start trading thread
         self.stop_event.clear()
@@ -320,6 +328,9 @@ class PaperTradingEngine:
                         # Update portfolio with current prices
                         self.portfolio_manager.update_market_prices(market_data)
                         
+                        # Append the new bar to per-symbol indicator state
+                        self._update_indicators(market_data)
+                        
                         # Check exit conditions for open positions
                         self._check_exit_conditions(market_data)
                         
@@ -398,6 +409,14 @@ class PaperTradingEngine:
             logger.error(f"Error getting market data: {e}")
             return None
     
+    def _update_indicators(self, market_data: Dict[str, MarketData]):
+        """Update streaming technical indicators with one bar per trading cycle"""
+        for symbol, data in market_data.items():
+            # Snapshots carry the cumulative day high/low, so build the bar of this interval
+            bar = Bar.from_interval(data, self._last_market_data.get(symbol))
+            self._last_market_data[symbol] = data
+            self.indicators.update(symbol, bar, data.timestamp)
+    
     def _process_trading_signals(self, market_data: Dict[str, MarketData]):
         """Generate and process trading signals"""
         
@@ -438,21 +457,9 @@ class PaperTradingEngine:
                                   market_conditions: MarketConditions) -> Optional[TradingSignal]:
         """Generate trading signal for a specific symbol"""
         
-        # Mock technical indicators (in real implementation, calculate from historical data)
-        from services.technical_analyzer import TechnicalIndicators
-        import numpy as np
-        
-        indicators = TechnicalIndicators(
-            rsi=50.0 + np.random.normal(0, 15),
-            macd=np.random.normal(0, 0.5),
-            macd_signal=np.random.normal(0, 0.5),
-            sma_20=float(market_data.price) * (1 + np.random.normal(0, 0.02)),
-            sma_50=float(market_data.price) * (1 + np.random.normal(0, 0.05)),
-            bollinger_upper=float(market_data.price) * 1.02,
-            bollinger_lower=float(market_data.price) * 0.98,
-            bollinger_middle=float(market_data.price),
-            stochastic_k=50.0 + np.random.normal(0, 20)
-        )
+        indicators = self.indicators.current(symbol)
+        if indicators is None:
+            indicators = TechnicalIndicators(symbol=symbol, timestamp=market_data.timestamp)
         
         # Mock Russian stock info
         stock = RussianStock(
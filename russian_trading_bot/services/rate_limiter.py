@@ -0,0 +1,145 @@
+"""
+Shared request rate limiter for exchange and broker APIs
+Общий ограничитель скорости запросов к API биржи и брокеров
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """
+    Ограничитель скорости запросов: не более max_requests единиц за любое
+    окно time_window секунд.
+
+    Каждый вызов acquire() сразу резервирует момент выдачи разрешения по
+    кольцевому буферу из последних max_requests выдач (O(cost) на вызов,
+    без пересборки списков), после чего ждет этого момента без удержания
+    блокировок. Ожидающие корутины стоят в одной очереди и пробуждаются
+    одним таймером строго в порядке вызовов (FIFO). Один экземпляр можно
+    разделять между MOEXClient, TinkoffBroker и FinamBroker в рамках
+    одного event loop.
+
+    Экземпляр не потокобезопасен и привязан к event loop, в котором
+    ожидает: future и таймер принадлежат этому циклу. Последовательная
+    смена цикла (например, несколько вызовов asyncio.run) допустима -
+    ожидающие завершенного цикла отбрасываются, а таймер переносится в
+    текущий цикл. Одновременное использование из нескольких потоков
+    не поддерживается.
+    """
+
+    def __init__(self, max_requests: int = 60, time_window: int = 60):
+        """
+        Args:
+            max_requests: Максимальное количество запросов
+            time_window: Временное окно в секундах
+        """
+        if max_requests < 1:
+            raise ValueError("max_requests должен быть положительным")
+        if time_window <= 0:
+            raise ValueError("time_window должен быть положительным")
+
+        self.max_requests = max_requests
+        self.time_window = time_window
+
+        # Моменты выдачи последних max_requests единиц (неубывающие, по time.monotonic)
+        self._grants: Deque[float] = deque(maxlen=max_requests)
+
+        # Очередь ожидающих: (момент выдачи, future) в порядке резервирования
+        self._waiters: Deque[Tuple[float, asyncio.Future]] = deque()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Цикл, которому принадлежат ожидающие future и таймер
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _reserve(self, cost: int) -> float:
+        """Зарезервировать cost единиц и вернуть момент, когда их можно использовать"""
+        if cost < 1 or cost > self.max_requests:
+            raise ValueError(f"Стоимость запроса должна быть от 1 до {self.max_requests}: {cost}")
+
+        grant_time = time.monotonic()
+        grants = self._grants
+
+        if grants:
+            # Не обгоняем уже ожидающих (FIFO)
+            grant_time = max(grant_time, grants[-1])
+
+            # После добавления cost единиц в окне должно остаться не более max_requests:
+            # последняя новая единица ждет, пока выйдет единица на max_requests позиций раньше
+            index = len(grants) + cost - 1 - self.max_requests
+            if index >= 0:
+                grant_time = max(grant_time, grants[index] + self.time_window)
+
+        grants.extend([grant_time] * cost)
+        return grant_time
+
+    async def acquire(self, cost: int = 1):
+        """
+        Получить разрешение на выполнение запроса
+
+        Args:
+            cost: Вес запроса в единицах лимита (например, для тяжелых запросов)
+        """
+        grant_time = self._reserve(cost)
+        loop = asyncio.get_running_loop()
+        self._discard_stale_waiters(loop)
+
+        delay = grant_time - time.monotonic()
+        if delay <= 0 and not self._waiters:
+            return
+
+        if delay > 0:
+            logger.warning(f"Превышен лимит запросов к API. Ожидание {delay:.2f} сек")
+
+        future = loop.create_future()
+        self._waiters.append((grant_time, future))
+        if self._timer is None:
+            self._schedule_wakeup(loop)
+
+        await future
+
+    def _discard_stale_waiters(self, loop: asyncio.AbstractEventLoop):
+        """Убрать отмененные ожидания и ожидания другого (завершенного) цикла"""
+        if self._loop is not loop:
+            # Future и таймер прежнего цикла больше никогда не сработают
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._waiters.clear()
+            self._loop = loop
+            return
+
+        if any(future.done() for _, future in self._waiters):
+            self._waiters = deque((grant_time, future) for grant_time, future in self._waiters
+                                  if not future.done())
+            if not self._waiters and self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _schedule_wakeup(self, loop: asyncio.AbstractEventLoop):
+        """Запланировать пробуждение первого ожидающего"""
+        grant_time, _ = self._waiters[0]
+        self._timer = loop.call_later(max(0.0, grant_time - time.monotonic()), self._wake_waiters, loop)
+
+    def _wake_waiters(self, loop: asyncio.AbstractEventLoop):
+        """Пробудить по порядку всех ожидающих, чей момент выдачи наступил"""
+        self._timer = None
+        now = time.monotonic()
+        while self._waiters and self._waiters[0][0] <= now:
+            _, future = self._waiters.popleft()
+            if not future.done():  # Отмененные ожидания просто пропускаем
+                future.set_result(None)
+
+        if self._waiters:
+            self._schedule_wakeup(loop)
+
+    def available(self) -> int:
+        """Количество единиц, доступных прямо сейчас без ожидания"""
+        now = time.monotonic()
+        in_window = sum(1 for grant_time in self._grants if grant_time > now - self.time_window)
+        return self.max_requests - in_window
@@ -0,0 +1,225 @@
+"""
+Bounded LRU/TTL cache for API responses
+Ограниченный LRU/TTL кэш ответов API
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Dict, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+class CacheState(Enum):
+    """Состояние записи кэша при чтении"""
+    FRESH = "fresh"    # TTL не истек
+    STALE = "stale"    # TTL истек, но запись можно отдать на время обновления
+    MISS = "miss"      # Записи нет (или она слишком устарела)
+
+
+@dataclass
+class _CacheEntry:
+    data: Any
+    size: int
+    expires_at: float
+    stale_until: float
+
+
+# Сколько элементов длинного списка оценивается при подсчете размера
+SIZE_SAMPLE = 8
+
+
+def estimate_size(data: Any) -> int:
+    """
+    Оценка размера ответа в байтах без сериализации
+
+    Примерно соответствует длине JSON-представления. У длинных списков
+    (строки data блоков ISS) оцениваются первые SIZE_SAMPLE элементов,
+    а результат масштабируется на длину списка.
+    """
+    if isinstance(data, str):
+        return len(data) + 2
+    if data is None or isinstance(data, bool):
+        return 5
+    if isinstance(data, (int, float)):
+        return 8
+    if isinstance(data, dict):
+        # Ключ в кавычках, ": " и ", " между парами
+        return sum(len(str(key)) + 6 + estimate_size(value) for key, value in data.items()) or 2
+    if isinstance(data, (list, tuple)):
+        if not data:
+            return 2
+        sample = data[:SIZE_SAMPLE]
+        sampled = sum(estimate_size(item) + 2 for item in sample)
+        return sampled * len(data) // len(sample)
+    return len(str(data))
+
+
+class ResponseCache:
+    """
+    Кэш ответов с вытеснением по LRU, TTL и суммарному размеру.
+
+    Просроченные записи еще stale_ttl секунд могут отдаваться со статусом
+    STALE (stale-while-revalidate), пока вызывающий код обновляет их в фоне.
+    По умолчанию окно устаревания выключено: его включают для кэша целиком
+    или для отдельных записей, где устаревшие данные допустимы.
+    Ведется учет байтов и счетчики попаданий, промахов и вытеснений.
+    """
+
+    def __init__(self,
+                 max_entries: int = 1024,
+                 max_bytes: int = 32 * 1024 * 1024,
+                 default_ttl: float = 5,
+                 stale_ttl: float = 0):
+        """
+        Args:
+            max_entries: Максимальное количество записей
+            max_bytes: Максимальный суммарный размер записей в байтах
+            default_ttl: Время жизни записи по умолчанию в секундах
+            stale_ttl: Сколько секунд после истечения TTL запись можно отдавать как устаревшую
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def peek(self, key: str) -> CacheState:
+        """Состояние записи без учета в счетчиках и без изменения порядка LRU"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return CacheState.MISS
+
+        now = time.monotonic()
+        if now < entry.expires_at:
+            return CacheState.FRESH
+        if now < entry.stale_until:
+            return CacheState.STALE
+        return CacheState.MISS
+
+    @property
+    def size_bytes(self) -> int:
+        """Текущий суммарный размер записей"""
+        return self._bytes
+
+    def get(self, key: str) -> Tuple[Optional[Any], CacheState]:
+        """
+        Получить запись
+
+        Returns:
+            Кортеж (данные или None, состояние записи)
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, CacheState.MISS
+
+        now = time.monotonic()
+        if now < entry.expires_at:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.data, CacheState.FRESH
+
+        if now < entry.stale_until:
+            self._entries.move_to_end(key)
+            self.stale_hits += 1
+            return entry.data, CacheState.STALE
+
+        self._remove(key)
+        self.expirations += 1
+        self.misses += 1
+        return None, CacheState.MISS
+
+    def set(self, key: str, data: Any, ttl: Optional[float] = None, size: Optional[int] = None,
+            stale_ttl: Optional[float] = None):
+        """
+        Сохранить запись
+
+        Args:
+            key: Ключ кэша
+            data: Данные
+            ttl: Время жизни в секундах (по умолчанию default_ttl)
+            size: Размер в байтах (если не указан, оценивается по структуре данных)
+            stale_ttl: Окно устаревания записи в секундах (по умолчанию stale_ttl кэша)
+        """
+        if ttl is None:
+            ttl = self.default_ttl
+        if stale_ttl is None:
+            stale_ttl = self.stale_ttl
+        if size is None:
+            size = estimate_size(data)
+
+        if size > self.max_bytes:
+            logger.debug(f"Ответ {key} ({size} байт) больше лимита кэша, не кэшируем")
+            self.delete(key)
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        now = time.monotonic()
+        self._entries[key] = _CacheEntry(data, size, now + ttl, now + ttl + stale_ttl)
+        self._bytes += size
+        self._evict()
+
+    def delete(self, key: str):
+        """Удалить запись"""
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self):
+        """Очистить кэш (счетчики сохраняются)"""
+        self._entries.clear()
+        self._bytes = 0
+
+    def purge_expired(self) -> int:
+        """Удалить записи, которые уже нельзя отдавать даже как устаревшие"""
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if now >= entry.stale_until]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+        return len(expired)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _evict(self):
+        """Вытеснить наименее давно использованные записи сверх лимитов"""
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Метрики кэша"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_rate': (self.hits + self.stale_hits) / lookups if lookups else 0.0
+        }
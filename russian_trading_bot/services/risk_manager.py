@@ -4,9 +4,9 @@ Implements volatility-adjusted risk controls, geopolitical risk assessment,
 and portfolio diversification rules specific to the Russian market.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Callable, Dict, List, Optional, Tuple, Any, Union
 from decimal import Decimal
 import math
 import statistics
@@ -14,6 +14,12 @@ from enum import Enum
 
 from ..models.market_data import RussianStock, MarketData, MOEXMarketData
 from ..models.news_data import RussianNewsArticle, NewsSentiment, NewsImpactScore
+from .candle_cache import CandleCache
+from .correlation_service import CorrelationMatrix, CorrelationService, get_correlation_service
+from .covariance_tracker import EWMACovarianceTracker
+from .exposure_index import ExposureDelta, ExposureIndex
+from .stress_engine import StressResult, StressScenario, StressTestEngine, default_scenarios
+from .var_engine import PortfolioVaREngine, VaRResult
 
 
 class RiskLevel(Enum):
@@ -101,6 +107,7 @@ class RiskParameters:
     geopolitical_risk_multiplier: float = 2.0  # Risk multiplier during high geopolitical risk
     correlation_threshold: float = 0.7  # Max correlation between positions
     min_cash_reserve_percent: float = 10.0  # Minimum cash reserve
+    max_daily_var_percent: float = 5.0  # Max 1-day VaR as % of portfolio
     
     # Russian market specific parameters
     ruble_volatility_threshold: float = 5.0  # Daily RUB volatility threshold
@@ -120,6 +127,7 @@ class RiskAssessment:
     recommendations: List[str]
     risk_factors: Dict[str, float]
     timestamp: datetime
+    value_at_risk: Optional[VaRResult] = None
 
 
 @dataclass
@@ -203,8 +211,20 @@ class RussianMarketRiskManager:
     Implements volatility-adjusted controls and geopolitical risk assessment
     """
     
-    def __init__(self, risk_params: Optional[RiskParameters] = None):
+    def __init__(self, risk_params: Optional[RiskParameters] = None,
+                 correlation_service: Optional[CorrelationService] = None,
+                 volatility_tracker: Optional[EWMACovarianceTracker] = None,
+                 var_engine: Optional[PortfolioVaREngine] = None,
+                 stress_engine: Optional[StressTestEngine] = None):
         self.risk_params = risk_params or RiskParameters()
+        self.correlation_service = correlation_service or get_correlation_service()
+        # Streaming EWMA statistics; when warmed up they replace per-call history scans
+        self.volatility_tracker = volatility_tracker
+        self.var_engine = var_engine
+        self.stress_engine = stress_engine or StressTestEngine(
+            factor_betas={'ENERGY': (0.4, self.risk_params.oil_price_correlation_factor)},
+            symbol_sectors=RUSSIAN_STOCK_SECTORS
+        )
         self.historical_volatility_cache: Dict[str, List[float]] = {}
         self.correlation_matrix: Dict[Tuple[str, str], float] = {}
         self.geopolitical_events: List[Dict[str, Any]] = []
@@ -228,6 +248,10 @@ class RussianMarketRiskManager:
         Returns:
             Stop-loss price adjusted for volatility
         """
+        tracked_volatility = self._tracked_volatility(symbol)
+        if tracked_volatility is not None:
+            return self._volatility_stop_loss(entry_price, tracked_volatility)
+        
         if len(historical_prices) < 2:
             # Fallback to default stop loss
             stop_loss_percent = self.risk_params.stop_loss_percent / 100
@@ -246,6 +270,10 @@ class RussianMarketRiskManager:
         # Calculate volatility (standard deviation of returns)
         volatility = statistics.stdev(returns) if len(returns) > 1 else 0.02
         
+        return self._volatility_stop_loss(entry_price, volatility)
+    
+    def _volatility_stop_loss(self, entry_price: Decimal, volatility: float) -> Decimal:
+        """Stop-loss price for a given daily volatility"""
         # Adjust stop loss based on volatility
         base_stop_loss = self.risk_params.stop_loss_percent / 100
         volatility_adjustment = volatility * self.risk_params.volatility_adjustment_factor
@@ -309,7 +337,8 @@ class RussianMarketRiskManager:
         self,
         portfolio: Portfolio,
         market_data: Dict[str, MarketData],
-        news_sentiment: Optional[Dict[str, float]] = None
+        news_sentiment: Optional[Dict[str, float]] = None,
+        price_histories: Optional[Dict[str, List[Decimal]]] = None
     ) -> RiskAssessment:
         """
         Assess overall portfolio risk for Russian market conditions
@@ -318,6 +347,7 @@ class RussianMarketRiskManager:
             portfolio: Current portfolio
             market_data: Current market data for all positions
             news_sentiment: News sentiment scores (optional)
+            price_histories: Price histories for historical VaR (optional)
             
         Returns:
             Comprehensive risk assessment
@@ -361,6 +391,21 @@ class RussianMarketRiskManager:
         if sector_risk > 0.7:
             recommendations.append("High sector concentration - diversify across sectors")
         
+        # 6. Value at Risk (reported alongside the score, not weighted into it)
+        value_at_risk = None
+        if self.var_engine is not None:
+            value_at_risk = self.var_engine.evaluate(portfolio, price_histories, self.volatility_tracker)
+            if value_at_risk is not None:
+                risk_factors['value_at_risk'] = min(
+                    1.0, value_at_risk.var_percent / self.risk_params.max_daily_var_percent
+                )
+                if value_at_risk.var_percent > self.risk_params.max_daily_var_percent:
+                    largest = max(value_at_risk.component_var, key=value_at_risk.component_var.get)
+                    recommendations.append(
+                        f"VaR {value_at_risk.var_percent:.1f}% exceeds limit "
+                        f"{self.risk_params.max_daily_var_percent:.1f}% - largest contributor {largest}"
+                    )
+        
         # Calculate overall risk score
         overall_risk_score = (
             concentration_risk * 0.25 +
@@ -389,7 +434,8 @@ class RussianMarketRiskManager:
             currency_risk_score=currency_risk,
             recommendations=recommendations,
             risk_factors=risk_factors,
-            timestamp=datetime.now()
+            timestamp=datetime.now(),
+            value_at_risk=value_at_risk
         )
     
     def validate_trade(
@@ -411,12 +457,76 @@ class RussianMarketRiskManager:
         Returns:
             Validation result with recommendations
         """
+        return self._validate_order(
+            order, market_data.get(order.symbol),
+            self._portfolio_aggregates(portfolio), current_risk_assessment
+        )
+    
+    def validate_trades(
+        self,
+        orders: List[TradeOrder],
+        portfolio: Portfolio,
+        market_data: Dict[str, MarketData],
+        current_risk_assessment: Optional[RiskAssessment] = None,
+        scale_to_limits: bool = False,
+        lot_sizes: Optional[Dict[str, int]] = None
+    ) -> List[ValidationResult]:
+        """
+        Validate a batch of trade orders against risk management rules
+        
+        Portfolio aggregates are computed once and each order gets the same
+        checks as validate_trade().
+        
+        Args:
+            orders: Trade orders in priority order
+            portfolio: Current portfolio
+            market_data: Current market data
+            current_risk_assessment: Current risk assessment (optional)
+            scale_to_limits: Fit the buy orders jointly, on top of existing holdings,
+                into the position size and cash limits; when an order has to shrink,
+                the feasible quantity is set as recommended_adjustments['quantity']
+                (0 drops the order) and the result validates that quantity
+            lot_sizes: Symbol -> lot size used to round scaled quantities down
+            
+        Returns:
+            Validation result per order, in order
+        """
+        aggregates = self._portfolio_aggregates(portfolio)
+        results = [
+            self._validate_order(order, market_data.get(order.symbol), aggregates, current_risk_assessment)
+            for order in orders
+        ]
+        
+        if scale_to_limits:
+            self._scale_orders_to_limits(
+                orders, results, market_data, aggregates, current_risk_assessment, lot_sizes or {}
+            )
+        
+        return results
+    
+    def _portfolio_aggregates(self, portfolio: Portfolio) -> Dict[str, Any]:
+        """Portfolio-level values shared by the checks of every order"""
+        sector_allocation = portfolio.sector_allocation
+        return {
+            'portfolio_value': portfolio.total_value,
+            'cash_balance': portfolio.cash_balance,
+            'max_sector_allocation': max(sector_allocation.values()) if sector_allocation else 0,
+            'position_values': {symbol: position.market_value for symbol, position in portfolio.positions.items()}
+        }
+    
+    def _validate_order(
+        self,
+        order: TradeOrder,
+        symbol_data: Optional[MarketData],
+        aggregates: Dict[str, Any],
+        current_risk_assessment: Optional[RiskAssessment]
+    ) -> ValidationResult:
+        """Validate one order against precomputed portfolio aggregates"""
         warnings = []
         errors = []
         recommended_adjustments = {}
         
         # Get current market data for the symbol
-        symbol_data = market_data.get(order.symbol)
         if not symbol_data:
             errors.append(f"No market data available for {order.symbol}")
             return ValidationResult(
@@ -428,11 +538,11 @@ class RussianMarketRiskManager:
             )
         
         current_price = symbol_data.price
+        portfolio_value = aggregates['portfolio_value']
         
         # 1. Position size validation
         if order.action == "BUY":
             position_value = current_price * order.quantity
-            portfolio_value = portfolio.total_value
             
             if portfolio_value > 0:
                 position_percent = float(position_value / portfolio_value * 100)
@@ -450,7 +560,7 @@ class RussianMarketRiskManager:
         # 2. Cash availability validation
         if order.action == "BUY":
             required_cash = current_price * order.quantity
-            available_cash = portfolio.cash_balance
+            available_cash = aggregates['cash_balance']
             
             if required_cash > available_cash:
                 errors.append(f"Insufficient cash: need {required_cash} RUB, have {available_cash} RUB")
@@ -466,15 +576,13 @@ class RussianMarketRiskManager:
         # 4. Sector concentration validation
         if order.action == "BUY":
             # This would require sector information - simplified for now
-            sector_allocation = portfolio.sector_allocation
-            # Assume we can get sector from symbol (would need lookup in real implementation)
             # For now, just warn if any sector is over-allocated
-            max_sector_allocation = max(sector_allocation.values()) if sector_allocation else 0
+            max_sector_allocation = aggregates['max_sector_allocation']
             if max_sector_allocation > self.risk_params.max_sector_allocation_percent:
                 warnings.append(f"High sector concentration detected ({max_sector_allocation:.1f}%)")
         
         # Calculate risk score for this trade
-        risk_score = self._calculate_trade_risk_score(order, portfolio, symbol_data)
+        risk_score = self._calculate_trade_risk_score(order, portfolio_value, symbol_data)
         
         # Determine if trade is valid
         is_valid = len(errors) == 0 and risk_score < 0.8
@@ -487,6 +595,63 @@ class RussianMarketRiskManager:
             recommended_adjustments=recommended_adjustments
         )
     
+    def _scale_orders_to_limits(
+        self,
+        orders: List[TradeOrder],
+        results: List[ValidationResult],
+        market_data: Dict[str, MarketData],
+        aggregates: Dict[str, Any],
+        current_risk_assessment: Optional[RiskAssessment],
+        lot_sizes: Dict[str, int]
+    ):
+        """Greedily fit buy orders, in list order, into per-symbol size and total cash limits
+
+        Each symbol's position room starts from its current holding. Results of
+        orders that change size are replaced by a validation of the new quantity.
+        """
+        portfolio_value = aggregates['portfolio_value']
+        remaining_cash = aggregates['cash_balance']
+        max_position_value = portfolio_value * Decimal(str(self.risk_params.max_position_size_percent / 100))
+        buys_blocked = (
+            current_risk_assessment is not None and
+            current_risk_assessment.overall_risk_level == RiskLevel.CRITICAL
+        )
+        allocated: Dict[str, Decimal] = dict(aggregates['position_values'])
+        
+        for index, (order, result) in enumerate(zip(orders, results)):
+            if order.action != "BUY":
+                continue
+            
+            symbol_data = market_data.get(order.symbol)
+            if not symbol_data or symbol_data.price <= 0 or portfolio_value <= 0 or buys_blocked:
+                quantity = 0
+            else:
+                price = symbol_data.price
+                position_room = max_position_value - allocated.get(order.symbol, Decimal('0'))
+                quantity = min(
+                    order.quantity,
+                    int(max(position_room, Decimal('0')) / price),
+                    int(max(remaining_cash, Decimal('0')) / price)
+                )
+                lot_size = lot_sizes.get(order.symbol, 1)
+                quantity -= quantity % lot_size
+                
+                allocated[order.symbol] = allocated.get(order.symbol, Decimal('0')) + price * quantity
+                remaining_cash -= price * quantity
+            
+            if quantity == order.quantity:
+                continue
+            
+            if quantity > 0:
+                result = self._validate_order(
+                    replace(order, quantity=quantity), symbol_data, aggregates, current_risk_assessment
+                )
+                results[index] = result
+            else:
+                result.is_valid = False
+                result.errors.append("No room for this order within position size and cash limits")
+            result.recommended_adjustments['quantity'] = quantity
+    
     def _assess_concentration_risk(self, portfolio: Portfolio) -> float:
         """Assess portfolio concentration risk"""
         if not portfolio.positions:
@@ -522,13 +687,24 @@ class RussianMarketRiskManager:
         if not portfolio.positions:
             return 0.0
         
+        # Full covariance from the streaming tracker when every position is covered
+        if self.volatility_tracker is not None and portfolio.total_value > 0:
+            weights = {
+                symbol: float(position.market_value / portfolio.total_value)
+                for symbol, position in portfolio.positions.items()
+            }
+            portfolio_volatility = self.volatility_tracker.portfolio_volatility(weights, annualize=True)
+            if portfolio_volatility is not None:
+                return min(1.0, portfolio_volatility / 0.5)
+        
         total_volatility_weighted = 0.0
         total_weight = 0.0
         
         for symbol, position in portfolio.positions.items():
             if symbol in market_data:
-                # Get cached volatility or calculate simple proxy
-                volatility = self._get_symbol_volatility(symbol, market_data[symbol])
+                # Until every position is tracked, use the placeholder for all of them
+                # so tracked (annual) and placeholder (daily) values are never mixed
+                volatility = self._placeholder_volatility(market_data[symbol])
                 weight = float(position.market_value / portfolio.total_value)
                 
                 total_volatility_weighted += volatility * weight
@@ -589,17 +765,29 @@ class RussianMarketRiskManager:
         return mapping[risk_level]
     
     def _get_symbol_volatility(self, symbol: str, market_data: MarketData) -> float:
-        """Get or calculate symbol volatility"""
-        # This would typically use historical price data
-        # For now, return a placeholder based on price changes
+        """Get or calculate daily symbol volatility"""
+        tracked_volatility = self._tracked_volatility(symbol)
+        if tracked_volatility is not None:
+            return tracked_volatility
+        
+        return self._placeholder_volatility(market_data)
+    
+    def _placeholder_volatility(self, market_data: MarketData) -> float:
+        """Placeholder volatility based on price changes (without a warmed-up tracker)"""
         if hasattr(market_data, 'change_percent') and market_data.change_percent:
             return abs(float(market_data.change_percent)) / 100.0
         return 0.02  # Default 2% daily volatility
     
+    def _tracked_volatility(self, symbol: str) -> Optional[float]:
+        """Daily EWMA volatility from the streaming tracker, if available"""
+        if self.volatility_tracker is None:
+            return None
+        return self.volatility_tracker.volatility(symbol)
+    
     def _calculate_trade_risk_score(
         self, 
         order: TradeOrder, 
-        portfolio: Portfolio, 
+        portfolio_value: Decimal, 
         market_data: MarketData
     ) -> float:
         """Calculate risk score for a specific trade"""
@@ -608,7 +796,6 @@ class RussianMarketRiskManager:
         # Position size risk
         if order.action == "BUY":
             position_value = market_data.price * order.quantity
-            portfolio_value = portfolio.total_value
             
             if portfolio_value > 0:
                 position_percent = float(position_value / portfolio_value)
@@ -703,6 +890,35 @@ class RussianMarketRiskManager:
             timestamp=datetime.now()
         )
     
+    def run_stress_tests(
+        self,
+        portfolio: Portfolio,
+        scenarios: Optional[List[StressScenario]] = None,
+        active_events: Optional[List[GeopoliticalEvent]] = None
+    ) -> List[StressResult]:
+        """
+        Reprice the portfolio under stress scenarios
+        
+        Args:
+            portfolio: Current portfolio
+            scenarios: Scenario battery (standard battery if omitted)
+            active_events: Geopolitical events; stocks named by active sanctions
+                events form the sanctions scenarios of the standard battery
+            
+        Returns:
+            Stress result per scenario
+        """
+        if scenarios is None:
+            sanctioned = {
+                symbol
+                for event in active_events or []
+                if event.event_type == 'SANCTIONS' and event.is_active()
+                for symbol in event.affected_stocks
+            }
+            scenarios = default_scenarios(sanctioned)
+        
+        return self.stress_engine.run(portfolio, scenarios)
+    
     def generate_portfolio_rebalance_recommendation(
         self,
         portfolio: Portfolio,
@@ -835,38 +1051,54 @@ class RussianMarketRiskManager:
     def build_correlation_matrix(
         self,
         symbols: List[str],
-        price_histories: Dict[str, List[Decimal]]
+        price_histories: Dict[str, List[Decimal]],
+        min_periods: int = 20
     ) -> Dict[Tuple[str, str], float]:
         """
         Build correlation matrix for Russian stocks
         
+        The matrix is computed in one pass by the shared correlation service
+        and cached per universe, so repeated checks on the same data are free.
+        
         Args:
             symbols: List of stock symbols
             price_histories: Dictionary mapping symbols to price histories
+            min_periods: Minimum number of prices required for a pair
             
         Returns:
             Dictionary mapping symbol pairs to correlation coefficients
         """
-        correlation_matrix = {}
-        
-        for i, symbol1 in enumerate(symbols):
-            for j, symbol2 in enumerate(symbols):
-                if i <= j:  # Only calculate upper triangle and diagonal
-                    if symbol1 == symbol2:
-                        correlation_matrix[(symbol1, symbol2)] = 1.0
-                    else:
-                        if symbol1 in price_histories and symbol2 in price_histories:
-                            correlation = self.calculate_stock_correlation(
-                                symbol1, symbol2,
-                                price_histories[symbol1],
-                                price_histories[symbol2]
-                            )
-                            if correlation is not None:
-                                correlation_matrix[(symbol1, symbol2)] = correlation
-                                correlation_matrix[(symbol2, symbol1)] = correlation  # Symmetric
+        matrix = self.correlation_service.matrix(symbols, price_histories, min_periods=min_periods - 1)
         
+        correlation_matrix = {(symbol, symbol): 1.0 for symbol in symbols}
+        correlation_matrix.update(matrix.to_pairs())  # Symmetric
         return correlation_matrix
     
+    def build_correlation_matrix_from_cache(
+        self,
+        symbols: List[str],
+        candle_cache: CandleCache,
+        lookback_days: int = 90,
+        end_date: Optional[datetime] = None
+    ) -> Dict[Tuple[str, str], float]:
+        """
+        Build correlation matrix from close prices in the MOEX candle cache
+        
+        Args:
+            symbols: List of stock symbols
+            candle_cache: Shared candle cache (close histories are read without copying)
+            lookback_days: Correlation window in calendar days
+            end_date: Window end (defaults to now)
+            
+        Returns:
+            Dictionary mapping symbol pairs to correlation coefficients
+        """
+        end_date = end_date or datetime.now()
+        price_histories = candle_cache.close_histories(
+            symbols, end_date - timedelta(days=lookback_days), end_date
+        )
+        return self.build_correlation_matrix(symbols, price_histories)
+    
     def check_sector_diversification_rules(
         self,
         portfolio: Portfolio,
@@ -1069,7 +1301,7 @@ class RussianMarketRiskManager:
     def check_correlation_limits(
         self,
         portfolio: Portfolio,
-        correlation_matrix: Dict[Tuple[str, str], float],
+        correlation_matrix: Union[Dict[Tuple[str, str], float], CorrelationMatrix],
         max_correlation: float = 0.7,
         max_high_correlation_pairs: int = 3
     ) -> Dict[str, Any]:
@@ -1078,7 +1310,7 @@ class RussianMarketRiskManager:
         
         Args:
             portfolio: Current portfolio
-            correlation_matrix: Correlation matrix for stocks
+            correlation_matrix: Correlation matrix for stocks (pair dictionary or CorrelationMatrix)
             max_correlation: Maximum allowed correlation between positions
             max_high_correlation_pairs: Maximum number of high-correlation pairs allowed
             
@@ -1916,48 +2148,16 @@ class RussianMarketRiskManager:
         Returns:
             Dictionary mapping symbol pairs to correlation coefficients
         """
-        correlations = {}
-        
-        # Calculate returns for each symbol
-        returns_data = {}
-        for symbol in symbols:
-            if symbol in historical_data and len(historical_data[symbol]) > 1:
-                prices = historical_data[symbol][-lookback_days:]
-                returns = []
-                for i in range(1, len(prices)):
-                    daily_return = float(prices[i] / prices[i-1] - 1)
-                    returns.append(daily_return)
-                returns_data[symbol] = returns
-        
-        # Calculate pairwise correlations
-        for i, symbol1 in enumerate(symbols):
-            for j, symbol2 in enumerate(symbols):
-                if i >= j:  # Skip duplicate pairs and self-correlation
-                    continue
-                    
-                if symbol1 in returns_data and symbol2 in returns_data:
-                    returns1 = returns_data[symbol1]
-                    returns2 = returns_data[symbol2]
-                    
-                    # Ensure same length
-                    min_length = min(len(returns1), len(returns2))
-                    if min_length < 10:  # Need at least 10 data points
-                        continue
-                        
-                    returns1 = returns1[-min_length:]
-                    returns2 = returns2[-min_length:]
-                    
-                    # Calculate correlation coefficient
-                    correlation = self._calculate_correlation(returns1, returns2)
-                    correlations[(symbol1, symbol2)] = correlation
-                    correlations[(symbol2, symbol1)] = correlation  # Symmetric
-        
-        return correlations
+        # Need at least 10 common returns per pair
+        matrix = self.correlation_service.matrix(
+            symbols, historical_data, window=lookback_days, min_periods=10
+        )
+        return matrix.to_pairs()
     
     def validate_correlation_limits(
         self,
         portfolio: Portfolio,
-        correlations: Dict[Tuple[str, str], float],
+        correlations: Union[Dict[Tuple[str, str], float], CorrelationMatrix],
         new_trade: Optional[TradeOrder] = None
     ) -> Tuple[bool, List[str]]:
         """
@@ -1965,7 +2165,7 @@ class RussianMarketRiskManager:
         
         Args:
             portfolio: Current portfolio
-            correlations: Correlation matrix between stocks
+            correlations: Correlation matrix between stocks (pair dictionary or CorrelationMatrix)
             new_trade: Optional new trade to validate
             
         Returns:
@@ -2160,7 +2360,10 @@ class RussianMarketRiskManager:
         # 3. Validate correlation limits
         if len(portfolio.positions) > 0:
             symbols = list(portfolio.positions.keys()) + [new_trade.symbol]
-            correlations = self.calculate_stock_correlations(symbols, historical_data)
+            if self.volatility_tracker is not None and self.volatility_tracker.is_ready(symbols):
+                correlations = self.volatility_tracker.correlation_matrix(list(dict.fromkeys(symbols)))
+            else:
+                correlations = self.calculate_stock_correlations(symbols, historical_data)
             
             correlation_valid, correlation_warnings = self.validate_correlation_limits(
                 portfolio, correlations, new_trade
@@ -2414,55 +2617,61 @@ class DiversificationAnalysis:
     timestamp: datetime
 
 
+# Sectors of Russian stocks (diversification rules, stress test fallback for placeholder sectors)
+RUSSIAN_STOCK_SECTORS: Dict[str, str] = {
+    # Energy sector
+    'GAZP': 'ENERGY', 'ROSN': 'ENERGY', 'LKOH': 'ENERGY', 'NVTK': 'ENERGY',
+    'SNGS': 'ENERGY', 'TATN': 'ENERGY', 'TRNFP': 'ENERGY',
+
+    # Financial sector
+    'SBER': 'FINANCIAL', 'VTBR': 'FINANCIAL', 'TCSG': 'FINANCIAL', 'BSPB': 'FINANCIAL',
+    'CBOM': 'FINANCIAL', 'AFKS': 'FINANCIAL',
+
+    # Materials sector
+    'GMKN': 'MATERIALS', 'NLMK': 'MATERIALS', 'MAGN': 'MATERIALS', 'CHMF': 'MATERIALS',
+    'ALRS': 'MATERIALS', 'RUAL': 'MATERIALS', 'PHOR': 'MATERIALS', 'POLY': 'MATERIALS',
+
+    # Technology sector
+    'YNDX': 'TECHNOLOGY', 'MAIL': 'TECHNOLOGY', 'OZON': 'TECHNOLOGY', 'FIXP': 'TECHNOLOGY',
+    'HHRU': 'TECHNOLOGY', 'DSKY': 'TECHNOLOGY', 'QIWI': 'TECHNOLOGY',
+
+    # Consumer sector
+    'MGNT': 'CONSUMER', 'FIVE': 'CONSUMER', 'LENT': 'CONSUMER', 'DIXY': 'CONSUMER',
+
+    # Telecommunications
+    'MTSS': 'TELECOM', 'RTKM': 'TELECOM', 'TTLK': 'TELECOM',
+
+    # Utilities
+    'FEES': 'UTILITIES', 'MSRS': 'UTILITIES', 'MRKZ': 'UTILITIES',
+
+    # Healthcare
+    'PHST': 'HEALTHCARE', 'GEMC': 'HEALTHCARE',
+
+    # Industrials
+    'AFLT': 'INDUSTRIALS', 'FLOT': 'INDUSTRIALS', 'BLNG': 'INDUSTRIALS',
+
+    # Real Estate
+    'PIKK': 'REAL_ESTATE', 'LSRG': 'REAL_ESTATE', 'ETLN': 'REAL_ESTATE'
+}
+
+
 class RussianMarketDiversificationManager:
     """
     Portfolio diversification manager for Russian market
     Implements sector diversification rules, correlation analysis, and position size limits
     """
     
-    def __init__(self, rules: Optional[DiversificationRules] = None):
+    def __init__(self, rules: Optional[DiversificationRules] = None,
+                 correlation_service: Optional[CorrelationService] = None):
         self.rules = rules or DiversificationRules()
+        self.correlation_service = correlation_service or get_correlation_service()
         self.sector_mapping = self._initialize_sector_mapping()
         self.state_owned_companies = self._initialize_state_owned_companies()
         self.sanctions_sensitive_stocks = self._initialize_sanctions_sensitive_stocks()
     
     def _initialize_sector_mapping(self) -> Dict[str, str]:
         """Initialize mapping of Russian stocks to sectors"""
-        return {
-            # Energy sector
-            'GAZP': 'ENERGY', 'ROSN': 'ENERGY', 'LKOH': 'ENERGY', 'NVTK': 'ENERGY',
-            'SNGS': 'ENERGY', 'TATN': 'ENERGY', 'TRNFP': 'ENERGY',
-            
-            # Financial sector
-            'SBER': 'FINANCIAL', 'VTBR': 'FINANCIAL', 'TCSG': 'FINANCIAL', 'BSPB': 'FINANCIAL',
-            'CBOM': 'FINANCIAL', 'AFKS': 'FINANCIAL',
-            
-            # Materials sector
-            'GMKN': 'MATERIALS', 'NLMK': 'MATERIALS', 'MAGN': 'MATERIALS', 'CHMF': 'MATERIALS',
-            'ALRS': 'MATERIALS', 'RUAL': 'MATERIALS', 'PHOR': 'MATERIALS', 'POLY': 'MATERIALS',
-            
-            # Technology sector
-            'YNDX': 'TECHNOLOGY', 'MAIL': 'TECHNOLOGY', 'OZON': 'TECHNOLOGY', 'FIXP': 'TECHNOLOGY',
-            'HHRU': 'TECHNOLOGY', 'DSKY': 'TECHNOLOGY', 'QIWI': 'TECHNOLOGY',
-            
-            # Consumer sector
-            'MGNT': 'CONSUMER', 'FIVE': 'CONSUMER', 'LENT': 'CONSUMER', 'DIXY': 'CONSUMER',
-            
-            # Telecommunications
-            'MTSS': 'TELECOM', 'RTKM': 'TELECOM', 'TTLK': 'TELECOM',
-            
-            # Utilities
-            'FEES': 'UTILITIES', 'MSRS': 'UTILITIES', 'MRKZ': 'UTILITIES',
-            
-            # Healthcare
-            'PHST': 'HEALTHCARE', 'GEMC': 'HEALTHCARE',
-            
-            # Industrials
-            'AFLT': 'INDUSTRIALS', 'FLOT': 'INDUSTRIALS', 'BLNG': 'INDUSTRIALS',
-            
-            # Real Estate
-            'PIKK': 'REAL_ESTATE', 'LSRG': 'REAL_ESTATE', 'ETLN': 'REAL_ESTATE'
-        }
+        return dict(RUSSIAN_STOCK_SECTORS)
     
     def _initialize_state_owned_companies(self) -> set:
         """Initialize set of state-owned companies"""
@@ -2509,7 +2718,7 @@ class RussianMarketDiversificationManager:
         violations.extend(sector_violations)
         
         # 4. Check position size limits
-        position_violations = self._check_position_size_limits(portfolio, position_sizes)
+        position_violations = self._check_position_size_limits(position_sizes)
         violations.extend(position_violations)
         
         # 5. Calculate correlation matrix and check correlation limits
@@ -2526,7 +2735,7 @@ class RussianMarketDiversificationManager:
         
         # 6. Check minimum diversification requirements
         min_diversification_violations = self._check_minimum_diversification(
-            portfolio, sector_allocations
+            list(portfolio.positions.keys()), len(sector_allocations)
         )
         violations.extend(min_diversification_violations)
         
@@ -2624,22 +2833,13 @@ class RussianMarketDiversificationManager:
         return violations
     
     def _check_position_size_limits(
-        self, portfolio: Portfolio, position_sizes: Dict[str, float]
+        self, position_sizes: Dict[str, float]
     ) -> List[DiversificationViolation]:
         """Check individual position size limits"""
         violations = []
         
         for symbol, size in position_sizes.items():
-            # Determine position limit based on market cap
-            if self._is_large_cap_stock(symbol):
-                limit = self.rules.max_large_cap_position
-                cap_type = "large cap"
-            elif self._is_mid_cap_stock(symbol):
-                limit = self.rules.max_mid_cap_position
-                cap_type = "mid cap"
-            else:
-                limit = self.rules.max_small_cap_position
-                cap_type = "small cap"
+            limit, cap_type = self._position_limit(symbol)
             
             if size > limit:
                 severity = self._determine_violation_severity(size, limit)
@@ -2655,22 +2855,20 @@ class RussianMarketDiversificationManager:
         
         return violations
     
+    def _position_limit(self, symbol: str) -> Tuple[float, str]:
+        """Position size limit (percent of portfolio) and market cap class of a stock"""
+        if self._is_large_cap_russian_stock(symbol):
+            return self.rules.max_large_cap_position, "large cap"
+        if self._is_mid_cap_russian_stock(symbol):
+            return self.rules.max_mid_cap_position, "mid cap"
+        return self.rules.max_small_cap_position, "small cap"
+    
     def _calculate_correlation_matrix(
         self, symbols: List[str], historical_prices: Dict[str, List[Decimal]]
     ) -> Dict[Tuple[str, str], float]:
         """Calculate correlation matrix for portfolio positions"""
-        correlation_matrix = {}
-        
-        for i, symbol1 in enumerate(symbols):
-            for j, symbol2 in enumerate(symbols):
-                if i < j:  # Only calculate upper triangle
-                    if symbol1 in historical_prices and symbol2 in historical_prices:
-                        correlation = self._calculate_correlation(
-                            historical_prices[symbol1], historical_prices[symbol2]
-                        )
-                        correlation_matrix[(symbol1, symbol2)] = correlation
-        
-        return correlation_matrix
+        matrix = self.correlation_service.matrix(symbols, historical_prices)
+        return matrix.to_pairs(symmetric=False)  # Upper triangle
     
     def _check_correlation_limits(
         self, correlation_matrix: Dict[Tuple[str, str], float], portfolio: Portfolio
@@ -2709,13 +2907,13 @@ class RussianMarketDiversificationManager:
         return violations, high_correlation_pairs
     
     def _check_minimum_diversification(
-        self, portfolio: Portfolio, sector_allocations: Dict[str, float]
+        self, symbols: List[str], num_sectors: int
     ) -> List[DiversificationViolation]:
         """Check minimum diversification requirements"""
         violations = []
         
         # Check minimum number of positions
-        num_positions = len(portfolio.positions)
+        num_positions = len(symbols)
         if num_positions < self.rules.min_number_of_positions:
             violations.append(DiversificationViolation(
                 rule_type='MIN_POSITIONS',
@@ -2723,12 +2921,11 @@ class RussianMarketDiversificationManager:
                 current_value=num_positions,
                 limit_value=self.rules.min_number_of_positions,
                 severity='HIGH',
-                affected_symbols=list(portfolio.positions.keys()),
+                affected_symbols=list(symbols),
                 recommended_action=f'Add more positions to reach minimum of {self.rules.min_number_of_positions}'
             ))
         
         # Check minimum number of sectors
-        num_sectors = len(sector_allocations)
         if num_sectors < self.rules.min_number_of_sectors:
             violations.append(DiversificationViolation(
                 rule_type='MIN_SECTORS',
@@ -2746,47 +2943,50 @@ class RussianMarketDiversificationManager:
         self, portfolio: Portfolio, position_sizes: Dict[str, float]
     ) -> List[DiversificationViolation]:
         """Check Russian market specific diversification rules"""
-        violations = []
-        
-        # Check state-owned company allocation
-        state_owned_allocation = sum(
-            size for symbol, size in position_sizes.items()
-            if symbol in self.state_owned_companies
-        )
+        groups = self._allocation_groups()
         
-        if state_owned_allocation > self.rules.max_state_owned_allocation:
-            severity = self._determine_violation_severity(
-                state_owned_allocation, self.rules.max_state_owned_allocation
-            )
-            violations.append(DiversificationViolation(
-                rule_type='STATE_OWNED',
-                violation_description=f'State-owned allocation ({state_owned_allocation:.1f}%) exceeds limit ({self.rules.max_state_owned_allocation:.1f}%)',
-                current_value=state_owned_allocation,
-                limit_value=self.rules.max_state_owned_allocation,
-                severity=severity,
-                affected_symbols=[s for s in position_sizes.keys() if s in self.state_owned_companies],
-                recommended_action=f'Reduce state-owned company allocation to below {self.rules.max_state_owned_allocation:.1f}%'
-            ))
+        # State-owned and sanctions-sensitive allocations
+        allocations = {
+            group: sum(size for symbol, size in position_sizes.items() if symbol in members)
+            for group, members in groups.items()
+        }
         
-        # Check sanctions-sensitive allocation
-        sanctions_sensitive_allocation = sum(
-            size for symbol, size in position_sizes.items()
-            if symbol in self.sanctions_sensitive_stocks
+        return self._check_group_allocations(
+            allocations, lambda group: [s for s in position_sizes.keys() if s in groups[group]]
         )
+    
+    def _allocation_groups(self) -> Dict[str, set]:
+        """Stock groups with an aggregate allocation limit"""
+        return {
+            'STATE_OWNED': self.state_owned_companies,
+            'SANCTIONS_SENSITIVE': self.sanctions_sensitive_stocks
+        }
+    
+    def _check_group_allocations(
+        self, allocations: Dict[str, float], holdings: Callable[[str], List[str]]
+    ) -> List[DiversificationViolation]:
+        """Check group allocations; holdings(group) lists the affected symbols of a violation"""
+        violations = []
         
-        if sanctions_sensitive_allocation > self.rules.max_sanctions_sensitive_allocation:
-            severity = self._determine_violation_severity(
-                sanctions_sensitive_allocation, self.rules.max_sanctions_sensitive_allocation
-            )
-            violations.append(DiversificationViolation(
-                rule_type='SANCTIONS_SENSITIVE',
-                violation_description=f'Sanctions-sensitive allocation ({sanctions_sensitive_allocation:.1f}%) exceeds limit ({self.rules.max_sanctions_sensitive_allocation:.1f}%)',
-                current_value=sanctions_sensitive_allocation,
-                limit_value=self.rules.max_sanctions_sensitive_allocation,
-                severity=severity,
-                affected_symbols=[s for s in position_sizes.keys() if s in self.sanctions_sensitive_stocks],
-                recommended_action=f'Reduce sanctions-sensitive allocation to below {self.rules.max_sanctions_sensitive_allocation:.1f}%'
-            ))
+        group_limits = {
+            'STATE_OWNED': (self.rules.max_state_owned_allocation, 'State-owned', 'state-owned company'),
+            'SANCTIONS_SENSITIVE': (self.rules.max_sanctions_sensitive_allocation, 'Sanctions-sensitive', 'sanctions-sensitive')
+        }
+        
+        for group, allocation in allocations.items():
+            limit, label, target = group_limits[group]
+            
+            if allocation > limit:
+                severity = self._determine_violation_severity(allocation, limit)
+                violations.append(DiversificationViolation(
+                    rule_type=group,
+                    violation_description=f'{label} allocation ({allocation:.1f}%) exceeds limit ({limit:.1f}%)',
+                    current_value=allocation,
+                    limit_value=limit,
+                    severity=severity,
+                    affected_symbols=holdings(group),
+                    recommended_action=f'Reduce {target} allocation to below {limit:.1f}%'
+                ))
         
         return violations
     
@@ -2920,17 +3120,31 @@ class RussianMarketDiversificationManager:
         Returns:
             Tuple of (is_allowed, warnings, modified_trade)
         """
-        warnings = []
-        
         # Simulate the trade to see the resulting portfolio
         simulated_portfolio = self._simulate_trade(proposed_trade, portfolio, market_data)
         
         # Analyze diversification of simulated portfolio
         analysis = self.analyze_portfolio_diversification(simulated_portfolio, market_data)
         
+        return self._trade_decision(
+            proposed_trade, analysis.violations,
+            lambda high_violations: self._suggest_trade_modification(
+                proposed_trade, portfolio, market_data, high_violations
+            )
+        )
+    
+    def _trade_decision(
+        self,
+        proposed_trade: TradeOrder,
+        violations: List[DiversificationViolation],
+        suggest_modification: Callable[[List[DiversificationViolation]], Optional[TradeOrder]]
+    ) -> Tuple[bool, List[str], Optional[TradeOrder]]:
+        """Turn the violations of a post-trade portfolio into (is_allowed, warnings, modified_trade)"""
+        warnings = []
+        
         # Check for critical violations
-        critical_violations = [v for v in analysis.violations if v.severity == 'CRITICAL']
-        high_violations = [v for v in analysis.violations if v.severity == 'HIGH']
+        critical_violations = [v for v in violations if v.severity == 'CRITICAL']
+        high_violations = [v for v in violations if v.severity == 'HIGH']
         
         # If critical violations, reject the trade
         if critical_violations:
@@ -2941,16 +3155,14 @@ class RussianMarketDiversificationManager:
             warnings.extend([v.violation_description for v in high_violations])
             
             # Try to modify the trade to reduce violations
-            modified_trade = self._suggest_trade_modification(
-                proposed_trade, portfolio, market_data, high_violations
-            )
+            modified_trade = suggest_modification(high_violations)
             
             if modified_trade and modified_trade.quantity != proposed_trade.quantity:
                 warnings.append(f"Suggested position size reduced from {proposed_trade.quantity} to {modified_trade.quantity}")
                 return True, warnings, modified_trade
         
         # Add medium/low violations as warnings
-        medium_low_violations = [v for v in analysis.violations if v.severity in ['MEDIUM', 'LOW']]
+        medium_low_violations = [v for v in violations if v.severity in ['MEDIUM', 'LOW']]
         if medium_low_violations:
             warnings.extend([v.violation_description for v in medium_low_violations])
         
@@ -3067,12 +3279,7 @@ class RussianMarketDiversificationManager:
         portfolio_value = portfolio.total_value
         
         # Determine position limit based on stock type
-        if self._is_large_cap_stock(trade.symbol):
-            max_position_percent = self.rules.max_large_cap_position
-        elif self._is_mid_cap_stock(trade.symbol):
-            max_position_percent = self.rules.max_mid_cap_position
-        else:
-            max_position_percent = self.rules.max_small_cap_position
+        max_position_percent, _ = self._position_limit(trade.symbol)
         
         max_position_value = portfolio_value * Decimal(str(max_position_percent / 100))
         
@@ -3103,6 +3310,160 @@ class RussianMarketDiversificationManager:
         
         return None
 
+    # ===== INCREMENTAL PRE-TRADE CHECKS =====
+    
+    def build_exposure_index(self, portfolio: Portfolio, top_n: int = 5) -> ExposureIndex:
+        """Exposure index of a portfolio for delta pre-trade checks"""
+        return ExposureIndex(
+            portfolio, self.sector_mapping, groups=self._allocation_groups(), top_n=top_n
+        )
+    
+    def pre_screen_trade(
+        self,
+        proposed_trade: TradeOrder,
+        exposure_index: ExposureIndex,
+        market_data: Dict[str, MarketData]
+    ) -> Tuple[bool, List[str], Optional[TradeOrder]]:
+        """
+        Check a proposed trade as a delta against an exposure index
+        
+        Same decision rules as the full simulation, but only the limits the
+        trade can move are evaluated: the traded position, its sector and
+        groups, and the minimum position/sector counts. Correlation limits
+        are not part of the pre-screen.
+        
+        Args:
+            proposed_trade: The trade being proposed
+            exposure_index: Index of the current portfolio (see build_exposure_index)
+            market_data: Current market data
+            
+        Returns:
+            Tuple of (is_allowed, warnings, modified_trade)
+        """
+        symbol_data = market_data.get(proposed_trade.symbol)
+        if not symbol_data:
+            return True, [], None  # Can't evaluate without market data
+        
+        price = float(symbol_data.price)
+        delta = exposure_index.evaluate(
+            proposed_trade.symbol, proposed_trade.action, proposed_trade.quantity, price
+        )
+        
+        return self._trade_decision(
+            proposed_trade, self._delta_violations(delta, exposure_index),
+            lambda high_violations: self._suggest_delta_modification(
+                proposed_trade, exposure_index, price, high_violations
+            )
+        )
+    
+    def pre_screen_trades(
+        self,
+        proposed_trades: List[TradeOrder],
+        portfolio: Portfolio,
+        market_data: Dict[str, MarketData],
+        apply_accepted: bool = True
+    ) -> List[Tuple[bool, List[str], Optional[TradeOrder]]]:
+        """
+        Pre-screen candidate trades in order against one exposure index
+        
+        Args:
+            proposed_trades: Candidate trades in priority order
+            portfolio: Current portfolio
+            market_data: Current market data
+            apply_accepted: Apply accepted (possibly reduced) trades to the index so
+                later candidates are checked against the resulting exposure
+            
+        Returns:
+            (is_allowed, warnings, modified_trade) per trade
+        """
+        exposure_index = self.build_exposure_index(portfolio)
+        results = []
+        
+        for trade in proposed_trades:
+            result = self.pre_screen_trade(trade, exposure_index, market_data)
+            is_allowed, _, modified_trade = result
+            
+            if apply_accepted and is_allowed and trade.symbol in market_data:
+                accepted = modified_trade or trade
+                exposure_index.apply_fill(
+                    accepted.symbol, accepted.action, accepted.quantity,
+                    float(market_data[accepted.symbol].price)
+                )
+            results.append(result)
+        
+        return results
+    
+    def _delta_violations(
+        self, delta: ExposureDelta, exposure_index: ExposureIndex
+    ) -> List[DiversificationViolation]:
+        """Violations of the limits touched by a trade"""
+        violations = []
+        
+        if delta.quantity > 0:
+            violations.extend(self._check_sector_diversification({delta.sector: delta.sector_percent}))
+            violations.extend(self._check_position_size_limits({delta.symbol: delta.position_percent}))
+        
+        if (delta.num_positions < self.rules.min_number_of_positions or
+                delta.num_sectors < self.rules.min_number_of_sectors):
+            violations.extend(self._check_minimum_diversification(
+                self._post_trade_symbols(delta, exposure_index), delta.num_sectors
+            ))
+        
+        groups = self._allocation_groups()
+        violations.extend(self._check_group_allocations(
+            delta.group_percents,
+            lambda group: [
+                s for s in self._post_trade_symbols(delta, exposure_index) if s in groups[group]
+            ]
+        ))
+        
+        return violations
+    
+    def _post_trade_symbols(self, delta: ExposureDelta, exposure_index: ExposureIndex) -> List[str]:
+        """Held symbols after the trade of a delta"""
+        symbols = [s for s in exposure_index.quantities if s != delta.symbol]
+        if delta.quantity > 0:
+            symbols.append(delta.symbol)
+        return symbols
+    
+    def _suggest_delta_modification(
+        self,
+        trade: TradeOrder,
+        exposure_index: ExposureIndex,
+        price: float,
+        violations: List[DiversificationViolation]
+    ) -> Optional[TradeOrder]:
+        """Reduce a buy to the position size limit (index version of _suggest_trade_modification)"""
+        if trade.action != "BUY":
+            return None
+        
+        if not any(v.rule_type == 'POSITION_SIZE' for v in violations):
+            return None
+        
+        max_position_percent, _ = self._position_limit(trade.symbol)
+        max_additional_value = (
+            exposure_index.total_value * max_position_percent / 100 -
+            exposure_index.position_values.get(trade.symbol, 0.0)
+        )
+        
+        if max_additional_value <= 0 or price <= 0:
+            return None  # Can't buy any more of this stock
+        
+        max_additional_quantity = int(max_additional_value / price)
+        
+        if max_additional_quantity < trade.quantity:
+            return TradeOrder(
+                symbol=trade.symbol,
+                action=trade.action,
+                quantity=max_additional_quantity,
+                price=trade.price,
+                order_type=trade.order_type,
+                stop_loss=trade.stop_loss,
+                take_profit=trade.take_profit
+            )
+        
+        return None
+
     # ===== DIVERSIFICATION RULES IMPLEMENTATION =====
     
     def check_sector_diversification_rules(
@@ -3299,21 +3660,8 @@ class RussianMarketDiversificationManager:
         Returns:
             Dictionary mapping symbol pairs to correlation coefficients
         """
-        correlation_matrix = {}
-        
-        for i, symbol1 in enumerate(symbols):
-            for j, symbol2 in enumerate(symbols):
-                if i < j:  # Only calculate upper triangle
-                    if symbol1 in price_histories and symbol2 in price_histories:
-                        correlation = self.calculate_stock_correlation(
-                            symbol1, symbol2,
-                            price_histories[symbol1],
-                            price_histories[symbol2]
-                        )
-                        if correlation is not None:
-                            correlation_matrix[(symbol1, symbol2)] = correlation
-        
-        return correlation_matrix
+        matrix = self.correlation_service.matrix(symbols, price_histories)
+        return matrix.to_pairs(symmetric=False)  # Upper triangle
     
     def check_correlation_limits(
         self, 
@@ -5,13 +5,14 @@ This module provides comprehensive Russian language processing capabilities
 specifically designed for financial news and market analysis.
 """
 
+import os
 import re
 import logging
-from typing import List, Dict, Set, Optional, Tuple
+import threading
+from typing import Any, Callable, Iterable, List, Dict, Set, Optional, Tuple
 from dataclasses import dataclass
 from pathlib import Path
 
-import spacy
 from natasha import (
     Segmenter, MorphVocab, NewsEmbedding, NewsMorphTagger,
     NewsNERTagger, NewsSyntaxParser, Doc
@@ -19,8 +20,12 @@ from natasha import (
 from natasha.extractors import MoneyExtractor, NamesExtractor
 import pymorphy2
 
+from .morph_cache import MorphologyCache
+
 logger = logging.getLogger(__name__)
 
+_MISSING = object()
+
 
 @dataclass
 class ProcessedText:
@@ -104,57 +109,148 @@ class RussianFinancialTerms:
         return self.moex_companies.get(company_name.lower())
 
 
-class RussianNLPPipeline:
-    """Основной класс для обработки русского текста в финансовом контексте."""
+def _load_spacy_model():
+    """Загружает spaCy модель для русского языка (None, если spaCy или модель не установлены)."""
+    try:
+        import spacy
+        spacy_nlp = spacy.load("ru_core_news_sm")
+        logger.info("SpaCy модель ru_core_news_sm загружена")
+        return spacy_nlp
+    except (ImportError, OSError):
+        logger.warning("SpaCy модель ru_core_news_sm не найдена. Используем только Natasha и PyMorphy2")
+        return None
+
+
+class NLPModelRegistry:
+    """
+    Реестр NLP моделей, общий для всех pipeline процесса.
     
-    def __init__(self):
-        self.segmenter = None
-        self.morph_vocab = None
-        self.emb = None
-        self.morph_tagger = None
-        self.ner_tagger = None
-        self.syntax_parser = None
-        self.pymorphy = None
-        self.spacy_nlp = None
-        self.financial_terms = RussianFinancialTerms()
-        self.money_extractor = None
-        self.names_extractor = None
-        
-        self._initialize_models()
+    Каждая модель загружается при первом обращении один раз, зависимые
+    модели (теггеры Natasha, экстракторы) получают уже загруженные
+    эмбеддинги и морфоанализатор. preload() в родительском процессе перед
+    fork позволяет рабочим процессам разделять память моделей copy-on-write.
+    """
     
-    def _initialize_models(self):
-        """Инициализирует все NLP модели."""
-        try:
-            logger.info("Инициализация русских NLP моделей...")
-            
+    def __init__(self):
+        self._models: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self._loaders: Dict[str, Callable[[], Any]] = {
             # Natasha компоненты
-            self.segmenter = Segmenter()
-            self.morph_vocab = MorphVocab()
-            self.emb = NewsEmbedding()
-            self.morph_tagger = NewsMorphTagger(self.emb)
-            self.ner_tagger = NewsNERTagger(self.emb)
-            self.syntax_parser = NewsSyntaxParser(self.emb)
-            
+            'segmenter': lambda: Segmenter(),
+            'morph_vocab': lambda: MorphVocab(),
+            'emb': lambda: NewsEmbedding(),
+            'morph_tagger': lambda: NewsMorphTagger(self.get('emb')),
+            'ner_tagger': lambda: NewsNERTagger(self.get('emb')),
+            'syntax_parser': lambda: NewsSyntaxParser(self.get('emb')),
             # PyMorphy2 для морфологического анализа
-            self.pymorphy = pymorphy2.MorphAnalyzer()
-            
-            # Инициализируем экстракторы с морфологическим анализатором
-            self.money_extractor = MoneyExtractor(self.pymorphy)
-            self.names_extractor = NamesExtractor(self.pymorphy)
-            
-            # Попытка загрузить spaCy модель для русского языка
-            try:
-                self.spacy_nlp = spacy.load("ru_core_news_sm")
-                logger.info("SpaCy модель ru_core_news_sm загружена")
-            except OSError:
-                logger.warning("SpaCy модель ru_core_news_sm не найдена. Используем только Natasha и PyMorphy2")
-                self.spacy_nlp = None
-            
-            logger.info("Русские NLP модели успешно инициализированы")
-            
-        except Exception as e:
-            logger.error(f"Ошибка при инициализации NLP моделей: {e}")
-            raise
+            'pymorphy': lambda: pymorphy2.MorphAnalyzer(),
+            # Экстракторы с морфологическим анализатором
+            'money_extractor': lambda: MoneyExtractor(self.get('pymorphy')),
+            'names_extractor': lambda: NamesExtractor(self.get('pymorphy')),
+            # Кэш разборов pymorphy2 (сам анализатор загружается при первом промахе)
+            'morph_cache': lambda: MorphologyCache(lambda: self.get('pymorphy')),
+            'spacy_nlp': _load_spacy_model,
+        }
+    
+    @property
+    def model_names(self) -> List[str]:
+        """Имена всех моделей реестра."""
+        return list(self._loaders)
+    
+    def get(self, name: str) -> Any:
+        """Возвращает модель, загружая ее при первом обращении."""
+        model = self._models.get(name, _MISSING)
+        if model is not _MISSING:
+            return model
+        
+        if name not in self._loaders:
+            raise KeyError(f"Неизвестная NLP модель: {name}")
+        
+        with self._lock:
+            model = self._models.get(name, _MISSING)
+            if model is _MISSING:
+                try:
+                    logger.info(f"Загрузка NLP модели {name}...")
+                    model = self._loaders[name]()
+                except Exception as e:
+                    logger.error(f"Ошибка при инициализации NLP модели {name}: {e}")
+                    raise
+                self._models[name] = model
+        return model
+    
+    def is_loaded(self, name: str) -> bool:
+        """Проверяет, загружена ли модель."""
+        return name in self._models
+    
+    def preload(self, names: Optional[Iterable[str]] = None) -> 'NLPModelRegistry':
+        """Загружает модели заранее (по умолчанию все)."""
+        for name in (names if names is not None else self._loaders):
+            self.get(name)
+        return self
+    
+    def clear(self):
+        """Выгружает все модели."""
+        with self._lock:
+            self._models.clear()
+    
+    def _reset_lock(self):
+        # Блокировка могла быть захвачена другим потоком родителя в момент fork
+        self._lock = threading.RLock()
+
+
+# Модели, которые использует process_text
+TEXT_PROCESSING_MODELS = (
+    'segmenter', 'morph_tagger', 'ner_tagger', 'pymorphy',
+    'money_extractor', 'names_extractor', 'morph_cache'
+)
+
+_model_registry = NLPModelRegistry()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_model_registry._reset_lock)
+
+
+def get_model_registry() -> NLPModelRegistry:
+    """Возвращает общий реестр NLP моделей процесса."""
+    return _model_registry
+
+
+def preload_models(names: Optional[Iterable[str]] = None,
+                   morph_cache_path: Optional[str] = None) -> NLPModelRegistry:
+    """
+    Заранее загружает модели общего реестра (например, перед созданием пула процессов).
+    
+    Если указан morph_cache_path, кэш морфологии прогревается сохраненными разборами.
+    """
+    _model_registry.preload(names)
+    if morph_cache_path:
+        _model_registry.get('morph_cache').load(morph_cache_path)
+    return _model_registry
+
+
+def _model_property(name: str) -> property:
+    return property(lambda self: self.models.get(name),
+                    doc=f"Модель {name} из реестра (загружается при первом обращении).")
+
+
+class RussianNLPPipeline:
+    """Основной класс для обработки русского текста в финансовом контексте."""
+    
+    segmenter = _model_property('segmenter')
+    morph_vocab = _model_property('morph_vocab')
+    emb = _model_property('emb')
+    morph_tagger = _model_property('morph_tagger')
+    ner_tagger = _model_property('ner_tagger')
+    syntax_parser = _model_property('syntax_parser')
+    pymorphy = _model_property('pymorphy')
+    spacy_nlp = _model_property('spacy_nlp')
+    money_extractor = _model_property('money_extractor')
+    names_extractor = _model_property('names_extractor')
+    morph_cache = _model_property('morph_cache')
+    
+    def __init__(self, registry: Optional[NLPModelRegistry] = None):
+        # Модели не загружаются здесь: они берутся из общего реестра при первом использовании
+        self.models = registry or get_model_registry()
+        self.financial_terms = RussianFinancialTerms()
     
     def clean_text(self, text: str) -> str:
         """Очищает текст от лишних символов и нормализует."""
@@ -203,10 +299,10 @@ class RussianNLPPipeline:
                 if token.text.strip() and len(token.text) > 1:
                     tokens.append(token.text)
                     
-                    # Получаем лемму через PyMorphy2 для лучшего качества
-                    parsed = self.pymorphy.parse(token.text)[0]
-                    lemmas.append(parsed.normal_form)
-                    pos_tags.append(parsed.tag.POS or 'UNKN')
+                    # Получаем лемму через PyMorphy2 для лучшего качества (с кэшированием разборов)
+                    lemma, pos = self.morph_cache.parse(token.text)
+                    lemmas.append(lemma)
+                    pos_tags.append(pos)
             
             return tokens, lemmas, pos_tags
             
@@ -214,7 +310,7 @@ class RussianNLPPipeline:
             logger.error(f"Ошибка при токенизации: {e}")
             # Fallback к простой токенизации
             tokens = text.split()
-            lemmas = [self.pymorphy.parse(token)[0].normal_form for token in tokens]
+            lemmas = self.morph_cache.lemmatize(tokens)
             pos_tags = ['UNKN'] * len(tokens)
             return tokens, lemmas, pos_tags
     
@@ -265,9 +361,11 @@ class RussianNLPPipeline:
         
         return entities
     
-    def extract_financial_terms(self, tokens: List[str], lemmas: List[str]) -> List[str]:
-        """Извлекает финансовые термины из токенов."""
+    def extract_financial_terms(self, tokens: List[str], lemmas: Optional[List[str]] = None) -> List[str]:
+        """Извлекает финансовые термины из токенов (леммы берутся из кэша морфологии, если не переданы)."""
         financial_terms = []
+        if lemmas is None:
+            lemmas = self.morph_cache.lemmatize(tokens)
         
         # Проверяем токены
         for token in tokens:
@@ -13,6 +13,8 @@ from dataclasses import dataclass
 from datetime import datetime
 import pickle
 import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 
 import numpy as np
@@ -23,11 +25,18 @@ from sklearn.metrics import classification_report, accuracy_score
 import joblib
 
 from ..models.news_data import RussianNewsArticle, NewsSentiment, SENTIMENT_LEVELS
-from .russian_nlp import RussianNLPPipeline, ProcessedText
+from .morph_cache import MorphologyCache
+from .russian_nlp import RussianNLPPipeline, ProcessedText, TEXT_PROCESSING_MODELS, preload_models
 
 logger = logging.getLogger(__name__)
 
 
+def _process_texts_chunk(texts: List[str]) -> List[ProcessedText]:
+    """Обработка пачки текстов NLP pipeline (точка входа рабочего процесса)."""
+    pipeline = RussianNLPPipeline()
+    return [pipeline.process_text(text) for text in texts]
+
+
 @dataclass
 class SentimentFeatures:
     """Признаки для анализа настроений."""
@@ -43,9 +52,24 @@ class SentimentFeatures:
 
 
 class RussianFinancialSentimentLexicon:
-    """Словарь русских финансовых терминов с эмоциональной окраской."""
+    """
+    Словарь русских финансовых терминов с эмоциональной окраской.
+
+    Термины записаны в разных словоформах ('растет', 'выросли'), а текст
+    анализируется по леммам. По умолчанию термины сравниваются только как
+    есть. С match_lemmas=True и кэшем морфологии слово, не найденное как
+    есть, сопоставляется с терминами по лемме; это меняет оценки, так как
+    начинают учитываться термины в других словоформах. Если одна лемма
+    получается из терминов разной окраски (в том числе нейтральных), она
+    считается неоднозначной и не оценивается.
+    """
     
-    def __init__(self):
+    def __init__(self, morph_cache: Optional[MorphologyCache] = None, match_lemmas: bool = False):
+        # Кэш морфологии для сопоставления словоформ с терминами по лемме
+        self.morph_cache = morph_cache
+        self.match_lemmas = match_lemmas
+        self._lemma_sentiments: Optional[Dict[str, float]] = None
+        
         # Позитивные финансовые термины
         self.positive_terms = {
             'рост', 'растет', 'выросли', 'увеличение', 'прибыль', 'доходы',
@@ -105,9 +129,31 @@ class RussianFinancialSentimentLexicon:
             return -1.0
         elif term_lower in self.neutral_terms:
             return 0.0
+        elif self.match_lemmas and self.morph_cache is not None:
+            # Другие словоформы терминов ('выросла' -> 'вырасти' <- 'выросли')
+            return self._get_lemma_sentiments().get(self.morph_cache.lemma(term_lower), 0.0)
         else:
             return 0.0
     
+    def _get_lemma_sentiments(self) -> Dict[str, float]:
+        """Окраска лемм терминов (строится при первом обращении)."""
+        if self._lemma_sentiments is None:
+            lemma_classes: Dict[str, Set[float]] = {}
+            for terms, sentiment in ((self.positive_terms, 1.0), (self.negative_terms, -1.0),
+                                     (self.neutral_terms, 0.0)):
+                for term in terms:
+                    lemma_classes.setdefault(self.morph_cache.lemma(term), set()).add(sentiment)
+            
+            ambiguous = sorted(lemma for lemma, classes in lemma_classes.items() if len(classes) > 1)
+            if ambiguous:
+                logger.debug(f"Неоднозначные леммы терминов не оцениваются: {ambiguous}")
+            
+            self._lemma_sentiments = {
+                lemma: next(iter(classes)) for lemma, classes in lemma_classes.items()
+                if len(classes) == 1
+            }
+        return self._lemma_sentiments
+    
     def get_intensifier_weight(self, word: str) -> float:
         """Возвращает вес усилителя."""
         return self.intensifiers.get(word.lower(), 1.0)
@@ -122,7 +168,7 @@ class RussianSentimentAnalyzer:
     
     def __init__(self, model_path: Optional[str] = None):
         self.nlp_pipeline = RussianNLPPipeline()
-        self.lexicon = RussianFinancialSentimentLexicon()
+        self.lexicon = RussianFinancialSentimentLexicon(self.nlp_pipeline.morph_cache)
         self.vectorizer = None
         self.model = None
         self.model_path = model_path or "models/russian_sentiment_model.pkl"
@@ -288,15 +334,19 @@ class RussianSentimentAnalyzer:
             avg_sentence_length=avg_sentence_length
         )
     
-    def _calculate_lexicon_sentiment(self, processed_text: ProcessedText) -> Tuple[float, float]:
-        """Вычисляет настроение на основе словаря."""
+    def _calculate_lexicon_sentiment(self, processed_text: ProcessedText,
+                                     term_sentiments: Optional[Dict[str, float]] = None) -> Tuple[float, float]:
+        """Вычисляет настроение на основе словаря (term_sentiments - готовая окраска лемм текста)."""
         lemmas = processed_text.lemmas
         tokens = processed_text.tokens
         
         sentiment_scores = []
         
         for i, lemma in enumerate(lemmas):
-            base_sentiment = self.lexicon.get_term_sentiment(lemma)
+            if term_sentiments is not None:
+                base_sentiment = term_sentiments[lemma]
+            else:
+                base_sentiment = self.lexicon.get_term_sentiment(lemma)
             
             if base_sentiment != 0:
                 # Проверяем усилители в окрестности
@@ -385,87 +435,10 @@ class RussianSentimentAnalyzer:
             full_text = f"{article.title} {article.content}"
             processed_text = self.nlp_pipeline.process_text(full_text)
             
-            # Извлекаем признаки
-            features = self._extract_features(processed_text)
-            
-            # Анализ на основе словаря
-            lexicon_sentiment, lexicon_confidence = self._calculate_lexicon_sentiment(processed_text)
-            
             # Анализ с помощью ML модели (если доступна)
-            ml_sentiment = 0.0
-            ml_confidence = 0.0
-            
-            if self.model is not None and self.vectorizer is not None:
-                try:
-                    # Подготавливаем текст для модели
-                    processed_for_ml = ' '.join(processed_text.lemmas)
-                    X = self.vectorizer.transform([processed_for_ml])
-                    
-                    # Получаем предсказание
-                    prediction = self.model.predict(X)[0]
-                    probabilities = self.model.predict_proba(X)[0]
-                    
-                    # Конвертируем в числовое значение
-                    if prediction == "POSITIVE":
-                        ml_sentiment = 0.7
-                    elif prediction == "NEGATIVE":
-                        ml_sentiment = -0.7
-                    else:
-                        ml_sentiment = 0.0
-                    
-                    ml_confidence = max(probabilities)
-                    
-                except Exception as e:
-                    logger.warning(f"Ошибка ML анализа: {e}")
+            ml_sentiment, ml_confidence = self._predict_ml_sentiments([processed_text])[0]
             
-            # Комбинируем результаты
-            if lexicon_confidence > 0 and ml_confidence > 0:
-                # Взвешенное среднее
-                total_confidence = lexicon_confidence + ml_confidence
-                final_sentiment = (lexicon_sentiment * lexicon_confidence + 
-                                 ml_sentiment * ml_confidence) / total_confidence
-                final_confidence = min((lexicon_confidence + ml_confidence) / 2, 1.0)
-            elif lexicon_confidence > 0:
-                final_sentiment = lexicon_sentiment
-                final_confidence = lexicon_confidence
-            elif ml_confidence > 0:
-                final_sentiment = ml_sentiment
-                final_confidence = ml_confidence
-            else:
-                final_sentiment = 0.0
-                final_confidence = 0.1  # Минимальная уверенность
-            
-            # Определяем категорию настроения
-            if final_sentiment >= 0.5:
-                overall_sentiment = "VERY_POSITIVE"
-            elif final_sentiment >= 0.1:
-                overall_sentiment = "POSITIVE"
-            elif final_sentiment <= -0.5:
-                overall_sentiment = "VERY_NEGATIVE"
-            elif final_sentiment <= -0.1:
-                overall_sentiment = "NEGATIVE"
-            else:
-                overall_sentiment = "NEUTRAL"
-            
-            # Извлекаем ключевые слова по категориям
-            positive_keywords = [lemma for lemma in processed_text.lemmas 
-                               if self.lexicon.get_term_sentiment(lemma) > 0]
-            negative_keywords = [lemma for lemma in processed_text.lemmas 
-                               if self.lexicon.get_term_sentiment(lemma) < 0]
-            neutral_keywords = [lemma for lemma in processed_text.lemmas 
-                              if self.lexicon.get_term_sentiment(lemma) == 0 and 
-                              lemma in self.lexicon.neutral_terms]
-            
-            return NewsSentiment(
-                article_id=f"{article.source}_{hash(article.title)}_{int(article.timestamp.timestamp())}",
-                overall_sentiment=overall_sentiment,
-                sentiment_score=final_sentiment,
-                confidence=final_confidence,
-                positive_keywords=positive_keywords[:10],  # Топ-10
-                negative_keywords=negative_keywords[:10],  # Топ-10
-                neutral_keywords=neutral_keywords[:10],   # Топ-10
-                timestamp=datetime.now()
-            )
+            return self._build_sentiment(article, processed_text, ml_sentiment, ml_confidence)
             
         except Exception as e:
             logger.error(f"Ошибка при анализе настроения: {e}")
@@ -478,18 +451,121 @@ class RussianSentimentAnalyzer:
                 timestamp=datetime.now()
             )
     
-    def batch_analyze_sentiment(self, articles: List[RussianNewsArticle]) -> List[NewsSentiment]:
-        """Анализирует настроение для списка статей."""
-        results = []
+    def _predict_ml_sentiments(self, processed_texts: List[ProcessedText]) -> List[Tuple[float, float]]:
+        """
+        ML оценки (настроение, уверенность) для пачки текстов.
+        
+        Все тексты векторизуются в одну разреженную матрицу, предсказание
+        делается одним вызовом predict_proba. Без модели или при ошибке
+        возвращаются нулевые оценки.
+        """
+        scores = [(0.0, 0.0)] * len(processed_texts)
+        if self.model is None or self.vectorizer is None or not processed_texts:
+            return scores
+        
+        try:
+            # Подготавливаем тексты для модели
+            X = self.vectorizer.transform([' '.join(processed.lemmas) for processed in processed_texts])
+            
+            # Класс с максимальной вероятностью совпадает с predict
+            probabilities = self.model.predict_proba(X)
+            predictions = self.model.classes_[np.argmax(probabilities, axis=1)]
+            
+            # Конвертируем в числовое значение
+            ml_values = {"POSITIVE": 0.7, "NEGATIVE": -0.7}
+            return [
+                (ml_values.get(prediction, 0.0), float(confidence))
+                for prediction, confidence in zip(predictions, probabilities.max(axis=1))
+            ]
+            
+        except Exception as e:
+            logger.warning(f"Ошибка ML анализа: {e}")
+            return scores
+    
+    def _build_sentiment(self, article: RussianNewsArticle, processed_text: ProcessedText,
+                         ml_sentiment: float, ml_confidence: float) -> NewsSentiment:
+        """Объединяет словарную и ML оценки в результат анализа статьи."""
+        # Окраска каждой уникальной леммы определяется один раз
+        term_sentiments = {lemma: self.lexicon.get_term_sentiment(lemma) for lemma in set(processed_text.lemmas)}
+        
+        # Анализ на основе словаря
+        lexicon_sentiment, lexicon_confidence = self._calculate_lexicon_sentiment(processed_text, term_sentiments)
+        
+        # Комбинируем результаты
+        if lexicon_confidence > 0 and ml_confidence > 0:
+            # Взвешенное среднее
+            total_confidence = lexicon_confidence + ml_confidence
+            final_sentiment = (lexicon_sentiment * lexicon_confidence + 
+                             ml_sentiment * ml_confidence) / total_confidence
+            final_confidence = min((lexicon_confidence + ml_confidence) / 2, 1.0)
+        elif lexicon_confidence > 0:
+            final_sentiment = lexicon_sentiment
+            final_confidence = lexicon_confidence
+        elif ml_confidence > 0:
+            final_sentiment = ml_sentiment
+            final_confidence = ml_confidence
+        else:
+            final_sentiment = 0.0
+            final_confidence = 0.1  # Минимальная уверенность
+        
+        # Определяем категорию настроения
+        if final_sentiment >= 0.5:
+            overall_sentiment = "VERY_POSITIVE"
+        elif final_sentiment >= 0.1:
+            overall_sentiment = "POSITIVE"
+        elif final_sentiment <= -0.5:
+            overall_sentiment = "VERY_NEGATIVE"
+        elif final_sentiment <= -0.1:
+            overall_sentiment = "NEGATIVE"
+        else:
+            overall_sentiment = "NEUTRAL"
+        
+        # Извлекаем ключевые слова по категориям
+        positive_keywords = [lemma for lemma in processed_text.lemmas 
+                           if term_sentiments[lemma] > 0]
+        negative_keywords = [lemma for lemma in processed_text.lemmas 
+                           if term_sentiments[lemma] < 0]
+        neutral_keywords = [lemma for lemma in processed_text.lemmas 
+                          if term_sentiments[lemma] == 0 and 
+                          lemma in self.lexicon.neutral_terms]
+        
+        return NewsSentiment(
+            article_id=f"{article.source}_{hash(article.title)}_{int(article.timestamp.timestamp())}",
+            overall_sentiment=overall_sentiment,
+            sentiment_score=final_sentiment,
+            confidence=final_confidence,
+            positive_keywords=positive_keywords[:10],  # Топ-10
+            negative_keywords=negative_keywords[:10],  # Топ-10
+            neutral_keywords=neutral_keywords[:10],   # Топ-10
+            timestamp=datetime.now()
+        )
+    
+    def batch_analyze_sentiment(self, articles: List[RussianNewsArticle],
+                                max_workers: Optional[int] = None) -> List[NewsSentiment]:
+        """
+        Анализирует настроение для списка статей.
+        
+        Тексты обрабатываются NLP pipeline (при max_workers > 1 - в пуле
+        процессов с заранее загруженными моделями), затем вся пачка
+        векторизуется и классифицируется одним вызовом модели. Результаты
+        возвращаются в порядке статей.
+        
+        Args:
+            articles: Статьи для анализа
+            max_workers: Процессы для обработки текстов (None или 1 - в текущем процессе)
+        """
+        if not articles:
+            return []
+        
+        texts = [f"{article.title} {article.content}" for article in articles]
+        processed_texts = self._process_texts(texts, max_workers)
+        ml_scores = self._predict_ml_sentiments(processed_texts)
         
-        for i, article in enumerate(articles):
+        results = []
+        for i, (article, processed_text, (ml_sentiment, ml_confidence)) in enumerate(
+                zip(articles, processed_texts, ml_scores)):
             try:
-                sentiment = self.analyze_sentiment(article)
-                results.append(sentiment)
-                
-                if (i + 1) % 10 == 0:
-                    logger.info(f"Обработано {i + 1}/{len(articles)} статей")
-                    
+                results.append(self._build_sentiment(article, processed_text, ml_sentiment, ml_confidence))
             except Exception as e:
                 logger.error(f"Ошибка при обработке статьи {i}: {e}")
                 # Добавляем нейтральный результат
@@ -501,8 +577,30 @@ class RussianSentimentAnalyzer:
                     timestamp=datetime.now()
                 ))
         
+        logger.info(f"Обработано {len(results)}/{len(articles)} статей")
         return results
     
+    def _process_texts(self, texts: List[str], max_workers: Optional[int] = None) -> List[ProcessedText]:
+        """Обрабатывает тексты NLP pipeline, при max_workers > 1 - в пуле процессов."""
+        if not max_workers or max_workers <= 1 or len(texts) < 2:
+            return [self.nlp_pipeline.process_text(text) for text in texts]
+        
+        # Модели загружаются до создания пула: при fork процессы разделяют их память
+        # copy-on-write, при spawn каждый процесс загружает их в initializer
+        preload_models(TEXT_PROCESSING_MODELS)
+        workers = min(max_workers, len(texts))
+        chunk_size = max(1, -(-len(texts) // (workers * 4)))
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=preload_models,
+                                     initargs=(TEXT_PROCESSING_MODELS,)) as executor:
+                return [processed for chunk in executor.map(_process_texts_chunk, chunks)
+                        for processed in chunk]
+        except (BrokenProcessPool, OSError) as e:
+            logger.warning(f"Пул процессов недоступен ({e}), обрабатываем тексты в текущем процессе")
+            return [self.nlp_pipeline.process_text(text) for text in texts]
+    
     def train_on_labeled_data(self, labeled_articles: List[Tuple[RussianNewsArticle, str]]):
         """Обучает модель на размеченных данных."""
         if not labeled_articles:
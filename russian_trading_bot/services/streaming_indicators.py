@@ -0,0 +1,510 @@
+"""
+Потоковые (инкрементальные) технические индикаторы для живых тиков MOEX.
+
+Каждый аккумулятор хранит минимальное состояние и обновляется за O(1)
+на новый бар через update(bar), не пересчитывая всю историю цен.
+Значения совпадают с TechnicalAnalyzer (без округления), пока
+аккумулятор не прогрелся, возвращается None.
+
+Прогрев скользящих средних отличается от скалярного API так же, как в
+TechnicalAnalyzer.calculate_indicator_series: sma_20, ema_12 и ema_26
+появляются с 20, 12 и 26 бара, а calculate_moving_averages не возвращает
+ничего, пока не наберется 50 цен.
+"""
+
+import math
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from .technical_analyzer import TechnicalAnalyzer, TechnicalIndicators
+
+
+class Bar(NamedTuple):
+    """Бар OHLC для потоковых индикаторов"""
+    high: float
+    low: float
+    close: float
+
+    @classmethod
+    def from_close(cls, price: float) -> 'Bar':
+        """Бар по одной цене (например, последняя сделка из снимка рынка)"""
+        price = float(price)
+        return cls(price, price, price)
+
+    @classmethod
+    def from_market_data(cls, market_data) -> 'Bar':
+        """Бар из MarketData; при отсутствии high/low используется текущая цена"""
+        price = float(market_data.price)
+        high = float(market_data.high_price) if market_data.high_price else price
+        low = float(market_data.low_price) if market_data.low_price else price
+        return cls(max(high, price), min(low, price), price)
+
+    @classmethod
+    def from_interval(cls, market_data, previous=None) -> 'Bar':
+        """
+        Бар за интервал между двумя снимками рынка
+
+        high_price/low_price в MarketData - экстремумы за весь день, поэтому
+        в бар интервала они попадают, только если обновились после
+        предыдущего снимка. Иначе бар строится по предыдущей и текущей цене
+        (внутриинтервальные экстремумы между снимками не видны). Первый
+        снимок дня охватывает интервал с открытия и берет дневной диапазон.
+        """
+        if previous is None or previous.timestamp.date() != market_data.timestamp.date():
+            return cls.from_market_data(market_data)
+
+        price = float(market_data.price)
+        previous_price = float(previous.price)
+        high = max(price, previous_price)
+        low = min(price, previous_price)
+        if market_data.high_price and (not previous.high_price or market_data.high_price > previous.high_price):
+            high = max(high, float(market_data.high_price))
+        if market_data.low_price and (not previous.low_price or market_data.low_price < previous.low_price):
+            low = min(low, float(market_data.low_price))
+        return cls(high, low, price)
+
+
+BarInput = Union[Bar, Tuple[float, float, float], float, int, Decimal]
+
+
+def _as_bar(bar: BarInput) -> Bar:
+    """Приведение входа update() к Bar"""
+    if isinstance(bar, Bar):
+        return bar
+    if isinstance(bar, (int, float, Decimal)):
+        return Bar.from_close(bar)
+    high, low, close = bar
+    return Bar(float(high), float(low), float(close))
+
+
+class StreamingIndicator(ABC):
+    """Базовый класс потокового индикатора"""
+
+    @abstractmethod
+    def update(self, bar: BarInput):
+        """Учесть новый бар и вернуть текущее значение"""
+
+    @property
+    @abstractmethod
+    def value(self):
+        """Текущее значение (None, пока аккумулятор не прогрелся)"""
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Сериализуемое состояние аккумулятора"""
+        state = {}
+        for key, item in self.__dict__.items():
+            state[key] = list(item) if isinstance(item, deque) else item
+        return state
+
+    def restore(self, state: Dict[str, Any]):
+        """Восстановление состояния, полученного из snapshot()"""
+        for key, item in state.items():
+            current = self.__dict__.get(key)
+            if isinstance(current, deque):
+                restored = deque(tuple(x) if isinstance(x, list) else x for x in item)
+                self.__dict__[key] = deque(restored, maxlen=current.maxlen)
+            else:
+                self.__dict__[key] = item
+
+
+class StreamingEMA(StreamingIndicator):
+    """EMA (эквивалент pandas ewm(span=...).mean() с adjust=True)"""
+
+    def __init__(self, span: int, min_periods: int = 1):
+        self.span = span
+        self.min_periods = min_periods
+        self.decay = 1.0 - 2.0 / (span + 1)
+        self.numerator = 0.0
+        self.denominator = 0.0
+        self.count = 0
+
+    def update(self, bar: BarInput) -> Optional[float]:
+        self.update_value(_as_bar(bar).close)
+        return self.value
+
+    def update_value(self, x: float):
+        self.numerator = x + self.decay * self.numerator
+        self.denominator = 1.0 + self.decay * self.denominator
+        self.count += 1
+
+    @property
+    def raw_value(self) -> Optional[float]:
+        """Значение без учета периода разогрева"""
+        if self.count == 0:
+            return None
+        return self.numerator / self.denominator
+
+    @property
+    def value(self) -> Optional[float]:
+        if self.count < self.min_periods:
+            return None
+        return self.raw_value
+
+
+class StreamingRSI(StreamingIndicator):
+    """RSI со сглаживанием Уайлдера"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev_close: Optional[float] = None
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.deltas = 0
+
+    def update(self, bar: BarInput) -> Optional[float]:
+        close = _as_bar(bar).close
+        if self.prev_close is not None:
+            delta = close - self.prev_close
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            self.deltas += 1
+
+            if self.deltas <= self.period:
+                # Разогрев: простое среднее первых period изменений
+                self.avg_gain += (gain - self.avg_gain) / self.deltas
+                self.avg_loss += (loss - self.avg_loss) / self.deltas
+            else:
+                self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+                self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+
+        self.prev_close = close
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        if self.deltas < self.period:
+            return None
+        if self.avg_loss == 0:
+            return 100.0
+        rs = self.avg_gain / self.avg_loss
+        return 100 - (100 / (1 + rs))
+
+
+class StreamingMACD(StreamingIndicator):
+    """MACD: две EMA по цене и сигнальная EMA по линии MACD"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.slow = slow
+        self.fast_ema = StreamingEMA(fast)
+        self.slow_ema = StreamingEMA(slow)
+        self.signal_ema = StreamingEMA(signal)
+
+    def update(self, bar: BarInput) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        close = _as_bar(bar).close
+        self.fast_ema.update_value(close)
+        self.slow_ema.update_value(close)
+        self.signal_ema.update_value(self.fast_ema.raw_value - self.slow_ema.raw_value)
+        return self.value
+
+    @property
+    def value(self) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        if self.slow_ema.count < self.slow:
+            return None, None, None
+        macd = self.fast_ema.raw_value - self.slow_ema.raw_value
+        signal = self.signal_ema.raw_value
+        return macd, signal, macd - signal
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'slow': self.slow,
+            'fast_ema': self.fast_ema.snapshot(),
+            'slow_ema': self.slow_ema.snapshot(),
+            'signal_ema': self.signal_ema.snapshot()
+        }
+
+    def restore(self, state: Dict[str, Any]):
+        self.slow = state['slow']
+        self.fast_ema.restore(state['fast_ema'])
+        self.slow_ema.restore(state['slow_ema'])
+        self.signal_ema.restore(state['signal_ema'])
+
+
+class StreamingATR(StreamingIndicator):
+    """Average True Range со сглаживанием Уайлдера"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev_close: Optional[float] = None
+        self.atr = 0.0
+        self.ranges = 0
+
+    def update(self, bar: BarInput) -> Optional[float]:
+        bar = _as_bar(bar)
+        if self.prev_close is not None:
+            true_range = max(
+                bar.high - bar.low,
+                abs(bar.high - self.prev_close),
+                abs(bar.low - self.prev_close)
+            )
+            self.ranges += 1
+
+            if self.ranges <= self.period:
+                self.atr += (true_range - self.atr) / self.ranges
+            else:
+                self.atr = (self.atr * (self.period - 1) + true_range) / self.period
+
+        self.prev_close = bar.close
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        if self.ranges < self.period:
+            return None
+        return self.atr
+
+
+class StreamingSMA(StreamingIndicator):
+    """Простая скользящая средняя через бегущую сумму"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window: Deque[float] = deque(maxlen=period)
+        self.total = 0.0
+
+    def update(self, bar: BarInput) -> Optional[float]:
+        self.update_value(_as_bar(bar).close)
+        return self.value
+
+    def update_value(self, x: float):
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(x)
+        self.total += x
+
+    @property
+    def value(self) -> Optional[float]:
+        if len(self.window) < self.period:
+            return None
+        return self.total / self.period
+
+
+class StreamingBollinger(StreamingIndicator):
+    """
+    Полосы Боллинджера по бегущим сумме и сумме квадратов отклонений
+    (скользящий вариант алгоритма Уэлфорда, устойчивый к накоплению ошибки).
+    """
+
+    def __init__(self, period: int = 20, std_dev: float = 2.0, volatility_adjustment: float = 1.0):
+        self.period = period
+        self.std_dev = std_dev
+        self.volatility_adjustment = volatility_adjustment
+        self.window: Deque[float] = deque(maxlen=period)
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, bar: BarInput) -> Optional[Dict[str, float]]:
+        x = _as_bar(bar).close
+        if len(self.window) < self.period:
+            self.window.append(x)
+            delta = x - self.mean
+            self.mean += delta / len(self.window)
+            self.m2 += delta * (x - self.mean)
+        else:
+            old = self.window[0]
+            self.window.append(x)
+            old_mean = self.mean
+            self.mean += (x - old) / self.period
+            self.m2 += (x - old) * (x - self.mean + old - old_mean)
+            self.m2 = max(self.m2, 0.0)
+        return self.value
+
+    @property
+    def value(self) -> Optional[Dict[str, float]]:
+        if len(self.window) < self.period or self.period < 2:
+            return None
+
+        std = math.sqrt(self.m2 / (self.period - 1)) * self.volatility_adjustment
+        upper = self.mean + std * self.std_dev
+        lower = self.mean - std * self.std_dev
+
+        return {
+            'bollinger_upper': upper,
+            'bollinger_middle': self.mean,
+            'bollinger_lower': lower,
+            'bollinger_width': (upper - lower) / self.mean * 100 if self.mean else None
+        }
+
+
+class StreamingStochastic(StreamingIndicator):
+    """Стохастический осциллятор на монотонных очередях максимумов и минимумов"""
+
+    def __init__(self, k_period: int = 14, d_period: int = 3):
+        self.k_period = k_period
+        self.d_period = d_period
+        self.index = 0
+        # Пары (номер бара, цена); максимумы убывают, минимумы возрастают
+        self.highs: Deque[Tuple[int, float]] = deque()
+        self.lows: Deque[Tuple[int, float]] = deque()
+        self.k_values: Deque[float] = deque(maxlen=d_period)
+        self.k_total = 0.0
+        self.k = None
+
+    def update(self, bar: BarInput) -> Tuple[Optional[float], Optional[float]]:
+        bar = _as_bar(bar)
+
+        while self.highs and self.highs[-1][1] <= bar.high:
+            self.highs.pop()
+        self.highs.append((self.index, bar.high))
+        while self.lows and self.lows[-1][1] >= bar.low:
+            self.lows.pop()
+        self.lows.append((self.index, bar.low))
+
+        window_start = self.index - self.k_period + 1
+        if self.highs[0][0] < window_start:
+            self.highs.popleft()
+        if self.lows[0][0] < window_start:
+            self.lows.popleft()
+
+        if window_start >= 0:
+            period_high = self.highs[0][1]
+            period_low = self.lows[0][1]
+            if period_high == period_low:
+                self.k = 50.0
+            else:
+                self.k = (bar.close - period_low) / (period_high - period_low) * 100
+
+            if len(self.k_values) == self.d_period:
+                self.k_total -= self.k_values[0]
+            self.k_values.append(self.k)
+            self.k_total += self.k
+
+        self.index += 1
+        return self.value
+
+    @property
+    def value(self) -> Tuple[Optional[float], Optional[float]]:
+        if len(self.k_values) < self.d_period:
+            return self.k, None
+        return self.k, self.k_total / self.d_period
+
+
+class StreamingIndicatorSet:
+    """
+    Полный набор потоковых индикаторов одной акции с параметрами TechnicalAnalyzer.
+    """
+
+    def __init__(self, symbol: str, analyzer: Optional[TechnicalAnalyzer] = None):
+        analyzer = analyzer or TechnicalAnalyzer()
+        self.symbol = symbol
+        self.bars = 0
+        self.last_update: Optional[datetime] = None
+        self.indicators: Dict[str, StreamingIndicator] = {
+            'rsi': StreamingRSI(analyzer.rsi_period),
+            'macd': StreamingMACD(analyzer.macd_fast, analyzer.macd_slow, analyzer.macd_signal),
+            'sma_20': StreamingSMA(20),
+            'sma_50': StreamingSMA(50),
+            'ema_12': StreamingEMA(12, min_periods=12),
+            'ema_26': StreamingEMA(26, min_periods=26),
+            'bollinger': StreamingBollinger(analyzer.bollinger_period, analyzer.bollinger_std,
+                                            analyzer.volatility_adjustment),
+            'atr': StreamingATR(analyzer.atr_period),
+            'stochastic': StreamingStochastic(analyzer.stochastic_k_period,
+                                              analyzer.stochastic_d_period)
+        }
+
+    def update(self, bar: BarInput, timestamp: Optional[datetime] = None) -> TechnicalIndicators:
+        """
+        Обновление всех индикаторов новым баром.
+
+        Args:
+            bar: Bar, кортеж (high, low, close) или цена закрытия
+            timestamp: Время бара (по умолчанию текущее время)
+
+        Returns:
+            Текущие значения индикаторов
+        """
+        bar = _as_bar(bar)
+        for indicator in self.indicators.values():
+            indicator.update(bar)
+
+        self.bars += 1
+        self.last_update = timestamp or datetime.now()
+        return self.current()
+
+    def warm_up(self, high_prices: List[float], low_prices: List[float],
+                close_prices: List[float]) -> TechnicalIndicators:
+        """Прогрев по истории (однократный проход O(n))"""
+        for bar in zip(high_prices, low_prices, close_prices):
+            self.update(bar)
+        return self.current()
+
+    def current(self) -> TechnicalIndicators:
+        """Текущие значения в формате TechnicalAnalyzer.calculate_all_indicators"""
+        macd, signal, histogram = self.indicators['macd'].value
+        stoch_k, stoch_d = self.indicators['stochastic'].value
+        bollinger = self.indicators['bollinger'].value or {}
+
+        return TechnicalIndicators(
+            symbol=self.symbol,
+            timestamp=self.last_update or datetime.now(),
+            rsi=self.indicators['rsi'].value,
+            macd=macd,
+            macd_signal=signal,
+            macd_histogram=histogram,
+            sma_20=self.indicators['sma_20'].value,
+            sma_50=self.indicators['sma_50'].value,
+            ema_12=self.indicators['ema_12'].value,
+            ema_26=self.indicators['ema_26'].value,
+            bollinger_upper=bollinger.get('bollinger_upper'),
+            bollinger_middle=bollinger.get('bollinger_middle'),
+            bollinger_lower=bollinger.get('bollinger_lower'),
+            bollinger_width=bollinger.get('bollinger_width'),
+            atr=self.indicators['atr'].value,
+            stochastic_k=stoch_k,
+            stochastic_d=stoch_d
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Сериализуемое состояние всех индикаторов"""
+        return {
+            'symbol': self.symbol,
+            'bars': self.bars,
+            'last_update': self.last_update.isoformat() if self.last_update else None,
+            'indicators': {name: indicator.snapshot() for name, indicator in self.indicators.items()}
+        }
+
+    def restore(self, state: Dict[str, Any]):
+        """Восстановление состояния из snapshot()"""
+        self.symbol = state['symbol']
+        self.bars = state['bars']
+        self.last_update = datetime.fromisoformat(state['last_update']) if state['last_update'] else None
+        for name, indicator_state in state['indicators'].items():
+            self.indicators[name].restore(indicator_state)
+
+
+class StreamingIndicatorRegistry:
+    """Потоковые индикаторы по всем отслеживаемым акциям"""
+
+    def __init__(self, analyzer: Optional[TechnicalAnalyzer] = None):
+        self.analyzer = analyzer or TechnicalAnalyzer()
+        self.symbols: Dict[str, StreamingIndicatorSet] = {}
+
+    def get(self, symbol: str) -> StreamingIndicatorSet:
+        """Набор индикаторов акции (создается при первом обращении)"""
+        if symbol not in self.symbols:
+            self.symbols[symbol] = StreamingIndicatorSet(symbol, self.analyzer)
+        return self.symbols[symbol]
+
+    def update(self, symbol: str, bar: BarInput,
+               timestamp: Optional[datetime] = None) -> TechnicalIndicators:
+        """Обновление индикаторов акции новым баром"""
+        return self.get(symbol).update(bar, timestamp)
+
+    def current(self, symbol: str) -> Optional[TechnicalIndicators]:
+        """Текущие значения индикаторов акции или None, если она не отслеживается"""
+        if symbol not in self.symbols:
+            return None
+        return self.symbols[symbol].current()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Состояние всех акций"""
+        return {symbol: indicator_set.snapshot() for symbol, indicator_set in self.symbols.items()}
+
+    def restore(self, state: Dict[str, Dict[str, Any]]):
+        """Восстановление состояния всех акций из snapshot()"""
+        self.symbols = {}
+        for symbol, indicator_state in state.items():
+            self.get(symbol).restore(indicator_state)
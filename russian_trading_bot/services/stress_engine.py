@@ -0,0 +1,325 @@
+"""
+Scenario stress testing for Russian market portfolios
+Reprices every position under sector, RUB/USD, oil, sanctions and
+historical (2022) shocks with one matrix of scenario returns and returns
+a P&L distribution per scenario. Scenarios can run in worker processes.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .var_engine import portfolio_exposures
+
+
+# Position sectors used across the code base mapped to the stress sectors
+SECTOR_ALIASES = {
+    'OIL_GAS': 'ENERGY',
+    'BANKING': 'FINANCIAL',
+    'METALS': 'MATERIALS',
+    'MINING': 'MATERIALS',
+    'TELECOMMUNICATIONS': 'TELECOM',
+    'RETAIL': 'CONSUMER',
+    'TRANSPORTATION': 'INDUSTRIALS',
+}
+
+# Sector sensitivities (USD/RUB beta, oil beta) of RUB-denominated returns.
+# Exporters gain in rubles when the ruble weakens, importers and banks lose.
+SECTOR_FACTOR_BETAS: Dict[str, Tuple[float, float]] = {
+    'ENERGY': (0.4, 0.8),
+    'MATERIALS': (0.4, 0.2),
+    'FINANCIAL': (-0.3, 0.2),
+    'CONSUMER': (-0.4, 0.1),
+    'REAL_ESTATE': (-0.3, 0.1),
+    'INDUSTRIALS': (-0.2, 0.1),
+    'TECHNOLOGY': (-0.1, 0.1),
+    'TELECOM': (-0.1, 0.05),
+    'UTILITIES': (-0.1, 0.05),
+    'HEALTHCARE': (-0.1, 0.0),
+}
+DEFAULT_FACTOR_BETAS = (0.0, 0.1)
+
+# Sector values that carry no information (the bot's own positions use GENERAL/UNKNOWN)
+PLACEHOLDER_SECTORS = frozenset({'GENERAL', 'UNKNOWN', 'OTHER'})
+
+
+def normalize_sector(sector: Optional[str]) -> str:
+    """Stress sector of a position sector name"""
+    sector = (sector or 'OTHER').upper()
+    return SECTOR_ALIASES.get(sector, sector)
+
+
+@dataclass
+class StressScenario:
+    """
+    Shock applied to every position at once (returns as fractions)
+
+    A position return is market_shock + its sector shock + betas times the
+    USD/RUB and oil moves, plus sanctions_shock if the symbol is listed.
+    symbol_shocks replace the composed return for known symbols (historical
+    replays).
+    """
+    name: str
+    market_shock: float = 0.0
+    sector_shocks: Dict[str, float] = field(default_factory=dict)
+    usd_rub_move: float = 0.0  # +0.2 = USD/RUB up 20% (weaker ruble)
+    oil_move: float = 0.0  # Brent move in USD
+    sanctioned_symbols: FrozenSet[str] = frozenset()
+    sanctions_shock: float = 0.0
+    symbol_shocks: Dict[str, float] = field(default_factory=dict)
+    shock_uncertainty: float = 0.25  # Relative std of the scenario shock size
+    dispersion: float = 0.02  # Std of idiosyncratic position returns
+    description: str = ""
+
+
+# Approximate MOEX moves of 24.02.2022: IMOEX -33%, USD/RUB +9%, banks and
+# sanctioned state companies hit hardest, exporters partly cushioned by the ruble
+SCENARIO_2022_GAP = StressScenario(
+    name='2022_gap_replay',
+    market_shock=-0.33,
+    sector_shocks={'FINANCIAL': -0.15, 'TECHNOLOGY': -0.05, 'MATERIALS': 0.05},
+    usd_rub_move=0.09,
+    sanctioned_symbols=frozenset({'SBER', 'VTBR', 'GAZP', 'ROSN', 'AFLT'}),
+    sanctions_shock=-0.10,
+    shock_uncertainty=0.15,
+    dispersion=0.05,
+    description="Replay of the 24 February 2022 gap"
+)
+
+
+def default_scenarios(sanctioned_symbols: Optional[Iterable[str]] = None) -> List[StressScenario]:
+    """
+    Standard battery: market, sector, ruble, oil, sanctions and 2022 replay
+
+    Args:
+        sanctioned_symbols: Symbols for the sanctions scenarios (skipped if empty)
+    """
+    scenarios = [
+        StressScenario('market_-10', market_shock=-0.10),
+        StressScenario('market_-20', market_shock=-0.20),
+    ]
+    scenarios.extend(
+        StressScenario(f'sector_{sector.lower()}_-15', sector_shocks={sector: -0.15})
+        for sector in SECTOR_FACTOR_BETAS
+    )
+    scenarios.extend(
+        StressScenario(f'usd_rub_{move:+.0%}', usd_rub_move=move)
+        for move in (0.10, 0.20, 0.30, -0.10)
+    )
+    scenarios.extend(
+        StressScenario(f'oil_{move:+.0%}', oil_move=move)
+        for move in (-0.20, -0.40, 0.20)
+    )
+
+    sanctioned = frozenset(sanctioned_symbols or ())
+    if sanctioned:
+        scenarios.append(StressScenario(
+            'sanctions', sanctioned_symbols=sanctioned, sanctions_shock=-0.30,
+            description="New sanctions on listed companies"
+        ))
+        scenarios.append(StressScenario(
+            'sanctions_package', market_shock=-0.08, usd_rub_move=0.15,
+            sanctioned_symbols=sanctioned, sanctions_shock=-0.25,
+            description="Sanctions with market and ruble contagion"
+        ))
+
+    scenarios.append(SCENARIO_2022_GAP)
+    return scenarios
+
+
+@dataclass
+class StressResult:
+    """P&L of the portfolio under one scenario (RUB, losses negative)"""
+    scenario: str
+    portfolio_value: float
+    pnl: float  # At the nominal shock without idiosyncratic noise
+    position_pnl: Dict[str, float]
+    expected_pnl: float
+    pnl_std: float
+    percentiles: Dict[int, float]  # Percentile -> P&L of the distribution
+    worst_pnl: float
+    distribution: Optional[np.ndarray] = None
+    timestamp: datetime = field(default_factory=datetime.now)
+
+    @property
+    def pnl_percent(self) -> float:
+        """Nominal P&L as percent of portfolio value"""
+        return self.pnl / self.portfolio_value * 100 if self.portfolio_value else 0.0
+
+
+def _scenario_pnl(args) -> np.ndarray:
+    """Worker entry point: P&L distribution of one scenario"""
+    returns, exposures, uncertainty, dispersion, draws, seed = args
+    rng = np.random.default_rng(seed)
+    scale = 1.0 + uncertainty * rng.standard_normal((draws, 1))
+    noise = dispersion * rng.standard_normal((draws, len(exposures)))
+    return np.maximum(returns * scale + noise, -1.0) @ exposures
+
+
+class StressTestEngine:
+    """
+    Vectorized scenario engine.
+
+    The nominal returns of all scenarios are built as one (scenarios x
+    positions) matrix, so nominal P&L is a single matrix-vector product.
+    Distributions draw a common shock-size factor and idiosyncratic noise
+    per scenario from per-scenario seeds, so results do not depend on the
+    number of workers.
+    """
+
+    def __init__(
+        self,
+        draws: int = 1000,
+        percentiles: Sequence[int] = (1, 5, 50, 95),
+        seed: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        factor_betas: Optional[Mapping[str, Tuple[float, float]]] = None,
+        keep_distributions: bool = False,
+        symbol_sectors: Optional[Mapping[str, str]] = None
+    ):
+        """
+        Args:
+            draws: P&L samples per scenario (0 - nominal P&L only)
+            percentiles: Percentiles reported for each distribution
+            seed: Random seed for reproducible distributions
+            max_workers: Worker processes for scenario distributions (None or 1 - in process)
+            factor_betas: Sector -> (USD/RUB beta, oil beta) overrides
+            keep_distributions: Keep the sampled P&L arrays in the results
+            symbol_sectors: Symbol -> sector used when a position has a placeholder sector
+        """
+        self.draws = draws
+        self.percentiles = tuple(percentiles)
+        self.seed = seed
+        self.max_workers = max_workers
+        self.factor_betas = dict(SECTOR_FACTOR_BETAS)
+        self.factor_betas.update(factor_betas or {})
+        self.keep_distributions = keep_distributions
+        self.symbol_sectors = dict(symbol_sectors or {})
+
+    def position_sector(self, symbol: str, sector: Optional[str]) -> str:
+        """Sector of a position, looked up by symbol when the position sector is a placeholder"""
+        if normalize_sector(sector) in PLACEHOLDER_SECTORS:
+            return self.symbol_sectors.get(symbol, sector or 'OTHER')
+        return sector
+
+    def scenario_returns(
+        self,
+        scenarios: Sequence[StressScenario],
+        symbols: Sequence[str],
+        sectors: Sequence[str]
+    ) -> np.ndarray:
+        """
+        Nominal returns of every position under every scenario
+
+        Returns:
+            Array (scenarios x positions), floored at -100%
+        """
+        sectors = [normalize_sector(sector) for sector in sectors]
+        unique_sectors = sorted(set(sectors))
+        sector_index = np.array([unique_sectors.index(sector) for sector in sectors], dtype=np.int64)
+
+        betas = np.array([self.factor_betas.get(sector, DEFAULT_FACTOR_BETAS) for sector in sectors])
+        betas = betas.reshape(len(sectors), 2)
+        factors = np.array([[s.market_shock, s.usd_rub_move, s.oil_move] for s in scenarios])
+        factors = factors.reshape(len(scenarios), 3)
+
+        sector_shocks = np.array([
+            [self._sector_shock(scenario, sector) for sector in unique_sectors] for scenario in scenarios
+        ]).reshape(len(scenarios), len(unique_sectors))
+
+        returns = (
+            factors[:, :1]
+            + factors[:, 1:] @ betas.T
+            + sector_shocks[:, sector_index]
+        )
+
+        positions = {symbol: i for i, symbol in enumerate(symbols)}
+        for row, scenario in enumerate(scenarios):
+            if scenario.sanctions_shock:
+                listed = [positions[symbol] for symbol in scenario.sanctioned_symbols if symbol in positions]
+                returns[row, listed] += scenario.sanctions_shock
+            for symbol, shock in scenario.symbol_shocks.items():
+                if symbol in positions:
+                    returns[row, positions[symbol]] = shock
+
+        return np.maximum(returns, -1.0)
+
+    @staticmethod
+    def _sector_shock(scenario: StressScenario, sector: str) -> float:
+        if not scenario.sector_shocks:
+            return 0.0
+        return sum(shock for name, shock in scenario.sector_shocks.items() if normalize_sector(name) == sector)
+
+    def run(
+        self,
+        portfolio,
+        scenarios: Optional[Sequence[StressScenario]] = None
+    ) -> List[StressResult]:
+        """
+        Stress P&L of a portfolio
+
+        Args:
+            portfolio: Current portfolio
+            scenarios: Scenario battery (default_scenarios() if omitted)
+
+        Returns:
+            Result per scenario, in scenario order
+        """
+        scenarios = list(scenarios) if scenarios is not None else default_scenarios()
+        symbols, exposures, portfolio_value = portfolio_exposures(portfolio)
+        sectors = [self.position_sector(symbol, portfolio.positions[symbol].sector) for symbol in symbols]
+
+        returns = self.scenario_returns(scenarios, symbols, sectors)
+        position_pnl = returns * exposures
+        nominal = position_pnl.sum(axis=1)
+
+        distributions = self._distributions(scenarios, returns, exposures)
+
+        results = []
+        for row, scenario in enumerate(scenarios):
+            pnl = float(nominal[row])
+            distribution = distributions[row] if distributions is not None else np.array([pnl])
+            results.append(StressResult(
+                scenario=scenario.name,
+                portfolio_value=portfolio_value,
+                pnl=pnl,
+                position_pnl=dict(zip(symbols, position_pnl[row].tolist())),
+                expected_pnl=float(distribution.mean()),
+                pnl_std=float(distribution.std()),
+                percentiles={
+                    p: float(value)
+                    for p, value in zip(self.percentiles, np.percentile(distribution, self.percentiles))
+                },
+                worst_pnl=float(distribution.min()),
+                distribution=distribution if self.keep_distributions else None
+            ))
+        return results
+
+    def _distributions(
+        self,
+        scenarios: Sequence[StressScenario],
+        returns: np.ndarray,
+        exposures: np.ndarray
+    ) -> Optional[List[np.ndarray]]:
+        """Sampled P&L per scenario, None when sampling is disabled"""
+        if self.draws <= 0 or len(exposures) == 0:
+            return None
+
+        seeds = np.random.SeedSequence(self.seed).spawn(len(scenarios))
+        tasks = [
+            (returns[row], exposures, scenario.shock_uncertainty, scenario.dispersion, self.draws, seeds[row])
+            for row, scenario in enumerate(scenarios)
+        ]
+        if self.max_workers and self.max_workers > 1 and len(tasks) > 1:
+            chunksize = max(1, len(tasks) // (self.max_workers * 4))
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(tasks))) as executor:
+                return list(executor.map(_scenario_pnl, tasks, chunksize=chunksize))
+        return [_scenario_pnl(task) for task in tasks]
+
+    @staticmethod
+    def worst_scenario(results: Sequence[StressResult]) -> Optional[StressResult]:
+        """Scenario with the largest nominal loss"""
+        return min(results, key=lambda result: result.pnl, default=None)
@@ -5,8 +5,10 @@
 
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+from typing import Dict, List, Mapping, Optional, Tuple, Union
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 import logging
 
@@ -35,6 +37,116 @@ class TechnicalIndicators:
     stochastic_d: Optional[float] = None
 
 
+# Порядок колонок OHLCV для входных массивов пакетного режима
+OHLCV_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+# Колонки, возвращаемые пакетным расчетом (совпадают с полями TechnicalIndicators)
+INDICATOR_COLUMNS = (
+    'rsi', 'macd', 'macd_signal', 'macd_histogram',
+    'sma_20', 'sma_50', 'ema_12', 'ema_26',
+    'bollinger_upper', 'bollinger_middle', 'bollinger_lower', 'bollinger_width',
+    'atr', 'stochastic_k', 'stochastic_d'
+)
+
+OHLCVInput = Union[np.ndarray, pd.DataFrame, Mapping[str, List[float]]]
+
+
+@dataclass
+class IndicatorMatrix:
+    """
+    Колоночный результат пакетного расчета индикаторов по нескольким акциям.
+    Каждый индикатор хранится матрицей (время x акции); доступ по тикеру
+    возвращает представления колонок без копирования.
+    """
+    symbols: List[str]
+    dates: Optional[pd.DatetimeIndex]
+    values: Dict[str, np.ndarray] = field(default_factory=dict)
+    
+    def __post_init__(self):
+        self._columns = {symbol: i for i, symbol in enumerate(self.symbols)}
+    
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._columns
+    
+    def __getitem__(self, symbol: str) -> Dict[str, np.ndarray]:
+        """Все индикаторы одной акции в формате calculate_indicator_series"""
+        column = self._columns[symbol]
+        return {name: matrix[:, column] for name, matrix in self.values.items()}
+    
+    def latest(self, symbol: str, analyzer: Optional['TechnicalAnalyzer'] = None) -> 'TechnicalIndicators':
+        """Последние значения индикаторов акции"""
+        analyzer = analyzer or TechnicalAnalyzer()
+        timestamp = self.dates[-1].to_pydatetime() if self.dates is not None and len(self.dates) else None
+        return analyzer.indicators_at(symbol, self[symbol], -1, timestamp)
+    
+    def to_frame(self, indicator: str) -> pd.DataFrame:
+        """Матрица одного индикатора в виде DataFrame (даты x тикеры)"""
+        return pd.DataFrame(self.values[indicator], index=self.dates, columns=self.symbols)
+
+
+def _ema_series(values: np.ndarray, span: int) -> np.ndarray:
+    """
+    EMA по всей серии (эквивалент pandas ewm(span=...).mean() с adjust=True).
+    Считается рекурсивным фильтром по оси 0 без цикла по барам.
+    """
+    alpha = 2.0 / (span + 1)
+    a = [1.0, -(1.0 - alpha)]
+    numerator = lfilter([1.0], a, values, axis=0)
+    denominator = lfilter([1.0], a, np.ones_like(values), axis=0)
+    return numerator / denominator
+
+
+def _wilder_series(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Сглаживание Уайлдера по оси 0: первое значение - среднее первых period
+    элементов, далее y[t] = (y[t-1] * (period - 1) + x[t]) / period.
+    Элементы до окончания разогрева заполняются NaN.
+    """
+    result = np.full(values.shape, np.nan)
+    if values.shape[0] < period:
+        return result
+
+    seed = values[:period].mean(axis=0)
+    result[period - 1] = seed
+
+    if values.shape[0] > period:
+        decay = (period - 1) / period
+        zi = (np.asarray(seed) * decay)[np.newaxis, ...]
+        result[period:], _ = lfilter([1.0 / period], [1.0, -decay],
+                                     values[period:], axis=0, zi=zi)
+    return result
+
+
+def _rolling_mean(values: np.ndarray, period: int) -> np.ndarray:
+    """Скользящее среднее по оси 0 через кумулятивные суммы"""
+    result = np.full(values.shape, np.nan)
+    if values.shape[0] < period:
+        return result
+
+    cumsum = np.cumsum(values, axis=0)
+    window_sums = cumsum[period - 1:].copy()
+    window_sums[1:] -= cumsum[:-period]
+    result[period - 1:] = window_sums / period
+    return result
+
+
+def _rolling_reduce(values: np.ndarray, period: int, reducer, **kwargs) -> np.ndarray:
+    """Произвольная агрегация скользящего окна по оси 0 (std, max, min)"""
+    result = np.full(values.shape, np.nan)
+    if values.shape[0] < period:
+        return result
+
+    windows = sliding_window_view(values, period, axis=0)
+    result[period - 1:] = reducer(windows, axis=-1, **kwargs)
+    return result
+
+
+def _mask_warmup(values: np.ndarray, bars: int) -> np.ndarray:
+    """Заполнение NaN первых bars значений, для которых скалярный API возвращает None"""
+    values[:max(bars, 0)] = np.nan
+    return values
+
+
 class TechnicalAnalyzer:
     """
     Технический анализатор для российского рынка MOEX.
@@ -336,6 +448,273 @@ class TechnicalAnalyzer:
             logger.error(f"Ошибка при расчете индикаторов для {symbol}: {e}")
             return TechnicalIndicators(symbol=symbol, timestamp=datetime.now())
     
+    def calculate_indicator_series(self, ohlcv: OHLCVInput) -> Dict[str, np.ndarray]:
+        """
+        Пакетный расчет всех индикаторов по всей истории за один проход.
+        
+        В отличие от calculate_all_indicators, возвращает не последнее значение,
+        а полную колонку для каждого бара. Значение в позиции t совпадает с
+        результатом скалярного API для цен [0..t] (без округления); бары, на
+        которых окно индикатора еще не набрано, заполнены NaN. Исключение -
+        sma_20, ema_12 и ema_26: скалярный calculate_moving_averages
+        возвращает их только начиная с 50 баров, а в колонках значения есть
+        с 20, 12 и 26 бара соответственно.
+        
+        Args:
+            ohlcv: Массив формы (n, 5) с колонками OHLCV_COLUMNS, DataFrame
+                   с колонками 'high', 'low', 'close' или словарь в формате
+                   market_data из calculate_all_indicators
+            
+        Returns:
+            Словарь {имя индикатора: np.ndarray длины n} с ключами INDICATOR_COLUMNS
+        """
+        high, low, close = self._extract_hlc(ohlcv)
+        return self._indicator_columns(high, low, close)
+    
+    def indicators_at(self, symbol: str, series: Dict[str, np.ndarray], index: int = -1,
+                      timestamp: Optional[datetime] = None) -> TechnicalIndicators:
+        """
+        Сборка TechnicalIndicators из результата calculate_indicator_series для одного бара.
+        
+        Args:
+            symbol: Тикер российской акции
+            series: Результат calculate_indicator_series
+            index: Номер бара (по умолчанию последний)
+            timestamp: Время бара (по умолчанию текущее время)
+            
+        Returns:
+            Объект TechnicalIndicators; NaN заменяются на None
+        """
+        values = {}
+        for name in INDICATOR_COLUMNS:
+            value = float(series[name][index])
+            values[name] = None if np.isnan(value) else value
+        
+        return TechnicalIndicators(
+            symbol=symbol,
+            timestamp=timestamp or datetime.now(),
+            **values
+        )
+    
+    def calculate_indicator_matrix(self, close: Union[np.ndarray, pd.DataFrame],
+                                   high: Optional[Union[np.ndarray, pd.DataFrame]] = None,
+                                   low: Optional[Union[np.ndarray, pd.DataFrame]] = None,
+                                   symbols: Optional[List[str]] = None,
+                                   dates: Optional[pd.DatetimeIndex] = None) -> IndicatorMatrix:
+        """
+        Пакетный расчет индикаторов сразу для всех акций матрицы цен.
+        
+        Строки - торговые дни MOEX, колонки - акции. Пропуски внутри истории
+        заполняются последним известным значением, а акции, начинающие торговаться
+        позже (NaN в начале колонки), считаются с первого доступного бара.
+        
+        Args:
+            close: Матрица цен закрытия (время x акции) или DataFrame с тикерами в колонках
+            high: Матрица максимальных цен той же формы (необязательно)
+            low: Матрица минимальных цен той же формы (необязательно)
+            symbols: Тикеры колонок (по умолчанию колонки DataFrame)
+            dates: Торговые даты строк (по умолчанию индекс DataFrame)
+            
+        Returns:
+            IndicatorMatrix с матрицами для каждого индикатора из INDICATOR_COLUMNS
+        """
+        if isinstance(close, pd.DataFrame):
+            symbols = symbols or [str(column) for column in close.columns]
+            dates = dates if dates is not None else pd.DatetimeIndex(close.index)
+            high = high.reindex(index=close.index, columns=close.columns) if isinstance(high, pd.DataFrame) else high
+            low = low.reindex(index=close.index, columns=close.columns) if isinstance(low, pd.DataFrame) else low
+        
+        close = self._prepare_matrix(close)
+        high = self._prepare_matrix(high) if high is not None else None
+        low = self._prepare_matrix(low) if low is not None else None
+        
+        if symbols is None:
+            symbols = [str(i) for i in range(close.shape[1])]
+        if len(symbols) != close.shape[1]:
+            raise ValueError(f"Количество тикеров ({len(symbols)}) не совпадает с числом колонок ({close.shape[1]})")
+        for matrix in (high, low):
+            if matrix is not None and matrix.shape != close.shape:
+                raise ValueError("Матрицы high/low должны совпадать по форме с матрицей close")
+        
+        values = {name: np.full(close.shape, np.nan) for name in INDICATOR_COLUMNS}
+        
+        # Колонки с одинаковым первым валидным баром считаются одним вызовом
+        valid = ~np.isnan(close)
+        first_valid = np.where(valid.any(axis=0), valid.argmax(axis=0), close.shape[0])
+        for start in np.unique(first_valid):
+            if start >= close.shape[0]:
+                continue
+            columns = np.flatnonzero(first_valid == start)
+            group = self._indicator_columns(
+                high[start:, columns] if high is not None else None,
+                low[start:, columns] if low is not None else None,
+                close[start:, columns]
+            )
+            for name, matrix in group.items():
+                values[name][start:, columns] = matrix
+        
+        return IndicatorMatrix(symbols=list(symbols), dates=dates, values=values)
+    
+    def calculate_signal_matrix(self, indicators: IndicatorMatrix,
+                                close: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Векторный аналог get_market_signal для всей матрицы индикаторов.
+        
+        Каждый из индикаторов RSI, MACD, Боллинджер и стохастик голосует
+        за покупку (+1), продажу (-1) или нейтрально (0) с порогами
+        get_market_signal; полосы Боллинджера сравниваются с ценой закрытия.
+        MACD никогда не голосует нейтрально, поэтому сигнал требует минимум
+        двух согласных индикаторов, а уверенность считается по согласию
+        среди ненейтральных голосов.
+        
+        Args:
+            indicators: Результат calculate_indicator_matrix
+            close: Матрица цен закрытия той же формы (время x акции)
+            
+        Returns:
+            Кортеж (направление: int8 матрица -1/0/1,
+                    уверенность: 0.5 + 0.5 * |сумма голосов| / число ненейтральных голосов,
+                    0 при отсутствии сигнала)
+        """
+        values = indicators.values
+        close = np.asarray(close, dtype=np.float64)
+        
+        with np.errstate(invalid='ignore'):
+            votes = [
+                np.where(values['rsi'] < 25, 1, np.where(values['rsi'] > 75, -1, 0)),
+                np.where(values['macd'] > values['macd_signal'], 1,
+                         np.where(values['macd'] <= values['macd_signal'], -1, 0)),
+                np.where(close <= values['bollinger_lower'], 1,
+                         np.where(close >= values['bollinger_upper'], -1, 0)),
+                np.where(values['stochastic_k'] < 20, 1, np.where(values['stochastic_k'] > 80, -1, 0))
+            ]
+        
+        votes = np.stack(votes)
+        net = votes.sum(axis=0)
+        active = np.count_nonzero(votes, axis=0)
+        agreeing = np.where(net > 0, (votes > 0).sum(axis=0), (votes < 0).sum(axis=0))
+        
+        direction = np.where(agreeing >= 2, np.sign(net), 0).astype(np.int8)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            confidence = np.where(direction != 0, 0.5 + 0.5 * np.abs(net) / active, 0.0)
+        return direction, confidence
+    
+    @staticmethod
+    def _prepare_matrix(matrix: Union[np.ndarray, pd.DataFrame]) -> np.ndarray:
+        """Матрица float64 (время x акции) с заполнением внутренних пропусков"""
+        if isinstance(matrix, pd.DataFrame):
+            return matrix.ffill().to_numpy(dtype=np.float64)
+        
+        data = np.asarray(matrix, dtype=np.float64)
+        if data.ndim == 1:
+            data = data[:, np.newaxis]
+        if data.ndim != 2:
+            raise ValueError("Ожидается матрица формы (время, акции)")
+        
+        missing = np.isnan(data)
+        if missing.any():
+            # Индекс последнего валидного бара для каждой ячейки (as-of заполнение)
+            rows = np.where(~missing, np.arange(data.shape[0])[:, np.newaxis], 0)
+            np.maximum.accumulate(rows, axis=0, out=rows)
+            data = data[rows, np.arange(data.shape[1])]
+        return data
+    
+    def _extract_hlc(self, ohlcv: OHLCVInput) -> Tuple[Optional[np.ndarray], Optional[np.ndarray], np.ndarray]:
+        """Приведение входных данных к массивам high/low/close (float64)"""
+        if isinstance(ohlcv, np.ndarray):
+            if ohlcv.ndim != 2 or ohlcv.shape[1] < len(OHLCV_COLUMNS):
+                raise ValueError(f"Ожидается массив формы (n, {len(OHLCV_COLUMNS)}) с колонками {OHLCV_COLUMNS}")
+            data = np.asarray(ohlcv, dtype=np.float64)
+            return (data[:, OHLCV_COLUMNS.index('high')],
+                    data[:, OHLCV_COLUMNS.index('low')],
+                    data[:, OHLCV_COLUMNS.index('close')])
+        
+        def column(name: str) -> Optional[np.ndarray]:
+            if name not in ohlcv or len(ohlcv[name]) == 0:
+                return None
+            return np.asarray(ohlcv[name], dtype=np.float64)
+        
+        close = column('close')
+        if close is None:
+            raise ValueError("Нет данных о ценах закрытия")
+        return column('high'), column('low'), close
+    
+    def _indicator_columns(self, high: Optional[np.ndarray], low: Optional[np.ndarray],
+                           close: np.ndarray) -> Dict[str, np.ndarray]:
+        """Расчет колонок индикаторов по оси 0 (время)"""
+        n = close.shape[0]
+        if n == 0:
+            # Без баров нет и разностей: колонки RSI и ATR иначе получили бы лишний NaN
+            return {name: np.full(close.shape, np.nan) for name in INDICATOR_COLUMNS}
+        
+        result: Dict[str, np.ndarray] = {}
+        
+        # RSI (сглаживание Уайлдера по приростам и падениям)
+        deltas = np.diff(close, axis=0)
+        gains = np.where(deltas > 0, deltas, 0.0)
+        losses = np.where(deltas < 0, -deltas, 0.0)
+        avg_gain = _wilder_series(gains, self.rsi_period)
+        avg_loss = _wilder_series(losses, self.rsi_period)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+        rsi = np.where(np.isnan(avg_gain) | np.isnan(avg_loss), np.nan, rsi)
+        result['rsi'] = np.concatenate([np.full((1,) + close.shape[1:], np.nan), rsi], axis=0)
+        
+        # MACD
+        macd_line = _ema_series(close, self.macd_fast) - _ema_series(close, self.macd_slow)
+        signal_line = _ema_series(macd_line, self.macd_signal)
+        result['macd'] = _mask_warmup(macd_line, self.macd_slow - 1)
+        result['macd_signal'] = _mask_warmup(signal_line, self.macd_slow - 1)
+        result['macd_histogram'] = result['macd'] - result['macd_signal']
+        
+        # Скользящие средние
+        result['sma_20'] = _rolling_mean(close, 20)
+        result['sma_50'] = _rolling_mean(close, 50)
+        result['ema_12'] = _mask_warmup(_ema_series(close, 12), 11)
+        result['ema_26'] = _mask_warmup(_ema_series(close, 26), 25)
+        
+        # Полосы Боллинджера
+        period = self.bollinger_period
+        middle = _rolling_mean(close, period)
+        std = _rolling_reduce(close, period, np.std, ddof=1) * self.volatility_adjustment
+        result['bollinger_upper'] = middle + std * self.bollinger_std
+        result['bollinger_middle'] = middle
+        result['bollinger_lower'] = middle - std * self.bollinger_std
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result['bollinger_width'] = (result['bollinger_upper'] - result['bollinger_lower']) / middle * 100
+        
+        if high is None or low is None:
+            for name in ('atr', 'stochastic_k', 'stochastic_d'):
+                result[name] = np.full(close.shape, np.nan)
+            return result
+        
+        # ATR
+        prev_close = close[:-1]
+        true_range = np.maximum.reduce([
+            high[1:] - low[1:],
+            np.abs(high[1:] - prev_close),
+            np.abs(low[1:] - prev_close)
+        ])
+        atr = _wilder_series(true_range, self.atr_period)
+        result['atr'] = np.concatenate([np.full((1,) + close.shape[1:], np.nan), atr], axis=0)
+        
+        # Стохастический осциллятор
+        k_period = self.stochastic_k_period
+        period_high = _rolling_reduce(high, k_period, np.max)
+        period_low = _rolling_reduce(low, k_period, np.min)
+        price_range = period_high - period_low
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stoch_k = np.where(price_range == 0, 50.0, (close - period_low) / price_range * 100)
+        stoch_k = np.where(np.isnan(price_range), np.nan, stoch_k)
+        result['stochastic_k'] = stoch_k
+        
+        stoch_d = np.full(close.shape, np.nan)
+        if n >= k_period:
+            stoch_d[k_period - 1:] = _rolling_mean(stoch_k[k_period - 1:], self.stochastic_d_period)
+        result['stochastic_d'] = stoch_d
+        
+        return result
+    
     def get_market_signal(self, indicators: TechnicalIndicators) -> Dict[str, str]:
         """
         Генерация торговых сигналов на основе технических индикаторов.
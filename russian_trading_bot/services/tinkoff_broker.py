@@ -11,6 +11,7 @@ import aiohttp
 import json
 
 from russian_trading_bot.api.broker_interface import RussianBrokerInterface, BrokerType
+from russian_trading_bot.services.rate_limiter import RateLimiter
 from russian_trading_bot.models.trading import (
     TradeOrder, ExecutionResult, OrderStatus, Portfolio, Position,
     OrderType, OrderAction
@@ -23,13 +24,14 @@ logger = logging.getLogger(__name__)
 class TinkoffBroker(RussianBrokerInterface):
     """Tinkoff Invest API implementation"""
     
-    def __init__(self, token: str, sandbox: bool = True):
+    def __init__(self, token: str, sandbox: bool = True, rate_limiter: Optional[RateLimiter] = None):
         """
         Initialize Tinkoff broker client
         
         Args:
             token: Tinkoff Invest API token
             sandbox: Use sandbox environment for testing
+            rate_limiter: Optional limiter shared with other API clients
         """
         self.token = token
         self.sandbox = sandbox
@@ -43,6 +45,7 @@ class TinkoffBroker(RussianBrokerInterface):
             "accept": "application/json"
         }
         self.session: Optional[aiohttp.ClientSession] = None
+        self.rate_limiter = rate_limiter
         self.account_id: Optional[str] = None
     
     async def _get_session(self) -> aiohttp.ClientSession:
@@ -56,6 +59,9 @@ class TinkoffBroker(RussianBrokerInterface):
     
     async def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Dict[str, Any]:
         """Make HTTP request to Tinkoff API"""
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+        
         session = await self._get_session()
         url = f"{self.base_url}/{endpoint}"
         
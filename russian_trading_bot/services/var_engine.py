@@ -0,0 +1,369 @@
+"""
+Portfolio Value-at-Risk engine for Russian market portfolios
+Historical simulation, Monte Carlo and parametric (delta-normal) VaR/CVaR
+with component and marginal VaR per position. Monte Carlo scenarios are
+generated from a Cholesky factor in fixed-size chunks, optionally across
+worker processes, so memory stays bounded for large books.
+"""
+
+import logging
+import math
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from statistics import NormalDist
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .correlation_service import returns_matrix
+
+
+logger = logging.getLogger(__name__)
+
+# Scenarios around the VaR quantile used to attribute VaR to positions
+VAR_KERNEL_FRACTION = 0.01
+
+
+@dataclass
+class VaRResult:
+    """Portfolio VaR/CVaR with per-position attribution (losses are positive RUB amounts)"""
+    method: str  # historical, monte_carlo, parametric
+    confidence: float
+    horizon_days: int
+    portfolio_value: float
+    var: float
+    cvar: float
+    component_var: Dict[str, float] = field(default_factory=dict)  # Sums to var
+    component_cvar: Dict[str, float] = field(default_factory=dict)  # Sums to cvar
+    marginal_var: Dict[str, float] = field(default_factory=dict)  # dVaR per 1 RUB of exposure
+    scenarios: int = 0
+    timestamp: datetime = field(default_factory=datetime.now)
+
+    @property
+    def var_percent(self) -> float:
+        """VaR as percent of portfolio value"""
+        return self.var / self.portfolio_value * 100 if self.portfolio_value else 0.0
+
+    @property
+    def cvar_percent(self) -> float:
+        """CVaR as percent of portfolio value"""
+        return self.cvar / self.portfolio_value * 100 if self.portfolio_value else 0.0
+
+
+def portfolio_exposures(portfolio) -> Tuple[List[str], np.ndarray, float]:
+    """
+    Position exposures of a portfolio
+
+    Returns:
+        (symbols, market values in RUB, total portfolio value including cash)
+    """
+    symbols = [symbol for symbol, position in portfolio.positions.items() if position.market_value]
+    values = np.array([float(portfolio.positions[symbol].market_value) for symbol in symbols])
+    return symbols, values, float(portfolio.total_value)
+
+
+def robust_cholesky(covariance: np.ndarray) -> np.ndarray:
+    """
+    Cholesky factor of a covariance matrix, repaired if it is not positive definite
+
+    Estimated covariances (EWMA, short windows) are often only positive
+    semi-definite; negative eigenvalues are clipped before factorization.
+    """
+    try:
+        return np.linalg.cholesky(covariance)
+    except np.linalg.LinAlgError:
+        eigenvalues, eigenvectors = np.linalg.eigh((covariance + covariance.T) / 2)
+        floor = max(eigenvalues.max(), 0.0) * 1e-10 + 1e-18
+        repaired = (eigenvectors * np.clip(eigenvalues, floor, None)) @ eigenvectors.T
+        return np.linalg.cholesky(repaired)
+
+
+def _simulate_chunk(factor: np.ndarray, exposures: np.ndarray, drift: np.ndarray,
+                    scale: float, size: int, seed: np.random.SeedSequence) -> np.ndarray:
+    """Position P&L (size x n) for one chunk of correlated normal scenarios"""
+    rng = np.random.default_rng(seed)
+    shocks = rng.standard_normal((size, len(exposures)))
+    returns = drift + scale * (shocks @ factor.T)
+    return returns * exposures
+
+
+def _chunk_pnl(args) -> np.ndarray:
+    """Worker entry point: total portfolio P&L of one chunk"""
+    return _simulate_chunk(*args).sum(axis=1)
+
+
+class PortfolioVaREngine:
+    """
+    Vectorized VaR/CVaR engine.
+
+    Historical simulation applies the matrix of aligned historical returns
+    to current exposures in one product. Monte Carlo draws correlated
+    normal returns through the Cholesky factor of the covariance matrix in
+    chunks: the first pass keeps only portfolio P&L to find the VaR
+    threshold, the second regenerates the same chunks (per-chunk seeds) to
+    attribute tail losses to positions. Component VaR is the average
+    position loss in scenarios closest to the VaR quantile, component CVaR
+    the average position loss beyond it; both add up to the portfolio total.
+    """
+
+    def __init__(
+        self,
+        confidence: float = 0.95,
+        horizon_days: int = 1,
+        simulations: int = 100_000,
+        chunk_size: int = 20_000,
+        seed: Optional[int] = None,
+        max_workers: Optional[int] = None
+    ):
+        """
+        Args:
+            confidence: VaR confidence level (e.g. 0.95 or 0.99)
+            horizon_days: Horizon in trading days (square-root-of-time scaling)
+            simulations: Number of Monte Carlo scenarios
+            chunk_size: Scenarios generated at once (bounds memory to chunk_size x positions)
+            seed: Random seed for reproducible Monte Carlo runs
+            max_workers: Worker processes for Monte Carlo (None or 1 - in process)
+        """
+        if not 0.5 < confidence < 1:
+            raise ValueError("confidence must be between 0.5 and 1")
+        if horizon_days < 1:
+            raise ValueError("horizon_days must be at least 1")
+
+        self.confidence = confidence
+        self.horizon_days = horizon_days
+        self.simulations = simulations
+        self.chunk_size = chunk_size
+        self.seed = seed
+        self.max_workers = max_workers
+
+    # ------------------------------------------------------------------
+    # Tail statistics
+
+    def _tail_statistics(self, pnl: np.ndarray) -> Tuple[float, float, np.ndarray, np.ndarray]:
+        """
+        VaR, CVaR and masks of kernel (near-VaR) and tail scenarios
+
+        Returns:
+            (var, cvar, kernel mask, tail mask)
+        """
+        count = len(pnl)
+        tail_count = max(1, int(math.floor(count * (1 - self.confidence))))
+        order = np.argsort(pnl, kind='stable')
+
+        var = -float(pnl[order[tail_count - 1]])
+        tail = np.zeros(count, dtype=bool)
+        tail[order[:tail_count]] = True
+        cvar = -float(pnl[tail].mean())
+
+        half_width = max(1, int(count * VAR_KERNEL_FRACTION / 2))
+        low = max(0, tail_count - 1 - half_width)
+        high = min(count, tail_count + half_width)
+        kernel = np.zeros(count, dtype=bool)
+        kernel[order[low:high]] = True
+        return var, cvar, kernel, tail
+
+    @staticmethod
+    def _attribute(total: float, contributions: np.ndarray) -> np.ndarray:
+        """Scale position contributions so they add up exactly to the total"""
+        subtotal = contributions.sum()
+        if subtotal == 0:
+            return contributions
+        return contributions * (total / subtotal)
+
+    def _result(self, method: str, symbols: Sequence[str], exposures: np.ndarray,
+                portfolio_value: float, var: float, cvar: float,
+                component_var: np.ndarray, component_cvar: np.ndarray, scenarios: int) -> VaRResult:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            marginal = np.where(exposures != 0, component_var / exposures, 0.0)
+        return VaRResult(
+            method=method,
+            confidence=self.confidence,
+            horizon_days=self.horizon_days,
+            portfolio_value=portfolio_value,
+            var=var,
+            cvar=cvar,
+            component_var=dict(zip(symbols, component_var.tolist())),
+            component_cvar=dict(zip(symbols, component_cvar.tolist())),
+            marginal_var=dict(zip(symbols, marginal.tolist())),
+            scenarios=scenarios
+        )
+
+    # ------------------------------------------------------------------
+    # Historical simulation
+
+    def historical(
+        self,
+        portfolio,
+        price_histories: Mapping[str, Sequence],
+        window: Optional[int] = None
+    ) -> Optional[VaRResult]:
+        """
+        Historical-simulation VaR/CVaR
+
+        Args:
+            portfolio: Current portfolio (exposures are position market values)
+            price_histories: Symbol -> prices, oldest first
+            window: Use only the last `window` prices
+
+        Returns:
+            VaRResult, or None if no complete return scenarios are available
+            (including fewer complete returns than horizon_days)
+        """
+        symbols, exposures, portfolio_value = portfolio_exposures(portfolio)
+        if not symbols:
+            return self._result('historical', [], exposures, portfolio_value, 0.0, 0.0,
+                                exposures, exposures, 0)
+
+        returns = returns_matrix(symbols, price_histories, window)
+        returns = returns[~np.isnan(returns).any(axis=1)]
+        if self.horizon_days > 1 and 0 < len(returns) < self.horizon_days:
+            logger.warning(f"Historical VaR: {len(returns)} complete returns are not enough "
+                           f"for a {self.horizon_days}-day horizon")
+            return None
+        if self.horizon_days > 1:
+            # Overlapping multi-day compounded returns
+            growth = np.cumprod(1 + returns, axis=0)
+            padded = np.vstack([np.ones((1, len(symbols))), growth])
+            returns = padded[self.horizon_days:] / padded[:-self.horizon_days] - 1
+        if len(returns) == 0:
+            logger.warning("Historical VaR: no complete return history for portfolio positions")
+            return None
+
+        position_pnl = returns * exposures
+        pnl = position_pnl.sum(axis=1)
+        var, cvar, kernel, tail = self._tail_statistics(pnl)
+
+        component_var = self._attribute(var, -position_pnl[kernel].mean(axis=0))
+        component_cvar = -position_pnl[tail].mean(axis=0)
+        return self._result('historical', symbols, exposures, portfolio_value, var, cvar,
+                            component_var, component_cvar, len(pnl))
+
+    # ------------------------------------------------------------------
+    # Parametric (delta-normal)
+
+    def parametric(self, portfolio, covariance: np.ndarray, symbols: Sequence[str]) -> VaRResult:
+        """
+        Delta-normal VaR with exact Euler decomposition
+
+        Args:
+            portfolio: Current portfolio
+            covariance: Daily return covariance ordered like `symbols`
+            symbols: Symbols of the covariance matrix (must cover all positions)
+        """
+        held, exposures, portfolio_value = portfolio_exposures(portfolio)
+        covariance = self._sub_covariance(covariance, symbols, held) * self.horizon_days
+
+        z = NormalDist().inv_cdf(self.confidence)
+        variance = float(exposures @ covariance @ exposures)
+        sigma = math.sqrt(max(variance, 0.0))
+        var = z * sigma
+        cvar = sigma * math.exp(-z * z / 2) / math.sqrt(2 * math.pi) / (1 - self.confidence)
+
+        # Euler decomposition: contributions of sigma add up to sigma
+        if sigma > 0:
+            component_sigma = exposures * (covariance @ exposures) / sigma
+        else:
+            component_sigma = np.zeros(len(held))
+        component_cvar = component_sigma * (cvar / sigma) if sigma > 0 else component_sigma
+        return self._result('parametric', held, exposures, portfolio_value, var, cvar,
+                            z * component_sigma, component_cvar, 0)
+
+    # ------------------------------------------------------------------
+    # Monte Carlo
+
+    @staticmethod
+    def _sub_covariance(covariance: np.ndarray, symbols: Sequence[str], held: Sequence[str]) -> np.ndarray:
+        index = {symbol: i for i, symbol in enumerate(symbols)}
+        missing = [symbol for symbol in held if symbol not in index]
+        if missing:
+            raise ValueError(f"Covariance does not cover positions: {', '.join(missing)}")
+        positions = [index[symbol] for symbol in held]
+        sub = np.asarray(covariance, dtype=np.float64)[np.ix_(positions, positions)]
+        if np.isnan(sub).any():
+            raise ValueError("Covariance has undefined entries for portfolio positions")
+        return sub
+
+    def _chunks(self) -> List[Tuple[int, np.random.SeedSequence]]:
+        sizes = [self.chunk_size] * (self.simulations // self.chunk_size)
+        if self.simulations % self.chunk_size:
+            sizes.append(self.simulations % self.chunk_size)
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+        return list(zip(sizes, seeds))
+
+    def monte_carlo(
+        self,
+        portfolio,
+        covariance: np.ndarray,
+        symbols: Sequence[str],
+        mean: Optional[np.ndarray] = None
+    ) -> VaRResult:
+        """
+        Monte Carlo VaR/CVaR from a daily return covariance
+
+        Args:
+            portfolio: Current portfolio
+            covariance: Daily return covariance ordered like `symbols`
+            symbols: Symbols of the covariance matrix (must cover all positions)
+            mean: Optional daily mean returns ordered like `symbols` (default zero)
+        """
+        held, exposures, portfolio_value = portfolio_exposures(portfolio)
+        if not held:
+            return self._result('monte_carlo', [], exposures, portfolio_value, 0.0, 0.0,
+                                exposures, exposures, 0)
+
+        factor = robust_cholesky(self._sub_covariance(covariance, symbols, held))
+        drift = np.zeros(len(held))
+        if mean is not None:
+            index = {symbol: i for i, symbol in enumerate(symbols)}
+            drift = np.asarray(mean, dtype=np.float64)[[index[symbol] for symbol in held]] * self.horizon_days
+        scale = math.sqrt(self.horizon_days)
+        chunks = self._chunks()
+
+        # Pass 1: portfolio P&L only (simulations floats)
+        tasks = [(factor, exposures, drift, scale, size, seed) for size, seed in chunks]
+        if self.max_workers and self.max_workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(tasks))) as executor:
+                pnl = np.concatenate(list(executor.map(_chunk_pnl, tasks)))
+        else:
+            pnl = np.concatenate([_chunk_pnl(task) for task in tasks])
+
+        var, cvar, kernel, tail = self._tail_statistics(pnl)
+
+        # Pass 2: regenerate chunks and accumulate position losses in kernel and tail scenarios
+        kernel_sum = np.zeros(len(held))
+        tail_sum = np.zeros(len(held))
+        offset = 0
+        for size, seed in chunks:
+            position_pnl = _simulate_chunk(factor, exposures, drift, scale, size, seed)
+            kernel_sum -= position_pnl[kernel[offset:offset + size]].sum(axis=0)
+            tail_sum -= position_pnl[tail[offset:offset + size]].sum(axis=0)
+            offset += size
+
+        component_var = self._attribute(var, kernel_sum / max(1, int(kernel.sum())))
+        component_cvar = tail_sum / max(1, int(tail.sum()))
+        return self._result('monte_carlo', held, exposures, portfolio_value, var, cvar,
+                            component_var, component_cvar, len(pnl))
+
+    # ------------------------------------------------------------------
+
+    def evaluate(
+        self,
+        portfolio,
+        price_histories: Optional[Mapping[str, Sequence]] = None,
+        covariance_tracker: Optional[Any] = None
+    ) -> Optional[VaRResult]:
+        """
+        VaR from the best available source
+
+        Monte Carlo on the EWMA covariance when the tracker covers every
+        position, otherwise historical simulation on the price histories.
+        """
+        held = [symbol for symbol, position in portfolio.positions.items() if position.market_value]
+        if covariance_tracker is not None and held and covariance_tracker.is_ready(held):
+            covariance = covariance_tracker.covariance_matrix(held)
+            if not np.isnan(covariance).any():
+                return self.monte_carlo(portfolio, covariance, held)
+        if price_histories:
+            return self.historical(portfolio, price_histories)
+        return None
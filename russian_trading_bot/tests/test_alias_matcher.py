@@ -0,0 +1,71 @@
+"""
+Тесты автомата поиска алиасов компаний и тикеров.
+"""
+
+import re
+
+from russian_trading_bot.services.alias_matcher import AliasMatcher, fold_case
+
+
+class TestAliasMatcher:
+    """Тесты автомата Ахо-Корасик."""
+
+    def test_overlapping_patterns(self):
+        """Тест: находятся все вхождения, включая вложенные и пересекающиеся."""
+        matcher = AliasMatcher([('сбербанк', 'SBER'), ('пао сбербанк', 'SBER'), ('банк втб', 'VTBR'),
+                                ('втб', 'VTBR')])
+
+        found = [(m.start, m.end, m.pattern) for m in matcher.find_all("ПАО Сбербанк и Банк ВТБ")]
+
+        assert found == [(0, 12, 'пао сбербанк'), (4, 12, 'сбербанк'), (15, 23, 'банк втб'), (20, 23, 'втб')]
+
+    def test_word_boundaries(self):
+        """Тест: алиас внутри другого слова не считается упоминанием."""
+        matcher = AliasMatcher([('мтс', 'MTSS'), ('x5', 'FIVE')])
+
+        found = [m.value for m in matcher.find_all("Нетмтс, x50 и x5_1, но МТС и (X5).")]
+
+        assert found == ['MTSS', 'FIVE']
+
+    def test_cyrillic_case_folding(self):
+        """Тест: регистр и буква ё не влияют на поиск, позиции совпадают с исходным текстом."""
+        matcher = AliasMatcher([('пятерочка', 'FIVE')])
+        text = "Сеть «ПЯТЁРОЧКА» растет"
+
+        match, = matcher.find_all(text)
+
+        assert text[match.start:match.end] == "ПЯТЁРОЧКА"
+        assert len(fold_case("İstanbul")) == len("İstanbul")
+
+    def test_case_sensitive_tickers(self):
+        """Тест: тикеры с учетом регистра ищутся тем же автоматом."""
+        matcher = AliasMatcher([('сбер', 'SBER')])
+        matcher.add('SBER', 'SBER', case_sensitive=True)
+
+        found = [(m.pattern, m.case_sensitive) for m in matcher.find_all("SBER, sber, SBERP и Сбер")]
+
+        assert found == [('SBER', True), ('сбер', False)]
+
+    def test_matches_regex_search_on_large_dictionary(self):
+        """Тест: на тысячах алиасов результат совпадает с поиском по регулярным выражениям."""
+        aliases = [f"компания{i}" for i in range(3000)] + ["компания", "компания12 групп"]
+        matcher = AliasMatcher((alias, i) for i, alias in enumerate(aliases))
+        text = "Компания12 групп и компания2999 опередили компанию1 и Компания300, компания30а."
+
+        expected = sorted(
+            (m.start(), m.end(), alias) for alias in aliases
+            for m in re.finditer(r'\b' + re.escape(alias) + r'\b', text.lower())
+        )
+        found = sorted((m.start, m.end, m.pattern) for m in matcher.find_all(text))
+
+        assert found == expected
+        assert len(matcher) == len(aliases)
+
+    def test_patterns_added_after_search(self):
+        """Тест: автомат перестраивается после добавления шаблонов."""
+        matcher = AliasMatcher([('газпром', 'GAZP')])
+        assert matcher.find_all("Газпром нефть") != []
+
+        matcher.add('газпром нефть', 'SIBN')
+
+        assert [m.value for m in matcher.find_all("Газпром нефть")] == ['GAZP', 'SIBN']
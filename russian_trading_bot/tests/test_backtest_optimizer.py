@@ -0,0 +1,174 @@
+"""
+Tests for the parallel parameter sweep and walk-forward optimizer
+"""
+
+import pytest
+import numpy as np
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.backtesting_engine import BacktestingEngine, BacktestConfig
+from services.ai_decision_engine import AIDecisionEngine
+from services.backtest_optimizer import (
+    BacktestSweepRunner, SharedBarStore, generate_parameter_sets,
+    walk_forward_windows, build_config
+)
+
+
+class TestBacktestOptimizer:
+    """Test cases for the backtest optimizer"""
+    
+    @pytest.fixture
+    def base_config(self):
+        """Create base backtest configuration"""
+        return BacktestConfig(
+            start_date=datetime(2022, 1, 1),
+            end_date=datetime(2023, 12, 31),
+            initial_capital=Decimal('1000000')
+        )
+    
+    @pytest.fixture
+    def symbols(self):
+        return ['SBER', 'GAZP', 'LKOH']
+    
+    @pytest.fixture
+    def loaded_engine(self, base_config, symbols):
+        """Backtesting engine with historical data loaded"""
+        engine = BacktestingEngine(Mock(spec=AIDecisionEngine))
+        assert engine.load_historical_data(symbols, base_config.start_date, base_config.end_date)
+        return engine
+    
+    def test_generate_parameter_sets(self):
+        """Test grid and random sweep generation"""
+        space = {'stop_loss_pct': [0.03, 0.05], 'take_profit_pct': [0.1, 0.15, 0.2]}
+        
+        grid = generate_parameter_sets(space)
+        assert len(grid) == 6
+        assert {'stop_loss_pct': 0.05, 'take_profit_pct': 0.2} in grid
+        
+        sampled = generate_parameter_sets(space, method="random", n_samples=4, seed=1)
+        assert len(sampled) == 4
+        assert len({tuple(p.values()) for p in sampled}) == 4
+        assert sampled == generate_parameter_sets(space, method="random", n_samples=4, seed=1)
+        
+        with pytest.raises(ValueError):
+            generate_parameter_sets({'unknown_field': [1]})
+        with pytest.raises(ValueError):
+            generate_parameter_sets({'weights.unknown': [1]})
+    
+    def test_build_config_with_weights(self, base_config):
+        """Test applying config and DecisionWeights parameters"""
+        config, weights = build_config(base_config, {'min_confidence': 0.7, 'weights.technical_weight': 0.5})
+        
+        assert config.min_confidence == 0.7
+        assert config.start_date == base_config.start_date
+        # DecisionWeights normalizes the overridden weight together with the defaults
+        assert weights.technical_weight == pytest.approx(0.5 / 1.2)
+        
+        _, weights = build_config(base_config, {'stop_loss_pct': 0.04})
+        assert weights is None
+    
+    def test_walk_forward_windows(self):
+        """Test rolling walk-forward windows"""
+        windows = walk_forward_windows(datetime(2022, 1, 1), datetime(2023, 12, 31), 365, 90)
+        
+        assert len(windows) >= 2
+        for window in windows:
+            assert window.train_start < window.train_end < window.test_start < window.test_end
+            assert window.test_end <= datetime(2023, 12, 31)
+        assert windows[1].train_start - windows[0].train_start == windows[0].test_end - windows[0].test_start
+    
+    def test_shared_bar_store_roundtrip(self, loaded_engine, symbols):
+        """Test attaching a shared memory copy of the bar store"""
+        store = loaded_engine.bar_store
+        shared = SharedBarStore(store)
+        try:
+            attached, handle = SharedBarStore.attach(shared.spec())
+            
+            assert attached.symbols == store.symbols
+            assert (attached.calendar == store.calendar).all()
+            np.testing.assert_array_equal(attached.close, store.close)
+            np.testing.assert_array_equal(attached.source_row, store.source_row)
+            assert not attached.close.flags.writeable
+            
+            del attached
+            handle.close()
+        finally:
+            shared.close()
+    
+    def test_serial_sweep_matches_direct_run(self, loaded_engine, base_config, symbols):
+        """Test in-process sweep ranking and parity with a direct fast backtest"""
+        parameter_sets = generate_parameter_sets({'stop_loss_pct': [0.03, 0.08]})
+        runner = BacktestSweepRunner(loaded_engine, symbols, max_workers=1)
+        
+        table = runner.run(base_config, parameter_sets)
+        
+        assert len(table) == 2
+        assert list(table['rank']) == [1, 2]
+        assert table['sharpe_ratio'].is_monotonic_decreasing
+        
+        config, _ = build_config(base_config, {'stop_loss_pct': 0.03})
+        direct = loaded_engine.run_fast_backtest(config, symbols)
+        row = table[table['stop_loss_pct'] == 0.03].iloc[0]
+        assert row['total_return'] == pytest.approx(direct.total_return)
+        assert row['total_trades'] == direct.total_trades
+    
+    def test_parallel_walk_forward(self, loaded_engine, base_config, symbols):
+        """Test process pool walk-forward sweep over shared memory"""
+        parameter_sets = generate_parameter_sets({'take_profit_pct': [0.1, 0.2]})
+        windows = walk_forward_windows(base_config.start_date, base_config.end_date, 365, 120)
+        
+        parallel = BacktestSweepRunner(loaded_engine, symbols, max_workers=2).run(
+            base_config, parameter_sets, windows=windows
+        )
+        serial = BacktestSweepRunner(loaded_engine, symbols, max_workers=1).run(
+            base_config, parameter_sets, windows=windows
+        )
+        
+        assert len(parallel) == 2
+        assert (parallel['windows'] == len(windows)).all()
+        assert 'test_sharpe_ratio' in parallel.columns and 'train_sharpe_ratio' in parallel.columns
+        
+        parallel = parallel.sort_values('take_profit_pct').reset_index(drop=True)
+        serial = serial.sort_values('take_profit_pct').reset_index(drop=True)
+        np.testing.assert_allclose(parallel['test_total_return'], serial['test_total_return'])
+    
+    def test_walk_forward_ranks_by_train_metric(self, loaded_engine, base_config, symbols):
+        """Test walk-forward selection uses in-sample metrics only"""
+        parameter_sets = generate_parameter_sets({'stop_loss_pct': [0.02, 0.05, 0.1]})
+        windows = walk_forward_windows(base_config.start_date, base_config.end_date, 365, 120)
+        
+        table = BacktestSweepRunner(loaded_engine, symbols, max_workers=1).run(
+            base_config, parameter_sets, windows=windows, rank_by='total_return'
+        )
+        
+        assert table['train_total_return'].is_monotonic_decreasing
+    
+    @pytest.mark.parametrize('max_workers', [1, 2])
+    def test_failed_backtest_fails_sweep(self, loaded_engine, base_config, symbols, max_workers):
+        """Test a failing run is not silently dropped from the averages"""
+        parameter_sets = generate_parameter_sets({'stop_loss_pct': [0.03, 0.08]})
+        runner = BacktestSweepRunner(loaded_engine, symbols, max_workers=max_workers)
+        
+        with patch.object(BacktestingEngine, 'run_fast_backtest', side_effect=RuntimeError("boom")):
+            with pytest.raises(RuntimeError):
+                runner.run(base_config, parameter_sets)
+    
+    def test_invalid_arguments(self, loaded_engine, base_config, symbols):
+        """Test validation of mode and ranking metric"""
+        with pytest.raises(ValueError):
+            BacktestSweepRunner(loaded_engine, symbols, mode="turbo")
+        
+        runner = BacktestSweepRunner(loaded_engine, symbols, max_workers=1)
+        with pytest.raises(ValueError):
+            runner.run(base_config, [{}], rank_by='unknown')
+        
+        # Fast mode ignores DecisionWeights, so sweeping them is rejected
+        weight_sets = generate_parameter_sets({'weights.technical_weight': [0.2, 0.5]})
+        with pytest.raises(ValueError):
+            runner.run(base_config, weight_sets)
@@ -763,4 +763,95 @@ class TestBacktestingEngine:
         # Verify no division by zero or other errors
         assert results.total_return == 0.0
         assert results.win_rate == 0.0
-        assert results.profit_factor == 0.0
\ No newline at end of file
+        assert results.profit_factor == 0.0
+
+    def test_fast_backtest(self, backtest_engine, sample_config, sample_symbols):
+        """Test vectorized fast backtest mode"""
+        results = backtest_engine.run_fast_backtest(sample_config, sample_symbols)
+        
+        assert isinstance(results, BacktestResults)
+        assert backtest_engine.status == BacktestStatus.COMPLETED
+        assert results.final_capital > 0
+        assert results.total_trades >= len(results.trades)
+        assert results.winning_trades + results.losing_trades == len(results.trades)
+        assert len(results.daily_returns) == len(results.portfolio_values) - 1
+        
+        for trade in results.trades:
+            assert trade.symbol in sample_symbols
+            assert trade.exit_date >= trade.entry_date
+            assert trade.pnl is not None
+            assert trade.exit_reason in ("stop_loss", "take_profit", "max_drawdown", "end_of_backtest")
+    
+    def test_fast_backtest_custom_signals(self, backtest_engine, sample_config):
+        """Test fast backtest with a precomputed signal generator"""
+        def buy_first_day(indicators, close):
+            direction = np.zeros(close.shape, dtype=np.int8)
+            direction[21, :] = 1
+            return direction, np.where(direction != 0, 1.0, 0.0)
+        
+        results = backtest_engine.run_fast_backtest(
+            sample_config, ['SBER', 'GAZP'], signal_generator=buy_first_day
+        )
+        
+        assert results.total_trades == 2
+        assert len(results.trades) == 2
+        assert all(trade.action == OrderAction.BUY for trade in results.trades)
+        
+        # P&L of the trades is reflected in final capital (commission/slippage aside)
+        pnl = sum(float(trade.pnl) for trade in results.trades)
+        assert float(results.final_capital) == pytest.approx(
+            float(sample_config.initial_capital) + pnl, rel=0.001
+        )
+    
+    def test_load_historical_data_from_candle_cache(self, ai_engine, tmp_path):
+        """Test loading cached MOEX candles instead of simulated data"""
+        from services.candle_cache import CandleCache, make_candles
+        
+        cache = CandleCache(str(tmp_path))
+        days = pd.bdate_range('2023-01-02', '2023-03-31')
+        cache.write('SBER', make_candles([(d, 250.0, 255.0, 245.0, 250.0 + i, 1000 + i) for i, d in enumerate(days)]),
+                    days[0], days[-1])
+        
+        engine = BacktestingEngine(ai_engine, candle_cache=cache)
+        assert engine.load_historical_data(['SBER', 'GAZP'], datetime(2023, 1, 2), datetime(2023, 3, 31))
+        
+        sber = engine.historical_data['SBER']
+        assert len(sber) == len(days)
+        assert sber['close'].iloc[-1] == 250.0 + len(days) - 1
+        assert sber['volume'].iloc[0] == 1000
+        
+        # Symbols missing from the cache fall back to simulated data
+        assert 'GAZP' in engine.historical_data
+        assert 'SBER' in engine.bar_store
+    
+    def test_bar_store_rebuilt_when_frames_change(self, ai_engine):
+        """Test the cached bar store follows frame assignment and explicit invalidation"""
+        days = pd.bdate_range('2023-01-02', periods=5)
+        
+        def frame(base):
+            return pd.DataFrame({'open': base, 'high': base + 1.0, 'low': base - 1.0,
+                                 'close': base, 'volume': 1000}, index=days)
+        
+        engine = BacktestingEngine(ai_engine)
+        engine.historical_data = {'SBER': frame(np.arange(5.0) + 100)}
+        store = engine.bar_store
+        assert engine.bar_store is store
+        
+        # Replacing a frame, even with one reusing the old id, rebuilds the store
+        engine.historical_data['SBER'] = frame(np.arange(5.0) + 200)
+        rebuilt = engine.bar_store
+        assert rebuilt is not store
+        assert rebuilt.close[-1, rebuilt.column('SBER')] == 204.0
+        
+        # In-place edits need an explicit invalidation
+        engine.historical_data['SBER'].loc[days[-1], 'close'] = 300.0
+        assert engine.bar_store is rebuilt
+        engine.invalidate_bar_store()
+        assert engine.bar_store.close[-1, engine.bar_store.column('SBER')] == 300.0
+    
+    def test_fast_backtest_no_symbols(self, backtest_engine, sample_config):
+        """Test fast backtest without tradable symbols"""
+        results = backtest_engine.run_fast_backtest(sample_config, [])
+        
+        assert results.total_trades == 0
+        assert results.final_capital == sample_config.initial_capital
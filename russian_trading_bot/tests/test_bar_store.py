@@ -0,0 +1,108 @@
+"""
+Tests for the columnar historical bar store
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from datetime import datetime
+
+from russian_trading_bot.services.bar_store import BarStore, BAR_FIELDS
+
+
+class TestBarStore:
+    """Test cases for columnar bar store"""
+    
+    @pytest.fixture
+    def frames(self):
+        """Per-symbol OHLCV frames with different listing dates and a gap"""
+        dates = pd.bdate_range('2023-01-02', periods=10)
+        
+        def make_frame(index, base):
+            closes = base + np.arange(len(index), dtype=float)
+            return pd.DataFrame({
+                'open': closes - 0.5,
+                'high': closes + 1.0,
+                'low': closes - 1.0,
+                'close': closes,
+                'volume': np.full(len(index), 1000)
+            }, index=index)
+        
+        return {
+            'SBER': make_frame(dates, 100.0),
+            'GAZP': make_frame(dates[3:], 200.0),
+            'LKOH': make_frame(dates.delete(5), 300.0)
+        }
+    
+    def test_from_frames_layout(self, frames):
+        """Test contiguous (dates x symbols) layout and dtypes"""
+        store = BarStore.from_frames(frames)
+        
+        assert store.symbols == ['SBER', 'GAZP', 'LKOH']
+        assert len(store) == 10
+        
+        for name in BAR_FIELDS:
+            array = store.field(name)
+            assert array.shape == (10, 3)
+            assert array.flags['C_CONTIGUOUS']
+        
+        assert store.close.dtype == np.float64
+        assert store.volume.dtype == np.int64
+    
+    def test_row_lookup_as_of(self, frames):
+        """Test exact and as-of date lookup"""
+        store = BarStore.from_frames(frames)
+        
+        assert store.row(datetime(2023, 1, 2)) == 0
+        assert store.row(datetime(2023, 1, 6)) == 4
+        # Saturday resolves to Friday
+        assert store.row(datetime(2023, 1, 7)) == 4
+        # Before calendar start
+        assert store.row(datetime(2022, 12, 30)) == -1
+    
+    def test_as_of_fill_and_staleness(self, frames):
+        """Test forward fill of missing bars and staleness tracking"""
+        store = BarStore.from_frames(frames)
+        gap_row = 5
+        lkoh = store.column('LKOH')
+        gazp = store.column('GAZP')
+        
+        # LKOH has no bar on row 5: value carried from row 4
+        assert store.close[gap_row, lkoh] == store.close[gap_row - 1, lkoh]
+        assert store.source_row[gap_row, lkoh] == gap_row - 1
+        
+        staleness = store.staleness_days(store.date(gap_row))
+        assert staleness[store.column('SBER')] == 0
+        assert staleness[lkoh] > 0
+        
+        # GAZP not listed yet on row 0
+        assert np.isnan(store.close[0, gazp])
+        assert np.isinf(store.staleness_days(store.date(0))[gazp])
+    
+    def test_window_excludes_pre_listing_rows(self, frames):
+        """Test trailing window views"""
+        store = BarStore.from_frames(frames)
+        
+        window = store.window('GAZP', 9, 50)
+        assert len(window) == 7
+        assert window[0] == 200.0
+        
+        assert len(store.window('SBER', 9, 3)) == 3
+        assert len(store.window('GAZP', 1, 5)) == 0
+        assert np.shares_memory(store.window('SBER', 9, 3), store.close)
+    
+    def test_to_frame_round_trip(self, frames):
+        """Test conversion back to per-symbol DataFrame"""
+        store = BarStore.from_frames(frames)
+        df = store.to_frame('GAZP')
+        
+        assert len(df) == 7
+        pd.testing.assert_series_equal(df['close'], frames['GAZP']['close'], check_names=False,
+                                       check_freq=False, check_index_type=False)
+    
+    def test_empty_store(self):
+        """Test store without symbols"""
+        store = BarStore.from_frames({})
+        
+        assert len(store) == 0
+        assert store.row(datetime(2023, 1, 2)) == -1
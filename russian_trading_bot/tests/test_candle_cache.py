@@ -0,0 +1,185 @@
+"""
+Unit tests for the MOEX candle cache
+Тесты для локального кэша свечей MOEX
+"""
+
+import asyncio
+
+import pytest
+import numpy as np
+from datetime import datetime, date
+from decimal import Decimal
+from unittest.mock import AsyncMock, patch
+
+import pytz
+
+from russian_trading_bot.services import candle_cache as candle_cache_module
+from russian_trading_bot.services.candle_cache import CandleCache, CANDLE_DTYPE, make_candles
+from russian_trading_bot.services.moex_client import MOEXClient
+
+
+def _fake_candles(symbol, start, end):
+    """Свечи по будням за диапазон с ценой, зависящей от даты"""
+    days = np.arange(np.datetime64(start.date(), 'D'), np.datetime64(end.date(), 'D') + 1)
+    days = days[np.is_busday(days)]
+    rows = [(d.astype(object), 100.0 + i, 101.0 + i, 99.0 + i, 100.5 + i, 1000 + i)
+            for i, d in enumerate(days)]
+    return make_candles(rows)
+
+
+class TestCandleCache:
+    """Тесты для кэша свечей"""
+    
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return CandleCache(str(tmp_path))
+    
+    def test_make_candles_sorts_and_deduplicates(self):
+        """Тест: свечи сортируются, дубликаты дат заменяются последней записью"""
+        candles = make_candles([
+            (date(2024, 1, 16), 1.0, 2.0, 0.5, 1.5, 10),
+            (date(2024, 1, 15), None, None, None, 2.5, None),
+            (date(2024, 1, 16), 1.0, 2.0, 0.5, 3.5, 20),
+        ])
+        
+        assert candles.dtype == CANDLE_DTYPE
+        assert list(candles['close']) == [2.5, 3.5]
+        assert np.isnan(candles['open'][0])
+        assert list(candles['volume']) == [0, 20]
+    
+    @pytest.mark.asyncio
+    async def test_incremental_fetch(self, cache):
+        """Тест: из ISS загружаются только отсутствующие диапазоны"""
+        fetcher = AsyncMock(side_effect=_fake_candles)
+        
+        first = await cache.ensure("SBER", datetime(2024, 1, 10), datetime(2024, 1, 31), fetcher)
+        assert fetcher.await_count == 1
+        assert first['date'][0] == np.datetime64('2024-01-10')
+        
+        # Полностью покрытый период - без запросов
+        await cache.ensure("SBER", datetime(2024, 1, 15), datetime(2024, 1, 20), fetcher)
+        assert fetcher.await_count == 1
+        
+        # Расширение с обеих сторон - два запроса только за недостающие дни
+        candles = await cache.ensure("SBER", datetime(2024, 1, 1), datetime(2024, 2, 15), fetcher)
+        assert fetcher.await_count == 3
+        requested = [(call.args[1].date(), call.args[2].date()) for call in fetcher.await_args_list[1:]]
+        assert requested == [(date(2024, 1, 1), date(2024, 1, 9)), (date(2024, 2, 1), date(2024, 2, 15))]
+        
+        assert cache.coverage("SBER") == [(date(2024, 1, 1), date(2024, 2, 15))]
+        assert np.all(np.diff(candles['date'].astype('int64')) > 0)
+        assert len(candles) == np.busday_count('2024-01-01', '2024-02-16')
+    
+    @pytest.mark.asyncio
+    async def test_views_are_memory_mapped(self, cache, tmp_path):
+        """Тест: чтение возвращает представления memory-mapped файла без копирования"""
+        await cache.ensure("GAZP", datetime(2024, 3, 1), datetime(2024, 3, 29), AsyncMock(side_effect=_fake_candles))
+        
+        closes = cache.field("GAZP", 'close', date(2024, 3, 4), date(2024, 3, 8))
+        assert len(closes) == 5
+        assert isinstance(closes.base, np.memmap) or isinstance(closes, np.memmap)
+        assert not closes.flags.writeable
+        
+        # Новый экземпляр видит те же данные на диске
+        reopened = CandleCache(str(tmp_path))
+        assert reopened.symbols() == ["GAZP"]
+        np.testing.assert_array_equal(reopened.field("GAZP", 'close'), cache.field("GAZP", 'close'))
+        
+        frame = cache.to_frame("GAZP", date(2024, 3, 4), date(2024, 3, 8))
+        assert list(frame.columns) == ['open', 'high', 'low', 'close', 'volume']
+        assert len(frame) == 5
+    
+    def test_missing_ranges(self, cache):
+        """Тест: вычисление непокрытых диапазонов"""
+        cache.write("LKOH", make_candles([]), date(2024, 1, 10), date(2024, 1, 20))
+        cache.write("LKOH", make_candles([]), date(2024, 2, 1), date(2024, 2, 10))
+        
+        assert cache.missing_ranges("LKOH", date(2024, 1, 1), date(2024, 2, 20)) == [
+            (date(2024, 1, 1), date(2024, 1, 9)),
+            (date(2024, 1, 21), date(2024, 1, 31)),
+            (date(2024, 2, 11), date(2024, 2, 20)),
+        ]
+        assert cache.missing_ranges("LKOH", date(2024, 1, 12), date(2024, 1, 18)) == []
+    
+    @pytest.mark.asyncio
+    async def test_moex_client_uses_cache(self, tmp_path):
+        """Тест: MOEXClient отдает исторические данные из кэша без повторной загрузки"""
+        client = MOEXClient(candle_cache=CandleCache(str(tmp_path)))
+        client._make_request = AsyncMock(return_value={
+            'history': {
+                'columns': ['TRADEDATE', 'CLOSE', 'VOLUME', 'OPEN', 'HIGH', 'LOW'],
+                'data': [
+                    ['2024-01-15', 250.5, 1000000, 248.0, 252.0, 247.0],
+                    ['2024-01-16', 251.0, 1200000, None, 253.0, 249.5],
+                    ['2024-01-17', None, 0, None, None, None]
+                ]
+            }
+        })
+        
+        result = await client.get_historical_data("SBER", datetime(2024, 1, 15), datetime(2024, 1, 17))
+        again = await client.get_historical_data("sber", datetime(2024, 1, 15), datetime(2024, 1, 17))
+        
+        assert client._make_request.await_count == 1
+        assert len(result) == len(again) == 2
+        assert result[0].price == Decimal('250.5')
+        assert result[0].open_price == Decimal('248.0')
+        assert result[1].open_price is None
+        assert result[1].volume == 1200000
+        assert result[0].timestamp.hour == 18 and result[0].timestamp.minute == 45
+    
+    def test_unfinished_day_uses_moscow_time(self, cache):
+        """Тест: незавершенный торговый день определяется по московскому времени"""
+        class _Clock(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                # 22:30 UTC 10 мая - в Москве уже 01:30 11 мая
+                utc_now = datetime(2024, 5, 10, 22, 30, tzinfo=pytz.utc)
+                return utc_now.astimezone(tz) if tz else utc_now.replace(tzinfo=None)
+        
+        with patch.object(candle_cache_module, 'datetime', _Clock):
+            cache.write("SBER", _fake_candles("SBER", datetime(2024, 5, 1), datetime(2024, 5, 10)),
+                        date(2024, 5, 1), date(2024, 5, 20))
+        
+        assert cache.coverage("SBER") == [(date(2024, 5, 1), date(2024, 5, 10))]
+    
+    @pytest.mark.asyncio
+    async def test_bulk_fetch_fills_cache(self, tmp_path):
+        """Тест: массовая загрузка догружает в кэш только отсутствующие диапазоны"""
+        cache = CandleCache(str(tmp_path))
+        await cache.ensure("SBER", datetime(2024, 1, 1), datetime(2024, 1, 31), AsyncMock(side_effect=_fake_candles))
+        
+        client = MOEXClient(candle_cache=cache)
+        client._fetch_history_candles = AsyncMock(side_effect=_fake_candles)
+        
+        result = await client.get_bulk_historical_candles(
+            {"SBER": (datetime(2024, 1, 1), datetime(2024, 3, 31)),
+             "GAZP": (datetime(2024, 1, 1), datetime(2024, 3, 31))},
+            chunk_days=30
+        )
+        
+        requested = sorted((call.args[0], call.args[1].date()) for call in client._fetch_history_candles.await_args_list)
+        assert ("SBER", date(2024, 1, 1)) not in requested
+        assert [r for r in requested if r[0] == "SBER"][0] == ("SBER", date(2024, 2, 1))
+        assert len(result["SBER"]) == len(result["GAZP"]) == np.busday_count('2024-01-01', '2024-04-01')
+        assert cache.missing_ranges("GAZP", date(2024, 1, 1), date(2024, 3, 31)) == []
+    
+    @pytest.mark.asyncio
+    async def test_bulk_fetch_shares_symbol_lock_with_ensure(self, tmp_path):
+        """Тест: одновременные массовая загрузка и ensure() не скачивают тикер дважды"""
+        cache = CandleCache(str(tmp_path))
+        
+        async def slow_candles(symbol, start, end):
+            await asyncio.sleep(0.01)
+            return _fake_candles(symbol, start, end)
+        
+        client = MOEXClient(candle_cache=cache)
+        client._fetch_history_candles = AsyncMock(side_effect=slow_candles)
+        ensure_fetcher = AsyncMock(side_effect=slow_candles)
+        
+        bulk, ensured = await asyncio.gather(
+            client.get_bulk_historical_candles({"SBER": (datetime(2024, 1, 1), datetime(2024, 1, 31))}),
+            cache.ensure("SBER", datetime(2024, 1, 1), datetime(2024, 1, 31), ensure_fetcher)
+        )
+        
+        assert client._fetch_history_candles.await_count + ensure_fetcher.await_count == 1
+        assert len(bulk["SBER"]) == len(ensured) == np.busday_count('2024-01-01', '2024-02-01')
@@ -0,0 +1,135 @@
+"""
+Unit tests for the shared correlation matrix service
+"""
+
+import pytest
+import numpy as np
+from decimal import Decimal
+
+from russian_trading_bot.services.correlation_service import (
+    CorrelationService, CorrelationMatrix, pairwise_correlation, returns_matrix
+)
+from russian_trading_bot.services.risk_manager import (
+    RussianMarketRiskManager, RussianMarketDiversificationManager
+)
+
+
+def _random_histories(count, seed=3, min_length=25, max_length=60):
+    rng = np.random.default_rng(seed)
+    histories = {}
+    for i in range(count):
+        length = int(rng.integers(min_length, max_length))
+        prices = 100 * np.cumprod(1 + rng.normal(0, 0.02, length))
+        histories[f"S{chr(65 + i % 26)}{chr(65 + i // 26)}"] = [Decimal(str(round(p, 2))) for p in prices]
+    return histories
+
+
+class TestCorrelationService:
+    """Test vectorized correlation matrix"""
+
+    @pytest.fixture
+    def service(self):
+        return CorrelationService()
+
+    def test_returns_matrix_aligns_recent_prices(self):
+        """Test shorter histories are aligned on their latest prices"""
+        returns = returns_matrix(['AAA', 'BBB', 'CCC'], {
+            'AAA': [100, 110, 121, 133.1],
+            'BBB': [50, 25],
+        })
+
+        assert returns.shape == (3, 3)
+        assert np.allclose(returns[:, 0], 0.1)
+        assert np.isnan(returns[:2, 1]).all()
+        assert returns[2, 1] == pytest.approx(-0.5)
+        assert np.isnan(returns[:, 2]).all()
+
+    def test_matches_pairwise_calculation(self, service):
+        """Test matrix equals per-pair correlation of the risk manager"""
+        risk_manager = RussianMarketRiskManager(correlation_service=service)
+        histories = _random_histories(8)
+        symbols = list(histories)
+
+        matrix = service.matrix(symbols, histories, min_periods=1)
+
+        for i, symbol1 in enumerate(symbols):
+            for symbol2 in symbols[i + 1:]:
+                expected = risk_manager.calculate_stock_correlation(
+                    symbol1, symbol2, histories[symbol1], histories[symbol2], min_periods=2
+                )
+                assert matrix.get((symbol1, symbol2)) == pytest.approx(expected, abs=1e-12)
+                assert matrix[(symbol2, symbol1)] == matrix[(symbol1, symbol2)]
+
+    def test_constant_and_short_series(self):
+        """Test constant series give 0.0 and too little overlap gives no value"""
+        returns = np.array([
+            [0.01, 0.0, np.nan],
+            [0.02, 0.0, np.nan],
+            [-0.01, 0.0, 0.03],
+        ])
+
+        correlation = pairwise_correlation(returns, min_periods=2)
+
+        assert correlation[0, 1] == 0.0
+        assert np.isnan(correlation[0, 2])
+        assert np.isnan(correlation[2, 2])
+        assert correlation[0, 0] == 1.0
+
+    def test_matrix_is_cached_per_universe_and_window(self, service):
+        """Test repeated requests reuse the matrix until prices change"""
+        histories = _random_histories(4)
+        symbols = list(histories)
+
+        first = service.matrix(symbols, histories, window=20)
+        assert service.matrix(symbols, histories, window=20) is first
+        assert service.matrix(symbols, histories, window=30) is not first
+
+        histories[symbols[0]] = histories[symbols[0]] + [Decimal('150')]
+        assert service.matrix(symbols, histories, window=20) is not first
+        assert service.stats()['hits'] == 1
+
+    def test_corrected_price_invalidates_cache(self, service):
+        """Test a corrected price inside the window misses the cache even with the same endpoints"""
+        histories = _random_histories(3)
+        symbols = list(histories)
+        first = service.matrix(symbols, histories, window=20)
+
+        corrected = list(histories[symbols[1]])
+        corrected[-10] = corrected[-10] * Decimal('1.05')
+        histories[symbols[1]] = corrected
+
+        second = service.matrix(symbols, histories, window=20)
+        assert second is not first
+        assert service.stats()['hits'] == 0
+        assert not np.allclose(second.values, first.values)
+
+    def test_pairs_above_threshold(self):
+        """Test vectorized selection of highly correlated pairs"""
+        values = np.array([
+            [1.0, 0.9, -0.2],
+            [0.9, 1.0, -0.8],
+            [-0.2, -0.8, 1.0],
+        ])
+        matrix = CorrelationMatrix(('AAA', 'BBB', 'CCC'), values)
+
+        assert matrix.pairs_above(0.7) == [('AAA', 'BBB', 0.9), ('BBB', 'CCC', -0.8)]
+        assert matrix.to_pairs(symmetric=False) == {
+            ('AAA', 'BBB'): 0.9, ('AAA', 'CCC'): -0.2, ('BBB', 'CCC'): -0.8
+        }
+
+    def test_managers_share_service(self, service):
+        """Test risk and diversification managers reuse one cached matrix"""
+        histories = _random_histories(5)
+        symbols = list(histories)
+        risk_manager = RussianMarketRiskManager(correlation_service=service)
+        diversification_manager = RussianMarketDiversificationManager(correlation_service=service)
+
+        risk_pairs = risk_manager.build_correlation_matrix(symbols, histories)
+        diversification_pairs = diversification_manager.build_correlation_matrix(symbols, histories)
+
+        assert service.stats() == {'entries': 2, 'hits': 0, 'misses': 2}  # Different min_periods
+        assert risk_manager.build_correlation_matrix(symbols, histories) == risk_pairs
+        assert service.stats()['hits'] == 1
+        for (symbol1, symbol2), correlation in diversification_pairs.items():
+            assert risk_pairs[(symbol1, symbol2)] == pytest.approx(correlation)
+            assert risk_pairs[(symbol1, symbol1)] == 1.0
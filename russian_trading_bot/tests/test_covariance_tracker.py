@@ -0,0 +1,182 @@
+"""
+Unit tests for the streaming EWMA covariance tracker
+"""
+
+import math
+import pytest
+import numpy as np
+from datetime import datetime
+from decimal import Decimal
+
+from russian_trading_bot.models.market_data import MarketData
+from russian_trading_bot.services.covariance_tracker import EWMACovarianceTracker
+from russian_trading_bot.services.risk_manager import (
+    RussianMarketRiskManager, Portfolio, Position
+)
+
+
+def _reference_covariance(returns, decay):
+    """Bias-corrected EWMA covariance computed from scratch"""
+    weights = (1 - decay) * decay ** np.arange(len(returns))[::-1]
+    return (returns * weights[:, None]).T @ returns / weights.sum()
+
+
+def _price_paths(rng, count, length):
+    returns = rng.multivariate_normal(
+        np.zeros(count), 0.0004 * (0.5 * np.eye(count) + 0.5), size=length
+    )
+    return returns, 100 * np.cumprod(1 + returns, axis=0)
+
+
+class TestEWMACovarianceTracker:
+    """Test online EWMA statistics"""
+
+    def test_matches_batch_ewma(self):
+        """Test streaming updates equal the batch EWMA covariance"""
+        rng = np.random.default_rng(11)
+        returns, _ = _price_paths(rng, 3, 60)
+        tracker = EWMACovarianceTracker(['AAA', 'BBB', 'CCC'], decay=0.9, min_observations=1)
+
+        for row in returns:
+            tracker.update_returns(dict(zip(['AAA', 'BBB', 'CCC'], row)))
+
+        expected = _reference_covariance(returns, 0.9)
+        assert np.allclose(tracker.covariance_matrix(), expected)
+        assert tracker.volatility('BBB') == pytest.approx(math.sqrt(expected[1, 1]))
+        assert tracker.correlation('AAA', 'CCC') == pytest.approx(
+            expected[0, 2] / math.sqrt(expected[0, 0] * expected[2, 2])
+        )
+
+    def test_prices_and_seed_agree(self):
+        """Test seeding from histories equals bar-by-bar price updates"""
+        rng = np.random.default_rng(5)
+        _, prices = _price_paths(rng, 2, 40)
+        histories = {'AAA': list(prices[:, 0]), 'BBB': list(prices[5:, 1])}
+
+        seeded = EWMACovarianceTracker.from_price_histories(histories, min_observations=10)
+        streamed = EWMACovarianceTracker(min_observations=10)
+        for i in range(40):
+            bar = {'AAA': prices[i, 0]}
+            if i >= 5:
+                bar['BBB'] = prices[i, 1]
+            streamed.update(bar)
+
+        assert np.allclose(seeded.covariance_matrix(), streamed.covariance_matrix())
+        assert streamed.observations('AAA') == 39
+        assert streamed.observations('BBB') == 34
+
+    def test_not_ready_until_min_observations(self):
+        """Test statistics are withheld until the symbol is warmed up"""
+        tracker = EWMACovarianceTracker(min_observations=3)
+        tracker.update({'SBER': 100})
+        tracker.update({'SBER': 101})
+        tracker.update({'SBER': 102})
+
+        assert tracker.volatility('SBER') is None
+        assert not tracker.is_ready(['SBER'])
+
+        tracker.update({'SBER': 100})
+        assert tracker.is_ready(['SBER'])
+        assert tracker.volatility('SBER') > 0
+        assert tracker.volatility('GAZP') is None
+
+    def test_portfolio_variance(self):
+        """Test portfolio variance equals w' S w for mapping and vector weights"""
+        rng = np.random.default_rng(2)
+        returns, _ = _price_paths(rng, 3, 50)
+        tracker = EWMACovarianceTracker(['AAA', 'BBB', 'CCC'], min_observations=1)
+        for row in returns:
+            tracker.update_returns(dict(zip(['AAA', 'BBB', 'CCC'], row)))
+
+        weights = np.array([0.5, 0.3, 0.2])
+        expected = weights @ tracker.covariance_matrix() @ weights
+
+        assert tracker.portfolio_variance(weights) == pytest.approx(expected)
+        assert tracker.portfolio_variance({'AAA': 0.5, 'BBB': 0.3, 'CCC': 0.2}) == pytest.approx(expected)
+        assert tracker.portfolio_volatility(weights, annualize=True) == pytest.approx(math.sqrt(expected * 252))
+        assert tracker.portfolio_variance({'AAA': 0.5, 'XXX': 0.5}) is None
+
+
+class TestRiskManagerWithTracker:
+    """Test risk manager reads warmed-up statistics from the tracker"""
+
+    @pytest.fixture
+    def tracker(self):
+        rng = np.random.default_rng(8)
+        _, prices = _price_paths(rng, 2, 60)
+        return EWMACovarianceTracker.from_price_histories(
+            {'SBER': list(prices[:, 0]), 'GAZP': list(prices[:, 1])}
+        )
+
+    def test_stop_loss_uses_tracked_volatility(self, tracker):
+        """Test stop loss ignores the history argument when the tracker is ready"""
+        risk_manager = RussianMarketRiskManager(volatility_tracker=tracker)
+        volatility = tracker.volatility('SBER')
+
+        stop_loss = risk_manager.calculate_volatility_adjusted_stop_loss('SBER', Decimal('100'), [])
+
+        expected = 0.05 + volatility * 1.5
+        expected = min(0.25, max(0.02, expected))
+        assert stop_loss == Decimal('100') * (Decimal('1') - Decimal(str(expected)))
+
+    def test_volatility_risk_uses_covariance(self, tracker):
+        """Test portfolio volatility risk comes from the EWMA covariance"""
+        risk_manager = RussianMarketRiskManager(volatility_tracker=tracker)
+        now = datetime.now()
+        positions = {
+            symbol: Position(symbol=symbol, quantity=10, entry_price=Decimal('100'),
+                             current_price=Decimal('100'), market_value=Decimal('1000'),
+                             unrealized_pnl=Decimal('0'), entry_date=now, sector='BANKING')
+            for symbol in ('SBER', 'GAZP')
+        }
+        portfolio = Portfolio(positions=positions, cash_balance=Decimal('0'))
+        market_data = {
+            symbol: MarketData(symbol=symbol, timestamp=now, price=Decimal('100'), volume=1000)
+            for symbol in positions
+        }
+
+        risk = risk_manager._assess_volatility_risk(portfolio, market_data)
+
+        expected = tracker.portfolio_volatility({'SBER': 0.5, 'GAZP': 0.5}, annualize=True) / 0.5
+        assert risk == pytest.approx(min(1.0, expected))
+
+    def test_volatility_risk_with_partial_warm_up(self):
+        """Test a partly warmed-up tracker leaves the placeholder volatility risk unchanged"""
+        tracker = EWMACovarianceTracker(['SBER'], min_observations=1)
+        for i in range(30):
+            tracker.update_returns({'SBER': 0.05 if i % 2 else -0.05})
+        now = datetime.now()
+        positions = {
+            symbol: Position(symbol=symbol, quantity=10, entry_price=Decimal('100'),
+                             current_price=Decimal('100'), market_value=Decimal('1000'),
+                             unrealized_pnl=Decimal('0'), entry_date=now, sector='BANKING')
+            for symbol in ('SBER', 'GAZP')
+        }
+        portfolio = Portfolio(positions=positions, cash_balance=Decimal('0'))
+        market_data = {
+            'SBER': MarketData(symbol='SBER', timestamp=now, price=Decimal('100'), volume=1000,
+                               change_percent=Decimal('-3')),
+            'GAZP': MarketData(symbol='GAZP', timestamp=now, price=Decimal('100'), volume=1000)
+        }
+
+        tracked_risk = RussianMarketRiskManager(volatility_tracker=tracker)._assess_volatility_risk(
+            portfolio, market_data)
+        untracked_risk = RussianMarketRiskManager()._assess_volatility_risk(portfolio, market_data)
+
+        # GAZP is not warmed up, so both positions use the same daily placeholder scale
+        assert tracked_risk == pytest.approx(untracked_risk)
+        assert tracked_risk == pytest.approx((0.5 * 0.03 + 0.5 * 0.02) / 0.5)
+
+    def test_volatility_risk_without_tracker_keeps_placeholder_scale(self):
+        """Test the default placeholder volatility is not annualized without a tracker"""
+        risk_manager = RussianMarketRiskManager()
+        now = datetime.now()
+        position = Position(symbol='SBER', quantity=10, entry_price=Decimal('100'),
+                            current_price=Decimal('100'), market_value=Decimal('1000'),
+                            unrealized_pnl=Decimal('0'), entry_date=now, sector='BANKING')
+        portfolio = Portfolio(positions={'SBER': position}, cash_balance=Decimal('0'))
+        market_data = {'SBER': MarketData(symbol='SBER', timestamp=now, price=Decimal('100'), volume=1000)}
+
+        risk = risk_manager._assess_volatility_risk(portfolio, market_data)
+
+        assert risk == pytest.approx(0.02 / 0.5)
@@ -120,6 +120,18 @@ class TestRussianEntityRecognizer:
         assert 'SBER' in result.tickers_mentioned
         assert 'GAZP' in result.tickers_mentioned
     
+    def test_recognize_entities_single_pass_matching(self):
+        """Тест поиска алиасов и тикеров одним проходом автомата."""
+        text = "SBERP и sber не тикеры, а GAZP - тикер. ПАО Сбербанк России и «Пятёрочка» отчитались."
+        result = self.recognizer.recognize_entities(text)
+        
+        assert set(result.tickers_mentioned) == {'GAZP', 'SBER', 'FIVE'}
+        assert self.recognizer._extract_direct_tickers(text) == ['GAZP']
+        
+        # Для одной позиции оставляется самое длинное совпадение
+        sber = [company for company in result.companies if company.ticker == 'SBER']
+        assert text[sber[0].start_pos:sber[0].end_pos] == "ПАО Сбербанк России"
+    
     def test_recognize_entities_empty_text(self):
         """Тест обработки пустого текста."""
         result = self.recognizer.recognize_entities("")
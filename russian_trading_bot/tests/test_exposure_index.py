@@ -0,0 +1,139 @@
+"""
+Unit tests for the incremental exposure index and delta pre-trade checks
+"""
+
+import pytest
+from datetime import datetime
+from decimal import Decimal
+
+from russian_trading_bot.models.market_data import MarketData
+from russian_trading_bot.services.risk_manager import (
+    RussianMarketDiversificationManager, Portfolio, Position, TradeOrder
+)
+
+
+PRICES = {'SBER': '250', 'GAZP': '160', 'LKOH': '6500', 'GMKN': '150',
+          'MTSS': '280', 'MGNT': '5000', 'AFLT': '40', 'PIKK': '700'}
+
+
+def _position(symbol, quantity, price):
+    price = Decimal(price)
+    return Position(symbol=symbol, quantity=quantity, entry_price=price, current_price=price,
+                    market_value=price * quantity, unrealized_pnl=Decimal('0'),
+                    entry_date=datetime.now(), sector='OTHER')
+
+
+@pytest.fixture
+def manager():
+    return RussianMarketDiversificationManager()
+
+
+@pytest.fixture
+def portfolio():
+    holdings = {'SBER': 200, 'GAZP': 300, 'LKOH': 8, 'GMKN': 300, 'MTSS': 150, 'MGNT': 10}
+    return Portfolio(
+        positions={symbol: _position(symbol, quantity, PRICES[symbol]) for symbol, quantity in holdings.items()},
+        cash_balance=Decimal('600000')
+    )
+
+
+@pytest.fixture
+def market_data():
+    now = datetime.now()
+    return {symbol: MarketData(symbol=symbol, timestamp=now, price=Decimal(price), volume=1000)
+            for symbol, price in PRICES.items()}
+
+
+class TestExposureIndex:
+    """Test delta exposure against the full trade simulation"""
+
+    @pytest.mark.parametrize('trade', [
+        TradeOrder('SBER', 'BUY', 100),
+        TradeOrder('AFLT', 'BUY', 500),
+        TradeOrder('GAZP', 'SELL', 100),
+        TradeOrder('MTSS', 'SELL', 1000),
+        TradeOrder('PIKK', 'SELL', 10),
+    ])
+    def test_delta_matches_simulated_portfolio(self, manager, portfolio, market_data, trade):
+        """Test evaluate() reproduces the aggregates of a simulated full portfolio"""
+        index = manager.build_exposure_index(portfolio, top_n=3)
+        delta = index.evaluate(trade.symbol, trade.action, trade.quantity,
+                               float(market_data[trade.symbol].price))
+
+        simulated = manager._simulate_trade(trade, portfolio, market_data)
+        sizes = manager._calculate_position_sizes(simulated)
+        sectors = manager._calculate_sector_allocations(simulated)
+
+        assert delta.total_value == pytest.approx(float(simulated.total_value))
+        assert delta.position_percent == pytest.approx(sizes.get(trade.symbol, 0.0))
+        assert delta.sector_percent == pytest.approx(sectors.get(delta.sector, 0.0))
+        assert delta.num_positions == len(simulated.positions)
+        assert delta.num_sectors == len(sectors)
+        assert delta.top_concentration == pytest.approx(sum(sorted(sizes.values())[-3:]))
+        for group, members in manager._allocation_groups().items():
+            if trade.symbol in members:
+                assert delta.group_percents[group] == pytest.approx(
+                    sum(size for symbol, size in sizes.items() if symbol in members)
+                )
+
+    def test_apply_fill_matches_rebuilt_index(self, manager, portfolio, market_data):
+        """Test in-place fills leave the same state as an index built from the new portfolio"""
+        index = manager.build_exposure_index(portfolio)
+        trades = [TradeOrder('AFLT', 'BUY', 500), TradeOrder('MTSS', 'SELL', 150),
+                  TradeOrder('SBER', 'SELL', 50)]
+
+        for trade in trades:
+            index.apply_fill(trade.symbol, trade.action, trade.quantity,
+                             float(market_data[trade.symbol].price))
+            portfolio = manager._simulate_trade(trade, portfolio, market_data)
+
+        rebuilt = manager.build_exposure_index(portfolio)
+        assert index.quantities == rebuilt.quantities
+        assert index.total_value == pytest.approx(rebuilt.total_value)
+        assert index.sector_values == pytest.approx(rebuilt.sector_values)
+        assert index.group_values == pytest.approx(rebuilt.group_values)
+        assert index.top_concentration() == pytest.approx(rebuilt.top_concentration())
+        assert 'MTSS' not in index
+
+
+class TestDeltaPreTradeChecks:
+    """Test pre-screen decisions of the diversification manager"""
+
+    def test_oversized_buy_is_rejected(self, manager, portfolio, market_data):
+        """Test a buy far above the position limit is rejected"""
+        index = manager.build_exposure_index(portfolio)
+
+        is_allowed, warnings, modified = manager.pre_screen_trade(
+            TradeOrder('AFLT', 'BUY', 10000), index, market_data
+        )
+
+        assert not is_allowed
+        assert modified is None
+        assert any('AFLT' in warning for warning in warnings)
+
+    def test_high_violation_reduces_buy(self, manager, portfolio, market_data):
+        """Test a moderately oversized buy is scaled down to the position limit"""
+        index = manager.build_exposure_index(portfolio)
+        limit, _ = manager._position_limit('PIKK')
+        total = float(portfolio.total_value)
+
+        quantity = int(total * limit * 1.7 / 100 / 700)
+        is_allowed, warnings, modified = manager.pre_screen_trade(
+            TradeOrder('PIKK', 'BUY', quantity), index, market_data
+        )
+
+        assert is_allowed
+        assert modified.quantity == int(total * limit / 100 / 700)
+        assert warnings[-1].startswith('Suggested position size reduced')
+
+    def test_batch_applies_accepted_trades(self, manager, portfolio, market_data):
+        """Test later candidates see the exposure of earlier accepted trades"""
+        trade = TradeOrder('AFLT', 'BUY', 1000)
+
+        isolated = manager.pre_screen_trades([trade, trade], portfolio, market_data, apply_accepted=False)
+        sequential = manager.pre_screen_trades([trade, trade], portfolio, market_data)
+
+        assert isolated[0] == isolated[1]
+        assert sequential[0] == isolated[0]
+        assert sequential[1] != sequential[0]
+        assert len(portfolio.positions) == 6  # The portfolio itself is untouched
@@ -0,0 +1,143 @@
+"""
+Unit tests for the columnar ISS parser
+Тесты для колоночного разбора ответов ISS MOEX
+"""
+
+import pytest
+import numpy as np
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import AsyncMock
+
+from russian_trading_bot.models.market_data import MarketData, MOSCOW_TZ
+from russian_trading_bot.services.candle_cache import CANDLE_DTYPE
+from russian_trading_bot.services.iss_parser import BoardSnapshot, block_columns, parse_history_candles
+from russian_trading_bot.services.moex_client import MOEXClient
+
+
+SECURITIES_BLOCK = {
+    'columns': ['SECID', 'LAST', 'VOLTODAY', 'BID', 'OFFER', 'PREVPRICE', 'OPEN', 'HIGH', 'LOW'],
+    'data': [
+        ['SBER', 250.5, 1000000, 250.0, 251.0, 248.0, 249.0, 252.0, 247.5],
+        ['GAZP', None, None, None, None, 179.0, None, None, None],
+        ['LKOH', 6500.0, 20000, 6499.5, 6501.0, 6450.0, 6460.0, 6520.0, 6440.0],
+    ]
+}
+
+
+class TestISSParser:
+    """Тесты для колоночного разбора блоков ISS"""
+
+    def test_block_columns_missing_column(self):
+        """Тест: отсутствующая колонка возвращается списком None"""
+        columns = block_columns(SECURITIES_BLOCK, ('SECID', 'WAPRICE'))
+
+        assert columns['SECID'] == ['SBER', 'GAZP', 'LKOH']
+        assert columns['WAPRICE'] == [None, None, None]
+
+    def test_snapshot_columns(self):
+        """Тест: снимок хранит типизированные колонки"""
+        snapshot = BoardSnapshot.from_block(SECURITIES_BLOCK)
+
+        assert snapshot.symbols == ['SBER', 'GAZP', 'LKOH']
+        assert snapshot.price.dtype == np.float64
+        assert snapshot.volume.dtype == np.int64
+        # Нет сделок - цена берется из PREVPRICE, объем 0
+        assert snapshot.price[snapshot.index('GAZP')] == 179.0
+        assert snapshot.volume[snapshot.index('GAZP')] == 0
+        assert np.isnan(snapshot.bid[snapshot.index('GAZP')])
+        assert snapshot.change_percent[snapshot.index('SBER')] == pytest.approx((250.5 - 248.0) / 248.0 * 100)
+
+    def test_snapshot_filters_symbols(self):
+        """Тест: в снимок попадают только запрошенные тикеры"""
+        snapshot = BoardSnapshot.from_block(SECURITIES_BLOCK, ['LKOH', 'SBER'])
+
+        assert set(snapshot) == {'SBER', 'LKOH'}
+        assert 'GAZP' not in snapshot
+
+    def test_snapshot_skips_invalid_rows(self):
+        """Тест: строки без цены или с bid > ask не попадают в снимок"""
+        block = {
+            'columns': ['SECID', 'LAST', 'PREVPRICE', 'BID', 'OFFER'],
+            'data': [
+                ['SBER', 250.5, 248.0, 250.0, 251.0],
+                ['GAZP', None, None, None, None],
+                ['LKOH', 6500.0, 6450.0, 6502.0, 6501.0],
+            ]
+        }
+        snapshot = BoardSnapshot.from_block(block)
+
+        assert snapshot.symbols == ['SBER']
+        assert snapshot.skipped == ['GAZP', 'LKOH']
+        assert 'GAZP' not in snapshot
+        assert snapshot.to_dict()['SBER'].price == Decimal('250.5')
+
+    def test_market_data_created_lazily(self):
+        """Тест: MarketData создается только при обращении и кэшируется"""
+        snapshot = BoardSnapshot.from_block(SECURITIES_BLOCK)
+        assert snapshot._objects == {}
+
+        sber = snapshot['SBER']
+
+        assert list(snapshot._objects) == ['SBER']
+        assert snapshot['SBER'] is sber
+
+    def test_market_data_matches_row_parsing(self):
+        """Тест: значения совпадают с построчным разбором через Decimal(str(x))"""
+        timestamp = datetime(2024, 1, 15, 12, 0, tzinfo=MOSCOW_TZ)
+        snapshot = BoardSnapshot.from_block(SECURITIES_BLOCK, timestamp=timestamp)
+
+        sber = snapshot['SBER']
+        assert isinstance(sber, MarketData)
+        assert sber.timestamp == timestamp
+        assert sber.price == Decimal('250.5')
+        assert sber.volume == 1000000
+        assert sber.bid == Decimal('250.0')
+        assert sber.ask == Decimal('251.0')
+        assert sber.previous_close == Decimal('248.0')
+        assert sber.change == Decimal('2.5')
+
+        gazp = snapshot['GAZP']
+        assert gazp.price == Decimal('179.0')
+        assert gazp.bid is None
+        assert gazp.change == Decimal('0')
+
+    def test_parse_history_candles(self):
+        """Тест: разбор блока history в массив свечей"""
+        block = {
+            'columns': ['TRADEDATE', 'CLOSE', 'VOLUME', 'OPEN', 'HIGH', 'LOW'],
+            'data': [
+                ['2024-01-15', 250.5, 1000000, 248.0, 252.0, 247.0],
+                ['2024-01-16', None, None, None, None, None],
+                ['2024-01-17', 251.0, None, None, None, None],
+            ]
+        }
+
+        candles = parse_history_candles(block)
+
+        assert candles.dtype == CANDLE_DTYPE
+        assert len(candles) == 2
+        assert candles['date'][0] == np.datetime64('2024-01-15')
+        assert candles['close'][1] == 251.0
+        assert candles['volume'][1] == 0
+        assert np.isnan(candles['open'][1])
+
+    def test_parse_empty_block(self):
+        """Тест: пустой блок дает пустой массив"""
+        candles = parse_history_candles({'columns': ['TRADEDATE', 'CLOSE'], 'data': []})
+
+        assert candles.dtype == CANDLE_DTYPE
+        assert len(candles) == 0
+
+    @pytest.mark.asyncio
+    async def test_client_board_snapshot(self):
+        """Тест: MOEXClient возвращает снимок одним запросом"""
+        client = MOEXClient()
+        client._make_request = AsyncMock(return_value={'securities': SECURITIES_BLOCK})
+
+        snapshot = await client.get_board_snapshot(['sber', 'LKOH'])
+
+        assert isinstance(snapshot, BoardSnapshot)
+        assert snapshot.symbols == ['SBER', 'LKOH']
+        client._make_request.assert_awaited_once()
+        assert client._make_request.call_args[0][1] == {'securities': 'SBER,LKOH'}
@@ -3,6 +3,7 @@ Unit tests for Russian market data models
 """
 
 import pytest
+import numpy as np
 from datetime import datetime, time
 from decimal import Decimal
 import pytz
@@ -10,7 +11,8 @@ from russian_trading_bot.models.market_data import (
     RussianStock, MarketData, TechnicalIndicators, MarketStatus,
     MOEXTradingSession, MOEXMarketData, MOEXOrderBook, MOEXTrade,
     validate_moex_ticker, validate_russian_sector, validate_isin,
-    validate_moex_trading_hours, get_next_trading_session
+    validate_moex_trading_hours, get_next_trading_session,
+    validate_market_data_arrays
 )
 
 
@@ -233,6 +235,85 @@ class TestMarketData:
                 high_price=Decimal("249.00"),  # High < open
                 low_price=Decimal("248.00")
             )
+    
+    def test_market_data_is_slotted(self):
+        """Test market data has no per-instance __dict__"""
+        data = MarketData(
+            symbol="SBER",
+            timestamp=datetime.now(),
+            price=Decimal("250.50"),
+            volume=1000000
+        )
+        assert not hasattr(data, '__dict__')
+        with pytest.raises(AttributeError):
+            data.unknown_field = 1
+    
+    def test_trusted_skips_validation(self):
+        """Test trusted constructor builds equal objects without validation"""
+        timestamp = datetime.now()
+        validated = MarketData(symbol="SBER", timestamp=timestamp, price=Decimal("250.50"),
+                               volume=1000, bid=Decimal("250.40"), ask=Decimal("250.60"))
+        trusted = MarketData.trusted(symbol="SBER", timestamp=timestamp, price=Decimal("250.50"),
+                                     volume=1000, bid=Decimal("250.40"), ask=Decimal("250.60"))
+        assert trusted == validated
+        
+        # No checks are run on the trusted path
+        unchecked = MarketData.trusted(symbol="sb", timestamp=timestamp, price=Decimal("-1"), volume=0)
+        assert unchecked.symbol == "sb"
+        assert unchecked.currency == "RUB"
+
+
+class TestBulkMarketDataValidation:
+    """Test vectorized MarketData validation"""
+    
+    def test_valid_rows(self):
+        """Test rows passing MarketData validation are marked valid"""
+        mask = validate_market_data_arrays(
+            ["SBER", "GAZP"], [250.5, 180.0], [1000, 0],
+            bids=[250.4, np.nan], asks=[250.6, np.nan],
+            opens=[249.0, 0.0], highs=[251.0, 0.0], lows=[248.0, 0.0]
+        )
+        assert mask.tolist() == [True, True]
+    
+    def test_invalid_rows(self):
+        """Test each MarketData rule is applied per row"""
+        mask = validate_market_data_arrays(
+            ["SB", "SBER", "SBER", "SBER", "SBER", "SBER", "SBER"],
+            [250.0, -1.0, 250.0, 250.0, 250.0, 250.0, np.nan],
+            [10, 10, -5, 10, 10, 10, 10],
+            bids=[np.nan, np.nan, np.nan, 251.0, np.nan, np.nan, np.nan],
+            asks=[np.nan, np.nan, np.nan, 250.0, np.nan, np.nan, np.nan],
+            opens=[np.nan, np.nan, np.nan, np.nan, 250.0, 250.0, np.nan],
+            highs=[np.nan, np.nan, np.nan, np.nan, 249.0, 252.0, np.nan],
+            lows=[np.nan, np.nan, np.nan, np.nan, 248.0, 250.5, np.nan]
+        )
+        assert mask.tolist() == [False, False, False, False, False, False, False]
+    
+    def test_single_symbol_for_all_rows(self):
+        """Test one ticker can be given for a whole price series"""
+        mask = validate_market_data_arrays("SBER", np.array([1.0, 2.0, 0.0]), np.array([1, 2, 3]))
+        assert mask.tolist() == [True, True, False]
+    
+    def test_matches_market_data_validation(self):
+        """Test bulk validation agrees with MarketData construction"""
+        rng = np.random.default_rng(7)
+        prices = rng.uniform(-5, 100, 200)
+        volumes = rng.integers(-10, 100, 200)
+        opens = rng.uniform(0, 100, 200)
+        highs = rng.uniform(0, 120, 200)
+        lows = rng.uniform(0, 100, 200)
+        
+        mask = validate_market_data_arrays("SBER", prices, volumes, opens=opens, highs=highs, lows=lows)
+        
+        for i in range(200):
+            try:
+                MarketData(symbol="SBER", timestamp=datetime.now(), price=Decimal(str(prices[i])),
+                           volume=int(volumes[i]), open_price=Decimal(str(opens[i])),
+                           high_price=Decimal(str(highs[i])), low_price=Decimal(str(lows[i])))
+                expected = True
+            except ValueError:
+                expected = False
+            assert mask[i] == expected
 
 
 class TestTechnicalIndicators:
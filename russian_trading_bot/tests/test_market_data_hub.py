@@ -0,0 +1,227 @@
+"""
+Unit tests for the market data fan-out hub
+"""
+
+import pytest
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import AsyncMock
+
+from russian_trading_bot.api.moex_interface import MOEXDataInterface
+from russian_trading_bot.models.market_data import MarketData, MOSCOW_TZ
+from russian_trading_bot.services.iss_parser import BoardSnapshot
+from russian_trading_bot.services.market_data_hub import MarketDataHub, MarketSnapshot, SubscriptionClosed
+
+
+def _quote(symbol: str, price: str) -> MarketData:
+    return MarketData(symbol=symbol, timestamp=datetime.now(MOSCOW_TZ), price=Decimal(price), volume=1000)
+
+
+def _board(symbols):
+    """Board snapshot with one row per symbol"""
+    block = {
+        'columns': ['SECID', 'LAST', 'PREVPRICE', 'VOLTODAY'],
+        'data': [[symbol, 100.0 + i, 99.0, 1000] for i, symbol in enumerate(symbols)]
+    }
+    return BoardSnapshot.from_block(block)
+
+
+class TestMarketDataHub:
+    """Test market data hub fan-out"""
+    
+    @pytest.fixture
+    def client(self):
+        """Mock MOEX client returning one quote per requested symbol"""
+        client = AsyncMock(spec=MOEXDataInterface)
+        client.get_multiple_stocks_data = AsyncMock(
+            side_effect=lambda symbols: {symbol: _quote(symbol, "100.0") for symbol in symbols}
+        )
+        return client
+    
+    @pytest.mark.asyncio
+    async def test_single_poll_fans_out(self, client):
+        """Test one board request serves every subscriber with the same tick"""
+        hub = MarketDataHub(client, symbols=["SBER"])
+        everything = hub.subscribe()
+        gazp_only = hub.subscribe(symbols=["gazp"])
+        
+        snapshot = await hub.poll_once()
+        
+        client.get_multiple_stocks_data.assert_awaited_once_with(["GAZP", "SBER"])
+        assert isinstance(snapshot, MarketSnapshot)
+        
+        full = await everything.get()
+        filtered = await gazp_only.get()
+        assert set(full.quotes) == {"SBER", "GAZP"}
+        assert set(filtered.quotes) == {"GAZP"}
+        assert full.sequence == filtered.sequence == snapshot.sequence
+        assert full.quotes["GAZP"] is filtered.quotes["GAZP"]
+    
+    @pytest.mark.asyncio
+    async def test_snapshots_are_read_only(self, client):
+        """Test snapshots cannot be modified by subscribers"""
+        hub = MarketDataHub(client, symbols=["SBER"])
+        snapshot = await hub.poll_once()
+        
+        with pytest.raises(TypeError):
+            snapshot.quotes["SBER"] = _quote("SBER", "1.0")
+        with pytest.raises(AttributeError):
+            snapshot.sequence = 10
+    
+    @pytest.mark.asyncio
+    async def test_drop_oldest_backpressure(self, client):
+        """Test slow subscribers keep only the most recent snapshots"""
+        hub = MarketDataHub(client, symbols=["SBER"])
+        slow = hub.subscribe(maxsize=2)
+        
+        for _ in range(5):
+            await hub.poll_once()
+        
+        assert slow.pending() == 2
+        assert slow.dropped == 3
+        assert [(await slow.get()).sequence for _ in range(2)] == [4, 5]
+    
+    @pytest.mark.asyncio
+    async def test_filtered_subscriber_skips_unrelated_ticks(self, client):
+        """Test subscribers are not woken by snapshots without their symbols"""
+        client.get_multiple_stocks_data = AsyncMock(return_value={"SBER": _quote("SBER", "250.0")})
+        hub = MarketDataHub(client, symbols=["SBER"])
+        lkoh = hub.subscribe(symbols=["LKOH"])
+        
+        await hub.poll_once()
+        
+        assert lkoh.get_nowait() is None
+    
+    @pytest.mark.asyncio
+    async def test_background_polling_and_provider(self, client):
+        """Test polling loop, late subscribers and the paper trading provider"""
+        hub = MarketDataHub(client, symbols=["SBER", "GAZP"], interval=0.01)
+        provider = hub.as_provider()
+        assert provider(["SBER"]) == {}
+        
+        hub.start()
+        subscription = hub.subscribe(symbols=["SBER"])
+        first = await asyncio.wait_for(subscription.get(), timeout=1)
+        second = await asyncio.wait_for(subscription.get(), timeout=1)
+        await hub.stop()
+        
+        assert second.sequence > first.sequence
+        assert not hub.running
+        assert set(provider(["SBER", "YNDX"])) == {"SBER"}
+        
+        # Late subscriber gets the latest snapshot immediately
+        late = hub.subscribe()
+        assert late.get_nowait() is hub.latest
+        
+        late.close()
+        assert late not in hub.subscriptions
+    
+    @pytest.mark.asyncio
+    async def test_poll_errors_are_counted(self, client):
+        """Test a failed poll does not publish"""
+        client.get_multiple_stocks_data = AsyncMock(side_effect=RuntimeError("ISS down"))
+        hub = MarketDataHub(client, symbols=["SBER"])
+        subscription = hub.subscribe()
+        
+        assert await hub.poll_once() is None
+        assert hub.errors == 1
+        assert subscription.pending() == 0
+    
+    @pytest.mark.asyncio
+    async def test_close_wakes_waiting_consumer(self, client):
+        """Test closing a subscription ends a pending get and async iteration"""
+        hub = MarketDataHub(client, symbols=["SBER"])
+        waiting = hub.subscribe()
+        iterating = hub.subscribe()
+        
+        async def consume():
+            return [snapshot.sequence async for snapshot in iterating]
+        
+        pending_get = asyncio.ensure_future(waiting.get())
+        consumer = asyncio.ensure_future(consume())
+        await hub.poll_once()
+        await asyncio.sleep(0)
+        assert (await pending_get).sequence == 1
+        
+        pending_get = asyncio.ensure_future(waiting.get())
+        await asyncio.sleep(0)
+        await hub.stop()
+        
+        with pytest.raises(SubscriptionClosed):
+            await asyncio.wait_for(pending_get, timeout=1)
+        assert await asyncio.wait_for(consumer, timeout=1) == [1]
+        assert waiting.pending() == 0
+        assert waiting.get_nowait() is None
+    
+    @pytest.mark.asyncio
+    async def test_closed_subscription_drains_queue(self, client):
+        """Test snapshots queued before close are still delivered"""
+        hub = MarketDataHub(client, symbols=["SBER"])
+        subscription = hub.subscribe(maxsize=2)
+        await hub.poll_once()
+        await hub.poll_once()
+        
+        subscription.close()
+        
+        assert [snapshot.sequence async for snapshot in subscription] == [1, 2]
+        with pytest.raises(SubscriptionClosed):
+            await subscription.get()
+    
+    @pytest.mark.asyncio
+    async def test_board_snapshot_builds_quotes_lazily(self, client):
+        """Test the hub polls the columnar board and builds only quotes that are read"""
+        board = _board(["GAZP", "LKOH", "SBER"])
+        client.get_board_snapshot = AsyncMock(return_value=board)
+        hub = MarketDataHub(client, symbols=["SBER", "LKOH"])
+        gazp_only = hub.subscribe(symbols=["GAZP"])
+        
+        snapshot = await hub.poll_once()
+        
+        client.get_board_snapshot.assert_awaited_once_with(["GAZP", "LKOH", "SBER"])
+        client.get_multiple_stocks_data.assert_not_awaited()
+        assert snapshot.quotes is board
+        assert set(board._objects) == {"GAZP"}
+        assert (await gazp_only.get()).quotes["GAZP"].price == Decimal("100.0")
+        with pytest.raises(TypeError):
+            snapshot.quotes["SBER"] = _quote("SBER", "1.0")
+    
+    @pytest.mark.asyncio
+    async def test_all_symbols_subscriber_polls_whole_board(self, client):
+        """Test a hub without fixed symbols polls the whole board for all-symbols subscribers"""
+        client.get_board_snapshot = AsyncMock(return_value=_board(["SBER", "GAZP"]))
+        hub = MarketDataHub(client)
+        
+        assert await hub.poll_once() is None
+        
+        everything = hub.subscribe()
+        hub.subscribe(symbols=["GAZP"])
+        await hub.poll_once()
+        
+        client.get_board_snapshot.assert_awaited_once_with(None)
+        assert set((await everything.get()).quotes) == {"SBER", "GAZP"}
+    
+    @pytest.mark.asyncio
+    async def test_unpriced_board_symbol_is_skipped(self, client):
+        """Test a board row without prices is counted and does not stop the poll loop"""
+        block = {
+            'columns': ['SECID', 'LAST', 'PREVPRICE', 'VOLTODAY'],
+            'data': [['GAZP', None, None, None], ['SBER', 100.0, 99.0, 1000]]
+        }
+        client.get_board_snapshot = AsyncMock(side_effect=lambda symbols: BoardSnapshot.from_block(block))
+        hub = MarketDataHub(client, symbols=["GAZP", "SBER"], interval=0.01)
+        subscription = hub.subscribe(symbols=["GAZP", "SBER"])
+        provider = hub.as_provider()
+        
+        hub.start()
+        first = await asyncio.wait_for(subscription.get(), timeout=1.0)
+        second = await asyncio.wait_for(subscription.get(), timeout=1.0)
+        
+        assert hub.running
+        assert hub.errors == 0
+        assert hub.invalid_quotes >= 2
+        assert set(first.quotes) == {"SBER"}
+        assert second.sequence > first.sequence
+        assert set(provider(["GAZP", "SBER"])) == {"SBER"}
+        
+        await hub.stop()
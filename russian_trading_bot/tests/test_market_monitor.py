@@ -15,6 +15,7 @@ from russian_trading_bot.models.notifications import (
 )
 from russian_trading_bot.services.market_monitor import MarketMonitor, VolatilityMetrics, MarketCondition
 from russian_trading_bot.services.notification_service import NotificationService
+from russian_trading_bot.services.candle_cache import CandleCache, make_candles
 
 
 class TestMarketMonitor:
@@ -377,6 +378,23 @@ class TestMarketMonitor:
         timestamps = [ts for ts, _ in market_monitor.price_history["SBER"]]
         assert old_timestamp not in timestamps
         assert recent_timestamp in timestamps
+    
+    @pytest.mark.asyncio
+    async def test_average_volume_from_candle_cache(self, notification_service, config, tmp_path):
+        """Test average volume uses daily volumes from the candle cache"""
+        cache = CandleCache(str(tmp_path))
+        today = datetime.now().date()
+        cache.write("SBER", make_candles([
+            (today - timedelta(days=40), 1.0, 1.0, 1.0, 1.0, 5000000),
+            (today - timedelta(days=3), 1.0, 1.0, 1.0, 1.0, 1000000),
+            (today - timedelta(days=2), 1.0, 1.0, 1.0, 1.0, 0),
+            (today - timedelta(days=1), 1.0, 1.0, 1.0, 1.0, 2000000)
+        ]), today - timedelta(days=40), today)
+        
+        monitor = MarketMonitor(notification_service, config, candle_cache=cache)
+        
+        assert await monitor._get_average_volume("SBER", days=20) == 1500000
+        assert await monitor._get_average_volume("GAZP", days=20) is None
 
 
 class TestVolatilityMetrics:
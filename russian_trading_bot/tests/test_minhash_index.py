@@ -0,0 +1,65 @@
+"""
+Unit tests for MinHash/LSH near-duplicate index
+Тесты MinHash-сигнатур и LSH-индекса
+"""
+
+import pytest
+
+from russian_trading_bot.services.minhash_index import (
+    MinHasher, MinHashLSHIndex, estimated_jaccard, optimal_bands, word_shingles
+)
+
+
+class TestMinHash:
+    """Тесты MinHash-сигнатур"""
+
+    def test_estimate_close_to_jaccard(self):
+        """Тест: доля совпадений сигнатур приближает коэффициент Жаккара"""
+        hasher = MinHasher(num_perm=256)
+        set1 = {f"слово{i}" for i in range(100)}
+        set2 = {f"слово{i}" for i in range(25, 125)}  # Жаккар = 75 / 125 = 0.6
+
+        estimate = estimated_jaccard(hasher.signature(set1), hasher.signature(set2))
+
+        assert estimate == pytest.approx(0.6, abs=0.1)
+        assert estimated_jaccard(hasher.signature(set1), hasher.signature(set(set1))) == 1.0
+
+    def test_signatures_deterministic(self):
+        """Тест: сигнатуры не зависят от экземпляра и порядка шинглов"""
+        words = ["сбербанк", "увеличил", "прибыль"]
+
+        assert (MinHasher().signature(words) == MinHasher().signature(reversed(words))).all()
+
+    def test_word_shingles(self):
+        """Тест: шинглы из подряд идущих слов"""
+        assert word_shingles(["a", "b", "c", "d"], 3) == {"a b c", "b c d"}
+        assert word_shingles(["a", "b"], 3) == {"a", "b"}
+
+
+class TestMinHashLSHIndex:
+    """Тесты LSH-индекса"""
+
+    def test_bands_below_threshold(self):
+        """Тест: порог LSH не выше порога похожести"""
+        for threshold in (0.5, 0.7, 0.8, 0.9):
+            bands, rows = optimal_bands(threshold, 128)
+            assert bands * rows == 128
+            assert (1 / bands) ** (1 / rows) <= threshold
+
+    def test_insert_query_remove(self):
+        """Тест: поиск похожей записи и удаление из корзин"""
+        hasher = MinHasher()
+        index = MinHashLSHIndex(0.7)
+        base = [f"слово{i}" for i in range(40)]
+
+        index.insert("a", hasher.signature(base))
+        index.insert("b", hasher.signature([f"другое{i}" for i in range(40)]))
+
+        match = index.best_match(hasher.signature(base[:38] + ["новое"]))
+        assert match[0] == "a"
+        assert match[1] >= 0.7
+
+        index.remove("a")
+        assert index.best_match(hasher.signature(base)) is None
+        assert len(index) == 1
+        assert all("a" not in bucket for buckets in index._buckets for bucket in buckets.values())
@@ -9,10 +9,11 @@ from unittest.mock import AsyncMock, MagicMock, patch
 from datetime import datetime, timedelta
 from decimal import Decimal
 import aiohttp
+import numpy as np
 
 from russian_trading_bot.services.moex_client import (
     MOEXClient, MOEXAPIError, MOEXRateLimitError, MOEXConnectionError,
-    RateLimiter, create_moex_client, format_moex_error
+    RateLimiter, create_moex_client, format_moex_error, split_date_range
 )
 from russian_trading_bot.models.market_data import (
     MarketData, RussianStock, MOEXOrderBook, MOEXTrade, MOSCOW_TZ
@@ -31,7 +32,7 @@ class TestRateLimiter:
         for _ in range(5):
             await limiter.acquire()
         
-        assert len(limiter.requests) == 5
+        assert limiter.available() == 0
     
     @pytest.mark.asyncio
     async def test_rate_limiter_blocks_excess_requests(self):
@@ -49,6 +50,95 @@ class TestRateLimiter:
         
         # Должна быть задержка
         assert end_time - start_time >= 0.9  # Почти 1 секунда
+    
+    @pytest.mark.asyncio
+    async def test_rate_limiter_fifo_order(self):
+        """Тест: ожидающие корутины обслуживаются в порядке вызова"""
+        limiter = RateLimiter(max_requests=2, time_window=0.2)
+        order = []
+        
+        async def worker(index):
+            await limiter.acquire()
+            order.append(index)
+        
+        start_time = asyncio.get_event_loop().time()
+        await asyncio.gather(*(worker(i) for i in range(6)))
+        elapsed = asyncio.get_event_loop().time() - start_time
+        
+        assert order == list(range(6))
+        # 6 запросов по 2 за окно: ожидание двух окон, без последовательного накопления задержек
+        assert 0.35 <= elapsed < 0.6
+    
+    @pytest.mark.asyncio
+    async def test_rate_limiter_weighted_cost(self):
+        """Тест: запрос с весом расходует несколько единиц лимита"""
+        limiter = RateLimiter(max_requests=5, time_window=60)
+        
+        await limiter.acquire(cost=3)
+        assert limiter.available() == 2
+        
+        await limiter.acquire(cost=2)
+        assert limiter.available() == 0
+        
+        with pytest.raises(ValueError):
+            await limiter.acquire(cost=6)
+    
+    @pytest.mark.asyncio
+    async def test_rate_limiter_cancelled_waiter(self):
+        """Тест: отмена ожидающего не блокирует последующие запросы"""
+        limiter = RateLimiter(max_requests=1, time_window=0.1)
+        await limiter.acquire()
+        
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        
+        await asyncio.wait_for(limiter.acquire(), timeout=1)
+    
+    def test_rate_limiter_waiter_cancelled_on_loop_shutdown(self):
+        """Тест: ожидающий, отмененный при остановке цикла, не блокирует новый цикл"""
+        limiter = RateLimiter(max_requests=1, time_window=0.1)
+        
+        async def abandon_waiter():
+            await limiter.acquire()
+            # Остается в очереди и отменяется при завершении asyncio.run
+            asyncio.ensure_future(limiter.acquire())
+            await asyncio.sleep(0)
+        
+        async def acquire_again():
+            await asyncio.wait_for(limiter.acquire(), timeout=1)
+        
+        asyncio.run(abandon_waiter())
+        asyncio.run(acquire_again())
+    
+    @pytest.mark.asyncio
+    async def test_rate_limiter_shared_between_clients(self):
+        """Тест: один ограничитель разделяется между клиентами"""
+        from russian_trading_bot.services.tinkoff_broker import TinkoffBroker
+        from russian_trading_bot.services.finam_broker import FinamBroker
+        
+        limiter = RateLimiter(max_requests=10, time_window=60)
+        client = MOEXClient(rate_limiter=limiter)
+        tinkoff = TinkoffBroker("token", rate_limiter=limiter)
+        finam = FinamBroker("token", "client", rate_limiter=limiter)
+        
+        assert client.rate_limiter is tinkoff.rate_limiter is finam.rate_limiter
+        
+        response = AsyncMock()
+        response.status = 200
+        response.json = AsyncMock(return_value={"accounts": []})
+        session = MagicMock()
+        session.closed = False
+        session.request.return_value.__aenter__ = AsyncMock(return_value=response)
+        session.request.return_value.__aexit__ = AsyncMock(return_value=False)
+        tinkoff.session = session
+        
+        await tinkoff._make_request("POST", "GetAccounts", {})
+        await client.rate_limiter.acquire()
+        
+        assert limiter.available() == 8
 
 
 class TestMOEXClient:
@@ -197,6 +287,22 @@ class TestMOEXClient:
         assert result[0].symbol == "SBER"
         assert result[0].price == Decimal('250.5')
     
+    @pytest.mark.asyncio
+    async def test_get_historical_data_invalid_candle(self, client):
+        """Тест: некорректная свеча приводит к MOEXAPIError"""
+        client._make_request = AsyncMock(return_value={
+            'history': {
+                'columns': ['TRADEDATE', 'CLOSE', 'VOLUME', 'OPEN', 'HIGH', 'LOW'],
+                'data': [
+                    ['2024-01-15', 250.5, 1000000, 248.0, 252.0, 247.0],
+                    ['2024-01-16', 0.0, 1200000, 250.5, 253.0, 249.5]
+                ]
+            }
+        })
+        
+        with pytest.raises(MOEXAPIError):
+            await client.get_historical_data("SBER", datetime(2024, 1, 15), datetime(2024, 1, 16))
+    
     @pytest.mark.asyncio
     async def test_get_stock_info(self, client):
         """Тест: получение информации об акции"""
@@ -383,6 +489,169 @@ class TestMOEXClient:
             await client.get_stock_data("SBER")
 
 
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_requests_coalesced(self, client):
+        """Тест: одновременные одинаковые запросы выполняются одним HTTP вызовом"""
+        release = asyncio.Event()
+        
+        async def fetch(endpoint, params):
+            await release.wait()
+            return {"endpoint": endpoint, "params": params}
+        
+        client._fetch = AsyncMock(side_effect=fetch)
+        
+        same = [client._make_request("/iss/securities.json", {"q": "SBER"}) for _ in range(5)]
+        other = client._make_request("/iss/securities.json", {"q": "GAZP"})
+        gathered = asyncio.gather(*same, other)
+        await asyncio.sleep(0)
+        release.set()
+        results = await gathered
+        
+        assert client._fetch.await_count == 2
+        assert all(result is results[0] for result in results[:5])
+        assert results[5]["params"] == {"q": "GAZP"}
+        assert client.get_cache_stats()['coalesced'] == 4
+        assert client.get_cache_stats()['in_flight'] == 0
+    
+    @pytest.mark.asyncio
+    async def test_coalesced_request_errors_and_cancellation(self, client):
+        """Тест: ошибка передается всем ожидающим, отмена одного не отменяет запрос"""
+        release = asyncio.Event()
+        calls = []
+        
+        async def fetch(endpoint, params):
+            calls.append(endpoint)
+            await release.wait()
+            if len(calls) == 1:
+                raise MOEXConnectionError("Нет соединения")
+            return {"ok": True}
+        
+        client._fetch = AsyncMock(side_effect=fetch)
+        
+        failing = asyncio.gather(*(client._make_request("/iss/a.json", use_cache=False) for _ in range(3)),
+                                 return_exceptions=True)
+        await asyncio.sleep(0)
+        release.set()
+        errors = await failing
+        assert all(isinstance(error, MOEXConnectionError) for error in errors)
+        
+        # После ошибки следующий вызов выполняет новый запрос
+        release.clear()
+        first = asyncio.ensure_future(client._make_request("/iss/a.json"))
+        second = asyncio.ensure_future(client._make_request("/iss/a.json"))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        
+        assert await second == {"ok": True}
+        assert first.cancelled()
+        assert len(calls) == 2
+    
+    @staticmethod
+    def _fake_history_request(state):
+        """Фейковый ISS history: по одной свече на каждый будний день диапазона"""
+        async def make_request(endpoint, params=None, use_cache=True, cache_ttl=None):
+            state['active'] += 1
+            state['peak'] = max(state['peak'], state['active'])
+            state['calls'] += 1
+            await asyncio.sleep(0.01)
+            state['active'] -= 1
+            
+            if 'BAD' in endpoint:
+                raise MOEXConnectionError("Нет соединения")
+            
+            days = []
+            day = datetime.strptime(params['from'], '%Y-%m-%d')
+            till = datetime.strptime(params['till'], '%Y-%m-%d')
+            while day <= till:
+                if day.weekday() < 5:
+                    days.append(day)
+                day += timedelta(days=1)
+            
+            page = days[params['start']:params['start'] + 100]
+            return {
+                'history': {
+                    'columns': ['TRADEDATE', 'CLOSE', 'VOLUME', 'OPEN', 'HIGH', 'LOW'],
+                    'data': [[d.strftime('%Y-%m-%d'), 100.0 + d.toordinal() % 50, 1000, 100.0, 150.0, 99.0]
+                             for d in page]
+                }
+            }
+        return make_request
+    
+    @pytest.mark.asyncio
+    async def test_bulk_historical_candles(self, client):
+        """Тест: массовая параллельная загрузка с ограничением параллелизма"""
+        state = {'active': 0, 'peak': 0, 'calls': 0}
+        client._make_request = self._fake_history_request(state)
+        
+        start_date = datetime(2023, 1, 1)
+        end_date = datetime(2023, 12, 31)
+        result = await client.get_bulk_historical_candles(
+            {'SBER': (start_date, end_date), 'gazp': (start_date, end_date), 'BAD1': (start_date, end_date)},
+            max_concurrency=3, chunk_days=60
+        )
+        
+        assert set(result.keys()) == {'SBER', 'GAZP'}  # BAD1 пропущен из-за ошибки
+        assert state['peak'] == 3
+        
+        # Порядок дат сохранен при склейке частей
+        candles = result['SBER']
+        assert len(candles) == 260
+        assert np.all(np.diff(candles['date'].astype('int64')) > 0)
+        
+        # Совпадает с последовательной загрузкой
+        serial = await client.get_historical_candles('SBER', start_date, end_date)
+        np.testing.assert_array_equal(candles, serial)
+    
+    @pytest.mark.asyncio
+    async def test_full_page_ending_at_range_end_is_last(self, client):
+        """Тест: полная страница до конца диапазона не требует запроса пустой страницы"""
+        state = {'active': 0, 'peak': 0, 'calls': 0}
+        client._make_request = self._fake_history_request(state)
+        
+        # С понедельника 01.01 по пятницу 17.05 - ровно 100 будних дней (одна полная страница)
+        candles = await client._fetch_history_candles('SBER', datetime(2024, 1, 1), datetime(2024, 5, 17))
+        
+        assert len(candles) == 100
+        assert state['calls'] == 1
+    
+    @pytest.mark.asyncio
+    async def test_multiple_historical_data(self, client):
+        """Тест: исторические данные нескольких акций"""
+        state = {'active': 0, 'peak': 0, 'calls': 0}
+        client._make_request = self._fake_history_request(state)
+        
+        result = await client.get_multiple_historical_data(
+            ['SBER', 'GAZP', 'invalid-ticker!'], datetime(2024, 1, 1), datetime(2024, 1, 31)
+        )
+        
+        assert set(result.keys()) == {'SBER', 'GAZP'}
+        assert len(result['GAZP']) == 23
+        assert all(isinstance(item, MarketData) for item in result['GAZP'])
+        assert result['GAZP'][0].timestamp < result['GAZP'][-1].timestamp
+    
+    @pytest.mark.asyncio
+    async def test_multiple_historical_data_skips_invalid_candles(self, client):
+        """Тест: тикер с некорректной свечой пропускается, остальные возвращаются"""
+        state = {'active': 0, 'peak': 0, 'calls': 0}
+        fake_request = self._fake_history_request(state)
+        
+        async def make_request(endpoint, params=None, use_cache=True):
+            data = await fake_request(endpoint, params, use_cache)
+            if 'GAZP' in endpoint:
+                data['history']['data'][0][1] = 0.0  # Нулевая цена закрытия
+            return data
+        
+        client._make_request = make_request
+        
+        result = await client.get_multiple_historical_data(
+            ['SBER', 'GAZP'], datetime(2024, 1, 1), datetime(2024, 1, 31)
+        )
+        
+        assert set(result.keys()) == {'SBER'}
+        assert len(result['SBER']) == 23
+
+
 class TestHelperFunctions:
     """Тесты для вспомогательных функций"""
     
@@ -397,6 +666,17 @@ class TestHelperFunctions:
         
         await client.close()
     
+    def test_split_date_range(self):
+        """Тест: разбиение диапазона дат на части"""
+        chunks = split_date_range(datetime(2024, 1, 1), datetime(2024, 1, 25), chunk_days=10)
+        
+        assert chunks == [
+            (datetime(2024, 1, 1), datetime(2024, 1, 10)),
+            (datetime(2024, 1, 11), datetime(2024, 1, 20)),
+            (datetime(2024, 1, 21), datetime(2024, 1, 25))
+        ]
+        assert split_date_range(datetime(2024, 1, 2), datetime(2024, 1, 1)) == []
+    
     def test_format_moex_error(self):
         """Тест: форматирование ошибок"""
         # Тест ошибки лимита запросов
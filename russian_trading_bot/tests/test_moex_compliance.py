@@ -338,7 +338,35 @@ class TestMOEXComplianceValidator:
             result = validator.validate_order_compliance(currency_order)
         
         assert any("Currency trading" in warning for warning in result["warnings"])
-    
+
+    def test_validate_orders_compliance_batch(self, validator, moscow_tz):
+        """Test batch validation checks the clock once and matches single-order results"""
+        orders = [
+            TradeOrder(symbol="SBER", action=OrderAction.BUY, quantity=100,
+                       order_type=OrderType.LIMIT, price=Decimal("250")),
+            TradeOrder(symbol="SBER", action=OrderAction.BUY, quantity=15,
+                       order_type=OrderType.MARKET),
+            TradeOrder(symbol="USDRUB_TOM", action=OrderAction.BUY, quantity=1000,
+                       order_type=OrderType.MARKET)
+        ]
+        test_time = moscow_tz.localize(datetime(2024, 1, 10, 15, 0))
+        calls = []
+
+        def current_time():
+            calls.append(1)
+            return test_time
+
+        with pytest.MonkeyPatch().context() as m:
+            m.setattr(validator, 'get_current_moscow_time', current_time)
+            results = validator.validate_orders_compliance(orders)
+            batch_calls = len(calls)
+            single_results = [validator.validate_order_compliance(order) for order in orders]
+
+        assert results == single_results
+        assert batch_calls < len(calls) - batch_calls
+        assert [result["valid"] for result in results] == [True, False, True]
+        assert results[0]["compliance_info"]["trading_session"] == "main"
+
     def test_get_compliance_summary(self, validator):
         """Test compliance summary generation"""
         summary = validator.get_compliance_summary()
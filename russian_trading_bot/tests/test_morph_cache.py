@@ -0,0 +1,94 @@
+"""
+Unit tests for the morphology cache
+Тесты кэша морфологического разбора
+"""
+
+import json
+from unittest.mock import Mock
+
+from russian_trading_bot.services.morph_cache import MorphologyCache
+
+
+def _analyzer():
+    """Морфоанализатор-заглушка: лемма - слово без окончания 'ы'"""
+    def parse(word):
+        parsed = Mock()
+        parsed.normal_form = word.lower().rstrip('ы')
+        parsed.tag.POS = 'NOUN' if word.lower().endswith('ы') else None
+        return [parsed]
+
+    analyzer = Mock()
+    analyzer.parse.side_effect = parse
+    return analyzer
+
+
+class TestMorphologyCache:
+    """Тесты кэша морфологии"""
+
+    def test_repeated_words_parsed_once(self):
+        """Тест: повторные словоформы (в любом регистре) берутся из кэша"""
+        analyzer = _analyzer()
+        cache = MorphologyCache(lambda: analyzer)
+
+        assert cache.parse("Акции") == ("акции", "UNKN")
+        assert cache.lemmatize(["котировки", "Котировки", "КОТИРОВКИ"]) == ["котировки"] * 3
+        assert cache.parse("акции") == ("акции", "UNKN")
+        assert cache.parse("доходы") == ("доход", "NOUN")
+
+        assert analyzer.parse.call_count == 3
+        stats = cache.stats()
+        assert stats['hits'] == 3
+        assert stats['misses'] == 3
+        assert stats['hit_rate'] == 0.5
+
+    def test_lru_eviction(self):
+        """Тест: вытесняются давно не использованные словоформы"""
+        cache = MorphologyCache(_analyzer, max_entries=2)
+
+        cache.parse("рост")
+        cache.parse("спад")
+        cache.parse("рост")
+        cache.parse("курс")
+
+        assert "рост" in cache and "курс" in cache
+        assert "спад" not in cache
+        assert cache.stats()['evictions'] == 1
+
+    def test_analyzer_loaded_lazily(self):
+        """Тест: анализатор запрашивается только при промахе"""
+        factory = Mock(side_effect=_analyzer)
+        cache = MorphologyCache(factory)
+
+        assert len(cache) == 0
+        factory.assert_not_called()
+
+        cache.parse("рубли")
+        factory.assert_called_once()
+
+    def test_save_and_warm_load(self, tmp_path):
+        """Тест: сохраненный кэш загружается при старте с учетом лимита и порядка LRU"""
+        path = str(tmp_path / "cache" / "morph.json")
+        cache = MorphologyCache(_analyzer)
+        cache.lemmatize(["акции", "доходы", "рубли"])
+
+        assert cache.save(path) == 3
+
+        analyzer = _analyzer()
+        warm = MorphologyCache(lambda: analyzer, max_entries=2)
+        assert warm.load(path) == 2
+        assert "акции" not in warm
+        assert warm.parse("рубли") == ("рубли", "UNKN")
+        analyzer.parse.assert_not_called()
+
+    def test_load_missing_or_corrupt_file(self, tmp_path):
+        """Тест: отсутствующий или поврежденный файл не ломает кэш"""
+        cache = MorphologyCache(_analyzer)
+        corrupt = tmp_path / "corrupt.json"
+        corrupt.write_text("{not json", encoding='utf-8')
+        malformed = tmp_path / "malformed.json"
+        malformed.write_text(json.dumps([["акции", "акция", "NOUN"], ["битая"]]), encoding='utf-8')
+
+        assert cache.load(str(tmp_path / "missing.json")) == 0
+        assert cache.load(str(corrupt)) == 0
+        assert cache.load(str(malformed)) == 1
+        assert cache.parse("акции") == ("акция", "NOUN")
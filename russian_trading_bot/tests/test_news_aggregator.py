@@ -126,6 +126,69 @@ class TestNewsDeduplicator:
         assert not deduplicator.is_duplicate(article1)
         assert not deduplicator.is_duplicate(article2)
 
+    def test_reprint_with_new_title_detection(self):
+        """Тест: перепечатка с другим заголовком обнаруживается по тексту"""
+        deduplicator = NewsDeduplicator()
+        body = ("Совет директоров Сбербанка рекомендовал направить на дивиденды половину "
+                "чистой прибыли по МСФО за прошлый год, сообщила пресс-служба банка. "
+                "Решение будет вынесено на годовое собрание акционеров в июне.")
+
+        article1 = RussianNewsArticle(
+            title="Сбербанк рекомендовал дивиденды",
+            content=body,
+            source="RBC",
+            timestamp=datetime.now()
+        )
+        article2 = RussianNewsArticle(
+            title="СРОЧНО: набсовет Сбера одобрил выплату",
+            content=body + " Источник: Интерфакс.",
+            source="INTERFAX",
+            timestamp=datetime.now()
+        )
+
+        assert not deduplicator.is_duplicate(article1)
+        assert deduplicator.is_duplicate(article2)
+
+    def test_time_based_eviction(self, monkeypatch):
+        """Тест: статьи забываются после истечения времени хранения"""
+        clock = [1000.0]
+        monkeypatch.setattr('russian_trading_bot.services.news_aggregator.time.monotonic', lambda: clock[0])
+        deduplicator = NewsDeduplicator(max_age_hours=1)
+
+        article = RussianNewsArticle(
+            title="Газпром снизил добычу",
+            content="Содержание о Газпроме",
+            source="RBC",
+            timestamp=datetime.now()
+        )
+
+        assert not deduplicator.is_duplicate(article)
+        clock[0] += 1800
+        assert deduplicator.is_duplicate(article)
+        clock[0] += 3600
+        assert not deduplicator.is_duplicate(article)
+        assert len(deduplicator) == 1
+
+    def test_memory_bounded(self):
+        """Тест: число записей ограничено, clear_old_entries(0) очищает все"""
+        deduplicator = NewsDeduplicator(max_entries=50)
+
+        for i in range(200):
+            deduplicator.is_duplicate(RussianNewsArticle(
+                title=f"Новость номер {i} о рынке {i * 7}",
+                content=f"Текст {i}",
+                source="RBC",
+                timestamp=datetime.now()
+            ))
+
+        assert len(deduplicator) == 50
+        assert len(deduplicator.title_index) == 50
+        assert len(deduplicator.seen_articles) == 50
+
+        deduplicator.clear_old_entries(0)
+        assert len(deduplicator) == 0
+        assert len(deduplicator.title_index) == 0
+
 
 class TestRussianNewsAggregator:
     """Тесты для агрегатора новостей"""
@@ -0,0 +1,227 @@
+"""
+Unit tests for the API response cache
+Тесты для кэша ответов API
+"""
+
+import pytest
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+from russian_trading_bot.services.response_cache import ResponseCache, CacheState, estimate_size
+from russian_trading_bot.services.moex_client import MOEXClient, QUOTE_STALE_TTL
+
+
+class FakeClock:
+    """Управляемые часы для проверки TTL"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    fake = FakeClock()
+    # Подменяем только ссылку модуля кэша на time, чтобы не остановить часы event loop
+    with patch('russian_trading_bot.services.response_cache.time') as fake_time:
+        fake_time.monotonic.side_effect = fake
+        yield fake
+
+
+class TestResponseCache:
+    """Тесты для LRU/TTL кэша"""
+    
+    def test_ttl_and_stale_window(self, clock):
+        """Тест: свежая запись, устаревшая запись и истечение"""
+        cache = ResponseCache(default_ttl=5, stale_ttl=10)
+        cache.set("quotes", {"SBER": 250.5})
+        
+        assert cache.get("quotes") == ({"SBER": 250.5}, CacheState.FRESH)
+        
+        clock.now += 6
+        assert cache.get("quotes") == ({"SBER": 250.5}, CacheState.STALE)
+        
+        clock.now += 10
+        assert cache.get("quotes") == (None, CacheState.MISS)
+        assert "quotes" not in cache
+        
+        stats = cache.stats()
+        assert (stats['hits'], stats['stale_hits'], stats['misses'], stats['expirations']) == (1, 1, 1, 1)
+        assert stats['bytes'] == 0
+    
+    def test_stale_window_is_opt_in(self, clock):
+        """Тест: по умолчанию устаревшие записи не отдаются, окно включается для записи"""
+        cache = ResponseCache(default_ttl=5)
+        cache.set("quotes", {"SBER": 250.5})
+        cache.set("securities", ["SBER"], ttl=300, stale_ttl=300)
+        
+        clock.now += 6
+        assert cache.get("quotes") == (None, CacheState.MISS)
+        
+        clock.now += 300
+        assert cache.get("securities") == (["SBER"], CacheState.STALE)
+    
+    def test_peek_does_not_count(self, clock):
+        """Тест: peek не меняет счетчики и порядок LRU"""
+        cache = ResponseCache(max_entries=2, default_ttl=5)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        
+        assert cache.peek("a") is CacheState.FRESH
+        assert cache.peek("missing") is CacheState.MISS
+        clock.now += 6
+        assert cache.peek("a") is CacheState.MISS
+        assert "a" in cache
+        
+        stats = cache.stats()
+        assert (stats['hits'], stats['stale_hits'], stats['misses'], stats['expirations']) == (0, 0, 0, 0)
+        
+        cache.set("c", 3)
+        assert "a" not in cache and "b" in cache
+    
+    def test_lru_eviction_by_count(self, clock):
+        """Тест: вытеснение наименее давно использованной записи"""
+        cache = ResponseCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        
+        assert "a" in cache and "c" in cache
+        assert "b" not in cache
+        assert cache.evictions == 1
+    
+    def test_byte_accounting(self, clock):
+        """Тест: учет размера и вытеснение по байтам"""
+        cache = ResponseCache(max_bytes=100)
+        cache.set("a", "x", size=40)
+        cache.set("b", "y", size=40)
+        assert cache.size_bytes == 80
+        
+        # Перезапись не удваивает размер
+        cache.set("b", "z", size=30)
+        assert cache.size_bytes == 70
+        
+        cache.set("c", "w", size=50)
+        assert "a" not in cache
+        assert cache.size_bytes == 80
+        
+        # Слишком большой ответ не кэшируется
+        cache.set("huge", "v", size=101)
+        assert "huge" not in cache
+        
+        # Размер по умолчанию оценивается по структуре (примерно как длина JSON)
+        cache.set("json", {"k": "v"})
+        assert cache.size_bytes == 80 + len('{"k": "v"}')
+    
+    def test_estimate_size_samples_long_lists(self):
+        """Тест: размер длинных списков оценивается по выборке без сериализации"""
+        rows = [["SBER", 250.5, 1000]] * 1000
+        estimate = estimate_size({"securities": {"columns": ["SECID", "LAST", "VOLTODAY"], "data": rows}})
+        
+        assert estimate == pytest.approx(len(json.dumps({"securities": {"data": rows}})), rel=0.5)
+    
+    def test_purge_expired(self, clock):
+        """Тест: очистка записей за пределами окна устаревания"""
+        cache = ResponseCache(default_ttl=1, stale_ttl=1)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=100)
+        
+        clock.now += 5
+        assert cache.purge_expired() == 1
+        assert len(cache) == 1
+
+
+class TestMOEXClientResponseCache:
+    """Тесты кэширования ответов в MOEXClient"""
+    
+    @pytest.mark.asyncio
+    async def test_stale_while_revalidate(self, clock):
+        """Тест: устаревший ответ отдается сразу, обновление выполняется одно в фоне"""
+        client = MOEXClient(response_cache=ResponseCache(default_ttl=5, stale_ttl=30))
+        responses = iter([{"v": 1}, {"v": 2}])
+        release = asyncio.Event()
+        
+        async def fetch(endpoint, params):
+            if client._fetch.await_count > 1:
+                await release.wait()
+            return next(responses)
+        
+        client._fetch = AsyncMock(side_effect=fetch)
+        
+        assert await client._make_request("/iss/test.json") == {"v": 1}
+        assert await client._make_request("/iss/test.json") == {"v": 1}
+        assert client._fetch.await_count == 1
+        
+        clock.now += 6
+        results = await asyncio.gather(*(client._make_request("/iss/test.json") for _ in range(3)))
+        assert results == [{"v": 1}] * 3
+        
+        await asyncio.sleep(0)
+        assert client._fetch.await_count == 2  # Одно фоновое обновление на ключ
+        
+        release.set()
+        await asyncio.sleep(0.01)
+        assert await client._make_request("/iss/test.json") == {"v": 2}
+        
+        stats = client.get_cache_stats()
+        assert stats['stale_hits'] == 3
+        assert stats['entries'] == 1
+    
+    @pytest.mark.asyncio
+    async def test_board_snapshot_served_stale_while_refreshing(self, clock):
+        """Тест: снимок режима торгов отдается устаревшим в пределах QUOTE_STALE_TTL, пока обновляется"""
+        client = MOEXClient()
+        release = asyncio.Event()
+        
+        async def fetch(endpoint, params):
+            if client._fetch.await_count > 1:
+                await release.wait()
+            price = 250.0 + client._fetch.await_count
+            return {'securities': {'columns': ['SECID', 'LAST', 'VOLTODAY'], 'data': [['SBER', price, 1000]]}}
+        
+        client._fetch = AsyncMock(side_effect=fetch)
+        
+        assert (await client.get_board_snapshot(['SBER'])).price[0] == 251.0
+        
+        # TTL истек, но окно устаревания котировок еще открыто
+        clock.now += client.response_cache.default_ttl + QUOTE_STALE_TTL / 2
+        assert (await client.get_board_snapshot(['SBER'])).price[0] == 251.0
+        await asyncio.sleep(0)
+        assert client._fetch.await_count == 2
+        
+        release.set()
+        await asyncio.sleep(0.01)
+        assert (await client.get_board_snapshot(['SBER'])).price[0] == 252.0
+        assert client.get_cache_stats()['stale_hits'] == 1
+        
+        # За пределами окна устаревания котировка запрашивается заново
+        clock.now += client.response_cache.default_ttl + QUOTE_STALE_TTL + 1
+        assert (await client.get_board_snapshot(['SBER'])).price[0] == 253.0
+        assert client.get_cache_stats()['stale_hits'] == 1
+    
+    def test_cache_validity_check_not_counted(self, clock):
+        """Тест: проверка валидности кэша не искажает статистику попаданий"""
+        client = MOEXClient()
+        client._set_cache("key", {"v": 1})
+        
+        assert client._is_cache_valid("key")
+        assert not client._is_cache_valid("other")
+        
+        stats = client.get_cache_stats()
+        assert (stats['hits'], stats['misses']) == (0, 0)
+    
+    @pytest.mark.asyncio
+    async def test_no_cache_bypasses_store(self, clock):
+        """Тест: use_cache=False не читает и не пишет кэш"""
+        client = MOEXClient()
+        client._fetch = AsyncMock(return_value={"v": 1})
+        
+        await client._make_request("/iss/orderbook.json", {"depth": 10}, use_cache=False)
+        await client._make_request("/iss/orderbook.json", {"depth": 10}, use_cache=False)
+        
+        assert client._fetch.await_count == 2
+        assert len(client.response_cache) == 0
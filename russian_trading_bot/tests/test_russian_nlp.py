@@ -7,7 +7,9 @@ from unittest.mock import Mock, patch
 from russian_trading_bot.services.russian_nlp import (
     RussianNLPPipeline, 
     RussianFinancialTerms, 
-    ProcessedText
+    ProcessedText,
+    NLPModelRegistry,
+    get_model_registry
 )
 
 
@@ -60,9 +62,11 @@ class TestRussianNLPPipeline:
              patch('russian_trading_bot.services.russian_nlp.NewsSyntaxParser'), \
              patch('russian_trading_bot.services.russian_nlp.pymorphy2.MorphAnalyzer'), \
              patch('russian_trading_bot.services.russian_nlp.MoneyExtractor'), \
-             patch('russian_trading_bot.services.russian_nlp.NamesExtractor'):
+             patch('russian_trading_bot.services.russian_nlp.NamesExtractor'), \
+             patch('russian_trading_bot.services.russian_nlp._load_spacy_model'):
             
-            pipeline = RussianNLPPipeline()
+            # Модели загружаются лениво, поэтому мокированные загружаем сразу в отдельный реестр
+            pipeline = RussianNLPPipeline(NLPModelRegistry().preload())
             return pipeline
     
     def test_clean_text_basic(self, nlp_pipeline):
@@ -127,6 +131,26 @@ class TestRussianNLPPipeline:
         assert len(pos_tags) == 1
         assert pos_tags[0] == "NOUN"
     
+    @patch('russian_trading_bot.services.russian_nlp.Doc')
+    def test_tokenize_and_lemmatize_uses_morph_cache(self, mock_doc, nlp_pipeline):
+        """Тест: повторяющиеся словоформы разбираются pymorphy2 один раз."""
+        mock_parsed = Mock()
+        mock_parsed.normal_form = "акция"
+        mock_parsed.tag.POS = "NOUN"
+        nlp_pipeline.pymorphy.parse.return_value = [mock_parsed]
+        
+        mock_tokens = [Mock(text=text) for text in ("Акции", "акции", "акции")]
+        mock_doc.return_value = Mock(tokens=mock_tokens)
+        
+        tokens, lemmas, pos_tags = nlp_pipeline.tokenize_and_lemmatize("Акции акции акции")
+        financial_terms = nlp_pipeline.extract_financial_terms(["акции"])
+        
+        assert lemmas == ["акция"] * 3
+        assert pos_tags == ["NOUN"] * 3
+        assert "акция" in financial_terms
+        nlp_pipeline.pymorphy.parse.assert_called_once()
+        assert nlp_pipeline.morph_cache.stats()['hits'] == 3
+    
     def test_tokenize_and_lemmatize_empty_input(self, nlp_pipeline):
         """Тест токенизации пустого ввода."""
         tokens, lemmas, pos_tags = nlp_pipeline.tokenize_and_lemmatize("")
@@ -218,6 +242,73 @@ class TestRussianNLPPipeline:
         assert result.money_amounts == []
 
 
+class TestNLPModelRegistry:
+    """Тесты для общего реестра NLP моделей."""
+    
+    def test_lazy_loading(self):
+        """Тест: pipeline создается без загрузки моделей, модель загружается при первом обращении."""
+        registry = NLPModelRegistry()
+        
+        with patch('russian_trading_bot.services.russian_nlp.pymorphy2.MorphAnalyzer') as analyzer:
+            pipeline = RussianNLPPipeline(registry)
+            assert not any(registry.is_loaded(name) for name in registry.model_names)
+            
+            assert pipeline.pymorphy is analyzer.return_value
+            assert pipeline.pymorphy is analyzer.return_value
+        
+        analyzer.assert_called_once()
+        assert registry.is_loaded('pymorphy')
+        assert not registry.is_loaded('emb')
+    
+    def test_models_shared_between_pipelines(self):
+        """Тест: зависимые модели используют одну загруженную копию эмбеддингов."""
+        registry = NLPModelRegistry()
+        
+        with patch('russian_trading_bot.services.russian_nlp.NewsEmbedding') as embedding, \
+             patch('russian_trading_bot.services.russian_nlp.NewsMorphTagger') as morph_tagger, \
+             patch('russian_trading_bot.services.russian_nlp.NewsNERTagger'):
+            first = RussianNLPPipeline(registry)
+            second = RussianNLPPipeline(registry)
+            
+            assert first.morph_tagger is second.morph_tagger
+            assert first.ner_tagger is second.ner_tagger
+        
+        embedding.assert_called_once()
+        morph_tagger.assert_called_once_with(embedding.return_value)
+    
+    def test_failed_load_is_retried(self):
+        """Тест: ошибка загрузки не кэшируется."""
+        registry = NLPModelRegistry()
+        
+        with patch('russian_trading_bot.services.russian_nlp.Segmenter', side_effect=[RuntimeError, Mock()]):
+            with pytest.raises(RuntimeError):
+                registry.get('segmenter')
+            assert not registry.is_loaded('segmenter')
+            assert registry.get('segmenter') is not None
+        
+        with pytest.raises(KeyError):
+            registry.get('unknown')
+    
+    def test_preload_selected_models(self):
+        """Тест: preload загружает только указанные модели."""
+        registry = NLPModelRegistry()
+        
+        with patch('russian_trading_bot.services.russian_nlp.Segmenter'), \
+             patch('russian_trading_bot.services.russian_nlp.MorphVocab'):
+            assert registry.preload(['segmenter', 'morph_vocab']) is registry
+        
+        assert registry.is_loaded('segmenter') and registry.is_loaded('morph_vocab')
+        assert not registry.is_loaded('pymorphy')
+        
+        registry.clear()
+        assert not registry.is_loaded('segmenter')
+    
+    def test_default_registry_is_shared(self):
+        """Тест: по умолчанию все pipeline используют общий реестр процесса."""
+        assert RussianNLPPipeline().models is get_model_registry()
+        assert RussianNLPPipeline().models is RussianNLPPipeline().models
+
+
 class TestRussianNLPIntegration:
     """Интеграционные тесты с реальными данными."""
     
@@ -14,6 +14,7 @@ from russian_trading_bot.services.sentiment_analyzer import (
     SentimentFeatures
 )
 from russian_trading_bot.models.news_data import RussianNewsArticle, NewsSentiment
+from russian_trading_bot.services.russian_nlp import ProcessedText
 
 
 class TestRussianFinancialSentimentLexicon:
@@ -66,6 +67,34 @@ class TestRussianFinancialSentimentLexicon:
         assert self.lexicon.get_term_sentiment('РОСТ') == 1.0
         assert self.lexicon.get_term_sentiment('Падение') == -1.0
         assert self.lexicon.is_negation('НЕ') is True
+    
+    def test_word_forms_matched_by_lemma(self):
+        """Тест сопоставления словоформ с терминами через кэш морфологии."""
+        lemmas = {'выросли': 'вырасти', 'выросла': 'вырасти', 'упал': 'упасть', 'упала': 'упасть'}
+        morph_cache = Mock()
+        morph_cache.lemma.side_effect = lambda word: lemmas.get(word, word)
+        lexicon = RussianFinancialSentimentLexicon(morph_cache, match_lemmas=True)
+        
+        assert lexicon.get_term_sentiment('Выросла') == 1.0
+        assert lexicon.get_term_sentiment('упала') == -1.0
+        assert lexicon.get_term_sentiment('неизвестныйтермин') == 0.0
+        assert self.lexicon.get_term_sentiment('выросла') == 0.0
+        # Без явного включения кэш не меняет оценки
+        assert RussianFinancialSentimentLexicon(morph_cache).get_term_sentiment('выросла') == 0.0
+    
+    def test_ambiguous_lemmas_not_scored(self):
+        """Тест: лемма, общая для терминов разной окраски, не оценивается."""
+        lemmas = {'подъем': 'сдвиг', 'спад': 'сдвиг', 'подъемы': 'сдвиг', 'курсы': 'курс', 'рост': 'курс'}
+        morph_cache = Mock()
+        morph_cache.lemma.side_effect = lambda word: lemmas.get(word, word)
+        lexicon = RussianFinancialSentimentLexicon(morph_cache, match_lemmas=True)
+        
+        # Точные формы терминов оцениваются как раньше
+        assert lexicon.get_term_sentiment('подъем') == 1.0
+        assert lexicon.get_term_sentiment('спад') == -1.0
+        # Лемма позитивного и негативного термина, лемма позитивного и нейтрального
+        assert lexicon.get_term_sentiment('подъемы') == 0.0
+        assert lexicon.get_term_sentiment('курсы') == 0.0
 
 
 class TestRussianSentimentAnalyzer:
@@ -180,6 +209,45 @@ class TestRussianSentimentAnalyzer:
         sentiment_types = [s.overall_sentiment for s in sentiments]
         assert len(set(sentiment_types)) > 1  # Должны быть разные типы настроений
     
+    def test_batch_matches_single_article_analysis(self):
+        """Тест: пакетный анализ совпадает с поштучным, порядок статей сохраняется."""
+        articles = [
+            self.create_test_article(f"Новость {i}", content)
+            for i, content in enumerate([
+                "Рост прибыли и успех компании",
+                "Падение акций и убытки",
+                "Компания опубликовала отчет",
+                "Очень сильный рост дивидендов"
+            ] * 3)
+        ]
+        
+        with patch.object(self.analyzer.model, 'predict_proba',
+                          wraps=self.analyzer.model.predict_proba) as predict_proba:
+            batch = self.analyzer.batch_analyze_sentiment(articles)
+        
+        assert predict_proba.call_count == 1
+        for article, sentiment in zip(articles, batch):
+            single = self.analyzer.analyze_sentiment(article)
+            assert sentiment.article_id == single.article_id
+            assert sentiment.overall_sentiment == single.overall_sentiment
+            assert sentiment.sentiment_score == pytest.approx(single.sentiment_score)
+            assert sentiment.confidence == pytest.approx(single.confidence)
+    
+    def test_batch_with_process_pool(self):
+        """Тест: обработка текстов в пуле процессов дает те же результаты."""
+        articles = [
+            self.create_test_article("Позитивные новости", "Рост прибыли, успех компании"),
+            self.create_test_article("Негативные новости", "Падение акций, кризис"),
+            self.create_test_article("Нейтральные новости", "Отчет за квартал")
+        ]
+        
+        sequential = self.analyzer.batch_analyze_sentiment(articles)
+        parallel = self.analyzer.batch_analyze_sentiment(articles, max_workers=2)
+        
+        assert [s.article_id for s in parallel] == [s.article_id for s in sequential]
+        assert [s.sentiment_score for s in parallel] == pytest.approx([s.sentiment_score for s in sequential])
+        assert self.analyzer.batch_analyze_sentiment([]) == []
+    
     def test_sentiment_with_intensifiers(self):
         """Тест анализа с усилителями."""
         article_normal = self.create_test_article(
@@ -216,6 +284,31 @@ class TestRussianSentimentAnalyzer:
         # Отрицание должно изменить настроение
         assert sentiment_negated.sentiment_score < sentiment_positive.sentiment_score
     
+    def test_inflected_terms_change_lexicon_score(self):
+        """Тест: термины в других словоформах учитываются только при match_lemmas."""
+        lemmas = {'выросли': 'вырасти', 'упал': 'упасть'}
+        morph_cache = Mock()
+        morph_cache.lemma.side_effect = lambda word: lemmas.get(word, word)
+        tokens = ['акции', 'выросли', 'курс', 'упал', 'прибыль']
+        processed = ProcessedText(
+            original_text=' '.join(tokens), cleaned_text=' '.join(tokens), tokens=tokens,
+            lemmas=['акция', 'вырасти', 'курс', 'упасть', 'прибыль'], pos_tags=[], entities=[],
+            financial_terms=[], money_amounts=[]
+        )
+        
+        self.analyzer.lexicon = RussianFinancialSentimentLexicon()
+        exact_score, exact_confidence = self.analyzer._calculate_lexicon_sentiment(processed)
+        self.analyzer.lexicon = RussianFinancialSentimentLexicon(morph_cache)
+        cached_score, cached_confidence = self.analyzer._calculate_lexicon_sentiment(processed)
+        self.analyzer.lexicon = RussianFinancialSentimentLexicon(morph_cache, match_lemmas=True)
+        lemma_score, lemma_confidence = self.analyzer._calculate_lexicon_sentiment(processed)
+        
+        # Без лемм учитывается только 'прибыль'; с леммами - еще 'выросли' (+1) и 'упал' (-1)
+        assert (exact_score, exact_confidence) == (1.0, 0.1)
+        assert (cached_score, cached_confidence) == (exact_score, exact_confidence)
+        assert lemma_score == pytest.approx(1 / 3)
+        assert lemma_confidence == pytest.approx(0.3)
+    
     def test_financial_terms_detection(self):
         """Тест обнаружения финансовых терминов."""
         article = self.create_test_article(
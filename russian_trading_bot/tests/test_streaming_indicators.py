@@ -0,0 +1,166 @@
+"""
+Тесты для потоковых технических индикаторов.
+"""
+
+import json
+import pytest
+import numpy as np
+from datetime import datetime
+from decimal import Decimal
+from russian_trading_bot.models.market_data import MarketData
+from russian_trading_bot.services.technical_analyzer import TechnicalAnalyzer, TechnicalIndicators
+from russian_trading_bot.services.streaming_indicators import (
+    Bar, StreamingIndicator, StreamingRSI, StreamingMACD, StreamingATR, StreamingBollinger,
+    StreamingStochastic, StreamingIndicatorSet, StreamingIndicatorRegistry
+)
+
+
+class TestStreamingIndicators:
+    """Тесты для потоковых индикаторов"""
+    
+    def setup_method(self):
+        """Настройка для каждого теста"""
+        self.analyzer = TechnicalAnalyzer()
+        
+        rng = np.random.default_rng(42)
+        self.closes = list(100.0 + np.cumsum(rng.normal(0, 1.5, 80)))
+        self.highs = [price + abs(rng.normal(0, 1)) for price in self.closes]
+        self.lows = [price - abs(rng.normal(0, 1)) for price in self.closes]
+    
+    def test_rsi_matches_analyzer(self):
+        """Тест совпадения потокового RSI с TechnicalAnalyzer"""
+        rsi = StreamingRSI(14)
+        
+        for i, price in enumerate(self.closes):
+            value = rsi.update(price)
+            expected = self.analyzer.calculate_rsi(self.closes[:i + 1])
+            
+            if expected is None:
+                assert value is None
+            else:
+                assert value == pytest.approx(expected, abs=0.01)
+    
+    def test_macd_matches_analyzer(self):
+        """Тест совпадения потокового MACD с TechnicalAnalyzer"""
+        macd = StreamingMACD(12, 26, 9)
+        
+        for i, price in enumerate(self.closes):
+            value = macd.update(price)
+            expected = self.analyzer.calculate_macd(self.closes[:i + 1])
+            
+            if expected[0] is None:
+                assert value == (None, None, None)
+            else:
+                assert value == pytest.approx(expected, abs=0.0001)
+    
+    def test_atr_and_stochastic_match_analyzer(self):
+        """Тест совпадения потоковых ATR и стохастика с TechnicalAnalyzer"""
+        atr = StreamingATR(14)
+        stochastic = StreamingStochastic(14, 3)
+        
+        for i, bar in enumerate(zip(self.highs, self.lows, self.closes)):
+            atr_value = atr.update(bar)
+            k_value, d_value = stochastic.update(bar)
+            
+            highs, lows, closes = self.highs[:i + 1], self.lows[:i + 1], self.closes[:i + 1]
+            expected_atr = self.analyzer.calculate_atr(highs, lows, closes)
+            expected_k, expected_d = self.analyzer.calculate_stochastic(highs, lows, closes)
+            
+            assert (atr_value is None) == (expected_atr is None)
+            if expected_atr is not None:
+                assert atr_value == pytest.approx(expected_atr, abs=0.0001)
+            
+            assert (k_value is None) == (expected_k is None)
+            assert (d_value is None) == (expected_d is None)
+            if expected_d is not None:
+                assert k_value == pytest.approx(expected_k, abs=0.01)
+                assert d_value == pytest.approx(expected_d, abs=0.01)
+    
+    def test_bollinger_matches_analyzer(self):
+        """Тест совпадения потоковых полос Боллинджера с TechnicalAnalyzer"""
+        bollinger = StreamingBollinger(20, 2.0, self.analyzer.volatility_adjustment)
+        
+        for i, price in enumerate(self.closes):
+            value = bollinger.update(price)
+            expected = self.analyzer.calculate_bollinger_bands(self.closes[:i + 1])
+            
+            if not expected:
+                assert value is None
+            else:
+                for key in ('bollinger_upper', 'bollinger_middle', 'bollinger_lower', 'bollinger_width'):
+                    assert value[key] == pytest.approx(expected[key], abs=0.01)
+    
+    def test_indicator_set_matches_all_indicators(self):
+        """Тест совпадения полного набора с calculate_all_indicators"""
+        indicator_set = StreamingIndicatorSet("SBER", self.analyzer)
+        indicators = indicator_set.warm_up(self.highs, self.lows, self.closes)
+        
+        expected = self.analyzer.calculate_all_indicators("SBER", {
+            'close': self.closes, 'high': self.highs, 'low': self.lows
+        })
+        
+        assert isinstance(indicators, TechnicalIndicators)
+        assert indicators.symbol == "SBER"
+        assert indicators.rsi == pytest.approx(expected.rsi, abs=0.01)
+        assert indicators.macd == pytest.approx(expected.macd, abs=0.0001)
+        assert indicators.sma_50 == pytest.approx(expected.sma_50, abs=0.01)
+        assert indicators.ema_26 == pytest.approx(expected.ema_26, abs=0.01)
+        assert indicators.atr == pytest.approx(expected.atr, abs=0.0001)
+        assert indicators.stochastic_d == pytest.approx(expected.stochastic_d, abs=0.01)
+    
+    def test_snapshot_and_restore(self):
+        """Тест сохранения и восстановления состояния"""
+        registry = StreamingIndicatorRegistry(self.analyzer)
+        bars = list(zip(self.highs, self.lows, self.closes))
+        
+        for bar in bars[:50]:
+            registry.update("SBER", bar)
+        
+        # Состояние должно переживать сериализацию в JSON
+        state = json.loads(json.dumps(registry.snapshot()))
+        
+        restored = StreamingIndicatorRegistry(self.analyzer)
+        restored.restore(state)
+        
+        for bar in bars[50:]:
+            original_values = registry.update("SBER", bar)
+            restored_values = restored.update("SBER", bar)
+        
+        assert restored_values.rsi == pytest.approx(original_values.rsi)
+        assert restored_values.macd == pytest.approx(original_values.macd)
+        assert restored_values.bollinger_upper == pytest.approx(original_values.bollinger_upper)
+        assert restored_values.stochastic_k == pytest.approx(original_values.stochastic_k)
+        assert restored_values.stochastic_d == pytest.approx(original_values.stochastic_d)
+    
+    def test_registry_unknown_symbol(self):
+        """Тест реестра для неотслеживаемой акции"""
+        registry = StreamingIndicatorRegistry(self.analyzer)
+        
+        assert registry.current("GAZP") is None
+        
+        indicators = registry.update("GAZP", Bar.from_close(150.0))
+        assert indicators.symbol == "GAZP"
+        assert indicators.rsi is None
+    
+    def test_base_indicator_is_abstract(self):
+        """Тест: базовый индикатор нельзя создать без update и value"""
+        with pytest.raises(TypeError):
+            StreamingIndicator()
+    
+    def test_interval_bar_from_cumulative_snapshots(self):
+        """Тест: бар интервала не наследует дневные экстремумы прошлых интервалов"""
+        def snapshot(hour, price, high, low):
+            return MarketData(symbol="SBER", timestamp=datetime(2024, 3, 1, hour), price=Decimal(price),
+                              volume=1000, high_price=Decimal(high), low_price=Decimal(low))
+        
+        first = snapshot(10, "250", "255", "245")
+        quiet = snapshot(11, "251", "255", "245")
+        new_high = snapshot(12, "252", "258", "245")
+        
+        assert Bar.from_interval(first) == Bar(255.0, 245.0, 250.0)
+        assert Bar.from_interval(quiet, first) == Bar(251.0, 250.0, 251.0)
+        assert Bar.from_interval(new_high, quiet) == Bar(258.0, 251.0, 252.0)
+        
+        next_day = MarketData(symbol="SBER", timestamp=datetime(2024, 3, 2, 10), price=Decimal("240"),
+                              volume=1000, high_price=Decimal("242"), low_price=Decimal("239"))
+        assert Bar.from_interval(next_day, new_high) == Bar(242.0, 239.0, 240.0)
@@ -0,0 +1,153 @@
+"""
+Unit tests for the scenario stress-testing engine
+"""
+
+import pytest
+import numpy as np
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from russian_trading_bot.services.risk_manager import (
+    RussianMarketRiskManager, RiskParameters, GeopoliticalEvent, Portfolio, Position
+)
+from russian_trading_bot.services.stress_engine import (
+    SCENARIO_2022_GAP, StressScenario, StressTestEngine, default_scenarios
+)
+
+
+def _portfolio(sector=None):
+    """Test portfolio; sector overrides every position sector (e.g. the bot's GENERAL placeholder)"""
+    now = datetime.now()
+    holdings = {'LKOH': ('OIL_GAS', '400000'), 'SBER': ('BANKING', '300000'), 'MGNT': ('RETAIL', '200000')}
+    if sector is not None:
+        holdings = {symbol: (sector, value) for symbol, (_, value) in holdings.items()}
+    positions = {
+        symbol: Position(symbol=symbol, quantity=1, entry_price=Decimal(value), current_price=Decimal(value),
+                         market_value=Decimal(value), unrealized_pnl=Decimal('0'), entry_date=now, sector=sector)
+        for symbol, (sector, value) in holdings.items()
+    }
+    return Portfolio(positions=positions, cash_balance=Decimal('100000'))
+
+
+class TestStressTestEngine:
+    """Test scenario repricing and distributions"""
+
+    def test_nominal_pnl_from_factor_shocks(self):
+        """Test nominal P&L combines market, sector, ruble, oil and sanctions shocks"""
+        engine = StressTestEngine(draws=0)
+        scenario = StressScenario(
+            'combined', market_shock=-0.1, sector_shocks={'FINANCIAL': -0.05},
+            usd_rub_move=0.2, oil_move=-0.3,
+            sanctioned_symbols=frozenset({'SBER'}), sanctions_shock=-0.2
+        )
+
+        result, = engine.run(_portfolio(), [scenario])
+
+        lkoh = 400000 * (-0.1 + 0.4 * 0.2 + 0.8 * -0.3)
+        sber = 300000 * (-0.1 - 0.05 - 0.3 * 0.2 + 0.2 * -0.3 - 0.2)
+        mgnt = 200000 * (-0.1 - 0.4 * 0.2 + 0.1 * -0.3)
+        assert result.position_pnl['LKOH'] == pytest.approx(lkoh)
+        assert result.position_pnl['SBER'] == pytest.approx(sber)
+        assert result.position_pnl['MGNT'] == pytest.approx(mgnt)
+        assert result.pnl == pytest.approx(lkoh + sber + mgnt)
+        assert result.pnl_percent == pytest.approx((lkoh + sber + mgnt) / 1000000 * 100)
+
+    def test_symbol_shocks_override_and_floor(self):
+        """Test replayed symbol returns replace factor shocks and losses stop at -100%"""
+        engine = StressTestEngine(draws=0)
+        scenario = StressScenario('replay', market_shock=-0.2, symbol_shocks={'SBER': -0.5},
+                                  sanctioned_symbols=frozenset({'MGNT'}), sanctions_shock=-1.5)
+
+        returns = engine.scenario_returns([scenario], ['SBER', 'MGNT', 'LKOH'], ['BANKING', 'RETAIL', 'OIL_GAS'])
+
+        assert returns.shape == (1, 3)
+        assert returns[0, 0] == pytest.approx(-0.5)
+        assert returns[0, 1] == -1.0
+        assert returns[0, 2] == pytest.approx(-0.2)
+
+    def test_distribution_centered_and_reproducible(self):
+        """Test sampled P&L is centered on the nominal shock and independent of workers"""
+        scenarios = default_scenarios({'SBER'})
+        sequential = StressTestEngine(draws=4000, seed=5).run(_portfolio(), scenarios)
+        parallel = StressTestEngine(draws=4000, seed=5, max_workers=2).run(_portfolio(), scenarios)
+
+        for single, pooled in zip(sequential, parallel):
+            assert single.percentiles == pooled.percentiles
+            assert single.expected_pnl == pytest.approx(single.pnl, abs=4 * single.pnl_std / np.sqrt(4000) + 1e-6)
+            assert single.percentiles[5] <= single.percentiles[50] <= single.percentiles[95]
+            assert single.worst_pnl <= single.percentiles[1]
+
+    def test_default_battery(self):
+        """Test the standard battery covers all scenario families"""
+        names = [scenario.name for scenario in default_scenarios(['GAZP'])]
+
+        assert 'market_-20' in names
+        assert 'sector_energy_-15' in names
+        assert 'usd_rub_+30%' in names
+        assert 'oil_-40%' in names
+        assert 'sanctions' in names
+        assert names[-1] == SCENARIO_2022_GAP.name
+        assert 'sanctions' not in [scenario.name for scenario in default_scenarios()]
+
+    def test_2022_replay_is_worst_case(self):
+        """Test the 2022 gap dominates single-factor scenarios for a long book"""
+        results = StressTestEngine(draws=0).run(_portfolio(), default_scenarios())
+
+        worst = StressTestEngine.worst_scenario(results)
+        assert worst.scenario == '2022_gap_replay'
+        assert worst.pnl < 0
+
+
+class TestRiskManagerStressTests:
+    """Test stress tests from the risk manager"""
+
+    def test_sanctions_events_drive_scenarios(self):
+        """Test stocks of active sanctions events are shocked in the sanctions scenario"""
+        risk_manager = RussianMarketRiskManager(
+            risk_params=RiskParameters(oil_price_correlation_factor=0.5),
+            stress_engine=StressTestEngine(draws=200, seed=1)
+        )
+        event = GeopoliticalEvent(
+            event_id='s1', event_type='SANCTIONS', severity='HIGH', description='New package',
+            affected_sectors=['BANKING'], affected_stocks=['SBER'],
+            start_date=datetime.now() - timedelta(days=1)
+        )
+
+        results = {result.scenario: result for result in
+                   risk_manager.run_stress_tests(_portfolio(), active_events=[event])}
+
+        assert results['sanctions'].position_pnl['SBER'] == pytest.approx(300000 * -0.3)
+        assert results['sanctions'].position_pnl['LKOH'] == 0.0
+
+    def test_oil_beta_from_risk_parameters(self):
+        """Test the default engine takes the energy oil beta from risk parameters"""
+        risk_manager = RussianMarketRiskManager(RiskParameters(oil_price_correlation_factor=0.5))
+
+        result, = risk_manager.run_stress_tests(_portfolio(), [StressScenario('oil', oil_move=-0.2)])
+
+        assert result.position_pnl['LKOH'] == pytest.approx(400000 * 0.5 * -0.2)
+
+    def test_placeholder_sectors_resolved_by_symbol(self):
+        """Test GENERAL positions of the bot are stressed with their real sectors"""
+        risk_manager = RussianMarketRiskManager(RiskParameters(oil_price_correlation_factor=0.8))
+        scenarios = [
+            StressScenario('rub', usd_rub_move=0.3),
+            StressScenario('oil', oil_move=-0.4),
+            StressScenario('banks', sector_shocks={'FINANCIAL': -0.15}),
+        ]
+
+        general = risk_manager.run_stress_tests(_portfolio('GENERAL'), scenarios)
+        sectored = risk_manager.run_stress_tests(_portfolio(), scenarios)
+
+        for placeholder, real in zip(general, sectored):
+            assert placeholder.position_pnl == pytest.approx(real.position_pnl)
+        assert general[1].position_pnl['LKOH'] == pytest.approx(400000 * 0.8 * -0.4)
+        assert general[2].position_pnl['SBER'] == pytest.approx(300000 * -0.15)
+
+    def test_placeholder_sector_without_mapping(self):
+        """Test unknown symbols with a placeholder sector keep the default betas"""
+        engine = StressTestEngine(draws=0, symbol_sectors={'SBER': 'FINANCIAL'})
+
+        assert engine.position_sector('SBER', 'UNKNOWN') == 'FINANCIAL'
+        assert engine.position_sector('SBER', 'ENERGY') == 'ENERGY'
+        assert engine.position_sector('XXXX', 'GENERAL') == 'GENERAL'
@@ -4,8 +4,11 @@
 
 import pytest
 import numpy as np
+import pandas as pd
 from datetime import datetime
-from russian_trading_bot.services.technical_analyzer import TechnicalAnalyzer, TechnicalIndicators
+from russian_trading_bot.services.technical_analyzer import (
+    TechnicalAnalyzer, TechnicalIndicators, IndicatorMatrix, INDICATOR_COLUMNS
+)
 
 
 class TestTechnicalAnalyzer:
@@ -336,4 +339,157 @@ class TestTechnicalAnalyzer:
         
         assert rsi is not None
         assert macd is not None
-        assert (end_time - start_time) < 1.0  # Должно выполняться менее чем за 1 секунду
\ No newline at end of file
+        assert (end_time - start_time) < 1.0  # Должно выполняться менее чем за 1 секунду
+
+    def test_calculate_indicator_series_matches_scalar(self):
+        """Тест соответствия пакетного расчета скалярному API на каждом баре"""
+        ohlcv = np.column_stack([
+            self.test_prices, self.test_highs, self.test_lows,
+            self.test_prices, np.full(len(self.test_prices), 1000.0)
+        ])
+        series = self.analyzer.calculate_indicator_series(ohlcv)
+        
+        with pytest.raises(ValueError):
+            self.analyzer.calculate_indicator_series(ohlcv[:, :4])
+        
+        assert set(series.keys()) == set(INDICATOR_COLUMNS)
+        assert all(len(values) == len(self.test_prices) for values in series.values())
+        
+        for t in (19, 30, len(self.test_prices) - 1):
+            closes = self.test_prices[:t + 1]
+            highs = self.test_highs[:t + 1]
+            lows = self.test_lows[:t + 1]
+            
+            assert series['rsi'][t] == pytest.approx(self.analyzer.calculate_rsi(closes), abs=0.01)
+            assert series['atr'][t] == pytest.approx(
+                self.analyzer.calculate_atr(highs, lows, closes), abs=0.0001)
+            
+            k_percent, d_percent = self.analyzer.calculate_stochastic(highs, lows, closes)
+            assert series['stochastic_k'][t] == pytest.approx(k_percent, abs=0.01)
+            assert series['stochastic_d'][t] == pytest.approx(d_percent, abs=0.01)
+            
+            bollinger = self.analyzer.calculate_bollinger_bands(closes)
+            assert series['bollinger_upper'][t] == pytest.approx(bollinger['bollinger_upper'], abs=0.01)
+            assert series['bollinger_width'][t] == pytest.approx(bollinger['bollinger_width'], abs=0.01)
+        
+        macd, signal, histogram = self.analyzer.calculate_macd(self.test_prices)
+        assert series['macd'][-1] == pytest.approx(macd, abs=0.0001)
+        assert series['macd_signal'][-1] == pytest.approx(signal, abs=0.0001)
+        assert series['macd_histogram'][-1] == pytest.approx(histogram, abs=0.0001)
+    
+    def test_calculate_indicator_series_warmup_is_nan(self):
+        """Тест заполнения NaN на барах разогрева индикаторов"""
+        market_data = {
+            'close': self.test_prices,
+            'high': self.test_highs,
+            'low': self.test_lows
+        }
+        series = self.analyzer.calculate_indicator_series(market_data)
+        
+        assert np.isnan(series['rsi'][:self.analyzer.rsi_period]).all()
+        assert not np.isnan(series['rsi'][self.analyzer.rsi_period])
+        assert np.isnan(series['sma_50'][:49]).all()
+        assert not np.isnan(series['sma_50'][49])
+        assert np.isnan(series['macd'][:self.analyzer.macd_slow - 1]).all()
+    
+    def test_calculate_indicator_series_dataframe_without_high_low(self):
+        """Тест пакетного расчета по DataFrame только с ценами закрытия"""
+        df = pd.DataFrame({'close': self.test_prices})
+        series = self.analyzer.calculate_indicator_series(df)
+        
+        assert not np.isnan(series['rsi'][-1])
+        assert np.isnan(series['atr']).all()
+        assert np.isnan(series['stochastic_k']).all()
+    
+    def test_calculate_indicator_series_empty_input(self):
+        """Тест пакетного расчета по пустому массиву OHLCV"""
+        series = self.analyzer.calculate_indicator_series(np.empty((0, 5)))
+        
+        assert set(series) == set(INDICATOR_COLUMNS)
+        assert all(len(values) == 0 for values in series.values())
+    
+    def test_indicators_at(self):
+        """Тест сборки TechnicalIndicators из пакетного результата"""
+        series = self.analyzer.calculate_indicator_series({'close': self.test_prices})
+        indicators = self.analyzer.indicators_at("SBER", series)
+        
+        assert isinstance(indicators, TechnicalIndicators)
+        assert indicators.symbol == "SBER"
+        assert indicators.rsi == pytest.approx(series['rsi'][-1])
+        assert indicators.atr is None
+    
+    def test_calculate_indicator_matrix_matches_series(self):
+        """Тест пакетного расчета по матрице нескольких акций"""
+        closes = np.column_stack([self.test_prices, self.test_prices[::-1]])
+        highs = closes + 2.0
+        lows = closes - 2.0
+        
+        matrix = self.analyzer.calculate_indicator_matrix(closes, highs, lows, symbols=["SBER", "GAZP"])
+        
+        assert "SBER" in matrix and "GAZP" in matrix
+        assert matrix.values['rsi'].shape == closes.shape
+        
+        for column, symbol in enumerate(["SBER", "GAZP"]):
+            expected = self.analyzer.calculate_indicator_series({
+                'close': closes[:, column], 'high': highs[:, column], 'low': lows[:, column]
+            })
+            for name, values in expected.items():
+                np.testing.assert_allclose(matrix[symbol][name], values, equal_nan=True)
+    
+    def test_calculate_indicator_matrix_late_listing_and_gaps(self):
+        """Тест матрицы с акцией, начавшей торговаться позже, и пропуском в данных"""
+        dates = pd.bdate_range("2024-01-01", periods=len(self.test_prices))
+        df = pd.DataFrame({'SBER': self.test_prices, 'LKOH': self.test_prices}, index=dates)
+        df.iloc[:10, 1] = np.nan
+        df.iloc[30, 0] = np.nan
+        
+        matrix = self.analyzer.calculate_indicator_matrix(df)
+        
+        assert matrix.symbols == ['SBER', 'LKOH']
+        assert np.isnan(matrix['LKOH']['rsi'][:10 + self.analyzer.rsi_period]).all()
+        assert not np.isnan(matrix['LKOH']['rsi'][-1])
+        assert not np.isnan(matrix['SBER']['sma_20'][30:]).any()
+        
+        latest = matrix.latest('SBER', self.analyzer)
+        assert latest.symbol == 'SBER'
+        assert latest.timestamp == dates[-1].to_pydatetime()
+        assert matrix.to_frame('rsi').shape == df.shape
+    
+    def test_calculate_signal_matrix(self):
+        """Тест векторных сигналов по матрице индикаторов"""
+        closes = np.column_stack([self.test_prices, self.test_prices[::-1]])
+        matrix = self.analyzer.calculate_indicator_matrix(closes, closes + 2.0, closes - 2.0)
+        
+        direction, confidence = self.analyzer.calculate_signal_matrix(matrix, closes)
+        
+        assert direction.shape == closes.shape
+        assert set(np.unique(direction)) <= {-1, 0, 1}
+        assert ((confidence == 0) == (direction == 0)).all()
+        assert (confidence[direction != 0] > 0.5).all()
+        # До прогрева индикаторов сигналов нет
+        assert (direction[:self.analyzer.stochastic_k_period - 1] == 0).all()
+    
+    def test_signal_matrix_requires_agreeing_indicators(self):
+        """Тест: один голос MACD не дает сигнала, согласие индикаторов дает"""
+        shape = (3, 1)
+        values = {name: np.full(shape, np.nan) for name in INDICATOR_COLUMNS}
+        values['rsi'][:] = 50.0
+        values['macd'][:] = 1.0
+        values['macd_signal'][:] = 0.5
+        values['bollinger_lower'][:] = 90.0
+        values['bollinger_upper'][:] = 110.0
+        values['stochastic_k'][:] = 50.0
+        values['rsi'][1] = 20.0          # RSI согласен с MACD
+        values['stochastic_k'][2] = 85.0  # Стохастик против MACD
+        matrix = IndicatorMatrix(symbols=['SBER'], dates=None, values=values)
+        
+        direction, confidence = self.analyzer.calculate_signal_matrix(matrix, np.full(shape, 100.0))
+        
+        # Только MACD: сигнала нет, вход невозможен при любом пороге
+        assert direction[0, 0] == 0
+        assert confidence[0, 0] == 0.0
+        # MACD + RSI на покупку
+        assert direction[1, 0] == 1
+        assert confidence[1, 0] == 1.0
+        # MACD против стохастика
+        assert direction[2, 0] == 0
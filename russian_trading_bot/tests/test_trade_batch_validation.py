@@ -0,0 +1,139 @@
+"""
+Unit tests for batch pre-trade validation in the risk manager
+"""
+
+import pytest
+from datetime import datetime
+from decimal import Decimal
+
+from russian_trading_bot.models.market_data import MarketData
+from russian_trading_bot.services.risk_manager import (
+    RussianMarketRiskManager, RiskParameters, RiskAssessment, RiskLevel,
+    GeopoliticalRiskLevel, Portfolio, Position, TradeOrder
+)
+
+
+@pytest.fixture
+def risk_manager():
+    return RussianMarketRiskManager(RiskParameters(max_position_size_percent=10.0))
+
+
+@pytest.fixture
+def portfolio():
+    position = Position(symbol='SBER', quantity=200, entry_price=Decimal('250'),
+                        current_price=Decimal('250'), market_value=Decimal('50000'),
+                        unrealized_pnl=Decimal('0'), entry_date=datetime.now(), sector='BANKING')
+    return Portfolio(positions={'SBER': position}, cash_balance=Decimal('150000'))
+
+
+@pytest.fixture
+def market_data():
+    now = datetime.now()
+    prices = {'SBER': '250', 'GAZP': '160', 'LKOH': '6500', 'MGNT': '5000'}
+    return {symbol: MarketData(symbol=symbol, timestamp=now, price=Decimal(price), volume=1000)
+            for symbol, price in prices.items()}
+
+
+class TestBatchTradeValidation:
+    """Test validate_trades against single-order validation"""
+
+    def test_matches_single_order_validation(self, risk_manager, portfolio, market_data):
+        """Test each batch result equals validate_trade for the same order"""
+        orders = [
+            TradeOrder('GAZP', 'BUY', 100),
+            TradeOrder('LKOH', 'BUY', 10),
+            TradeOrder('SBER', 'SELL', 50),
+            TradeOrder('YNDX', 'BUY', 5),
+        ]
+
+        results = risk_manager.validate_trades(orders, portfolio, market_data)
+
+        assert results == [risk_manager.validate_trade(order, portfolio, market_data) for order in orders]
+        assert [result.is_valid for result in results] == [True, False, True, False]
+
+    def test_scale_to_position_and_cash_limits(self, risk_manager, portfolio, market_data):
+        """Test buys are scaled jointly into per-symbol size and total cash limits"""
+        orders = [
+            TradeOrder('GAZP', 'BUY', 100),   # 16,000 RUB - fits
+            TradeOrder('GAZP', 'BUY', 100),   # Only 4,000 RUB of the 20,000 RUB GAZP limit left
+            TradeOrder('MGNT', 'BUY', 4),     # 20,000 RUB - fits
+            TradeOrder('LKOH', 'BUY', 4),     # 26,000 RUB - scaled down to the position limit
+            TradeOrder('SBER', 'SELL', 50),   # Sells are not scaled
+        ]
+
+        results = risk_manager.validate_trades(
+            orders, portfolio, market_data, scale_to_limits=True, lot_sizes={'GAZP': 10}
+        )
+
+        assert 'quantity' not in results[0].recommended_adjustments
+        assert results[1].recommended_adjustments['quantity'] == 20
+        assert 'quantity' not in results[2].recommended_adjustments
+        assert results[3].recommended_adjustments['quantity'] == 3
+        assert results[4].recommended_adjustments == {}
+
+    def test_scale_respects_remaining_cash(self, portfolio, market_data):
+        """Test later orders only get the cash left by earlier ones"""
+        risk_manager = RussianMarketRiskManager(RiskParameters(max_position_size_percent=100.0))
+        portfolio.cash_balance = Decimal('15000')
+        orders = [
+            TradeOrder('GAZP', 'BUY', 50),    # 8,000 RUB
+            TradeOrder('LKOH', 'BUY', 2),     # 13,000 RUB, 7,000 RUB left - scaled to 1
+            TradeOrder('SBER', 'BUY', 30),    # 500 RUB left - scaled to 2
+        ]
+
+        results = risk_manager.validate_trades(orders, portfolio, market_data, scale_to_limits=True)
+
+        assert 'quantity' not in results[0].recommended_adjustments
+        assert results[1].recommended_adjustments['quantity'] == 1
+        assert results[2].recommended_adjustments['quantity'] == 2
+
+    def test_critical_risk_drops_buys(self, risk_manager, portfolio, market_data):
+        """Test buys are dropped when the portfolio risk level is critical"""
+        assessment = RiskAssessment(
+            overall_risk_level=RiskLevel.CRITICAL,
+            portfolio_risk_score=0.9,
+            geopolitical_risk_level=GeopoliticalRiskLevel.CRITICAL,
+            volatility_risk_score=0.8,
+            concentration_risk_score=0.9,
+            currency_risk_score=0.7,
+            recommendations=[],
+            risk_factors={},
+            timestamp=datetime.now()
+        )
+
+        results = risk_manager.validate_trades(
+            [TradeOrder('GAZP', 'BUY', 10)], portfolio, market_data, assessment, scale_to_limits=True
+        )
+
+        assert not results[0].is_valid
+        assert results[0].recommended_adjustments['quantity'] == 0
+
+    def test_scale_counts_existing_holdings(self, risk_manager, portfolio, market_data):
+        """Test position room starts from the current holding of the symbol"""
+        portfolio.positions['SBER'].market_value = Decimal('15000')
+        portfolio.cash_balance = Decimal('185000')  # Keeps the 20,000 RUB position limit
+        orders = [
+            TradeOrder('SBER', 'BUY', 40),    # 10,000 RUB, but only 5,000 RUB of the SBER limit left
+            TradeOrder('GAZP', 'BUY', 100),   # No holding - fits
+        ]
+
+        results = risk_manager.validate_trades(orders, portfolio, market_data, scale_to_limits=True)
+
+        assert results[0].recommended_adjustments['quantity'] == 20
+        assert 'quantity' not in results[1].recommended_adjustments
+
+    def test_scaled_results_validate_feasible_quantity(self, risk_manager, portfolio, market_data):
+        """Test scaled orders are re-validated at the feasible quantity"""
+        orders = [
+            TradeOrder('LKOH', 'BUY', 4),     # 26,000 RUB exceeds the 20,000 RUB limit - scaled to 3
+            TradeOrder('SBER', 'BUY', 10),    # SBER holding already exceeds the limit - dropped
+        ]
+
+        results = risk_manager.validate_trades(orders, portfolio, market_data, scale_to_limits=True)
+
+        assert results[0].recommended_adjustments['quantity'] == 3
+        assert results[0].errors == []
+        assert results[0].is_valid
+        assert results[1].recommended_adjustments['quantity'] == 0
+        assert not results[1].is_valid
+        assert results[1].errors
@@ -0,0 +1,178 @@
+"""
+Unit tests for the portfolio VaR/CVaR engine
+"""
+
+import pytest
+import numpy as np
+from datetime import datetime
+from decimal import Decimal
+
+from russian_trading_bot.models.market_data import MarketData
+from russian_trading_bot.services.covariance_tracker import EWMACovarianceTracker
+from russian_trading_bot.services.risk_manager import (
+    RussianMarketRiskManager, RiskParameters, Portfolio, Position
+)
+from russian_trading_bot.services.var_engine import PortfolioVaREngine, robust_cholesky
+
+
+SYMBOLS = ['SBER', 'GAZP', 'LKOH']
+COVARIANCE = np.array([
+    [4.0, 2.0, 1.0],
+    [2.0, 9.0, 3.0],
+    [1.0, 3.0, 6.0],
+]) * 1e-4
+
+
+def _portfolio(values, cash='0'):
+    now = datetime.now()
+    positions = {
+        symbol: Position(symbol=symbol, quantity=1, entry_price=Decimal(str(value)),
+                         current_price=Decimal(str(value)), market_value=Decimal(str(value)),
+                         unrealized_pnl=Decimal('0'), entry_date=now, sector='OIL_GAS')
+        for symbol, value in values.items()
+    }
+    return Portfolio(positions=positions, cash_balance=Decimal(cash))
+
+
+def _histories(length=300, seed=4):
+    rng = np.random.default_rng(seed)
+    returns = rng.multivariate_normal(np.zeros(3), COVARIANCE, size=length)
+    prices = 100 * np.cumprod(1 + returns, axis=0)
+    return {symbol: list(prices[:, i]) for i, symbol in enumerate(SYMBOLS)}
+
+
+class TestPortfolioVaREngine:
+    """Test VaR/CVaR methods and attribution"""
+
+    @pytest.fixture
+    def portfolio(self):
+        return _portfolio({'SBER': 500000, 'GAZP': 300000, 'LKOH': 200000}, cash='100000')
+
+    def test_historical_var(self, portfolio):
+        """Test historical VaR equals the empirical loss quantile"""
+        histories = _histories()
+        engine = PortfolioVaREngine(confidence=0.95)
+
+        result = engine.historical(portfolio, histories)
+
+        exposures = np.array([500000, 300000, 200000])
+        prices = np.array([histories[symbol] for symbol in SYMBOLS]).T
+        pnl = (prices[1:] / prices[:-1] - 1) @ exposures
+        expected_var = -np.sort(pnl)[int(len(pnl) * 0.05) - 1]
+
+        assert result.method == 'historical'
+        assert result.scenarios == 299
+        assert result.var == pytest.approx(expected_var)
+        assert result.cvar >= result.var
+        assert result.portfolio_value == 1100000
+        assert sum(result.component_var.values()) == pytest.approx(result.var)
+        assert sum(result.component_cvar.values()) == pytest.approx(result.cvar)
+
+    def test_historical_var_short_history_for_horizon(self, portfolio):
+        """Test historical VaR refuses a horizon longer than the return history"""
+        engine = PortfolioVaREngine(confidence=0.95, horizon_days=10)
+
+        assert engine.historical(portfolio, _histories(length=8)) is None
+
+        result = engine.historical(portfolio, _histories(length=30))
+        assert result.horizon_days == 10
+        assert result.scenarios == 20
+
+    def test_monte_carlo_matches_parametric(self, portfolio):
+        """Test Monte Carlo VaR converges to the delta-normal value for normal returns"""
+        engine = PortfolioVaREngine(confidence=0.99, simulations=200_000, chunk_size=50_000, seed=1)
+
+        simulated = engine.monte_carlo(portfolio, COVARIANCE, SYMBOLS)
+        analytic = engine.parametric(portfolio, COVARIANCE, SYMBOLS)
+
+        assert simulated.scenarios == 200_000
+        assert simulated.var == pytest.approx(analytic.var, rel=0.03)
+        assert simulated.cvar == pytest.approx(analytic.cvar, rel=0.03)
+        assert sum(simulated.component_var.values()) == pytest.approx(simulated.var)
+        for symbol in SYMBOLS:
+            assert simulated.component_var[symbol] == pytest.approx(analytic.component_var[symbol], rel=0.15)
+
+    def test_parametric_euler_decomposition(self, portfolio):
+        """Test parametric components add up and marginal VaR is per RUB of exposure"""
+        engine = PortfolioVaREngine(confidence=0.95, horizon_days=10)
+        result = engine.parametric(portfolio, COVARIANCE, SYMBOLS)
+
+        exposures = np.array([500000, 300000, 200000])
+        sigma = np.sqrt(exposures @ COVARIANCE @ exposures * 10)
+        assert result.var == pytest.approx(1.6448536 * sigma, rel=1e-6)
+        assert sum(result.component_var.values()) == pytest.approx(result.var)
+        assert result.marginal_var['GAZP'] == pytest.approx(result.component_var['GAZP'] / 300000)
+
+    def test_monte_carlo_reproducible_and_parallel(self, portfolio):
+        """Test seeded runs are reproducible and workers give identical results"""
+        sequential = PortfolioVaREngine(simulations=40_000, chunk_size=10_000, seed=7)
+        parallel = PortfolioVaREngine(simulations=40_000, chunk_size=10_000, seed=7, max_workers=2)
+
+        first = sequential.monte_carlo(portfolio, COVARIANCE, SYMBOLS)
+        second = sequential.monte_carlo(portfolio, COVARIANCE, SYMBOLS)
+        third = parallel.monte_carlo(portfolio, COVARIANCE, SYMBOLS)
+
+        assert first.var == second.var == third.var
+        assert first.component_var == third.component_var
+
+    def test_uncovered_position_raises(self, portfolio):
+        """Test covariance must cover every position"""
+        engine = PortfolioVaREngine(simulations=1000, chunk_size=1000)
+        with pytest.raises(ValueError, match="LKOH"):
+            engine.monte_carlo(portfolio, COVARIANCE[:2, :2], SYMBOLS[:2])
+
+    def test_cholesky_repairs_semidefinite_matrix(self):
+        """Test singular covariance still yields a usable factor"""
+        covariance = np.array([[1.0, 1.0], [1.0, 1.0]]) * 1e-4
+        factor = robust_cholesky(covariance)
+        assert np.allclose(factor @ factor.T, covariance, atol=1e-10)
+
+
+class TestRiskManagerVaR:
+    """Test VaR integration into portfolio risk assessment"""
+
+    def _market_data(self, symbols):
+        now = datetime.now()
+        return {symbol: MarketData(symbol=symbol, timestamp=now, price=Decimal('100'), volume=1000)
+                for symbol in symbols}
+
+    def test_assessment_includes_historical_var(self):
+        """Test assess_portfolio_risk reports VaR and recommends action above the limit"""
+        risk_manager = RussianMarketRiskManager(
+            risk_params=RiskParameters(max_daily_var_percent=0.5),
+            var_engine=PortfolioVaREngine()
+        )
+        portfolio = _portfolio({'SBER': 500000, 'GAZP': 300000, 'LKOH': 200000})
+
+        assessment = risk_manager.assess_portfolio_risk(
+            portfolio, self._market_data(SYMBOLS), price_histories=_histories()
+        )
+
+        assert assessment.value_at_risk is not None
+        assert assessment.value_at_risk.method == 'historical'
+        assert assessment.risk_factors['value_at_risk'] == 1.0
+        assert any("VaR" in recommendation for recommendation in assessment.recommendations)
+
+    def test_assessment_prefers_tracker_monte_carlo(self):
+        """Test a warmed-up covariance tracker switches VaR to Monte Carlo"""
+        tracker = EWMACovarianceTracker.from_price_histories(_histories())
+        risk_manager = RussianMarketRiskManager(
+            volatility_tracker=tracker,
+            var_engine=PortfolioVaREngine(simulations=20_000, chunk_size=5_000, seed=3)
+        )
+        portfolio = _portfolio({'SBER': 500000, 'GAZP': 300000})
+
+        assessment = risk_manager.assess_portfolio_risk(portfolio, self._market_data(['SBER', 'GAZP']))
+
+        assert assessment.value_at_risk.method == 'monte_carlo'
+        assert set(assessment.value_at_risk.component_var) == {'SBER', 'GAZP'}
+
+    def test_assessment_without_engine(self):
+        """Test VaR is skipped when no engine is configured"""
+        risk_manager = RussianMarketRiskManager()
+        portfolio = _portfolio({'SBER': 500000})
+
+        assessment = risk_manager.assess_portfolio_risk(portfolio, self._market_data(['SBER']))
+
+        assert assessment.value_at_risk is None
+        assert 'value_at_risk' not in assessment.risk_factors